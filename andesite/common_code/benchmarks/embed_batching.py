@@ -0,0 +1,103 @@
+"""
+Compares embedding a document's chunks the way `AzureEmbedClient.post` used to (batches of 25 sent one after the
+other, each over a new HTTP client) with the `EmbedBatcher` engine, against a local embeddings stub whose response
+time grows with the tokens of the batch.
+
+Usage: python -m benchmarks.embed_batching [--chunks 2000] [--latency-ms 40] [--concurrency 1 4 8]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+from aiohttp import web
+
+from common.clients.azure_embed_client import AzureEmbedClient, InputType
+from common.clients.embed_batcher import EmbedBatchConfig, estimate_tokens
+
+DIMENSIONS = 1024
+# Time the stub spends per thousand estimated tokens, on top of the fixed latency
+SECONDS_PER_THOUSAND_TOKENS = 0.01
+
+
+def _stub_app(latency_s: float) -> web.Application:
+    async def embeddings(request: web.Request) -> web.Response:
+        payload = await request.json()
+        texts = payload["input"]
+        tokens = sum(estimate_tokens(text) for text in texts)
+        await asyncio.sleep(latency_s + tokens / 1000 * SECONDS_PER_THOUSAND_TOKENS)
+        data = [{"index": i, "object": "embedding", "embedding": [0.001] * DIMENSIONS} for i in range(len(texts))]
+        body = {"id": "stub", "object": "list", "data": data, "model": "stub", "usage": {"prompt_tokens": tokens}}
+        return web.Response(text=json.dumps(body), content_type="application/json")
+
+    app = web.Application(client_max_size=64 * 1024 * 1024)
+    app.router.add_post("/embeddings", embeddings)
+    return app
+
+
+async def _baseline(base_url: str, chunks: list[str]) -> int:
+    embeddings = []
+    for i in range(0, len(chunks), 25):
+        async with httpx.AsyncClient() as client:
+            response = await client.post(
+                f"{base_url}/embeddings?api-version=stub",
+                json={"input": chunks[i : i + 25], "input_type": str(InputType.DOCUMENT), "encoding_format": "float"},
+                timeout=300,
+            )
+            response.raise_for_status()
+            embeddings.extend(response.json()["data"])
+    return len(embeddings)
+
+
+async def _batched(base_url: str, chunks: list[str], max_concurrent_batches: int) -> int:
+    client = AzureEmbedClient(EmbedBatchConfig(max_concurrent_batches=max_concurrent_batches))
+    client.base_url = base_url
+    client.api_version = "stub"
+    client.headers = {"Content-Type": "application/json"}
+    embeddings = await client.embed_passages(chunks)
+    return len(embeddings)
+
+
+async def _run(chunk_count: int, latency_ms: int, concurrency: list[int]):
+    runner = web.AppRunner(_stub_app(latency_ms / 1000))
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]  # type: ignore[union-attr]
+    base_url = f"http://127.0.0.1:{port}"
+
+    # chunks of roughly 100 to 400 tokens, like a chunked document
+    chunks = [f"chunk {i} " + "lorem ipsum dolor sit amet " * (15 + i % 45) for i in range(chunk_count)]
+    tokens = sum(estimate_tokens(chunk) for chunk in chunks)
+    print(f"{chunk_count} chunks (~{tokens} tokens), {latency_ms}ms per request")
+
+    try:
+        start = time.perf_counter()
+        count = await _baseline(base_url, chunks)
+        elapsed = time.perf_counter() - start
+        print(f"  25 per batch, sequential:       {elapsed:7.2f}s ({count / elapsed:8.0f} chunks/s)")
+        for max_concurrent_batches in concurrency:
+            start = time.perf_counter()
+            count = await _batched(base_url, chunks, max_concurrent_batches)
+            elapsed = time.perf_counter() - start
+            print(
+                f"  token batches, {max_concurrent_batches:2d} concurrent: "
+                f"{elapsed:7.2f}s ({count / elapsed:8.0f} chunks/s)"
+            )
+    finally:
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--latency-ms", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    args = parser.parse_args()
+    asyncio.run(_run(args.chunks, args.latency_ms, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
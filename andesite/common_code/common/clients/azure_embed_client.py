@@ -8,8 +8,8 @@ Classes:
 Functions:
     make_batches(data) -> Generator[list[str]]
     post(data) -> list[list[float]]
-    embed_passages(texts) -> list[list[float]]
-    embed_query(text) -> list[list[float]]
+    embed_passages(texts) -> NDArray[float32]
+    embed_query(text) -> NDArray[float32]
 
 Usage Example:
     embed_model = AzureEmbedClient()
@@ -28,10 +28,13 @@ from enum import Enum
 from typing import Any, ClassVar, final
 
 import httpx
+import numpy as np
+import numpy.typing as npt
 from opentelemetry import trace
 from pydantic import BaseModel, SecretStr
-from rich.progress import BarColumn, Progress, TaskProgressColumn, TextColumn, TimeRemainingColumn
 
+from common.clients.embed_batcher import EmbedBatchConfig, EmbedBatcher
+from common.clients.embed_cache import EmbedCache, EmbedCacheConfig
 from common.jsonlogging.jsonlogger import Logging
 
 logger = Logging.get_logger(__name__)()
@@ -83,9 +86,19 @@ class AzureEmbedClient:
     _model: AzureEmbedModelParams | None = None
     _instance: ClassVar["AzureEmbedClient | None"] = None
 
+    def __init__(
+        self, batch_config: EmbedBatchConfig | None = None, cache_config: EmbedCacheConfig | None = None
+    ) -> None:
+        self._batcher = EmbedBatcher(batch_config or EmbedBatchConfig())
+        self._cache = EmbedCache(cache_config)
+
     @classmethod
     async def initialize(
-        cls, config: AzureConfig, model: AzureEmbedModelParams = AzureEmbedModelParams.COHERE_EMBED3
+        cls,
+        config: AzureConfig,
+        model: AzureEmbedModelParams = AzureEmbedModelParams.COHERE_EMBED3,
+        batch_config: EmbedBatchConfig | None = None,
+        cache_config: EmbedCacheConfig | None = None,
     ) -> None:
         if cls._instance:
             logger.warning("AzureEmbedClient is already initialized. Use get_client method")
@@ -99,7 +112,7 @@ class AzureEmbedClient:
         }
         cls.api_version = config.api_version
         cls._model = model
-        cls._instance = cls()
+        cls._instance = cls(batch_config, cache_config)
 
     @classmethod
     def get_client(cls) -> "AzureEmbedClient":
@@ -122,6 +135,23 @@ class AzureEmbedClient:
         for i in range(0, len(data), batch_size):
             yield data[i : i + batch_size]
 
+    async def _post_batch(
+        self, client: httpx.AsyncClient, batch: list[str], input_type: InputType
+    ) -> list[dict[str, Any]]:
+        payload = {
+            "input": batch,
+            "input_type": str(input_type),
+            "encoding_format": "float",
+        }
+        response = await client.post(
+            url=f"{self.base_url}/embeddings?api-version={self.api_version}",
+            headers=self.headers,
+            json=payload,
+        )
+        _ = response.raise_for_status()
+        validated_response: AzureHTTPResponse = AzureHTTPResponse.model_validate_json(response.content)
+        return sorted(validated_response.data, key=lambda item: item.get("index", 0))
+
     async def post(
         self,
         data: list[str] | str,
@@ -129,69 +159,43 @@ class AzureEmbedClient:
     ) -> list[dict[str, Any]]:
         """HTTP Post request for embedding endpoint.
 
+        Long inputs are sent in concurrent batches over a pooled client, see `EmbedBatcher`.
+
         Args:
             data (list[str] | str): Individual query or list of docs to embed.
             input_type (InputType): Enum to register input as query, text, or document.
 
         Returns:
-            list[list[float]] : List of embeddings from text.
+            list[dict[str, Any]] : Embedding items from the response, one per input and in input order.
 
         """
-        batch_threshold = 25
-        if isinstance(data, list) and len(data) > batch_threshold:
-            batches = list(self.make_batches(data=data, batch_size=batch_threshold))
-            responses: list[dict[str, Any]] = []
-            total_batches = len(batches)
-            with Progress(
-                TextColumn("[bold blue]{task.description}"),
-                BarColumn(),
-                TaskProgressColumn(),
-                TimeRemainingColumn(),
-            ) as progress:
-                task = progress.add_task("[green]Processing Embedding Batches", total=total_batches)
-                for idx, batch in enumerate(batches):
-                    logger.info("Processing Embedding Batch %s / %s", idx + 1, total_batches)
-                    embeds = await self.post(data=batch)
-                    if embeds:
-                        responses.extend(embeds)
-                    progress.update(
-                        task, advance=1, description=f"[green]Processing Embedding Batches ({idx + 1}/{total_batches})"
-                    )
-
-            return responses
-
-        timeout = 300
-        payload = {
-            "input": data if isinstance(data, list) else [data],
-            "input_type": str(input_type),
-            "encoding_format": "float",
-        }
+        try:
+            return await self._batcher.run(
+                data if isinstance(data, list) else [data],
+                lambda client, batch: self._post_batch(client, batch, input_type),
+            )
+        except Exception:
+            logger.exception("Unexpected Error Occured")
+            raise
+
+    async def _embed(self, texts: list[str], input_type: InputType) -> npt.NDArray[np.float32]:
+        """Embed texts not found in the embedding cache, identical texts are only embedded once."""
+
+        async def embed_misses(misses: list[str]) -> list[list[float]]:
+            response = await self.post(data=misses, input_type=input_type)
+            return [x["embedding"] for x in response]
+
+        model = self._model.name.lower() if self._model else str(self.base_url)
+        return await self._cache.embed(model, str(input_type), texts, embed_misses)
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
-                    url=f"{self.base_url}/embeddings?api-version={self.api_version}",
-                    headers=self.headers,
-                    json=payload,
-                    timeout=timeout,
-                )
-                _ = response.raise_for_status()
-                validated_response: AzureHTTPResponse = AzureHTTPResponse.model_validate_json(response.content)
-            except Exception:
-                logger.exception("Unexpected Error Occured")
-                raise
-
-            else:
-                return validated_response.data
-
-    async def embed_passages(self, texts: list[str]) -> list[list[float]]:
+    async def embed_passages(self, texts: list[str]) -> npt.NDArray[np.float32]:
         """Embed passages or corpus.
 
         Args:
             texts (list[str]): texts being used as corpus for vectors.
 
         Returns:
-            list[list[float]]: list of embeddings.
+            NDArray[float32]: embeddings, one row per text.
 
         Raises:
             ValueError: If response is not returned or "data" isn't in response.
@@ -202,25 +206,24 @@ class AzureEmbedClient:
 
         logger.info("Encoding passages.")
         try:
-            response: list[dict[str, Any]] = await self.post(data=texts, input_type=InputType.DOCUMENT)
+            embeddings = await self._embed(texts, InputType.DOCUMENT)
         except Exception:
             logger.exception("Unexpected error occurred.")
             raise
         else:
-            if not response:
+            if len(embeddings) == 0:
                 raise ValueError
-            embeddings: list[list[float]] = [x["embedding"] for x in response]
             logger.info("Succesfully generated embedding for corpus")
             return embeddings
 
-    async def embed_query(self, text: str) -> list[list[float]]:
+    async def embed_query(self, text: str) -> npt.NDArray[np.float32]:
         """Embed query.
 
         Args:
             text (str): Text of query.
 
         Returns:
-            list[list[float]]: embedding of text query.
+            NDArray[float32]: embedding of text query, as a single row.
 
         Raises:
             ValueError: If response is not returned or "data" isn't in response.
@@ -231,14 +234,13 @@ class AzureEmbedClient:
 
         logger.info("Encoding query.")
         try:
-            response = await self.post(data=text, input_type=InputType.QUERY)
+            embeddings = await self._embed([text], InputType.QUERY)
         except Exception:
             logger.exception("Unexpected error ocurred.")
             raise
         else:
-            if not response:
+            if len(embeddings) == 0:
                 raise ValueError
-            embeddings: list[list[float]] = [x["embedding"] for x in response]
             logger.info("Succesfully generated embedding for text: %s", text)
             return embeddings
 
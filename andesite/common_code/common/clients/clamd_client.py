@@ -1,14 +1,61 @@
-import io
-
-from clamd import ClamdNetworkSocket  # type: ignore
+"""Asyncio client for clamd antivirus scans.
+
+Files are streamed to clamd with the INSTREAM command in `chunk_size` pieces, so an upload is never held in memory as
+a whole. Connections are kept in a pool of at most `pool_size` clamd sessions (IDSESSION), which lets concurrent scans
+run in parallel and reuses connections between scans. Streams are cut off at `stream_max_length`, which should match
+the clamd `StreamMaxLength` setting: clamd would otherwise drop the connection once the limit is passed.
+
+Classes:
+    ClamdConfig
+    ClamdResponse
+    ClamdClient
+"""
+
+import asyncio
+import contextlib
+import struct
+import time
+from collections.abc import AsyncIterable, AsyncIterator
+from typing import Protocol
+
+from opentelemetry import metrics
+from pydantic import Field
 from pydantic_settings import BaseSettings
-from starlette.concurrency import run_in_threadpool
+
+from common.jsonlogging.jsonlogger import Logging
+
+logger = Logging.get_logger(__name__)
+meter = metrics.get_meter(__name__)
+
+clamd_scan_duration_histogram = meter.create_histogram(
+    "clamd_scan_duration",
+    unit="s",
+    description="Time from sending a file to clamd until its verdict, by result (clean, infected or error)",
+)
+clamd_scan_size_histogram = meter.create_histogram(
+    "clamd_scan_size",
+    unit="By",
+    description="Bytes streamed to clamd per scan",
+)
+clamd_pool_wait_histogram = meter.create_histogram(
+    "clamd_pool_wait_duration",
+    unit="s",
+    description="Time a scan waited for a free clamd connection",
+)
+
+MIB = 1024 * 1024
 
 
 class ClamdConfig(BaseSettings):
     host: str = "clamav"
     port: int = 3310
     timeout: int = 600
+    pool_size: int = Field(default=4, ge=1, description="Maximum number of open clamd connections")
+    chunk_size: int = Field(default=64 * 1024, ge=1, description="Bytes sent per INSTREAM chunk")
+    stream_max_length: int = Field(default=25 * MIB, ge=1, description="clamd StreamMaxLength, 25 MiB by default")
+    idle_timeout: int = Field(
+        default=25, ge=0, description="Seconds an idle connection is reused, keep it below clamd IdleTimeout"
+    )
 
 
 class ClamdResponse(BaseSettings):
@@ -16,34 +63,192 @@ class ClamdResponse(BaseSettings):
     virus_name: str = ""
 
 
+class ClamdClientException(Exception):
+    pass
+
+
+class ClamdStreamTooLargeException(ClamdClientException):
+    pass
+
+
+class AsyncReadable(Protocol):
+    async def read(self, size: int = -1) -> bytes: ...
+
+
+class _Session:
+    """One clamd connection in IDSESSION mode, replies are prefixed with the number of the command."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.commands = 0
+        self.last_used = time.monotonic()
+
+    @classmethod
+    async def open(cls, conf: ClamdConfig) -> "_Session":
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(conf.host, conf.port), conf.timeout)
+        writer.write(b"zIDSESSION\0")
+        await writer.drain()
+        return cls(reader, writer)
+
+    def usable(self, idle_timeout: int) -> bool:
+        return not self.reader.at_eof() and not self.writer.is_closing() and (
+            time.monotonic() - self.last_used < idle_timeout
+        )
+
+    async def close(self) -> None:
+        if not self.writer.is_closing():
+            with contextlib.suppress(ConnectionError):
+                self.writer.write(b"zEND\0")
+            self.writer.close()
+        with contextlib.suppress(ConnectionError):
+            await self.writer.wait_closed()
+
+
+async def _chunks(file: bytes | AsyncIterable[bytes] | AsyncReadable, chunk_size: int) -> AsyncIterator[bytes]:
+    if isinstance(file, (bytes, bytearray, memoryview)):
+        view = memoryview(file)
+        for i in range(0, len(view), chunk_size):
+            yield bytes(view[i : i + chunk_size])
+    elif hasattr(file, "read"):
+        while chunk := await file.read(chunk_size):
+            yield chunk
+    else:
+        async for data in file:
+            view = memoryview(data)
+            for i in range(0, len(view), chunk_size):
+                yield bytes(view[i : i + chunk_size])
+
+
 class ClamdClient:
-    _client: ClamdNetworkSocket | None = None
+    """Scans files with clamd over a pool of sessions.
+
+    The pool and its semaphore are recreated when used from another event loop, as Celery tasks each run their own.
+    """
+
+    _config: ClamdConfig | None = None
+    _semaphore: asyncio.Semaphore | None = None
+    _idle: list[_Session] = []
+    _loop: asyncio.AbstractEventLoop | None = None
 
     @classmethod
     def initialize(cls, conf: ClamdConfig) -> None:
-        cls._client = ClamdNetworkSocket(host=conf.host, port=conf.port, timeout=conf.timeout)
+        cls._config = conf
+        cls._semaphore = None
+        cls._idle = []
+        cls._loop = None
 
     @classmethod
     def instance(cls) -> "ClamdClient":
         return ClamdClient()
 
     @classmethod
-    async def scan(cls, file_bytes: bytes) -> ClamdResponse:
-        if not cls._client:
-            raise Exception("ClamdClient not initialized")
+    async def close(cls) -> None:
+        idle, cls._idle = cls._idle, []
+        if cls._loop is asyncio.get_running_loop():
+            await asyncio.gather(*(session.close() for session in idle))
 
-        av_result = await run_in_threadpool(cls._client.instream, io.BytesIO(file_bytes))
-
-        if "stream" not in av_result:
-            raise Exception("Error parsing antivirus scan result")
-
-        if len(av_result["stream"]) != 2:
-            raise Exception("Invalid antivirus scan result")
+    @classmethod
+    def _get_semaphore(cls, conf: ClamdConfig) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if cls._semaphore is None or cls._loop is not loop:
+            # sessions of another loop can't be used or closed from this one, they go with their loop
+            cls._semaphore = asyncio.Semaphore(conf.pool_size)
+            cls._idle = []
+            cls._loop = loop
+        return cls._semaphore
 
-        if av_result["stream"][0] == "FOUND":
-            return ClamdResponse(is_virus=True, virus_name=av_result["stream"][1])
+    @classmethod
+    async def _acquire(cls, conf: ClamdConfig) -> _Session:
+        while cls._idle:
+            session = cls._idle.pop()
+            if session.usable(conf.idle_timeout):
+                return session
+            await session.close()
+        return await _Session.open(conf)
 
-        if av_result["stream"][0] != "OK":
-            raise Exception("Unexpected antivirus scan result")
+    @classmethod
+    async def scan(cls, file: bytes | AsyncIterable[bytes] | AsyncReadable) -> ClamdResponse:
+        """
+        Streams a file to clamd and returns its verdict.
+
+        Args:
+            file (bytes | AsyncIterable[bytes] | AsyncReadable): The file contents, an async iterator of chunks or an
+                object with an async `read(size)` such as an `UploadFile`.
+
+        Returns:
+            ClamdResponse: Whether clamd found a virus, and its name.
+
+        Raises:
+            ClamdStreamTooLargeException: If the file is larger than `stream_max_length`.
+            ClamdClientException: If the client is not initialized or clamd returns an error.
+        """
+        if not cls._config:
+            raise ClamdClientException("ClamdClient not initialized")
+        conf = cls._config
+
+        waiting = time.perf_counter()
+        async with cls._get_semaphore(conf):
+            clamd_pool_wait_histogram.record(time.perf_counter() - waiting)
+            start = time.perf_counter()
+            result = "error"
+            sent = 0
+            session: _Session | None = None
+            try:
+                session = await cls._acquire(conf)
+                session.commands += 1
+                session.writer.write(b"zINSTREAM\0")
+                async for chunk in _chunks(file, conf.chunk_size):
+                    sent += len(chunk)
+                    if sent > conf.stream_max_length:
+                        raise ClamdStreamTooLargeException(
+                            f"File exceeds the antivirus stream limit of {conf.stream_max_length} bytes"
+                        )
+                    session.writer.write(struct.pack("!L", len(chunk)) + chunk)
+                    await session.writer.drain()
+                session.writer.write(struct.pack("!L", 0))
+                await session.writer.drain()
+
+                async with asyncio.timeout(conf.timeout):
+                    reply = await session.reader.readuntil(b"\0")
+                response = cls._parse_reply(reply, session.commands)
+                result = "infected" if response.is_virus else "clean"
+                session.last_used = time.monotonic()
+                cls._idle.append(session)
+                session = None
+                return response
+            except (OSError, asyncio.IncompleteReadError, TimeoutError) as e:
+                logger().warning("Antivirus scan failed: %s", e)
+                raise ClamdClientException(f"Antivirus scan failed: {e}") from e
+            finally:
+                if session:
+                    # the connection is mid-command or broken, don't hand it out again
+                    await session.close()
+                clamd_scan_duration_histogram.record(time.perf_counter() - start, {"result": result})
+                clamd_scan_size_histogram.record(sent)
+
+    @staticmethod
+    def _parse_reply(reply: bytes, command: int) -> ClamdResponse:
+        # replies look like "1: stream: OK", "1: stream: Eicar-Signature FOUND" or "1: ... ERROR"
+        text = reply.rstrip(b"\0").decode(errors="replace")
+        prefix = f"{command}: "
+        if not text.startswith(prefix):
+            raise ClamdClientException("Error parsing antivirus scan result")
+        text = text.removeprefix(prefix)
+
+        if text.endswith("ERROR"):
+            if "size limit exceeded" in text:
+                raise ClamdStreamTooLargeException("File exceeds the clamd StreamMaxLength")
+            raise ClamdClientException(f"Antivirus scan error: {text}")
+
+        if not text.startswith("stream: "):
+            raise ClamdClientException("Invalid antivirus scan result")
+        status = text.removeprefix("stream: ")
+
+        if status.endswith(" FOUND"):
+            return ClamdResponse(is_virus=True, virus_name=status.removesuffix(" FOUND"))
+
+        if status != "OK":
+            raise ClamdClientException("Unexpected antivirus scan result")
 
         return ClamdResponse(is_virus=False)
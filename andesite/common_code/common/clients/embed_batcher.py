@@ -0,0 +1,181 @@
+"""Batch execution for embedding endpoints.
+
+This module splits the texts of one embedding call into batches bounded by both input count and estimated tokens,
+sends the batches concurrently over a pooled HTTP client, retries them on throttling and server errors, and
+reassembles the results in input order.
+
+Classes:
+    EmbedBatchConfig
+    EmbedBatcher
+
+Functions:
+    estimate_tokens(text) -> int
+    make_token_batches(texts, max_inputs, max_tokens) -> list[list[str]]
+"""
+
+import asyncio
+import math
+import random
+from collections.abc import Awaitable, Callable
+from typing import TypeVar
+
+import httpx
+from httpx import AsyncClient
+from opentelemetry import trace
+from pydantic import BaseModel, Field
+
+from common.jsonlogging.jsonlogger import Logging
+
+logger = Logging.get_logger(__name__)
+tracer = trace.get_tracer(__name__)
+
+T = TypeVar("T")
+
+# Rough characters per token for English text with BPE-style tokenizers
+CHARS_PER_TOKEN = 4
+
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+class EmbedBatchConfig(BaseModel):
+    max_batch_inputs: int = Field(default=96, ge=1, description="Most texts sent in one request")
+    max_batch_tokens: int = Field(default=16_000, ge=1, description="Most estimated tokens sent in one request")
+    max_concurrent_batches: int = Field(default=4, ge=1, description="Most requests in flight for one call")
+    max_retries: int = Field(default=5, ge=0, description="Retries of a batch on throttling or server errors")
+    backoff_base_seconds: float = Field(default=0.5, gt=0)
+    backoff_max_seconds: float = Field(default=30.0, gt=0)
+    timeout_seconds: float = Field(default=300.0, gt=0)
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the tokens of a text without loading the model's tokenizer.
+
+    Args:
+        text (str): Text to embed.
+
+    Returns:
+        int: Estimated token count, at least 1.
+
+    """
+    return max(1, math.ceil(len(text) / CHARS_PER_TOKEN))
+
+
+def make_token_batches(texts: list[str], max_inputs: int, max_tokens: int) -> list[list[str]]:
+    """Break up inputs into consecutive batches that stay within both limits.
+
+    A text estimated above `max_tokens` on its own is sent in a batch by itself, the endpoint truncates it.
+
+    Args:
+        texts (list[str]): Texts to embed.
+        max_inputs (int): Most texts per batch.
+        max_tokens (int): Most estimated tokens per batch.
+
+    Returns:
+        list[list[str]]: Batches, in input order.
+
+    """
+    batches: list[list[str]] = []
+    batch: list[str] = []
+    batch_tokens = 0
+    for text in texts:
+        tokens = estimate_tokens(text)
+        if batch and (len(batch) >= max_inputs or batch_tokens + tokens > max_tokens):
+            batches.append(batch)
+            batch, batch_tokens = [], 0
+        batch.append(text)
+        batch_tokens += tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+class EmbedBatcher:
+    """Sends the batches of an embedding call concurrently and returns one result per input, in order.
+
+    The HTTP client is kept between calls and recreated when used from another event loop, as Celery tasks each run
+    their own.
+    """
+
+    def __init__(self, config: EmbedBatchConfig):
+        self.config = config
+        self._client: AsyncClient | None = None
+        self._client_loop: asyncio.AbstractEventLoop | None = None
+
+    def _get_client(self) -> AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            self._client = AsyncClient(
+                timeout=self.config.timeout_seconds,
+                limits=httpx.Limits(
+                    max_connections=self.config.max_concurrent_batches,
+                    max_keepalive_connections=self.config.max_concurrent_batches,
+                ),
+            )
+            self._client_loop = loop
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None and self._client_loop is asyncio.get_running_loop():
+            await self._client.aclose()
+        self._client = None
+        self._client_loop = None
+
+    def _backoff(self, attempt: int, response: httpx.Response | None) -> float:
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after is not None:
+            try:
+                return min(float(retry_after), self.config.backoff_max_seconds)
+            except ValueError:
+                pass
+        delay = min(self.config.backoff_base_seconds * 2**attempt, self.config.backoff_max_seconds)
+        return random.uniform(delay / 2, delay)
+
+    async def _send_with_retry(
+        self, send: Callable[[AsyncClient, list[str]], Awaitable[list[T]]], batch: list[str]
+    ) -> list[T]:
+        attempt = 0
+        while True:
+            response: httpx.Response | None = None
+            try:
+                return await send(self._get_client(), batch)
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code not in RETRYABLE_STATUS_CODES or attempt >= self.config.max_retries:
+                    raise
+                response = e.response
+            except httpx.TransportError:
+                if attempt >= self.config.max_retries:
+                    raise
+            delay = self._backoff(attempt, response)
+            attempt += 1
+            logger().warning("Retrying embedding batch of %d texts in %.1fs (attempt %d)", len(batch), delay, attempt)
+            await asyncio.sleep(delay)
+
+    @tracer.start_as_current_span("embed_batches")
+    async def run(self, texts: list[str], send: Callable[[AsyncClient, list[str]], Awaitable[list[T]]]) -> list[T]:
+        """Embed texts in concurrent batches.
+
+        Args:
+            texts (list[str]): Texts to embed.
+            send (Callable): Posts one batch with the given client and returns one result per text of the batch.
+
+        Returns:
+            list[T]: One result per text, in input order.
+
+        Raises:
+            ValueError: If a batch returns a different number of results than it was sent texts.
+
+        """
+        batches = make_token_batches(texts, self.config.max_batch_inputs, self.config.max_batch_tokens)
+        semaphore = asyncio.Semaphore(self.config.max_concurrent_batches)
+
+        async def run_batch(index: int, batch: list[str]) -> list[T]:
+            async with semaphore:
+                results = await self._send_with_retry(send, batch)
+            if len(results) != len(batch):
+                raise ValueError(f"Embedding batch {index} returned {len(results)} results for {len(batch)} texts")
+            logger().debug("Embedded batch %d / %d", index + 1, len(batches))
+            return results
+
+        # gather keeps the order of the batches, whatever order they complete in
+        batch_results = await asyncio.gather(*(run_batch(index, batch) for index, batch in enumerate(batches)))
+        return [result for results in batch_results for result in results]
@@ -0,0 +1,209 @@
+"""Content-addressed cache of embeddings.
+
+This module keeps embeddings keyed on (model, input type, sha256 of the text) in Redis and, optionally, in a local
+SQLite file, so texts embedded before (re-processed documents, repeated prompts) are not sent to the embedding
+endpoint again. Vectors are stored packed as float16, which halves their size; cached vectors are therefore rounded
+to float16 precision. Embeddings are returned as float32 NumPy arrays, one row per text.
+
+Classes:
+    EmbedCacheConfig
+    EmbedCache
+
+Functions:
+    pack_vector(vector) -> bytes
+    unpack_vector(data) -> NDArray[float32]
+"""
+
+import asyncio
+import hashlib
+import sqlite3
+import threading
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+import numpy as np
+import numpy.typing as npt
+from opentelemetry import metrics, trace
+from pydantic import BaseModel, Field
+from redis.asyncio import Redis as AsyncRedis
+from redis.exceptions import RedisError
+
+from common.clients.redis_client import RedisClient, RedisClientException
+from common.jsonlogging.jsonlogger import Logging
+
+logger = Logging.get_logger(__name__)
+tracer = trace.get_tracer(__name__)
+meter = metrics.get_meter(__name__)
+
+embed_cache_lookups_counter = meter.create_counter(
+    "embedding_cache_lookups",
+    unit="1",
+    description="Embedding cache lookups of unique texts, by tier that answered (disk, redis or miss)",
+)
+embed_cache_deduplicated_counter = meter.create_counter(
+    "embedding_cache_deduplicated",
+    unit="1",
+    description="Texts not sent for embedding because an identical text was in the same batch",
+)
+
+
+class EmbedCacheConfig(BaseModel):
+    enabled: bool = True
+    redis_ttl_seconds: int = Field(default=30 * 24 * 3600, ge=1, description="How long embeddings stay in Redis")
+    disk_path: str | None = Field(default=None, description="SQLite file for a local tier, none when unset")
+    key_prefix: str = "embedding"
+
+
+def pack_vector(vector: npt.ArrayLike) -> bytes:
+    return np.asarray(vector, dtype="<f2").tobytes()
+
+
+def unpack_vector(data: bytes) -> npt.NDArray[np.float32]:
+    return np.frombuffer(data, dtype="<f2").astype(np.float32)
+
+
+class _DiskTier:
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB)")
+
+    def get_many(self, keys: list[str]) -> dict[str, bytes]:
+        found: dict[str, bytes] = {}
+        with self._lock:
+            # SQLite allows at most 999 parameters per statement in older builds
+            for i in range(0, len(keys), 900):
+                chunk = keys[i : i + 900]
+                rows = self._connection.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                )
+                found.update(rows)
+        return found
+
+    def set_many(self, items: dict[str, bytes]) -> None:
+        with self._lock, self._connection:
+            self._connection.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?)", items.items())
+
+
+class EmbedCache:
+    """Looks embeddings up in the disk tier, then in Redis, and embeds only the unique texts found in neither.
+
+    Redis is taken from `RedisClient` when it is initialized; without it, and without a disk tier, every text is
+    embedded but identical texts of a batch are still sent once. A failing tier is treated as a miss.
+    """
+
+    def __init__(self, config: EmbedCacheConfig | None = None, redis: AsyncRedis | None = None):
+        self.config = config or EmbedCacheConfig()
+        self._redis = redis
+        self._disk: _DiskTier | None = None
+        if self.config.enabled and self.config.disk_path:
+            try:
+                self._disk = _DiskTier(self.config.disk_path)
+            except sqlite3.Error as e:
+                logger().warning("Embedding cache disk tier %s is unusable: %s", self.config.disk_path, e)
+
+    def _get_redis(self) -> AsyncRedis | None:
+        if self._redis is not None:
+            return self._redis
+        try:
+            return RedisClient.get_client()
+        except RedisClientException:
+            return None
+
+    def key(self, model: str, input_type: str, text: str) -> str:
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{self.config.key_prefix}:{model}:{input_type}:{digest}"
+
+    async def _get_many(self, keys: list[str]) -> dict[str, npt.NDArray[np.float32]]:
+        found: dict[str, bytes] = {}
+        if self._disk is not None:
+            try:
+                found = await asyncio.to_thread(self._disk.get_many, keys)
+            except sqlite3.Error as e:
+                logger().warning("Embedding cache lookup on disk failed: %s", e)
+            embed_cache_lookups_counter.add(len(found), {"tier": "disk"})
+
+        missing = [key for key in keys if key not in found]
+        redis = self._get_redis()
+        if missing and redis is not None:
+            try:
+                values = await redis.mget(missing)
+            except RedisError as e:
+                logger().warning("Embedding cache lookup in Redis failed: %s", e)
+                values = [None] * len(missing)
+            from_redis = {key: value for key, value in zip(missing, values, strict=True) if value is not None}
+            embed_cache_lookups_counter.add(len(from_redis), {"tier": "redis"})
+            if from_redis:
+                await self._set_disk(from_redis)
+            found.update(from_redis)
+
+        embed_cache_lookups_counter.add(len(keys) - len(found), {"tier": "miss"})
+        return {key: unpack_vector(value) for key, value in found.items()}
+
+    async def _set_disk(self, items: dict[str, bytes]) -> None:
+        if self._disk is None:
+            return
+        try:
+            await asyncio.to_thread(self._disk.set_many, items)
+        except sqlite3.Error as e:
+            logger().warning("Embedding cache write to disk failed: %s", e)
+
+    async def _set_many(self, items: dict[str, bytes]) -> None:
+        await self._set_disk(items)
+        redis = self._get_redis()
+        if redis is not None:
+            try:
+                async with redis.pipeline(transaction=False) as pipeline:
+                    for key, value in items.items():
+                        pipeline.set(key, value, ex=self.config.redis_ttl_seconds)
+                    await pipeline.execute()
+            except RedisError as e:
+                logger().warning("Embedding cache write to Redis failed: %s", e)
+
+    @tracer.start_as_current_span("embed_with_cache")
+    async def embed(
+        self,
+        model: str,
+        input_type: str,
+        texts: list[str],
+        embed_fn: Callable[[list[str]], Awaitable[list[list[float]] | npt.NDArray[np.floating]]],
+    ) -> npt.NDArray[np.float32]:
+        """Embed texts, sending only the unique texts that are not cached to `embed_fn`.
+
+        Args:
+            model (str): Identifies the embedding model, so models never share vectors.
+            input_type (str): How the texts are embedded, such as document or query.
+            texts (list[str]): Texts to embed.
+            embed_fn (Callable): Embeds a list of texts, one vector per text in order.
+
+        Returns:
+            NDArray[float32]: One row per text, in input order.
+
+        """
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        unique_texts = list(dict.fromkeys(texts))
+        embed_cache_deduplicated_counter.add(len(texts) - len(unique_texts))
+        if not self.config.enabled:
+            embedded = np.asarray(await embed_fn(unique_texts), dtype=np.float32)
+            rows = {text: row for row, text in enumerate(unique_texts)}
+            return embedded[[rows[text] for text in texts]]
+
+        keys = {text: self.key(model, input_type, text) for text in unique_texts}
+        cached = await self._get_many(list(keys.values()))
+        vectors = {text: cached[key] for text, key in keys.items() if key in cached}
+
+        misses = [text for text in unique_texts if text not in vectors]
+        if misses:
+            embedded = np.asarray(await embed_fn(misses), dtype=np.float32)
+            if len(embedded) != len(misses):
+                raise ValueError(f"Embedding returned {len(embedded)} vectors for {len(misses)} texts")
+            vectors.update(zip(misses, embedded, strict=True))
+            await self._set_many(
+                {keys[text]: pack_vector(vector) for text, vector in zip(misses, embedded, strict=True)}
+            )
+
+        return np.stack([vectors[text] for text in texts])
@@ -1,5 +1,7 @@
 from abc import ABCMeta, abstractmethod
 
+import numpy as np
+import numpy.typing as npt
 from pydantic import BaseModel
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -29,27 +31,27 @@ class EmbedModel(metaclass=ABCMeta):
         pass
 
     @abstractmethod
-    async def embed_passages(self, texts: list[str]) -> list[list[float]] | None:
+    async def embed_passages(self, texts: list[str]) -> npt.NDArray[np.float32] | None:
         """Embed passages or corpus.
 
         Args:
             texts (list[str]): texts being used as corpus for vectors.
 
         Returns:
-            list[list[float]] | None: list of embeddings.
+            NDArray[float32] | None: embeddings, one row per text.
 
         """
         pass
 
     @abstractmethod
-    async def embed_query(self, text: str) -> list[list[float]] | None:
+    async def embed_query(self, text: str) -> npt.NDArray[np.float32] | None:
         """Embed query.
 
         Args:
             text (str): Text of query.
 
         Returns:
-            list[list[float]]: embedding of text query.
+            NDArray[float32]: embedding of text query, as a single row.
 
         """
         pass
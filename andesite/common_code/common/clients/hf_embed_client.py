@@ -9,8 +9,8 @@ Classes:
 Functions:
     make_batches(data) -> Generator[list[str]]
     post(data) -> list[list[float]]
-    embed_passages(texts) -> list[list[float]]
-    embed_query(text) -> list[list[float]]
+    embed_passages(texts) -> NDArray[float32]
+    embed_query(text) -> NDArray[float32]
 
 Usage Example:
     embed_model = HFEmbedClient()
@@ -28,8 +28,12 @@ from collections.abc import Generator
 from typing import final
 
 import httpx
+import numpy as np
+import numpy.typing as npt
 from opentelemetry import trace
 
+from common.clients.embed_batcher import EmbedBatchConfig, EmbedBatcher
+from common.clients.embed_cache import EmbedCache, EmbedCacheConfig
 from common.clients.embed_client import EmbedClientConfig, EmbedModel, EmbedModelConfig
 from common.jsonlogging.jsonlogger import Logging
 
@@ -45,10 +49,17 @@ class HFConfig(EmbedModelConfig):
 class HFEmbedClient(EmbedModel):
     """Embedding model with embedding functionality."""
 
-    def __init__(self, config: HFConfig) -> None:
+    def __init__(
+        self,
+        config: HFConfig,
+        batch_config: EmbedBatchConfig | None = None,
+        cache_config: EmbedCacheConfig | None = None,
+    ) -> None:
         self.config: HFConfig = config
         self.url: str = config.hf.url
         self.headers: dict[str, str] = {"Content-Type": "application/json"}
+        self._batcher = EmbedBatcher(batch_config or EmbedBatchConfig())
+        self._cache = EmbedCache(cache_config)
 
     @staticmethod
     def make_batches(data: list[str], batch_size: int) -> Generator[list[str]]:
@@ -65,9 +76,17 @@ class HFEmbedClient(EmbedModel):
         for i in range(0, len(data), batch_size):
             yield data[i : i + batch_size]
 
+    async def _post_batch(self, client: httpx.AsyncClient, batch: list[str]) -> list[list[float]]:
+        response = await client.post(url=self.url, headers=self.headers, json={"inputs": batch})
+        _ = response.raise_for_status()
+        return response.json()
+
     async def post(self, data: list[str] | str) -> list[list[float]] | None:
         """HTTP Post request for embedding endpoint.
 
+        Inputs are sent in concurrent batches over a pooled client, see `EmbedBatcher`. A single query is sent as a
+        one-item list, so the response always holds one embedding per input.
+
         Args:
             data (list[str] | str): Individual query or list of docs to embed.
 
@@ -75,70 +94,57 @@ class HFEmbedClient(EmbedModel):
             list[list[float]] : List of embeddings from text.
 
         """
-        batch_threshold = 25
-        if isinstance(data, list) and len(data) > batch_threshold:
-            batches = list(self.make_batches(data=data, batch_size=batch_threshold))
-            responses: list[list[float]] = []
-            total_batches = len(batches)
-            for idx, batch in enumerate(batches):
-                logger().info("Processing Embedding Batch %s / %s", idx + 1, total_batches)
-                embeds = await self.post(data=batch)
-                if embeds:
-                    responses.extend(embeds)
-            return responses
-
-        timeout = 300
-        json_data = {"inputs": data}
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
-                    url=self.url,
-                    headers=self.headers,
-                    json=json_data,
-                    timeout=timeout,
-                )
-                _ = response.raise_for_status()
-            except Exception:
-                logger().exception("Unexpected Error Occured")
-
-            else:
-                return response.json()
+        try:
+            return await self._batcher.run(data if isinstance(data, list) else [data], self._post_batch)
+        except Exception:
+            logger().exception("Unexpected Error Occured")
         return None
 
-    async def embed_passages(self, texts: list[str]) -> list[list[float]] | None:
+    async def _embed(self, texts: list[str], input_type: str) -> npt.NDArray[np.float32]:
+        """Embed texts not found in the embedding cache, identical texts are only embedded once."""
+
+        async def embed_misses(misses: list[str]) -> list[list[float]]:
+            embeddings = await self.post(data=misses)
+            if embeddings is None:
+                raise ValueError("Embedding request failed")
+            return embeddings
+
+        return await self._cache.embed(self.url, input_type, texts, embed_misses)
+
+    async def embed_passages(self, texts: list[str]) -> npt.NDArray[np.float32] | None:
         """Embed passages or corpus.
 
         Args:
             texts (list[str]): texts being used as corpus for vectors.
 
         Returns:
-            list[list[float]] | None: list of embeddings.
+            NDArray[float32] | None: embeddings, one row per text.
 
         """
         logger().info("Encoding passages.")
         try:
-            response = await self.post(data=texts)
+            response = await self._embed(texts, "document")
         except Exception:
             logger().exception("Unexpected error occurred.")
             return None
         else:
             return response
 
-    async def embed_query(self, text: str) -> list[list[float]] | None:
+    async def embed_query(self, text: str) -> npt.NDArray[np.float32] | None:
         """Embed query.
 
         Args:
             text (str): Text of query.
 
         Returns:
-            list[list[float]]: embedding of text query.
+            NDArray[float32]: embedding of text query, as a single row.
 
         """
         logger().info("Encoding query.")
         query_prompt = "Represent this sentence for searching relevant passages:"
         query = query_prompt + text
         try:
-            response = await self.post(data=query)
+            response = await self._embed([query], "query")
         except Exception:
             logger().exception("Unexpected error ocurred.")
             return None
@@ -12,6 +12,7 @@ Functions:
     create_collection(collection_name, vec_size, distance_method)
     add_vectors(collection_name, embeddings)
     query_vectors(collection_name, embedding, limit) -> list[ScoredPoint]
+    search_many(collection_name, embeddings, limit) -> list[list[dict]]
     is_collection_new(collection_name) -> bool
     is_collection_empty(collection_name, collection_count) -> bool
     list_collections() -> list[str]
@@ -21,7 +22,7 @@ Functions:
 """
 
 import dotenv
-from pydantic import BaseModel, SecretStr
+from pydantic import BaseModel, Field, SecretStr
 
 
 # This is put here bc pymilvus runs load_dotenv at init and breaks processor and backend with Assert Error
@@ -32,10 +33,15 @@ def noop(*args, **kwargs):
 
 dotenv.load_dotenv = noop
 
+import asyncio
+import json
+import time
 from typing import TYPE_CHECKING, Any, final
 
+import numpy as np
+import numpy.typing as npt
 from opentelemetry import trace
-from pymilvus import AsyncMilvusClient, MilvusClient  # type: ignore[import-untyped]
+from pymilvus import AsyncMilvusClient, DataType, MilvusClient  # type: ignore[import-untyped]
 from pymilvus.orm.connections import connections  # type: ignore[import-untyped]
 
 from common.jsonlogging.jsonlogger import Logging
@@ -48,6 +54,7 @@ from common.clients.vdb_client import (
     Distance,
     EmbedDict,
     IndexMethod,
+    Quantization,
     VecDBClientError,
 )
 
@@ -58,6 +65,43 @@ tracer: trace.Tracer = trace.get_tracer(__name__)
 class MilvusConfig(BaseModel):
     vecdb_milvus_url: str
     vecdb_milvus_token: SecretStr
+    insert_batch_bytes: int = Field(default=8 * 1024 * 1024, ge=1, description="Most estimated bytes per write")
+    max_concurrent_inserts: int = Field(default=4, ge=1, description="Most writes in flight for one add_vectors")
+    index_cache_ttl_seconds: float = Field(default=300.0, ge=0, description="How long index details are reused")
+
+
+def _estimate_point_bytes(point: dict[str, Any]) -> int:
+    """Rough serialized size of a point, float32 vector plus its fields as text."""
+    size = 0
+    for key, value in point.items():
+        size += len(key) + (4 * len(value) if key == "vector" else len(str(value)))
+    return size
+
+
+def _make_byte_batches(points: list[dict[str, Any]], max_bytes: int) -> list[list[dict[str, Any]]]:
+    batches: list[list[dict[str, Any]]] = []
+    batch: list[dict[str, Any]] = []
+    batch_bytes = 0
+    for point in points:
+        point_bytes = _estimate_point_bytes(point)
+        if batch and batch_bytes + point_bytes > max_bytes:
+            batches.append(batch)
+            batch, batch_bytes = [], 0
+        batch.append(point)
+        batch_bytes += point_bytes
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def _pq_subvectors(vec_size: int) -> int:
+    """Subvectors of an IVF_PQ index, about 8 dimensions each and a divisor of the dimension as Milvus requires."""
+    return next(m for m in range(max(vec_size // 8, 1), 0, -1) if vec_size % m == 0)
+
+
+def _partition_expression(partition_filter: dict[str, str | int]) -> str:
+    # json.dumps quotes and escapes strings the way Milvus expressions expect
+    return " and ".join(f"{key} == {json.dumps(value)}" for key, value in partition_filter.items())
 
 
 @final
@@ -66,8 +110,13 @@ class MilvusVecDBClient:
 
     async_client: AsyncMilvusClient | None = None
     sync_client: MilvusClient | None = None
+    config: MilvusConfig | None = None
     _client: "MilvusVecDBClient | None" = None
 
+    def __init__(self) -> None:
+        # collection name -> (monotonic time fetched, index details)
+        self._index_details: dict[str, tuple[float, dict[str, Any]]] = {}
+
     @classmethod
     async def initialize(cls, config: MilvusConfig) -> None:
         """Initialize sync and async pymilvus clients.
@@ -92,6 +141,7 @@ class MilvusVecDBClient:
             uri=config.vecdb_milvus_url,
             token=config.vecdb_milvus_token.get_secret_value(),
         )
+        cls.config = config
         cls._client = cls()
 
     @classmethod
@@ -120,14 +170,24 @@ class MilvusVecDBClient:
         vec_size: int,
         distance_method: Distance = Distance.COSINE,
         index_method: IndexMethod = IndexMethod.HNSW,
+        partition_key: str | None = None,
+        num_partitions: int | None = None,
+        quantization: Quantization = Quantization.NONE,
     ) -> bool:
         """Create a Milvus collection, if not existant.
 
+        With a `partition_key`, the collection is hashed into partitions on that payload field, and searches filtered
+        on it (see `search_many`) only scan the partitions that can match. Use it for tenant-scoped collections.
+
         Args:
             collection_name (str): Name of collection.
             vec_size (int): Dimension of vector; e.g., 1024.
             distance_method (Distance, enum): Method to be used for retrieval.
             index_method: (IndexMethod, enum): Method used for indexing collection.
+            partition_key (str, optional): String payload field to partition the collection on.
+            num_partitions (int, optional): Partitions to hash the key into, Milvus' default when unset.
+            quantization (Quantization): INT8 builds an IVF_SQ8 index and PQ an IVF_PQ index in place of
+                `index_method`, FLOAT16 isn't supported.
 
         Returns:
             bool: True if collection was successfully created, false if collection already exists.
@@ -157,21 +217,56 @@ class MilvusVecDBClient:
         if self.sync_client and self.async_client:
             index_params: IndexParams = self.sync_client.prepare_index_params()
 
-            index_params.add_index(field_name="vector", metric_type=distance, index_type=str(index_method))
+            match quantization:
+                case Quantization.INT8:
+                    index_params.add_index(
+                        field_name="vector",
+                        metric_type=distance,
+                        index_type=str(IndexMethod.IVF_SQ8),
+                        params={"nlist": 1024},
+                    )
+                case Quantization.PQ:
+                    index_params.add_index(
+                        field_name="vector",
+                        metric_type=distance,
+                        index_type=str(IndexMethod.IVF_PQ),
+                        params={"nlist": 1024, "m": _pq_subvectors(vec_size), "nbits": 8},
+                    )
+                case Quantization.FLOAT16:
+                    raise VecDBClientError("Milvus collections can't use float16 quantization, use int8 or pq")
+                case _:
+                    index_params.add_index(field_name="vector", metric_type=distance, index_type=str(index_method))
 
             try:
-                _ = await self.async_client.create_collection(
-                    collection_name=collection_name,
-                    dimension=vec_size,
-                    metric_type=distance,
-                    index_params=index_params,
-                )
+                if partition_key:
+                    # The quick setup schema, id and vector with dynamic payload fields, plus the partition key
+                    schema = self.sync_client.create_schema(auto_id=False, enable_dynamic_field=True)
+                    schema.add_field(field_name="id", datatype=DataType.INT64, is_primary=True)
+                    schema.add_field(field_name="vector", datatype=DataType.FLOAT_VECTOR, dim=vec_size)
+                    schema.add_field(
+                        field_name=partition_key, datatype=DataType.VARCHAR, max_length=512, is_partition_key=True
+                    )
+                    partition_kwargs = {"num_partitions": num_partitions} if num_partitions else {}
+                    _ = await self.async_client.create_collection(
+                        collection_name=collection_name,
+                        schema=schema,
+                        index_params=index_params,
+                        **partition_kwargs,
+                    )
+                else:
+                    _ = await self.async_client.create_collection(
+                        collection_name=collection_name,
+                        dimension=vec_size,
+                        metric_type=distance,
+                        index_params=index_params,
+                    )
 
             except Exception as e:
                 logger.exception("Error when creating collection %s", collection_name)
                 raise VecDBClientError(f"Error encountered when creating new collection: {e!s}") from e
 
             else:
+                self._index_details.pop(collection_name, None)
                 logger.info(
                     "Milvus Collection for %s was successfully created.",
                     collection_name,
@@ -184,6 +279,9 @@ class MilvusVecDBClient:
     async def add_vectors(self, collection_name: str, embeddings: list[EmbedDict]) -> bool:
         """Add vectors to collection.
 
+        Points are upserted in batches of at most `MilvusConfig.insert_batch_bytes` estimated bytes, with up to
+        `MilvusConfig.max_concurrent_inserts` batches in flight, so large documents stay under the gRPC message limit.
+
         Args:
             collection_name (str): Name of collection for vector upload.
             embeddings (list[EmbedDict]): dict with embedding and payload.
@@ -195,25 +293,31 @@ class MilvusVecDBClient:
             VecDBClientError: If error encountered during validation.
 
         """
-        points = []
-        for idx, embedding in enumerate(embeddings):
-            try:
-                point: dict[str, int | list[float] | str | float] = {"id": idx, "vector": embedding["embedding"]}
-                for k, v in embedding["payload"].items():
-                    point[k] = v
-
-            except Exception as e:
-                logger.exception("Point validation unsuccessful")
-                raise VecDBClientError("Error encountered validating points for vectors") from e
-            else:
-                points.append(point)
+        try:
+            points: list[dict[str, Any]] = [
+                {"id": idx, "vector": np.asarray(embedding["embedding"], dtype=np.float32), **embedding["payload"]}
+                for idx, embedding in enumerate(embeddings)
+            ]
+        except Exception as e:
+            logger.exception("Point validation unsuccessful")
+            raise VecDBClientError("Error encountered validating points for vectors") from e
+
+        if self.sync_client and self.async_client and self.config:
+            async_client = self.async_client
+            config = self.config
+            semaphore = asyncio.Semaphore(config.max_concurrent_inserts)
+
+            async def upsert_batch(batch: list[dict[str, Any]]) -> int:
+                async with semaphore:
+                    operation_info: dict[str, Any] = await async_client.upsert(
+                        collection_name=collection_name,
+                        data=batch,
+                    )
+                return operation_info["upsert_count"]
 
-        if self.sync_client and self.async_client:
             try:
-                operation_info: dict[str, Any] = await self.async_client.upsert(
-                    collection_name=collection_name,
-                    data=points,
-                )
+                batches = _make_byte_batches(points, config.insert_batch_bytes)
+                upsert_counts = await asyncio.gather(*(upsert_batch(batch) for batch in batches))
 
             except Exception as e:
                 logger.exception("Error in adding vectors to %s collection", collection_name)
@@ -222,72 +326,104 @@ class MilvusVecDBClient:
             else:
                 ct_embeddings: int = len(points)
 
-                if operation_info["upsert_count"] != ct_embeddings:
+                if sum(upsert_counts) != ct_embeddings:
                     return False
 
                 logger.info(
-                    "Successfully uploaded %s vectors to collection %s",
+                    "Successfully uploaded %s vectors to collection %s in %s batches",
                     ct_embeddings,
                     collection_name,
+                    len(batches),
                 )
 
                 return True
         else:
             raise VecDBClientError("Milvus client is not initialized")
 
-    async def query_vectors(
+    async def _get_index_details(self, collection_name: str) -> dict[str, Any]:
+        """Describe the collection's index, reusing the result for `MilvusConfig.index_cache_ttl_seconds`."""
+        if not self.sync_client or not self.config:
+            raise VecDBClientError("Milvus client is not initialized")
+
+        cached = self._index_details.get(collection_name)
+        if cached and time.monotonic() - cached[0] < self.config.index_cache_ttl_seconds:
+            return cached[1]
+
+        try:
+            list_indexes_async = async_wrap(self.sync_client.list_indexes)
+            collection_index: list[str] = await list_indexes_async(collection_name=collection_name)
+
+            # Assumes there is only one index per collection, please be careful
+            describe_index_async = async_wrap(self.sync_client.describe_index)
+            index_details: dict[str, Any] = await describe_index_async(
+                collection_name=collection_name,
+                index_name=collection_index[0],
+            )
+
+        except Exception as e:
+            logger.exception("Error encountered while getting index details in query_vectors.")
+            raise VecDBClientError("Could not get index details from collection") from e
+
+        self._index_details[collection_name] = (time.monotonic(), index_details)
+        return index_details
+
+    @tracer.start_as_current_span("search_many")
+    async def search_many(
         self,
         collection_name: str,
-        embedding: list[list[float]],
+        embeddings: list[list[float]] | npt.NDArray[np.floating],
         limit: int = 3,
         query_filter: str = "",
-    ) -> list[dict[str, Any]]:
-        """Query vectors in vec db using a query.
+        partition_filter: dict[str, str | int] | None = None,
+        search_params: dict[str, Any] | None = None,
+        output_fields: list[str] | None = None,
+    ) -> list[list[dict[str, Any]]]:
+        """Search the nearest vectors of many queries in one request.
 
         Args:
             collection_name (str): Name of collection to query.
-            embedding (list[float]): Embedding of query text.
-            limit (int): Number of top chunks to retrieve.
-            filter (str): A scalar filtering condition to filter matching entities.
+            embeddings (list[list[float]] | NDArray): Embeddings of the query texts, one per row.
+            limit (int): Number of top chunks to retrieve per query.
+            query_filter (str): A scalar filtering condition to filter matching entities.
+            partition_filter (dict[str, str | int], optional): Values the partition key must equal, so Milvus only
+                searches the partitions that hold them.
+            search_params (dict[str, Any], optional): Index search parameters, such as `{"params": {"ef": 64}}`.
+            output_fields (list[str], optional): Fields to return, all fields when unset. The vector is never
+                returned.
 
         Returns:
-            list[Any]: list of vectors with payload.
+            list[list[dict[str, Any]]]: Per query, in query order, the distance and fields of the matches.
 
         Raises:
             VecDBClientError: If index details are not available.
 
         """
         if self.sync_client and self.async_client:
-            try:
-                list_indexes_async = async_wrap(self.sync_client.list_indexes)
-                collection_index: list[str] = await list_indexes_async(collection_name=collection_name)
-
-                # Assumes there is only one index per collection, please be careful
-                describe_index_async = async_wrap(self.sync_client.describe_index)
-                index_details: dict[str, Any] = await describe_index_async(
-                    collection_name=collection_name,
-                    index_name=collection_index[0],
-                )
-
-            except Exception as e:
-                logger.exception("Error encountered while getting index details in query_vectors.")
-                raise VecDBClientError("Could not get index details from collection") from e
-            else:
-                logger.info("Querying collection %s", collection_name)
-
-                query_returns: list[list[dict[str, Any]]] = await self.async_client.search(
-                    collection_name=collection_name,
-                    anns_field="vector",
-                    data=embedding,
-                    limit=limit,
-                    search_params={"metric_type": index_details["metric_type"]},
-                    output_fields=["*"],
-                    filter=query_filter,
-                )
+            index_details = await self._get_index_details(collection_name)
+
+            if partition_filter:
+                expressions = [_partition_expression(partition_filter)]
+                if query_filter:
+                    expressions.append(f"({query_filter})")
+                query_filter = " and ".join(expressions)
+
+            logger.info("Querying collection %s", collection_name)
+
+            query_returns: list[list[dict[str, Any]]] = await self.async_client.search(
+                collection_name=collection_name,
+                anns_field="vector",
+                data=np.asarray(embeddings, dtype=np.float32),
+                limit=limit,
+                search_params={"metric_type": index_details["metric_type"], **(search_params or {})},
+                output_fields=output_fields or ["*"],
+                filter=query_filter,
+            )
 
-                # Only return relevant data
+            # Only return relevant data
+            results: list[list[dict[str, Any]]] = []
+            for hits in query_returns:
                 doc_retrieval_list: list[dict[str, Any]] = []
-                for entry in query_returns[0]:
+                for entry in hits:
                     doc_dict = {"distance": entry["distance"]}
                     for k, v in entry["entity"].items():
                         if k == "vector":
@@ -295,11 +431,37 @@ class MilvusVecDBClient:
                         doc_dict[k] = v
 
                     doc_retrieval_list.append(doc_dict)
+                results.append(doc_retrieval_list)
 
-                return doc_retrieval_list
+            return results
         else:
             raise VecDBClientError("Milvus client is not initialized")
 
+    async def query_vectors(
+        self,
+        collection_name: str,
+        embedding: list[list[float]] | npt.NDArray[np.floating],
+        limit: int = 3,
+        query_filter: str = "",
+    ) -> list[dict[str, Any]]:
+        """Query vectors in vec db using a query.
+
+        Args:
+            collection_name (str): Name of collection to query.
+            embedding (list[float]): Embedding of query text.
+            limit (int): Number of top chunks to retrieve.
+            filter (str): A scalar filtering condition to filter matching entities.
+
+        Returns:
+            list[Any]: list of vectors with payload, for the first query.
+
+        Raises:
+            VecDBClientError: If index details are not available.
+
+        """
+        results = await self.search_many(collection_name, embedding, limit=limit, query_filter=query_filter)
+        return results[0] if results else []
+
     async def list_collections(self) -> list[str] | None:
         if self.sync_client:
             list_collections_async = async_wrap(self.sync_client.list_collections)
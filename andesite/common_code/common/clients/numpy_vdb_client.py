@@ -0,0 +1,535 @@
+"""numpy_vdb_client module, an in-process vector index kept in NumPy arrays.
+
+This module contains a vector db client for small and medium collections, and a local stand-in where Milvus, Qdrant
+and pgvector aren't available. Each collection is one contiguous float32 or float16 matrix searched exactly with
+vectorized top-k, its payload is kept in one array per field for filtering.
+
+Collections are persisted, when a data directory is configured, as `.npy` files that are memory-mapped on load, so
+opening a large collection doesn't read it into memory until it is changed.
+
+Classes:
+    NumpyConfig
+    NumpyVecDBClient
+
+Functions:
+    create_collection(collection_name, vec_size, distance_method)
+    add_vectors(collection_name, embeddings)
+    query_vectors(collection_name, embedding, limit, query_filter) -> list[dict]
+    search_many(collection_name, embeddings, limit, query_filter) -> list[list[dict]]
+    delete_by_filter(collection_name, delete_filter) -> bool
+    create_snapshot(collection_name) -> bool
+    recover_from_snapshot(collection_name, filename, wait)
+    flush(collection_name)
+"""
+
+import asyncio
+import json
+import os
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any, Literal, final
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+
+import numpy as np
+import numpy.typing as npt
+from opentelemetry import trace
+from pydantic import BaseModel, Field
+
+from common.clients.vdb_client import Distance, EmbedDict, Quantization, VecDBClientError
+from common.jsonlogging.jsonlogger import Logging
+
+logger = Logging.get_logger(__name__)
+tracer = trace.get_tracer(__name__)
+
+# Rows per block when computing Manhattan distances, bounds the (rows x dimension) temporary of each block
+MANHATTAN_BLOCK_ROWS = 4_096
+
+
+class NumpyConfig(BaseModel):
+    data_dir: str | None = Field(default=None, description="Directory collections are persisted in, none when unset")
+    snapshot_dir: str | None = Field(default=None, description="Directory for snapshots, data_dir/snapshots if unset")
+    dtype: Literal["float32", "float16"] = Field(default="float32", description="Storage type of new collections")
+    search_chunk_rows: int = Field(default=65_536, ge=1, description="Rows scored at once during a search")
+
+
+class _Collection:
+    """Vectors, ids and payload columns of one collection.
+
+    The arrays are allocated with spare capacity and only the first `size` rows are live. Searches read the arrays
+    as they were when they started: appends only write past `size` or into new arrays, and deletes build new arrays.
+    """
+
+    def __init__(self, dim: int, distance: Distance, dtype: str) -> None:
+        self.dim = dim
+        self.distance = distance
+        self.dtype = np.dtype(dtype)
+        self.size = 0
+        self.next_id = 0
+        self.vectors: np.ndarray = np.empty((0, dim), dtype=self.dtype)
+        self.ids: np.ndarray = np.empty(0, dtype=np.int64)
+        self.columns: dict[str, np.ndarray] = {}
+        self.dirty = False
+
+    def view(self) -> tuple[np.ndarray, np.ndarray, dict[str, np.ndarray]]:
+        size = self.size
+        return self.vectors[:size], self.ids[:size], {name: column[:size] for name, column in self.columns.items()}
+
+    def _reserve(self, extra: int) -> None:
+        capacity = len(self.ids)
+        if self.size + extra <= capacity:
+            return
+        capacity = max(self.size + extra, 2 * capacity, 1_024)
+        vectors = np.empty((capacity, self.dim), dtype=self.dtype)
+        vectors[: self.size] = self.vectors[: self.size]
+        ids = np.empty(capacity, dtype=np.int64)
+        ids[: self.size] = self.ids[: self.size]
+        columns = {}
+        for name, column in self.columns.items():
+            columns[name] = np.full(capacity, None, dtype=object)
+            columns[name][: self.size] = column[: self.size]
+        self.vectors, self.ids, self.columns = vectors, ids, columns
+
+    def add(self, vectors: np.ndarray, payloads: list[dict[str, Any]]) -> None:
+        if vectors.ndim != 2 or vectors.shape[1] != self.dim:
+            raise VecDBClientError(f"Expected vectors of dimension {self.dim}, got shape {vectors.shape}")
+        if self.distance == Distance.COSINE:
+            vectors = _normalize(vectors)
+
+        count = len(vectors)
+        self._reserve(count)
+        start, end = self.size, self.size + count
+        self.vectors[start:end] = vectors
+        self.ids[start:end] = np.arange(self.next_id, self.next_id + count)
+
+        for name in {name for payload in payloads for name in payload}.difference(self.columns):
+            self.columns[name] = np.full(len(self.ids), None, dtype=object)
+        for name, column in self.columns.items():
+            column[start:end] = [payload.get(name) for payload in payloads]
+
+        self.size = end
+        self.next_id += count
+        self.dirty = True
+
+    def mask(self, columns: dict[str, np.ndarray], size: int, query_filter: dict[str, Any]) -> np.ndarray:
+        """Rows whose payload equals every filter value, a list of values matches any of them."""
+        mask = np.ones(size, dtype=bool)
+        for name, value in query_filter.items():
+            column = columns.get(name)
+            if column is None:
+                return np.zeros(size, dtype=bool)
+            if isinstance(value, list | tuple | set):
+                matches = np.zeros(size, dtype=bool)
+                for item in value:
+                    matches |= column == item
+                mask &= matches
+            else:
+                mask &= column == value
+        return mask
+
+    def delete(self, query_filter: dict[str, Any]) -> int:
+        vectors, ids, columns = self.view()
+        keep = ~self.mask(columns, len(ids), query_filter)
+        deleted = int(len(ids) - keep.sum())
+        if deleted:
+            self.vectors, self.ids = vectors[keep], ids[keep]
+            self.columns = {name: column[keep] for name, column in columns.items()}
+            self.size = len(self.ids)
+            self.dirty = True
+        return deleted
+
+    def _scores(self, chunk: np.ndarray, queries: np.ndarray) -> np.ndarray:
+        """Scores of (queries x rows), higher is nearer."""
+        match self.distance:
+            case Distance.COSINE | Distance.DOT:
+                return queries @ chunk.T
+            case Distance.EUCLID:
+                squared = (queries * queries).sum(axis=1)[:, None] - 2 * queries @ chunk.T
+                squared += (chunk * chunk).sum(axis=1)[None, :]
+                return -np.sqrt(np.maximum(squared, 0))
+            case _:
+                scores = np.empty((len(queries), len(chunk)), dtype=np.float32)
+                for start in range(0, len(chunk), MANHATTAN_BLOCK_ROWS):
+                    block = chunk[start : start + MANHATTAN_BLOCK_ROWS]
+                    for i, query in enumerate(queries):
+                        scores[i, start : start + len(block)] = -np.abs(block - query).sum(axis=1)
+                return scores
+
+    def search(
+        self, queries: np.ndarray, limit: int, query_filter: dict[str, Any] | None, chunk_rows: int
+    ) -> list[list[dict[str, Any]]]:
+        if queries.ndim != 2 or queries.shape[1] != self.dim:
+            raise VecDBClientError(f"Expected queries of dimension {self.dim}, got shape {queries.shape}")
+        if self.distance == Distance.COSINE:
+            queries = _normalize(queries)
+
+        vectors, ids, columns = self.view()
+        mask = self.mask(columns, len(ids), query_filter) if query_filter else None
+
+        # Keep the best `limit` rows per query across chunks, so the score matrix never exceeds one chunk
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+        best_rows = np.empty((len(queries), 0), dtype=np.int64)
+        for start in range(0, len(ids), chunk_rows):
+            chunk = vectors[start : start + chunk_rows].astype(np.float32, copy=False)
+            scores = self._scores(chunk, queries)
+            if mask is not None:
+                scores[:, ~mask[start : start + len(chunk)]] = -np.inf
+            rows = np.broadcast_to(np.arange(start, start + len(chunk)), scores.shape)
+            best_scores = np.concatenate([best_scores, scores], axis=1)
+            best_rows = np.concatenate([best_rows, rows], axis=1)
+            if best_scores.shape[1] > limit:
+                top = np.argpartition(-best_scores, limit - 1, axis=1)[:, :limit]
+                best_scores = np.take_along_axis(best_scores, top, axis=1)
+                best_rows = np.take_along_axis(best_rows, top, axis=1)
+
+        order = np.argsort(-best_scores, axis=1, kind="stable")
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+        best_rows = np.take_along_axis(best_rows, order, axis=1)
+
+        sign = 1.0 if self.distance in (Distance.COSINE, Distance.DOT) else -1.0
+        results = []
+        for scores, rows in zip(best_scores, best_rows, strict=True):
+            hits = []
+            for score, row in zip(scores, rows, strict=True):
+                if score == -np.inf:
+                    break
+                hit: dict[str, Any] = {"id": int(ids[row]), "distance": sign * float(score)}
+                for name, column in columns.items():
+                    if column[row] is not None:
+                        hit[name] = column[row]
+                hits.append(hit)
+            results.append(hits)
+        return results
+
+    def meta(self) -> dict[str, Any]:
+        return {"dim": self.dim, "distance": str(self.distance), "dtype": self.dtype.name, "next_id": self.next_id}
+
+    def payload(self) -> dict[str, list[Any]]:
+        return {name: column.tolist() for name, column in self.view()[2].items()}
+
+    @classmethod
+    def from_arrays(
+        cls, meta: dict[str, Any], vectors: np.ndarray, ids: np.ndarray, payload: dict[str, list[Any]]
+    ) -> "_Collection":
+        collection = cls(meta["dim"], Distance(meta["distance"]), meta["dtype"])
+        collection.next_id = meta["next_id"]
+        collection.vectors, collection.ids, collection.size = vectors, ids, len(ids)
+        for name, values in payload.items():
+            collection.columns[name] = np.empty(len(values), dtype=object)
+            collection.columns[name][:] = values
+        return collection
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def _write_atomic(path: Path, write) -> None:
+    tmp = path.with_name(f".{path.name}.tmp")
+    with tmp.open("wb") as f:
+        write(f)
+    os.replace(tmp, path)
+
+
+@final
+class NumpyVecDBClient:
+    """Client for an in-process vector index backed by NumPy.
+
+    Search is exact: every live row is scored. Distances follow Milvus: similarity for cosine and dot product
+    (higher is nearer), distance for Euclidean and Manhattan (lower is nearer).
+
+    Changes are written to `NumpyConfig.data_dir` by `flush` and `close`, not on every call.
+    """
+
+    _client: "NumpyVecDBClient | None" = None
+
+    def __init__(self, config: NumpyConfig | None = None) -> None:
+        self.config: NumpyConfig = config or NumpyConfig()
+        self._collections: dict[str, _Collection] = {}
+        if self.config.data_dir:
+            self._load_all(Path(self.config.data_dir))
+
+    @classmethod
+    async def initialize(cls, config: NumpyConfig) -> None:
+        """Initialize the client, loading the collections persisted in the data directory."""
+        cls._client = await asyncio.to_thread(cls, config)
+
+    @classmethod
+    def get_client(cls) -> "NumpyVecDBClient":
+        """Use as singleton client."""
+        if not cls._client:
+            raise VecDBClientError("NumpyVecDB Client not initialized")
+        return cls._client
+
+    @classmethod
+    async def close(cls) -> None:
+        """Persist changed collections and drop the singleton."""
+        if cls._client:
+            for collection_name in list(cls._client._collections):
+                await cls._client.flush(collection_name)
+            cls._client = None
+
+    def _load_all(self, data_dir: Path) -> None:
+        for meta_path in data_dir.glob("*/meta.json"):
+            directory = meta_path.parent
+            try:
+                meta = json.loads(meta_path.read_text())
+                payload = json.loads((directory / "payload.json").read_text())
+                vectors = np.load(directory / "vectors.npy", mmap_mode="r")
+                ids = np.load(directory / "ids.npy")
+            except (OSError, ValueError) as e:
+                logger().warning("Skipping unreadable collection in %s: %s", directory, e)
+                continue
+            self._collections[directory.name] = _Collection.from_arrays(meta, vectors, ids, payload)
+            logger().info("Loaded collection %s with %d vectors", directory.name, len(ids))
+
+    def _get_collection(self, collection_name: str) -> _Collection:
+        collection = self._collections.get(collection_name)
+        if collection is None:
+            raise VecDBClientError(f"Collection {collection_name} does not exist")
+        return collection
+
+    def _snapshot_dir(self) -> Path:
+        if self.config.snapshot_dir:
+            return Path(self.config.snapshot_dir)
+        if self.config.data_dir:
+            return Path(self.config.data_dir) / "snapshots"
+        raise VecDBClientError("Neither snapshot_dir nor data_dir is configured")
+
+    async def create_collection(
+        self,
+        collection_name: str,
+        vec_size: int,
+        distance_method: Distance = Distance.COSINE,
+        quantization: Quantization = Quantization.NONE,
+    ) -> bool:
+        """Create a collection, if not existant.
+
+        Args:
+            collection_name (str): Name of collection to create.
+            vec_size (int): dimension of each vector
+            distance_method (Distance): similarity metric
+            quantization (Quantization): FLOAT16 stores float16, NONE stores `NumpyConfig.dtype`.
+
+        Returns:
+            bool: True if collection was created, False if collection exists.
+
+        """
+        if collection_name in self._collections:
+            logger().error(
+                "Collection %s already exists in database. Delete collection if you would like to recreate.",
+                collection_name,
+            )
+            return False
+        if "/" in collection_name or collection_name.startswith(".") or collection_name == "snapshots":
+            raise VecDBClientError(f"Invalid collection name: {collection_name}")
+
+        match quantization:
+            case Quantization.NONE:
+                dtype = self.config.dtype
+            case Quantization.FLOAT16:
+                dtype = "float16"
+            case _:
+                raise VecDBClientError(f"Numpy collections can't use {quantization} quantization, use float16")
+        self._collections[collection_name] = _Collection(vec_size, distance_method, dtype)
+        self._collections[collection_name].dirty = True
+        logger().info("Numpy Collection for %s was successfully created.", collection_name)
+        return True
+
+    async def add_vectors(self, collection_name: str, embeddings: list[EmbedDict]) -> bool:
+        """Add vectors to collection.
+
+        Args:
+            collection_name (str): Name of collection for vector upload.
+            embeddings (list[EmbedDict]): dict with embedding and payload.
+
+        Returns:
+            bool: True if successfully added vectors.
+
+        Raises:
+            VecDBClientError: If the collection doesn't exist or the vectors don't match its dimension.
+
+        """
+        collection = self._get_collection(collection_name)
+        if not embeddings:
+            return True
+        try:
+            vectors = np.asarray([embedding["embedding"] for embedding in embeddings], dtype=np.float32)
+        except (KeyError, ValueError) as e:
+            raise VecDBClientError("Error encountered validating points for vectors") from e
+
+        collection.add(vectors, [dict(embedding["payload"]) for embedding in embeddings])
+        logger().info("Successfully uploaded %s vectors to collection %s", len(embeddings), collection_name)
+        return True
+
+    @tracer.start_as_current_span("numpy_search_many")
+    async def search_many(
+        self,
+        collection_name: str,
+        embeddings: list[list[float]] | npt.NDArray[np.floating],
+        limit: int = 3,
+        query_filter: dict[str, Any] | None = None,
+    ) -> list[list[dict[str, Any]]]:
+        """Search the nearest vectors of many queries.
+
+        Args:
+            collection_name (str): Name of collection to query.
+            embeddings (list[list[float]] | NDArray): Embeddings of the query texts, one per row.
+            limit (int): Number of top chunks to retrieve per query.
+            query_filter (dict[str, Any], optional): Payload values to match, a list matches any of its values.
+
+        Returns:
+            list[list[dict[str, Any]]]: Per query, in query order, the id, distance and payload of the matches,
+                nearest first.
+
+        Raises:
+            VecDBClientError: If the collection doesn't exist or the queries don't match its dimension.
+
+        """
+        collection = self._get_collection(collection_name)
+        if len(embeddings) == 0 or limit < 1:
+            return [[] for _ in embeddings]
+        queries = np.asarray(embeddings, dtype=np.float32)
+        chunk_rows = self.config.search_chunk_rows
+        # Large collections take a while to score, keep the event loop free meanwhile
+        return await asyncio.to_thread(collection.search, queries, limit, query_filter, chunk_rows)
+
+    async def query_vectors(
+        self,
+        collection_name: str,
+        embedding: list[list[float]] | npt.NDArray[np.floating],
+        limit: int = 3,
+        query_filter: dict[str, Any] | None = None,
+    ) -> list[dict[str, Any]]:
+        """Query vectors in vec db using a query.
+
+        Args:
+            collection_name (str): Name of collection to query.
+            embedding (list[list[float]] | NDArray): Embedding of query text.
+            limit (int): Number of top chunks to retrieve.
+            query_filter (dict[str, Any], optional): Payload values to match.
+
+        Returns:
+            list[dict[str, Any]]: list of vectors with payload, for the first query.
+
+        """
+        results = await self.search_many(collection_name, embedding, limit=limit, query_filter=query_filter)
+        return results[0] if results else []
+
+    async def list_collections(self) -> list[str] | None:
+        return sorted(self._collections)
+
+    async def collection_exists(self, collection_name: str) -> bool:
+        return collection_name in self._collections
+
+    async def num_entities(self, collection_name: str, timeout: float | None = None) -> int:
+        return self._get_collection(collection_name).size
+
+    async def delete_by_filter(self, collection_name: str, delete_filter: str) -> bool:
+        """Delete vectors from collection based on a filter.
+
+        Args:
+            collection_name (str): Name of target collection.
+            delete_filter (str): JSON object of payload values to match, e.g. '{"doc_id": "a1"}'.
+
+        Returns:
+            bool: True if successful.
+
+        Raises:
+            VecDBClientError: If the collection doesn't exist or the filter isn't a JSON object.
+
+        """
+        collection = self._get_collection(collection_name)
+        try:
+            query_filter = json.loads(delete_filter)
+        except json.JSONDecodeError as e:
+            raise VecDBClientError(f"Delete filter is not valid JSON: {delete_filter}") from e
+        if not isinstance(query_filter, dict) or not query_filter:
+            raise VecDBClientError("Delete filter must be a non-empty JSON object")
+
+        deleted = collection.delete(query_filter)
+        logger().info("Deleted %d vectors from %s using filter: %s", deleted, collection_name, delete_filter)
+        return True
+
+    async def flush(self, collection_name: str) -> None:
+        """Write a changed collection to the data directory, nothing happens without one."""
+        collection = self._get_collection(collection_name)
+        if not self.config.data_dir or not collection.dirty:
+            return
+
+        directory = Path(self.config.data_dir) / collection_name
+        vectors, ids, _ = collection.view()
+        meta, payload = collection.meta(), collection.payload()
+
+        def write() -> None:
+            directory.mkdir(parents=True, exist_ok=True)
+            _write_atomic(directory / "vectors.npy", lambda f: np.save(f, vectors))
+            _write_atomic(directory / "ids.npy", lambda f: np.save(f, ids))
+            _write_atomic(directory / "payload.json", lambda f: f.write(json.dumps(payload).encode()))
+            # meta.json is written last, a collection is only loaded once it exists
+            _write_atomic(directory / "meta.json", lambda f: f.write(json.dumps(meta).encode()))
+
+        await asyncio.to_thread(write)
+        collection.dirty = False
+        logger().info("Flushed collection %s with %d vectors", collection_name, len(ids))
+
+    async def create_snapshot(self, collection_name: str) -> bool:
+        """Write the collection to a timestamped `.npz` file in the snapshot directory.
+
+        Returns:
+            bool: True if the snapshot was written, False if not.
+
+        """
+        collection = self._get_collection(collection_name)
+        vectors, ids, _ = collection.view()
+        meta, payload = collection.meta(), collection.payload()
+        timestamp = datetime.now(UTC).strftime("%Y%m%dT%H%M%S%f")
+        path = self._snapshot_dir() / f"{collection_name}-{timestamp}.npz"
+
+        def write() -> None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            _write_atomic(
+                path,
+                lambda f: np.savez(
+                    f,
+                    vectors=vectors,
+                    ids=ids,
+                    meta=np.array(json.dumps(meta)),
+                    payload=np.array(json.dumps(payload)),
+                ),
+            )
+
+        try:
+            await asyncio.to_thread(write)
+        except OSError:
+            logger().exception("Error while creating snapshot of collection %s", collection_name)
+            return False
+        logger().info("Created snapshot %s of collection %s", path, collection_name)
+        return True
+
+    async def recover_from_snapshot(self, collection_name: str, filename: str, wait: bool = True) -> None:
+        """Replace the collection with a snapshot, from a `file://` URI or a path relative to the snapshot directory."""
+        parsed = urlparse(filename)
+        path = Path(url2pathname(parsed.path)) if parsed.scheme == "file" else Path(filename)
+        if not path.is_absolute():
+            path = self._snapshot_dir() / path
+
+        def read() -> _Collection:
+            with np.load(path, allow_pickle=False) as snapshot:
+                return _Collection.from_arrays(
+                    json.loads(str(snapshot["meta"])),
+                    snapshot["vectors"],
+                    snapshot["ids"],
+                    json.loads(str(snapshot["payload"])),
+                )
+
+        try:
+            collection = await asyncio.to_thread(read)
+        except (OSError, ValueError, KeyError) as e:
+            raise VecDBClientError(f"Could not read snapshot {path}") from e
+        collection.dirty = True
+        self._collections[collection_name] = collection
+        logger().info("Recovered collection %s from snapshot %s", collection_name, path)
+        if wait:
+            await self.flush(collection_name)
@@ -1,27 +1,91 @@
+import asyncio
 import json
 import re
-from collections.abc import Generator
+from collections.abc import Iterable, Iterator
 from typing import Annotated, Any, final
 
 import asyncpg  # type: ignore[import-untyped, import-not-found]
+import numpy as np
+import numpy.typing as npt
 from opentelemetry import trace
+from pgvector import Vector  # type: ignore [import-untyped, import-not-found]
 from pgvector.asyncpg import register_vector  # type: ignore [import-untyped, import-not-found]
 from pydantic import BaseModel, Field, field_validator
 from pydantic_core import ValidationError
 
-from common.clients.vdb_client import Distance, EmbedDict
+from common.clients.vdb_client import Distance, EmbedDict, Quantization
 from common.jsonlogging.jsonlogger import Logging
 
 logger = Logging.get_logger(__name__)
 tracer = trace.get_tracer(__name__)
 
+IDENTIFIER_PATTERN = re.compile(r"^[a-zA-Z_][a-zA-Z0-9_]*$")
+
+# Loads with at least this many rows are streamed with binary COPY instead of prepared INSERTs
+COPY_THRESHOLD = 1_000
+
+# Column type of the embedding for each supported quantization
+VECTOR_TYPES = {Quantization.NONE: "vector", Quantization.FLOAT16: "halfvec"}
+
+
+class CollectionInputs(BaseModel):
+    collection_name: str
+
+    @field_validator("collection_name", mode="before")
+    @classmethod
+    def _is_valid_identifier(cls, identifier: str):
+        """Validate SQL identifier to prevent injection.
+
+        Only allows alphanumeric characters and underscores.
+        First character must be a letter or underscore.
+
+        Args:
+            identifier (str): input for sql command.
+
+        Returns:
+            str: identifier input, if valid.
+
+        Raises:
+            ValueError: If doesn't pass validation.
+
+        """
+        if not isinstance(identifier, str) or not IDENTIFIER_PATTERN.match(identifier):
+            raise ValueError(f"Invalid collection name: {identifier}")
+        return identifier
+
+
+class CreateCollectionInputs(CollectionInputs):
+    vec_size: Annotated[int, Field(gt=0, lt=20000)]
+
+
+class QueryVectorInputs(CollectionInputs):
+    distance: Distance
+    limit: Annotated[int, Field(gt=1, lt=20)]
+
+
+class SearchVectorsInputs(CollectionInputs):
+    distance: Distance
+    limit: Annotated[int, Field(ge=1, le=1000)]
+    ef_search: Annotated[int, Field(ge=1, le=1000)] | None = None
+    probes: Annotated[int, Field(ge=1)] | None = None
+
+
+class IndexCollectionInputs(CollectionInputs):
+    distance: Distance
+
 
 @final
 class PgVector:
-    """Client for interacting with PgVector Database."""
+    """Client for interacting with PgVector Database.
+
+    Queries run on connections from an asyncpg pool, each with the pgvector codecs registered, so concurrent callers
+    don't wait on one another.
+    """
 
     def __init__(self) -> None:
-        self.conn = None
+        self.pool: asyncpg.Pool | None = None
+        # collection name -> type of its embedding column, vector or halfvec
+        self._vector_types: dict[str, str] = {}
 
     async def __aenter__(self):
         return self
@@ -36,8 +100,10 @@ class PgVector:
         database: str,
         host: str,
         port: str,
+        min_size: int = 1,
+        max_size: int = 10,
     ):
-        """Establish connection to PostgreSQL database.
+        """Create the connection pool to PostgreSQL database.
 
         Args:
             user (str): username of db
@@ -45,38 +111,55 @@ class PgVector:
             database (str): db name
             host (str): url of host, 127.0.0.1, if local
             port (str): port for db connection
+            min_size (int): connections opened up front
+            max_size (int): most connections open at once
 
         """
-        if not self.conn:
-            self.conn = await asyncpg.connect(user=user, password=password, database=database, host=host, port=port)
-            if self.conn:
-                try:
-                    await self.conn.execute("CREATE EXTENSION IF NOT EXISTS vector")
-                    await register_vector(self.conn)
-                except Exception:
-                    logger().exception("Error occured while connecting to database.")
-                    raise
-                else:
-                    logger().info("Connection to vector database successfully established.")
+        if self.pool:
+            return
+        try:
+            # the vector type must exist before the pool's connections register its codec
+            conn = await asyncpg.connect(user=user, password=password, database=database, host=host, port=port)
+            try:
+                await conn.execute("CREATE EXTENSION IF NOT EXISTS vector")
+            finally:
+                await conn.close()
+            self.pool = await asyncpg.create_pool(
+                user=user,
+                password=password,
+                database=database,
+                host=host,
+                port=port,
+                min_size=min_size,
+                max_size=max_size,
+                init=register_vector,
+            )
+        except Exception:
+            logger().exception("Error occured while connecting to database.")
+            raise
+        else:
+            logger().info("Connection to vector database successfully established.")
 
     async def close(self):
-        """Close the database connection."""
-        if self.conn:
-            await self.conn.close()
-            self.conn = None
+        """Close the connection pool."""
+        if self.pool:
+            await self.pool.close()
+            self.pool = None
+
+    def _get_pool(self) -> asyncpg.Pool:
+        if self.pool is None:
+            raise ValueError("Connection to Database not established.")
+        return self.pool
 
     async def collection_exists(self, collection_name: str) -> bool:
         """Check if named collection exists in database."""
-        if self.conn:
-            response = await self.conn.fetch(
-                "SELECT EXISTS (SELECT FROM pg_tables WHERE schemaname = 'public' AND tablename  = $1);",
-                collection_name,
-            )
-            exists: bool = response[0]["exists"]
-            if exists:
-                logger().info("Collection %s is found in database.", collection_name)
-            return exists
-        raise ValueError("Connection to database not established.")
+        exists: bool = await self._get_pool().fetchval(
+            "SELECT EXISTS (SELECT FROM pg_tables WHERE schemaname = 'public' AND tablename  = $1);",
+            collection_name,
+        )
+        if exists:
+            logger().info("Collection %s is found in database.", collection_name)
+        return exists
 
     @staticmethod
     def _is_valid_identifier(identifier: str) -> bool:
@@ -92,14 +175,14 @@ class PgVector:
             bool: True if input is valid.
 
         """
-        pattern = re.compile(r"^[a-zA-Z_][a-zA-Z0-9_]*$")
-        return bool(pattern.match(identifier))
+        return bool(IDENTIFIER_PATTERN.match(identifier))
 
     async def create_collection(
         self,
         collection_name: str,
         vec_size: int,
         distance_method: Distance,
+        quantization: Quantization = Quantization.NONE,
     ) -> bool:
         """Create a 'collection' in pgvector, if not existant.
 
@@ -107,16 +190,27 @@ class PgVector:
             collection_name (str): Name of collection to create.
             vec_size (int): dimension of each vector
             distance_method (Distance): similarity metric
+            quantization (Quantization): NONE stores `vector` (float32), FLOAT16 stores `halfvec`.
 
         Returns:
             bool: True if collection was created, False if collection exists.
 
         Raises:
-            ValueError: If db connection not created.
+            ValueError: If db connection not created, or the quantization isn't supported by pgvector.
             ValidationError: If inputs fail validation.
             DuplicateTableError: If table already exists.
 
         """
+        try:
+            _ = CreateCollectionInputs.model_validate({"collection_name": collection_name, "vec_size": vec_size})
+        except ValidationError:
+            logger().exception("create_collection inputs failed validation.")
+            raise
+
+        vector_type = VECTOR_TYPES.get(quantization)
+        if vector_type is None:
+            raise ValueError(f"pgvector doesn't support {quantization} quantization, use none or float16")
+
         if await self.collection_exists(
             collection_name=collection_name,
         ):
@@ -127,60 +221,43 @@ class PgVector:
 
         # TODO: write OVERWRITE logic
 
-        class CreateCollectionInputs(BaseModel):
-            collection_name: str
-            vec_size: Annotated[int, Field(gt=0, lt=20000)]
-
-            @field_validator("collection_name", mode="before")
-            @classmethod
-            def _is_valid_identifier(cls, identifier: str):
-                """Validate SQL identifier to prevent injection.
-
-                Only allows alphanumeric characters and underscores.
-                First character must be a letter or underscore.
-
-                Args:
-                    identifier (str): input for sql command.
-
-                Returns:
-                    str: identifier input, if valid.
-
-                Raises:
-                    ValidationError: If doesn't pass validation.
-
-                """
-                pattern = re.compile(r"^[a-zA-Z_][a-zA-Z0-9_]*$")
-                if not bool(pattern.match(identifier)):
-                    raise ValidationError("Invalid collection name: %s", collection_name)
-                return identifier
-
         try:
-            _ = CreateCollectionInputs.model_validate({})
-        except ValidationError:
-            logger().exception("create_collection inputs failed validation.")
+            response = await self._get_pool().execute(
+                f"CREATE TABLE {collection_name} "
+                f"(id bigserial PRIMARY KEY, embedding {vector_type}({vec_size}), payload json)",
+            )
+        except asyncpg.exceptions.DuplicateTableError:
+            logger().exception("Table creation unsuccesful; table %s already exists", collection_name)
             raise
-
-        if self.conn:
-            try:
-                response = await self.conn.execute(
-                    f"CREATE TABLE {collection_name} (id bigserial PRIMARY KEY, embedding vector({vec_size}), payload json)",
-                )
-            except asyncpg.exceptions.DuplicateTableError:
-                logger().exception("Table creation unsuccesful; table %s already exists", collection_name)
-                raise
-            else:
-                if response == "CREATE TABLE":
-                    logger().info("Table %s successfully created.", collection_name)
-                    return True
-                return False
         else:
-            raise ValueError("Connection to Database not established.")
+            if response == "CREATE TABLE":
+                self._vector_types[collection_name] = vector_type
+                logger().info("Table %s successfully created.", collection_name)
+                return True
+            return False
 
     @staticmethod
     def _generate_batches(lst: list[Any], batch_size: int):
         for i in range(0, len(lst), batch_size):
             yield lst[i : i + batch_size]
 
+    async def _vector_type(self, collection_name: str) -> str:
+        """Type of the collection's embedding column, looked up once per collection."""
+        if collection_name not in self._vector_types:
+            vector_type = await self._get_pool().fetchval(
+                "SELECT t.typname FROM pg_attribute a JOIN pg_type t ON t.oid = a.atttypid "
+                "WHERE a.attrelid = $1::regclass AND a.attname = 'embedding'",
+                collection_name,
+            )
+            self._vector_types[collection_name] = vector_type or "vector"
+        return self._vector_types[collection_name]
+
+    @staticmethod
+    def _to_records(embeddings: Iterable[EmbedDict]) -> Iterator[tuple[Any, str]]:
+        for embedding in embeddings:
+            # pgvector encodes float32 arrays directly, without going through Python floats
+            yield np.asarray(embedding["embedding"], dtype=np.float32), json.dumps(embedding["payload"])
+
     async def add_vectors(
         self,
         collection_name: str,
@@ -188,6 +265,9 @@ class PgVector:
     ) -> bool:
         """Add vectors to collection.
 
+        Small loads are inserted with one prepared statement, loads of `COPY_THRESHOLD` rows or more go through
+        `copy_vectors`. Rows are type checked by the asyncpg codecs as they are encoded.
+
         Args:
             collection_name (str): Name of collection for vector upload.
             embeddings (list[EmbedDict]): dict with embedding and payload.
@@ -197,70 +277,81 @@ class PgVector:
 
         Raises:
             ValueError: If db connection not established.
+            ValidationError: If the collection name is not a valid identifier.
 
         """
+        try:
+            _ = CollectionInputs.model_validate({"collection_name": collection_name})
+        except ValidationError:
+            logger().exception("Inputs for add_vectors failed type validation.")
+            raise
 
-        class AddVectorsInputs(BaseModel):
-            collection_name: str
-            embeddings: list[EmbedDict]
+        if len(embeddings) >= COPY_THRESHOLD:
+            return await self.copy_vectors(collection_name, embeddings)
 
-            @field_validator("collection_name", mode="before")
-            @classmethod
-            def _is_valid_identifier(cls, identifier: str):
-                """Validate SQL identifier to prevent injection.
+        pool = self._get_pool()
+        try:
+            await pool.executemany(
+                f"INSERT INTO {collection_name} (embedding, payload) VALUES ($1, $2)",
+                list(self._to_records(embeddings)),
+            )
+        except Exception:
+            logger().exception("Error uploading vectors.")
+            return False
+        logger().info("%d vectors successfully added to collection %s", len(embeddings), collection_name)
+        return True
+
+    @tracer.start_as_current_span("copy_vectors")
+    async def copy_vectors(
+        self,
+        collection_name: str,
+        embeddings: list[EmbedDict],
+        batch_size: int = 50_000,
+        max_concurrent_batches: int = 4,
+    ) -> bool:
+        """Bulk load vectors with binary COPY.
 
-                Only allows alphanumeric characters and underscores.
-                First character must be a letter or underscore.
+        The rows are streamed in batches of `batch_size`, each batch copied on its own pooled connection, with up to
+        `max_concurrent_batches` copies running at once. A failed batch doesn't roll back the batches already copied.
 
-                Args:
-                    identifier (str): input for sql command.
+        Args:
+            collection_name (str): Name of collection for vector upload.
+            embeddings (list[EmbedDict]): dict with embedding and payload.
+            batch_size (int): Rows per COPY.
+            max_concurrent_batches (int): Most COPYs running at once.
 
-                Returns:
-                    str: identifier input, if valid.
+        Returns:
+            bool: True if all the vectors were added, False if not.
 
-                Raises:
-                    ValidationError: If doesn't pass validation.
+        Raises:
+            ValueError: If db connection not established.
+            ValidationError: If the collection name is not a valid identifier.
 
-                """
-                pattern = re.compile(r"^[a-zA-Z_][a-zA-Z0-9_]*$")
-                if not bool(pattern.match(identifier)):
-                    raise ValidationError("Invalid collection name: %s", collection_name)
-                return identifier
+        """
+        _ = CollectionInputs.model_validate({"collection_name": collection_name})
+        pool = self._get_pool()
+        semaphore = asyncio.Semaphore(max_concurrent_batches)
+
+        async def copy_batch(batch: list[EmbedDict]) -> None:
+            async with semaphore, pool.acquire() as conn:
+                await conn.copy_records_to_table(
+                    collection_name,
+                    records=self._to_records(batch),
+                    columns=["embedding", "payload"],
+                )
 
         try:
-            _ = AddVectorsInputs.model_validate({"collection_name": collection_name, "embeddings": embeddings})
-        except ValidationError:
-            logger().exception("Inputs for add_vectors failed type validation.")
-
-        if self.conn:
-            batches: Generator[list[EmbedDict], None] = self._generate_batches(embeddings, 20)
-
-            for batch in batches:
-                embed_string = ""
-                flat_params = []
-                for i in range(len(batch)):
-                    embed_string += f"(${i * 2 + 1}, ${i * 2 + 2}), "
-                    flat_params.append(batch[i]["embedding"])
-                    flat_params.append(json.dumps(batch[i]["payload"]))
-                embed_string = embed_string[:-2]
-                try:
-                    response = await self.conn.execute(
-                        f"INSERT INTO {collection_name} (embedding, payload) VALUES {embed_string}",
-                        *flat_params,
-                    )
-                except Exception:
-                    logger().exception("Error uploading vectors.")
-                    return False
-                else:
-                    if "INSERT" in response:
-                        logger().info("Vectors successfully added to collection %s", collection_name)
-            return True
-        raise ValueError("Connection to Database not established.")
+            await asyncio.gather(*(copy_batch(batch) for batch in self._generate_batches(embeddings, batch_size)))
+        except Exception:
+            logger().exception("Error copying vectors into collection %s", collection_name)
+            return False
+        logger().info("%d vectors successfully copied to collection %s", len(embeddings), collection_name)
+        return True
 
     async def query_vectors(
         self,
         collection_name: str,
-        embedding: list[list[float]],
+        embedding: list[list[float]] | npt.NDArray[np.floating],
         limit: Annotated[int, Field(gt=1, lt=20)] = 3,
         distance: Distance = Distance.COSINE,
     ) -> list[asyncpg.Record]:
@@ -268,7 +359,7 @@ class PgVector:
 
         Args:
             collection_name (str): Name of collection to query.
-            embedding (list[float]): Embedding of query text.
+            embedding (list[list[float]] | NDArray): Embedding of query text, the first row is used.
             limit (int): Number of top chunks to retrieve.
 
         Returns:
@@ -279,66 +370,134 @@ class PgVector:
             ValidationError: If inputs don't pass type validation.
 
         """
+        try:
+            _ = QueryVectorInputs.model_validate(
+                {"distance": distance, "collection_name": collection_name, "limit": limit}
+            )
+        except ValidationError:
+            logger().exception("Inputs failed validation for querying vectors.")
+            raise
+
+        distance_sign = self._distance_operator(distance)
+
+        try:
+            sql = f"SELECT * FROM {collection_name} ORDER BY embedding {distance_sign} $1 LIMIT {limit}"
 
-        class QueryVectorInputs(BaseModel):
-            distance: Distance
-            collection_name: str
-            limit: Annotated[int, Field(gt=1, lt=20)]
+            query = np.asarray(embedding, dtype=np.float32)
+            response = await self._get_pool().fetch(
+                sql,
+                query[0] if query.ndim == 2 else query,
+            )
+        except:
+            logger().exception("Error while querying vectors.")
+            raise
+        else:
+            return response
 
-            @field_validator("collection_name", mode="before")
-            @classmethod
-            def _is_valid_identifier(cls, identifier: str):
-                """Validate SQL identifier to prevent injection.
+    @staticmethod
+    def _distance_operator(distance: Distance) -> str:
+        match distance:
+            case Distance.COSINE:
+                return "<=>"
+            case Distance.DOT:
+                return "<#>"
+            case _:
+                return "<->"
 
-                Only allows alphanumeric characters and underscores.
-                First character must be a letter or underscore.
+    @tracer.start_as_current_span("search_vectors")
+    async def search_vectors(
+        self,
+        collection_name: str,
+        embeddings: list[list[float]] | npt.NDArray[np.floating],
+        limit: int = 10,
+        distance: Distance = Distance.COSINE,
+        payload_filter: dict[str, Any] | None = None,
+        ef_search: int | None = None,
+        probes: int | None = None,
+        with_embedding: bool = False,
+    ) -> list[list[asyncpg.Record]]:
+        """Search the nearest vectors of many queries in one round-trip.
 
-                Args:
-                    identifier (str): input for sql command.
+        The query vectors are unnested and each runs its own ordered scan in a LATERAL join, so every query gets its
+        own top `limit`. `payload_filter` is matched as JSONB containment (`payload @> filter`) in the scan.
 
-                Returns:
-                    str: identifier input, if valid.
+        Args:
+            collection_name (str): Name of collection to query.
+            embeddings (list[list[float]] | NDArray): Embeddings of the query texts, one per row.
+            limit (int): Number of nearest vectors to retrieve per query.
+            distance (Distance): Distance metric the collection is indexed with.
+            payload_filter (dict[str, Any] | None): Only match vectors whose payload contains these values.
+            ef_search (int | None): `hnsw.ef_search` for this call, raise it above `limit` for better recall.
+            probes (int | None): `ivfflat.probes` for this call.
+            with_embedding (bool): Also return the stored vectors, left out by default as they dominate the result.
 
-                Raises:
-                    ValidationError: If doesn't pass validation.
+        Returns:
+            list[list[asyncpg.Record]]: Per query, in query order, records with id, payload, distance and, if asked
+                for, embedding, nearest first.
 
-                """
-                pattern = re.compile(r"^[a-zA-Z_][a-zA-Z0-9_]*$")
-                if not bool(pattern.match(identifier)):
-                    raise ValidationError("Invalid collection name: %s", collection_name)
-                return identifier
+        Raises:
+            ValueError: If db connection not established.
+            ValidationError: If inputs don't pass type validation.
 
+        """
         try:
-            _ = QueryVectorInputs.model_validate(
-                {"distance": distance, "collection_name": collection_name, "limit": limit}
+            _ = SearchVectorsInputs.model_validate(
+                {
+                    "collection_name": collection_name,
+                    "distance": distance,
+                    "limit": limit,
+                    "ef_search": ef_search,
+                    "probes": probes,
+                }
             )
         except ValidationError:
-            logger().exception("Inputs failed validation for querying vectors.")
+            logger().exception("Inputs failed validation for searching vectors.")
             raise
 
-        match distance:
-            case Distance.COSINE:
-                distance_sign = "<=>"
-            case Distance.DOT:
-                distance_sign = "<#>"
-            case _:
-                distance_sign = "<->"
+        if len(embeddings) == 0:
+            return []
+
+        distance_sign = self._distance_operator(distance)
+        vector_type = await self._vector_type(collection_name)
+        columns = "id, payload, embedding" if with_embedding else "id, payload"
+        where = "WHERE payload::jsonb @> $3::jsonb" if payload_filter else ""
+        sql = f"""
+            SELECT q.ord, r.*
+            FROM unnest($1::text[]) WITH ORDINALITY AS q(query, ord)
+            CROSS JOIN LATERAL (
+                SELECT {columns}, embedding {distance_sign} q.query::{vector_type} AS distance
+                FROM {collection_name}
+                {where}
+                ORDER BY embedding {distance_sign} q.query::{vector_type}
+                LIMIT $2
+            ) AS r
+            ORDER BY q.ord, r.distance
+        """
+        args: list[Any] = [[Vector(embedding).to_text() for embedding in embeddings], limit]
+        if payload_filter:
+            args.append(json.dumps(payload_filter))
 
-        if self.conn:
-            try:
-                sql = f"SELECT * FROM {collection_name} ORDER BY embedding {distance_sign} $1 LIMIT {limit}"
+        search_params = {"hnsw.ef_search": ef_search, "ivfflat.probes": probes}
+        settings = {name: str(value) for name, value in search_params.items() if value is not None}
+        pool = self._get_pool()
+        try:
+            async with pool.acquire() as conn:
+                if settings:
+                    # set_config(..., true) lasts until the end of the transaction, so pooled connections stay clean
+                    async with conn.transaction():
+                        for name, value in settings.items():
+                            await conn.execute("SELECT set_config($1, $2, true)", name, value)
+                        rows = await conn.fetch(sql, *args)
+                else:
+                    rows = await conn.fetch(sql, *args)
+        except Exception:
+            logger().exception("Error while searching vectors in %s", collection_name)
+            raise
 
-                response = await self.conn.fetch(
-                    sql,
-                    embedding,
-                )
-            except:
-                logger().exception("Error while querying vectors.")
-                raise
-            else:
-                return response
-        else:
-            raise ValueError("Connection to Database not established.")
+        results: list[list[asyncpg.Record]] = [[] for _ in embeddings]
+        for row in rows:
+            results[row["ord"] - 1].append(row)
+        return results
 
     async def recover_from_snapshot(
         self,
@@ -351,16 +510,14 @@ class PgVector:
 
     async def create_snapshot(self, collection_name: str) -> bool:
         # TODO: Contingent on deploymnent strategy
-        if self.conn:
-            try:
-                _ = await self.conn.execute("")
-            except Exception:
-                logger().exception("Error while creating snapshot of collection %s", collection_name)
-                return False
-            else:
-                return True
+        pool = self._get_pool()
+        try:
+            _ = await pool.execute("")
+        except Exception:
+            logger().exception("Error while creating snapshot of collection %s", collection_name)
+            return False
         else:
-            raise ValueError("Connection to Database not established.")
+            return True
 
     async def list_collections(self) -> list[str] | None:
         """List all collections available.
@@ -372,16 +529,14 @@ class PgVector:
             ValueError: If db connection not established.
 
         """
-        if self.conn:
-            try:
-                response = await self.conn.fetch("SELECT * FROM pg_tables WHERE schemaname = 'public';")
-            except Exception:
-                logger().exception("Error while retrieving list of tables.")
-            else:
-                collection_list: list[str] = [x["tablename"] for x in response]
-                return collection_list
+        pool = self._get_pool()
+        try:
+            response = await pool.fetch("SELECT * FROM pg_tables WHERE schemaname = 'public';")
+        except Exception:
+            logger().exception("Error while retrieving list of tables.")
         else:
-            raise ValueError("Connection to Database not established.")
+            collection_list: list[str] = [x["tablename"] for x in response]
+            return collection_list
         return None
 
     async def index_collection(self, collection_name: str, distance: Distance) -> bool:
@@ -398,71 +553,39 @@ class PgVector:
             ValueError: If db connection is not established.
 
         """
-
-        class IndexCollectionInputs(BaseModel):
-            collection_name: str
-            distance: Distance
-
-            @field_validator("collection_name", mode="before")
-            @classmethod
-            def _is_valid_identifier(cls, identifier: str):
-                """Validate SQL identifier to prevent injection.
-
-                Only allows alphanumeric characters and underscores.
-                First character must be a letter or underscore.
-
-                Args:
-                    identifier (str): input for sql command.
-
-                Returns:
-                    str: identifier input, if valid.
-
-                Raises:
-                    ValidationError: If doesn't pass validation.
-
-                """
-                pattern = re.compile(r"^[a-zA-Z_][a-zA-Z0-9_]*$")
-                if not bool(pattern.match(identifier)):
-                    raise ValidationError("Invalid collection name: %s", collection_name)
-                return identifier
-
         try:
             _ = IndexCollectionInputs.model_validate({"collection_name": collection_name, "distance": distance})
         except ValidationError:
             logger().exception("Inputs failed validation for querying vectors.")
             raise
 
+        vector_type = await self._vector_type(collection_name)
         match distance:
             case Distance.COSINE:
-                distance_input = "vector_cosine_ops"
+                distance_input = f"{vector_type}_cosine_ops"
             case Distance.DOT:
-                distance_input = "vector_ip_ops"
+                distance_input = f"{vector_type}_ip_ops"
             case _:
-                distance_input = "vector_l2_ops"
+                distance_input = f"{vector_type}_l2_ops"
 
-        if self.conn:
-            try:
-                response = await self.conn.execute(
-                    f"CREATE INDEX ON {collection_name} USING hnsw (embedding {distance_input})"
-                )
-            except Exception:
-                logger().exception("Error indexing collection %s", collection_name)
-                return False
-            else:
-                if "CREATE INDEX" in response:
-                    logger().info("Succesfully created index for %s with %s", collection_name, distance_input)
-                return True
+        pool = self._get_pool()
+        try:
+            response = await pool.execute(f"CREATE INDEX ON {collection_name} USING hnsw (embedding {distance_input})")
+        except Exception:
+            logger().exception("Error indexing collection %s", collection_name)
+            return False
         else:
-            raise ValueError("Connection to Database not established.")
+            if "CREATE INDEX" in response:
+                logger().info("Succesfully created index for %s with %s", collection_name, distance_input)
+            return True
 
     async def num_entities(self, collection_name: str, timeout: float | None = None) -> int:
         """Returns the number of entities in the collection."""
         # TODO: Make this work
 
-        if not self.conn:
-            raise ValueError("Connection to Database not established.")
+        pool = self._get_pool()
         try:
-            result = await self.conn.fetchval(f"SELECT COUNT(*) FROM {collection_name};")
+            result = await pool.fetchval(f"SELECT COUNT(*) FROM {collection_name};", timeout=timeout)
             return int(result)
         except Exception:
             logger().exception("Error while counting entities in collection %s", collection_name)
@@ -472,11 +595,10 @@ class PgVector:
         """Delete vectors from collection based on a filter."""
         # TODO: Make this work
 
-        if not self.conn:
-            raise ValueError("Connection to Database not established.")
+        pool = self._get_pool()
         try:
             query = f"DELETE FROM {collection_name} WHERE {filter};"
-            await self.conn.execute(query)
+            await pool.execute(query)
             logger().info("Deleted vectors from %s using filter: %s", collection_name, filter)
             return True
         except Exception:
@@ -16,18 +16,19 @@ Functions:
 """
 
 import numpy as np
+import numpy.typing as npt
 import qdrant_client  # type: ignore
 from opentelemetry import trace
 from pydantic import ValidationError
 from qdrant_client import models  # type: ignore
 from qdrant_client.models import (  # type: ignore
+    Batch,
     OptimizersConfigDiff,
-    PointStruct,
     ScoredPoint,
     VectorParams,
 )
 
-from common.clients.vdb_client import Distance, EmbedDict, VecDBClient
+from common.clients.vdb_client import Distance, EmbedDict, Quantization, VecDBClient
 from common.jsonlogging.jsonlogger import Logging
 
 logger = Logging.get_logger(__name__)
@@ -45,13 +46,18 @@ class QdrantVector(VecDBClient):
         collection_name: str,
         vec_size: int,
         distance_method: Distance = Distance.COSINE,
+        quantization: Quantization = Quantization.NONE,
     ) -> bool:
         """Create a Qdrant collection, if not existant.
 
+        Quantized vectors (INT8, PQ) are kept in RAM for search while the original vectors rescore the candidates,
+        FLOAT16 stores the vectors themselves in half precision.
+
         Args:
             collection_name (str): Name of collection to create.
             vec_size (int): dimension of each vector
             distance_method (Distance): similarity metric
+            quantization (Quantization): how vectors are stored
 
         Returns:
             bool: True if collection was created, False if collection exists.
@@ -73,9 +79,25 @@ class QdrantVector(VecDBClient):
                 distance = models.Distance.EUCLID
             case Distance.MANHATTAN:
                 distance = models.Distance.MANHATTAN
+        quantization_config: models.ScalarQuantization | models.ProductQuantization | None = None
+        datatype: models.Datatype | None = None
+        match quantization:
+            case Quantization.FLOAT16:
+                datatype = models.Datatype.FLOAT16
+            case Quantization.INT8:
+                quantization_config = models.ScalarQuantization(
+                    scalar=models.ScalarQuantizationConfig(type=models.ScalarType.INT8, quantile=0.99, always_ram=True)
+                )
+            case Quantization.PQ:
+                quantization_config = models.ProductQuantization(
+                    product=models.ProductQuantizationConfig(compression=models.CompressionRatio.X16, always_ram=True)
+                )
+
         _ = await self.client.create_collection(
             collection_name=collection_name,
-            vectors_config=VectorParams(size=vec_size, distance=distance),
+            vectors_config=VectorParams(
+                size=vec_size, distance=distance, quantization_config=quantization_config, datatype=datatype
+            ),
             optimizers_config=OptimizersConfigDiff(indexing_threshold=2000),
         )
         logger().info(
@@ -95,18 +117,17 @@ class QdrantVector(VecDBClient):
             bool: True if successfully added vectors, False if not
 
         """
-        points = []
-        for idx, embedding in enumerate(embeddings):
-            try:
-                point = PointStruct(
-                    id=idx,
-                    vector=embedding["embedding"],
-                    payload=embedding["payload"],
-                )
-            except ValidationError:
-                logger().exception("Point validation unsuccessful")
-            else:
-                points.append(point)
+        try:
+            # one float32 matrix for all points, converted to the request's floats in a single call
+            vectors = np.asarray([embedding["embedding"] for embedding in embeddings], dtype=np.float32)
+            points = Batch(
+                ids=list(range(len(embeddings))),
+                vectors=vectors.tolist(),
+                payloads=[embedding["payload"] for embedding in embeddings],
+            )
+        except (ValueError, ValidationError):
+            logger().exception("Point validation unsuccessful")
+            return False
 
         try:
             operation_info = await self.client.upsert(
@@ -118,7 +139,7 @@ class QdrantVector(VecDBClient):
             logger().exception("Error in adding vectors to %s collection", collection_name)
             return False
         else:
-            ct_embeddings = len(points)
+            ct_embeddings = len(points.ids)
             logger().info(
                 "Successfully uploaded %s vectors to collection %s",
                 ct_embeddings,
@@ -131,7 +152,7 @@ class QdrantVector(VecDBClient):
     async def query_vectors(
         self,
         collection_name: str,
-        embedding: list[list[float]],
+        embedding: list[list[float]] | npt.NDArray[np.floating],
         limit: int = 3,
     ) -> list[ScoredPoint]:
         """Query vectors in vec db using a query.
@@ -146,10 +167,9 @@ class QdrantVector(VecDBClient):
 
         """
         logger().info("Querying collection %s", collection_name)
-        embedding = np.array(embedding[0])  # type: ignore[assignment]
         query_returns = await self.client.query_points(
             collection_name=collection_name,
-            query=embedding,
+            query=np.asarray(embedding[0], dtype=np.float32),
             with_payload=True,
             limit=limit,
         )
@@ -210,7 +230,8 @@ class QdrantVector(VecDBClient):
 
         Args:
             collection_name (str): Desired name of collection
-            filename (str): Path of snapshot file
+            filename (str): URL of the snapshot the Qdrant server can fetch, `http(s)://` or a `file://` URI of a
+                path on the server's filesystem.
             wait (bool): Return confirmation of recovery; true is succesful.
 
         Note:
@@ -1,11 +1,17 @@
 from enum import Enum
 from typing import Any, Protocol, TypedDict, final, runtime_checkable
 
+import numpy as np
+import numpy.typing as npt
+
 
 class EmbedDict(TypedDict):
-    """Dictionary schema for embeddings in add_vectors fx."""
+    """Dictionary schema for embeddings in add_vectors fx.
+
+    Prefer a float32 NumPy array for the embedding, a list of Python floats takes about 8x the memory per dimension.
+    """
 
-    embedding: list[float]
+    embedding: list[float] | npt.NDArray[np.floating]
     payload: dict[str, str | float | int]
 
 
@@ -21,6 +27,21 @@ class Distance(str, Enum):
     MANHATTAN = "Manhattan"
 
 
+class Quantization(str, Enum):
+    """How a collection stores its vectors, trading recall for memory.
+
+    Not every client supports every option, see each client's `create_collection`.
+    """
+
+    def __str__(self) -> str:
+        return str(self.value)
+
+    NONE = "none"  # float32
+    FLOAT16 = "float16"  # half precision, 2x smaller
+    INT8 = "int8"  # scalar quantization, 4x smaller
+    PQ = "pq"  # product quantization, 16x smaller or more
+
+
 class IndexMethod(str, Enum):
     """Vector Index Methods for db."""
 
@@ -65,6 +86,7 @@ class VecDBClient(Protocol):
         collection_name: str,
         vec_size: int,
         distance_method: Distance,
+        quantization: Quantization = Quantization.NONE,
     ) -> bool: ...
 
     async def add_vectors(
@@ -76,7 +98,7 @@ class VecDBClient(Protocol):
     async def query_vectors(
         self,
         collection_name: str,
-        embedding: list[list[float]],
+        embedding: list[list[float]] | npt.NDArray[np.floating],
         limit: int = 3,
     ) -> list[Any]: ...
 
@@ -1,16 +1,33 @@
+import asyncio
+import hashlib
+import json
+import os
 import re
+import threading
 from datetime import UTC, datetime
 from pathlib import Path
-from typing import TypedDict, final
+from typing import Any, TypedDict, final
 
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.exceptions import ClientError
 from opentelemetry import trace
+from pydantic import BaseModel, Field
 
+from common.clients.vdb_client import VecDBClient
 from common.jsonlogging.jsonlogger import Logging
 
 logger = Logging.get_logger(__name__)
 tracer = trace.get_tracer(__name__)
 
+MIB = 1024 * 1024
+
+# Part size boto3 uses by default, snapshots uploaded before the transfer config was set have ETags built with it
+BOTO3_DEFAULT_PART_SIZE = 8 * MIB
+
+# Metadata key holding the sha256 of the snapshot, set on upload
+SHA256_METADATA_KEY = "sha256"
+
 
 class Snap(TypedDict):
     col_name: str
@@ -18,12 +35,60 @@ class Snap(TypedDict):
     filename: Path | str
 
 
+class SnapshotTransferConfig(BaseModel):
+    part_size_bytes: int = Field(default=64 * MIB, ge=5 * MIB, description="Multipart part size, S3's minimum is 5 MiB")
+    max_concurrent_parts: int = Field(default=8, ge=1, description="Parts of one snapshot transferred at once")
+    max_concurrent_files: int = Field(default=2, ge=1, description="Snapshots transferred at once")
+
+
+def _file_digests(path: Path, part_sizes: list[int]) -> tuple[str, dict[int, str]]:
+    """Hash a file in one pass.
+
+    Returns:
+        tuple[str, dict[int, str]]: sha256 of the file, and the S3 ETag it gets when uploaded with each part size.
+
+    """
+    sha256 = hashlib.sha256()
+    whole_md5 = hashlib.md5()  # S3 ETags are md5 based
+    part_md5s: dict[int, list[bytes]] = {size: [] for size in part_sizes}
+    current: dict[int, tuple[Any, int]] = {size: (hashlib.md5(), 0) for size in part_sizes}
+    file_size = 0
+    with path.open("rb") as f:
+        while block := f.read(MIB):
+            sha256.update(block)
+            whole_md5.update(block)
+            file_size += len(block)
+            for size in part_sizes:
+                view = memoryview(block)
+                md5, filled = current[size]
+                while view:
+                    take = min(len(view), size - filled)
+                    md5.update(view[:take])
+                    view, filled = view[take:], filled + take
+                    if filled == size:
+                        part_md5s[size].append(md5.digest())
+                        md5, filled = hashlib.md5(), 0
+                current[size] = (md5, filled)
+
+    etags = {}
+    for size in part_sizes:
+        md5, filled = current[size]
+        digests = part_md5s[size] + ([md5.digest()] if filled else [])
+        if file_size < size:
+            # below the multipart threshold boto3 sends a single PUT, whose ETag is the md5 of the file
+            etags[size] = whole_md5.hexdigest()
+        else:
+            etags[size] = f"{hashlib.md5(b''.join(digests)).hexdigest()}-{len(digests)}"
+    return sha256.hexdigest(), etags
+
+
 @final
 class S3Client:
-    def __init__(self, bucket_name: str) -> None:
+    def __init__(self, bucket_name: str, transfer_config: SnapshotTransferConfig | None = None) -> None:
         self.s3 = self._init_boto()
         self.bucket_name = bucket_name
         self.save_directory = Path(__file__).parent.parent.parent.joinpath("data/vecdb_snapshots")
+        self.transfer_config = transfer_config or SnapshotTransferConfig()
         self.objects = self.list_objects()
 
     @staticmethod
@@ -156,6 +221,65 @@ class S3Client:
                 recent_date = date
         return recent_date["filename"]
 
+    @classmethod
+    def _latest_by_collection(cls, filenames: list[Path] | list[str]) -> dict[str, Path | str]:
+        """Most recent snapshot of each collection among the filenames."""
+        by_collection: dict[str, list[Snap]] = {}
+        for filename in filenames:
+            snap = cls._parse_snapshot_name(filename)
+            if snap:
+                by_collection.setdefault(snap["col_name"], []).append(snap)
+        return {col_name: cls._find_most_recent(snapshots=snaps) for col_name, snaps in by_collection.items()}
+
+    def _boto_transfer_config(self) -> TransferConfig:
+        return TransferConfig(
+            multipart_threshold=self.transfer_config.part_size_bytes,
+            multipart_chunksize=self.transfer_config.part_size_bytes,
+            max_concurrency=self.transfer_config.max_concurrent_parts,
+            use_threads=True,
+        )
+
+    def _head_object(self, key: str) -> dict[str, Any] | None:
+        try:
+            return self.s3.head_object(Bucket=self.bucket_name, Key=key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+    def _matches_remote(self, path: Path, head: dict[str, Any]) -> bool:
+        """Whether a local file has the content of an S3 object, by its sha256 metadata or else its ETag."""
+        if not path.exists() or path.stat().st_size != head["ContentLength"]:
+            return False
+        sha256, etags = _file_digests(path, [self.transfer_config.part_size_bytes, BOTO3_DEFAULT_PART_SIZE])
+        remote_sha256 = head.get("Metadata", {}).get(SHA256_METADATA_KEY)
+        if remote_sha256:
+            return remote_sha256 == sha256
+        return head["ETag"].strip('"') in etags.values()
+
+    def _upload_if_changed(self, path: Path) -> bool:
+        """Upload a snapshot unless S3 already has the same content under its name.
+
+        Returns:
+            bool: True if the snapshot was uploaded, False if it was unchanged.
+
+        """
+        head = self._head_object(path.name)
+        if head is not None and self._matches_remote(path, head):
+            logger().info("Snapshot %s is unchanged in S3, skipping upload", path.name)
+            return False
+
+        sha256, _ = _file_digests(path, [])
+        self.s3.upload_file(
+            Filename=str(path),
+            Bucket=self.bucket_name,
+            Key=path.name,
+            ExtraArgs={"Metadata": {SHA256_METADATA_KEY: sha256}},
+            Config=self._boto_transfer_config(),
+        )
+        logger().info("Uploaded snapshot %s", path.name)
+        return True
+
     def upload_snapshots(self) -> None:
         """Upload snapshots to S3.
 
@@ -166,29 +290,193 @@ class S3Client:
             and date created.
         - Seperates the snapshots by collection
         - Finds the most recent snapshot version for each collection.
-        - Uploads most recent snapshot version for each collection to S3 bucket.
+        - Uploads most recent snapshot version for each collection to S3 bucket,
+            unless S3 already has it.
         """
         snapshots = list(self.save_directory.glob("**/*.snapshot"))
-
-        snapshots_parsed = [self._parse_snapshot_name(snap) for snap in snapshots]
-
-        collection_names = list({x["col_name"] for x in snapshots_parsed if x})
-
-        snaps_by_collection = [
-            [snap for snap in snapshots_parsed if snap and snap["col_name"] == col_name]
-            for col_name in collection_names
-        ]
-
-        updated_snapshots = [self._find_most_recent(snapshots=col) for col in snaps_by_collection]
+        updated_snapshots = [snap for snap in self._latest_by_collection(snapshots).values() if isinstance(snap, Path)]
 
         try:
-            _ = [
-                self.s3.upload_file(Filename=snap, Bucket=self.bucket_name, Key=snap.name)
-                for snap in updated_snapshots
-                if isinstance(snap, Path)
-            ]
+            for snap in updated_snapshots:
+                _ = self._upload_if_changed(snap)
         except Exception:
             logger().exception("Error in uploading snapshots to S3.")
 
         else:
             logger().info("Succesfully uploaded documents: %s", updated_snapshots)
+
+    async def upload_snapshots_async(self) -> list[str]:
+        """Upload the most recent snapshot of each collection, several at once and each in concurrent parts.
+
+        Snapshots that S3 already has are skipped.
+
+        Returns:
+            list[str]: Names of the snapshots uploaded.
+
+        """
+        snapshots = list(self.save_directory.glob("**/*.snapshot"))
+        latest = [snap for snap in self._latest_by_collection(snapshots).values() if isinstance(snap, Path)]
+        semaphore = asyncio.Semaphore(self.transfer_config.max_concurrent_files)
+
+        async def upload(path: Path) -> bool:
+            async with semaphore:
+                return await asyncio.to_thread(self._upload_if_changed, path)
+
+        uploaded = await asyncio.gather(*(upload(path) for path in latest))
+        return [path.name for path, was_uploaded in zip(latest, uploaded, strict=True) if was_uploaded]
+
+    def _list_snapshot_keys(self) -> list[str]:
+        keys: list[str] = []
+        for page in self.s3.get_paginator("list_objects_v2").paginate(Bucket=self.bucket_name):
+            keys.extend(obj["Key"] for obj in page.get("Contents", []) if Path(obj["Key"]).suffix == ".snapshot")
+        return keys
+
+    @tracer.start_as_current_span("download_snapshot")
+    async def download_snapshot(self, key: str) -> Path:
+        """Download a snapshot in concurrent ranged parts, resuming an interrupted download.
+
+        Parts are written to `<snapshot>.part` and recorded in `<snapshot>.part.json` as they complete, so a download
+        interrupted by a restart only fetches the parts it is missing, as long as the object is unchanged. A local
+        snapshot with the content of the object is kept as is.
+
+        Args:
+            key (str): Object key of the snapshot.
+
+        Returns:
+            Path: Local path of the snapshot.
+
+        Raises:
+            ClientError: If the object can't be read, or changed during the download.
+            ValueError: If the downloaded content doesn't match the object's sha256.
+
+        """
+        target = self.save_directory.joinpath(key)
+        head = await asyncio.to_thread(self.s3.head_object, Bucket=self.bucket_name, Key=key)
+        if await asyncio.to_thread(self._matches_remote, target, head):
+            logger().info("Snapshot %s is already downloaded", key)
+            return target
+
+        etag, size = head["ETag"], head["ContentLength"]
+        part_size = self.transfer_config.part_size_bytes
+        partial = target.with_name(f"{target.name}.part")
+        state_path = target.with_name(f"{target.name}.part.json")
+        target.parent.mkdir(parents=True, exist_ok=True)
+
+        done: set[int] = set()
+        try:
+            state = json.loads(state_path.read_text())
+            if (state["etag"], state["size"], state["part_size"]) == (etag, size, part_size) and partial.exists():
+                done = set(state["done"])
+        except (OSError, ValueError, KeyError):
+            pass
+        if not done:
+            with partial.open("wb") as f:
+                f.truncate(size)
+        parts = [index for index in range((size + part_size - 1) // part_size) if index not in done]
+        if done:
+            logger().info("Resuming download of %s, %d parts left", key, len(parts))
+
+        state_lock = threading.Lock()
+        semaphore = asyncio.Semaphore(self.transfer_config.max_concurrent_parts)
+
+        def download_part(index: int) -> None:
+            start = index * part_size
+            end = min(start + part_size, size) - 1
+            response = self.s3.get_object(
+                Bucket=self.bucket_name, Key=key, Range=f"bytes={start}-{end}", IfMatch=etag
+            )
+            offset = start
+            # each part has its own descriptor, threads can't be cancelled and may outlive a failed download
+            fd = os.open(partial, os.O_WRONLY)
+            try:
+                for chunk in response["Body"].iter_chunks(MIB):
+                    offset += os.pwrite(fd, chunk, offset)
+            finally:
+                os.close(fd)
+            if offset != end + 1:
+                raise ValueError(f"Part {index} of {key} is {offset - start} bytes, expected {end + 1 - start}")
+            with state_lock:
+                done.add(index)
+                tmp = state_path.with_name(f".{state_path.name}.tmp")
+                tmp.write_text(json.dumps({"etag": etag, "size": size, "part_size": part_size, "done": sorted(done)}))
+                os.replace(tmp, state_path)
+
+        async def run_part(index: int) -> None:
+            async with semaphore:
+                await asyncio.to_thread(download_part, index)
+
+        # let every part finish before failing, so no write to the file is still running once this returns
+        results = await asyncio.gather(*(run_part(index) for index in parts), return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
+        remote_sha256 = head.get("Metadata", {}).get(SHA256_METADATA_KEY)
+        if remote_sha256:
+            sha256, _ = await asyncio.to_thread(_file_digests, partial, [])
+            if sha256 != remote_sha256:
+                partial.unlink(missing_ok=True)
+                state_path.unlink(missing_ok=True)
+                raise ValueError(f"Downloaded snapshot {key} doesn't match its sha256")
+
+        os.replace(partial, target)
+        state_path.unlink(missing_ok=True)
+        logger().info("Downloaded snapshot %s to %s", key, target)
+        return target
+
+    async def get_snapshots_async(self) -> dict[str, Path]:
+        """Download the most recent snapshot of each collection, several at once.
+
+        Returns:
+            dict[str, Path]: Local snapshot path by collection name.
+
+        """
+        keys = await asyncio.to_thread(self._list_snapshot_keys)
+        latest = {col_name: str(key) for col_name, key in self._latest_by_collection(keys).items()}
+        semaphore = asyncio.Semaphore(self.transfer_config.max_concurrent_files)
+
+        async def download(key: str) -> Path:
+            async with semaphore:
+                return await self.download_snapshot(key)
+
+        paths = await asyncio.gather(*(download(key) for key in latest.values()))
+        return dict(zip(latest, paths, strict=True))
+
+    @tracer.start_as_current_span("restore_snapshots")
+    async def restore_snapshots(self, vdb_client: VecDBClient, wait: bool = True) -> list[str]:
+        """Recover each collection from its most recent snapshot in S3.
+
+        Each collection is recovered as soon as its own snapshot is downloaded, while the others are still
+        downloading. A collection that fails is logged and doesn't stop the others.
+
+        Snapshots are passed to the vector db as `file://` URIs of the downloaded files, so a Qdrant server has to
+        share the filesystem, with `save_directory` mounted at the same path.
+
+        Args:
+            vdb_client (VecDBClient): Vector db client to recover the collections into.
+            wait (bool): Passed to `recover_from_snapshot`.
+
+        Returns:
+            list[str]: Names of the collections recovered.
+
+        """
+        keys = await asyncio.to_thread(self._list_snapshot_keys)
+        latest = {col_name: str(key) for col_name, key in self._latest_by_collection(keys).items()}
+        semaphore = asyncio.Semaphore(self.transfer_config.max_concurrent_files)
+
+        async def restore(col_name: str, key: str) -> None:
+            async with semaphore:
+                path = await self.download_snapshot(key)
+            await vdb_client.recover_from_snapshot(col_name, path.as_uri(), wait=wait)
+            logger().info("Recovered collection %s from snapshot %s", col_name, key)
+
+        results = await asyncio.gather(
+            *(restore(col_name, key) for col_name, key in latest.items()), return_exceptions=True
+        )
+        restored = []
+        for col_name, result in zip(latest, results, strict=True):
+            if isinstance(result, BaseException):
+                logger().error("Could not recover collection %s: %s", col_name, result)
+            else:
+                restored.append(col_name)
+        return restored
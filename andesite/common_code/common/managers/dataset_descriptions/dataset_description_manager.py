@@ -6,7 +6,7 @@ from typing import Any
 
 from motor.motor_asyncio import AsyncIOMotorCollection as AgnosticCollection
 from opentelemetry import trace
-from pymongo import ASCENDING, ReturnDocument
+from pymongo import ASCENDING, DeleteOne, ReturnDocument, UpdateOne
 
 from common.jsonlogging.jsonlogger import Logging
 from common.managers.dataset_descriptions.dataset_description_model import (
@@ -228,6 +228,49 @@ class DatasetDescriptionManager:
             )
             raise e
 
+    @tracer.start_as_current_span("bulk_write_dataset_descriptions_async")
+    @check_client_initialization
+    async def bulk_write_dataset_descriptions_async(
+        self,
+        descriptions: list[DatasetDescription],
+        delete_paths: list[list[str]] | None = None,
+        connector: str | None = None,
+    ) -> None:
+        """
+        Asynchronously upserts many dataset descriptions and deletes others in a single bulk write. This is meant
+        for syncing datasets discovered on external systems: a description that is already stored is kept, only the
+        enrichment fields that are set on the given description are updated.
+
+        :param descriptions: The dataset descriptions to upsert.
+        :param delete_paths: The paths of the dataset descriptions to delete, for `connector`.
+        :param connector: The connector of the dataset descriptions to delete.
+        :raises DatasetDescriptionException: If paths are given to delete without a connector.
+        """
+        if delete_paths and connector is None:
+            raise DatasetDescriptionException("A connector is required to delete dataset descriptions")
+
+        operations: list[UpdateOne | DeleteOne] = []
+        for description in descriptions:
+            update: dict[str, Any] = {"$setOnInsert": {"description": description.description}}
+            if description.enrichment is not None:
+                enrichment = description.enrichment.model_dump(exclude_none=True)
+                if enrichment:
+                    update["$set"] = {f"enrichment.{field}": value for field, value in enrichment.items()}
+            operations.append(
+                UpdateOne({"connector": description.connector, "path": description.path}, update, upsert=True)
+            )
+        operations.extend(DeleteOne({"connector": connector, "path": path}) for path in delete_paths or [])
+
+        if not operations:
+            return
+        result = await self._storage_collection.bulk_write(operations, ordered=False)  # type: ignore
+        logger().info(
+            "Bulk wrote dataset descriptions: %d inserted, %d updated, %d deleted",
+            result.upserted_count,
+            result.modified_count,
+            result.deleted_count,
+        )
+
     @tracer.start_as_current_span("initialize")
     async def initialize(self, storage_collection: AgnosticCollection | None = None) -> None:
         """
@@ -1,15 +1,25 @@
+import base64
+import binascii
 import datetime
+import json
 from functools import lru_cache
 from typing import Any
 
 from bson import ObjectId
+from bson.errors import InvalidId
 from motor.motor_asyncio import AsyncIOMotorCollection as AgnosticCollection
 from opentelemetry import trace
-from pymongo import ASCENDING
+from pymongo import ASCENDING, DESCENDING
 
 from common.jsonlogging.jsonlogger import Logging
 from common.models.connectors import ConnectorScope
-from common.models.document import DocumentStorageModel, ProcessingStatusEnum, RiskScoreEnum
+from common.models.document import (
+    DocumentStorageModel,
+    DocumentSummaryModel,
+    DocumentSummaryPage,
+    ProcessingStatusEnum,
+    RiskScoreEnum,
+)
 
 logger = Logging.get_logger(__name__)
 tracer = trace.get_tracer(__name__)
@@ -21,6 +31,19 @@ class DocumentStorageException(Exception):
     pass
 
 
+def _encode_cursor(uploaded_at: datetime.datetime, doc_id: ObjectId) -> str:
+    data = json.dumps({"uploaded_at": uploaded_at.isoformat(), "id": str(doc_id)})
+    return base64.urlsafe_b64encode(data.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime.datetime, ObjectId]:
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.datetime.fromisoformat(data["uploaded_at"]), ObjectId(data["id"])
+    except (binascii.Error, ValueError, KeyError, TypeError, InvalidId) as e:
+        raise DocumentStorageException(f"Invalid document cursor '{cursor}'") from e
+
+
 class DocumentStorageManager:
     def __init__(
         self,
@@ -112,6 +135,51 @@ class DocumentStorageManager:
                 documents.append(document_response)
         return documents
 
+    @tracer.start_as_current_span("list_document_summaries_async")
+    async def list_document_summaries_async(self, limit: int = 50, cursor: str | None = None) -> DocumentSummaryPage:
+        """
+        Asynchronously lists the summaries of documents that are not archived, newest first.
+
+        Pages are keyed on (uploaded_at, _id) rather than skipped over, so every page costs the same however deep it
+        is, and only the fields of DocumentSummaryModel are read.
+
+        :param limit: the maximum number of documents in the page.
+        :param cursor: the next_cursor of the previous page, or None for the first page.
+        :raises DocumentStorageException: If the limit is below 1 or the cursor is invalid.
+        :return: The page of document summaries and the cursor of the following page.
+        """
+        if self._storage_collection is None:
+            raise DocumentStorageException("Unable to list documents because no storage collection was initialized.")
+        if limit < 1:
+            raise DocumentStorageException(f"Unable to list documents with a limit of {limit}, it must be at least 1.")
+
+        query: dict[str, Any] = {"archived_at": None}
+        if cursor:
+            uploaded_at, doc_id = _decode_cursor(cursor)
+            query["$or"] = [
+                {"uploaded_at": {"$lt": uploaded_at}},
+                {"uploaded_at": uploaded_at, "_id": {"$lt": doc_id}},
+            ]
+
+        # one more than the page to know whether there is a next page
+        documents_in_mongo = (
+            await self._storage_collection.find(query, DocumentSummaryModel.projection())  # type: ignore
+            .sort([("uploaded_at", DESCENDING), ("_id", DESCENDING)])
+            .limit(limit + 1)
+            .to_list(length=None)
+        )
+
+        next_cursor = None
+        if len(documents_in_mongo) > limit:
+            documents_in_mongo = documents_in_mongo[:limit]
+            last = documents_in_mongo[-1]
+            next_cursor = _encode_cursor(last["uploaded_at"], last["_id"])
+
+        return DocumentSummaryPage(
+            documents=[DocumentSummaryModel.from_mongo(d) for d in documents_in_mongo],
+            next_cursor=next_cursor,
+        )
+
     @tracer.start_as_current_span("archive_document_async")
     async def archive_all_documents_async(self) -> bool:
         """
@@ -285,6 +353,10 @@ class DocumentStorageManager:
             )
             return
         await self._storage_collection.create_index([("uploaded_at", ASCENDING)])
+        # matches the archived_at filter and the sort of list_document_summaries_async
+        await self._storage_collection.create_index(
+            [("archived_at", ASCENDING), ("uploaded_at", DESCENDING), ("_id", DESCENDING)]
+        )
 
         await self._migrate_june_2_2025()
         await self._migrate_june_7_2025()
@@ -0,0 +1,161 @@
+import hashlib
+import json
+from collections import defaultdict
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+from common.models.alert_attributes import AlertAttribute, AlertAttributeContext
+from common.models.alerts import Alert
+from common.models.connector_id_enum import ConnectorIdEnum
+
+AlertFieldKey = tuple[str, str]
+
+
+class AlertFieldIndex:
+    """
+    The `AlertFieldIndex` is an inverted index from (canonical field, value hash) to alert ids.
+
+    It is built incrementally as alerts arrive and is used to generate only the candidate pairs
+    of alerts that share at least one configured attribute, instead of comparing every alert
+    against every other alert with `Alert.matching_fields`.
+
+    Attributes:
+        attributes (list[AlertAttribute]): The configured canonical attributes to index on.
+        context (AlertAttributeContext): Only attributes with a positive weight in this context are indexed.
+        max_key_frequency (int | None): Keys shared by more alerts than this are treated as too common
+            to be useful (e.g. `severity=high`) and no longer produce candidates. None disables the cap.
+    """
+
+    def __init__(
+        self,
+        attributes: list[AlertAttribute],
+        context: AlertAttributeContext = AlertAttributeContext.grouping,
+        max_key_frequency: int | None = None,
+    ) -> None:
+        self.max_key_frequency = max_key_frequency
+        self._field_mappings: dict[ConnectorIdEnum, list[tuple[str, str]]] = defaultdict(list)
+        self._canonical_fields: list[str] = []
+        for attribute in attributes:
+            if attribute.weight(context) <= 0:
+                continue
+            self._canonical_fields.append(attribute.attribute_name)
+            for connector, connector_fields in attribute.mappings.items():
+                for connector_field in connector_fields:
+                    self._field_mappings[connector].append((connector_field, attribute.attribute_name))
+
+        self._postings: dict[AlertFieldKey, list[str]] = defaultdict(list)
+        self._alert_keys: dict[str, dict[str, str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._alert_keys)
+
+    def __contains__(self, alert_id: object) -> bool:
+        return alert_id in self._alert_keys
+
+    def add(self, alert: Alert) -> set[str]:
+        """
+        Index an alert and return the ids of previously indexed alerts that share at least one attribute with it.
+        Adding an alert id that is already indexed replaces its previous entry.
+        """
+        if alert.id in self._alert_keys:
+            self.remove(alert.id)
+
+        keys = self._canonical_values(alert)
+        self._alert_keys[alert.id] = keys
+
+        candidates: set[str] = set()
+        for canonical_field, value_hash in keys.items():
+            posting = self._postings[(canonical_field, value_hash)]
+            if self.max_key_frequency is None or len(posting) < self.max_key_frequency:
+                candidates.update(posting)
+            posting.append(alert.id)
+
+        return candidates
+
+    def add_many(self, alerts: Iterable[Alert]) -> None:
+        for alert in alerts:
+            self.add(alert)
+
+    def remove(self, alert_id: str) -> None:
+        keys = self._alert_keys.pop(alert_id, None)
+        if keys is None:
+            return
+        for key in keys.items():
+            posting = self._postings.get(key)
+            if posting is None:
+                continue
+            posting.remove(alert_id)
+            if not posting:
+                del self._postings[key]
+
+    def candidates(self, alert_id: str) -> set[str]:
+        """Get the ids of indexed alerts that share at least one attribute with the given alert."""
+        keys = self._alert_keys.get(alert_id)
+        if not keys:
+            return set()
+
+        candidates: set[str] = set()
+        for key in keys.items():
+            posting = self._postings.get(key, [])
+            if self.max_key_frequency is not None and len(posting) > self.max_key_frequency:
+                continue
+            candidates.update(posting)
+        candidates.discard(alert_id)
+        return candidates
+
+    def candidate_pairs(self) -> Iterator[tuple[str, str]]:
+        """
+        Yield each unordered pair of alert ids that share at least one attribute exactly once.
+        Pairs are ordered so that the first id was indexed before the second.
+        """
+        order = {alert_id: position for position, alert_id in enumerate(self._alert_keys)}
+        for alert_id in self._alert_keys:
+            position = order[alert_id]
+            for other_id in sorted(self.candidates(alert_id), key=order.__getitem__):
+                if order[other_id] > position:
+                    yield alert_id, other_id
+
+    def shared_attributes(self, alert_id: str, other_id: str) -> set[str]:
+        """Get the canonical attributes whose values match between two indexed alerts."""
+        keys = self._alert_keys.get(alert_id, {})
+        other_keys = self._alert_keys.get(other_id, {})
+        return {field for field, value_hash in keys.items() if other_keys.get(field) == value_hash}
+
+    def _canonical_values(self, alert: Alert) -> dict[str, str]:
+        """
+        Get the hashed value of each configured canonical attribute present on the alert.
+        A canonical field already on the alert wins over the connector fields mapped to it,
+        mirroring `Alert.copy_with_translated_details_table`.
+        """
+        details = alert.get_details_table_as_dict()
+        values: dict[str, str] = {}
+
+        for canonical_field in self._canonical_fields:
+            value = self._detail_value(alert, details, canonical_field)
+            if value is not None:
+                values[canonical_field] = _hash_value(value)
+
+        for connector_field, canonical_field in self._field_mappings.get(alert.connector, []):
+            if canonical_field in values:
+                continue
+            value = self._detail_value(alert, details, connector_field)
+            if value is not None:
+                values[canonical_field] = _hash_value(value)
+
+        return values
+
+    @staticmethod
+    def _detail_value(alert: Alert, details: dict[str, Any], field_name: str) -> Any | None:
+        value = details.get(field_name)
+        if value is not None:
+            return value
+        # flattened lists and dicts need to be reassembled
+        prefix = field_name + "."
+        if any(key.startswith(prefix) for key in details):
+            return alert.get_detail_value(field_name)
+        return None
+
+
+def _hash_value(value: Any) -> str:
+    serialized = json.dumps(value, sort_keys=True, default=str)
+    return hashlib.blake2b(serialized.encode(), digest_size=16).hexdigest()
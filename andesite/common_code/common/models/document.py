@@ -81,6 +81,16 @@ class Recommendation(BaseModel):
     content: str
 
 
+def _parse_processing_error(v):
+    # this enables us to change the ProcessingErrorEnum values without worry about data migrations
+    if isinstance(v, str):
+        try:
+            return ProcessingErrorEnum(v)
+        except ValueError:
+            return ProcessingErrorEnum.GENERIC
+    return v
+
+
 class DocumentBaseModel(BaseModel):
     id: str = Field(default_factory=lambda: str(ObjectId()))
     name: str
@@ -107,13 +117,43 @@ class DocumentBaseModel(BaseModel):
 
     @field_validator("processing_error", mode="before")
     def _set_processing_error(cls, v):
-        # this enables us to change the ProcessingErrorEnum values without worry about data migrations
-        if isinstance(v, str):
-            try:
-                return ProcessingErrorEnum(v)
-            except ValueError:
-                return ProcessingErrorEnum.GENERIC
-        return v
+        return _parse_processing_error(v)
+
+
+class DocumentSummaryModel(BaseModel):
+    """The fields of a document needed to list it, read with a projection instead of loading whole documents."""
+
+    id: str
+    name: str
+    single_sentence_summary: str | None = None
+    file_name: str
+    url: str | None = None
+    mime_type: str
+    uploaded_at: datetime
+    risk_score: RiskScoreEnum = Field(default=RiskScoreEnum.UNKNOWN)
+    processing_error: ProcessingErrorEnum | None = None
+    processing_status: ProcessingStatusEnum = Field(default=ProcessingStatusEnum.PENDING)
+    processing_progress_percent: int = Field(default=0)
+
+    model_config = ConfigDict(json_encoders={datetime: lambda v: v.replace(tzinfo=UTC).isoformat()})
+
+    @field_validator("processing_error", mode="before")
+    def _set_processing_error(cls, v):
+        return _parse_processing_error(v)
+
+    @classmethod
+    def projection(cls) -> dict[str, int]:
+        return {field: 1 for field in cls.model_fields if field != "id"}
+
+    @staticmethod
+    def from_mongo(document):
+        document["id"] = str(document.pop("_id", None))
+        return DocumentSummaryModel(**document)
+
+
+class DocumentSummaryPage(BaseModel):
+    documents: list[DocumentSummaryModel]
+    next_cursor: str | None = None  # pass back to get the following page, None on the last page
 
 
 class DocumentStorageModel(DocumentBaseModel):
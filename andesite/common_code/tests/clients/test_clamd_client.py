@@ -0,0 +1,151 @@
+import asyncio
+import struct
+import threading
+
+import pytest
+import pytest_asyncio
+
+from common.clients.clamd_client import (
+    ClamdClient,
+    ClamdClientException,
+    ClamdConfig,
+    ClamdResponse,
+    ClamdStreamTooLargeException,
+)
+
+SIGNATURE = b"FAKE-ANTIVIRUS-TEST-SIGNATURE"
+
+
+class FakeClamd:
+    """Speaks the clamd IDSESSION and INSTREAM commands, with a StreamMaxLength of `max_length`."""
+
+    def __init__(self, max_length: int = 1024):
+        self.max_length = max_length
+        self.connections = 0
+        self.active = 0
+        self.max_active = 0
+        self.chunk_sizes: list[int] = []
+        self.server: asyncio.Server | None = None
+
+    async def start(self) -> int:
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        assert await reader.readuntil(b"\0") == b"zIDSESSION\0"
+        command = 0
+        try:
+            while (request := await reader.readuntil(b"\0")) == b"zINSTREAM\0":
+                command += 1
+                self.active += 1
+                self.max_active = max(self.max_active, self.active)
+                data = b""
+                while size := struct.unpack("!L", await reader.readexactly(4))[0]:
+                    self.chunk_sizes.append(size)
+                    data += await reader.readexactly(size)
+                    if len(data) > self.max_length:
+                        writer.write(f"{command}: INSTREAM size limit exceeded. ERROR\0".encode())
+                        writer.close()
+                        return
+                await asyncio.sleep(0.01)
+                self.active -= 1
+                verdict = "Fake-Signature FOUND" if SIGNATURE in data else "OK"
+                writer.write(f"{command}: stream: {verdict}\0".encode())
+                await writer.drain()
+            assert request == b"zEND\0"
+        except asyncio.IncompleteReadError:
+            pass
+        writer.close()
+
+
+@pytest_asyncio.fixture
+async def clamd():
+    fake = FakeClamd()
+    port = await fake.start()
+    ClamdClient.initialize(ClamdConfig(host="127.0.0.1", port=port, pool_size=2, chunk_size=16, stream_max_length=512))
+    yield fake
+    await ClamdClient.close()
+    fake.server.close()
+
+
+async def _upload(*parts: bytes):
+    for part in parts:
+        yield part
+
+
+@pytest.mark.asyncio
+async def test_scans_bytes_and_async_iterators(clamd):
+    assert await ClamdClient.scan(b"hello world") == ClamdResponse(is_virus=False)
+    found = await ClamdClient.scan(_upload(b"prefix ", SIGNATURE[:10], SIGNATURE[10:]))
+    assert found == ClamdResponse(is_virus=True, virus_name="Fake-Signature")
+    assert max(clamd.chunk_sizes) == 16
+    assert clamd.connections == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_scans_are_bounded_by_pool_size(clamd):
+    results = await asyncio.gather(*(ClamdClient.scan(b"x" * 100) for _ in range(6)))
+    assert all(not result.is_virus for result in results)
+    assert clamd.max_active == 2
+    assert clamd.connections == 2
+
+
+@pytest.mark.asyncio
+async def test_stream_max_length(clamd):
+    with pytest.raises(ClamdStreamTooLargeException):
+        await ClamdClient.scan(b"x" * 513)
+    # clamd configured with a lower limit than the client
+    clamd.max_length = 100
+    with pytest.raises(ClamdStreamTooLargeException):
+        await ClamdClient.scan(_upload(b"x" * 200))
+
+    clamd.max_length = 1024
+    assert await ClamdClient.scan(b"x" * 512) == ClamdResponse(is_virus=False)
+
+
+@pytest.mark.asyncio
+async def test_requires_initialize():
+    ClamdClient._config = None
+    with pytest.raises(ClamdClientException):
+        await ClamdClient.scan(b"data")
+
+
+def test_scans_from_several_event_loops():
+    fake = FakeClamd()
+    server_loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=server_loop.run_forever, daemon=True)
+    thread.start()
+    port = asyncio.run_coroutine_threadsafe(fake.start(), server_loop).result()
+    ClamdClient.initialize(ClamdConfig(host="127.0.0.1", port=port, pool_size=1, chunk_size=16))
+
+    async def scan() -> list[ClamdResponse]:
+        # two scans with a pool of one wait on the semaphore
+        return list(await asyncio.gather(ClamdClient.scan(b"hello"), ClamdClient.scan(SIGNATURE)))
+
+    async def scan_and_close() -> list[ClamdResponse]:
+        try:
+            return await scan()
+        finally:
+            await ClamdClient.close()
+
+    try:
+        # like Celery tasks, each asyncio.run has its own event loop
+        expected = [ClamdResponse(is_virus=False), ClamdResponse(is_virus=True, virus_name="Fake-Signature")]
+        assert asyncio.run(scan()) == expected
+        assert asyncio.run(scan_and_close()) == expected
+        assert fake.connections == 2
+    finally:
+        asyncio.run_coroutine_threadsafe(_stop_server(fake), server_loop).result()
+        server_loop.call_soon_threadsafe(server_loop.stop)
+        thread.join()
+        server_loop.close()
+
+
+async def _stop_server(fake: FakeClamd):
+    fake.server.close()
+    # the sessions of the first loop were never closed, their handlers still wait for a command
+    handlers = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+    for handler in handlers:
+        handler.cancel()
+    await asyncio.gather(*handlers, return_exceptions=True)
@@ -0,0 +1,118 @@
+import asyncio
+import json
+from unittest.mock import patch
+
+import httpx
+import numpy as np
+import pytest
+
+from common.clients.azure_embed_client import AzureEmbedClient, InputType
+from common.clients.embed_batcher import EmbedBatchConfig, make_token_batches
+from common.clients.embed_client import EmbedClientConfig
+from common.clients.hf_embed_client import HFConfig, HFEmbedClient
+
+
+class FakeEmbeddings:
+    """Embeds each text as [len(text)], answering later batches sooner, and fails the first `failures` requests."""
+
+    def __init__(self, failures: int = 0, status_code: int = 429):
+        self.failures = failures
+        self.status_code = status_code
+        self.payloads: list[dict] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.content)
+        self.payloads.append(payload)
+        if self.failures:
+            self.failures -= 1
+            return httpx.Response(self.status_code, headers={"retry-after": "0"})
+
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        texts = payload.get("input", payload.get("inputs"))
+        await asyncio.sleep(0.01 / len(self.payloads))
+        self.in_flight -= 1
+
+        if "inputs" in payload:
+            return httpx.Response(200, json=[[float(len(text))] for text in texts])
+        data = [{"index": i, "embedding": [float(len(text))]} for i, text in enumerate(texts)]
+        return httpx.Response(
+            200, json={"id": "1", "object": "list", "data": data[::-1], "model": "embed", "usage": {}}
+        )
+
+
+@pytest.fixture
+def fake_embeddings():
+    fake = FakeEmbeddings()
+    transport = httpx.MockTransport(fake.handler)
+    with patch(
+        "common.clients.embed_batcher.AsyncClient",
+        new=lambda **kwargs: httpx.AsyncClient(transport=transport, **kwargs),
+    ):
+        yield fake
+
+
+def _azure_client(config: EmbedBatchConfig) -> AzureEmbedClient:
+    client = AzureEmbedClient(config)
+    client.base_url = "https://embed.example.com"
+    client.api_version = "2024-05-01-preview"
+    client.headers = {}
+    return client
+
+
+def test_make_token_batches():
+    texts = ["a" * 40, "b" * 40, "c" * 4, "d" * 4, "e" * 400]
+
+    # 10 + 10 tokens fill the first batch, the last text is over the limit on its own
+    assert make_token_batches(texts, max_inputs=10, max_tokens=20) == [texts[:2], texts[2:4], texts[4:]]
+    assert make_token_batches(texts, max_inputs=2, max_tokens=1000) == [texts[:2], texts[2:4], texts[4:]]
+    assert make_token_batches([], max_inputs=2, max_tokens=1000) == []
+
+
+@pytest.mark.asyncio
+async def test_azure_post_runs_batches_concurrently_in_order(fake_embeddings):
+    client = _azure_client(EmbedBatchConfig(max_batch_inputs=25, max_concurrent_batches=4))
+    texts = [f"{i}" + "x" * (i % 50) for i in range(250)]
+
+    embeddings = await client.embed_passages(texts)
+
+    assert embeddings.dtype == np.float32
+    assert embeddings.tolist() == [[float(len(text))] for text in texts]
+    assert len(fake_embeddings.payloads) == 10
+    assert all(payload["input_type"] == str(InputType.DOCUMENT) for payload in fake_embeddings.payloads)
+    assert 1 < fake_embeddings.max_in_flight <= 4
+
+
+@pytest.mark.asyncio
+async def test_batches_are_retried_on_throttling(fake_embeddings):
+    client = _azure_client(EmbedBatchConfig(max_retries=2))
+    fake_embeddings.failures = 2
+
+    assert (await client.embed_query("hello")).tolist() == [[5.0]]
+    assert len(fake_embeddings.payloads) == 3
+
+    fake_embeddings.failures = 3
+    with pytest.raises(httpx.HTTPStatusError):
+        await client.embed_query("hello")
+
+    fake_embeddings.failures, fake_embeddings.status_code = 1, 400
+    fake_embeddings.payloads.clear()
+    with pytest.raises(httpx.HTTPStatusError):
+        await client.embed_query("hello")
+    assert len(fake_embeddings.payloads) == 1
+
+
+@pytest.mark.asyncio
+async def test_hf_post(fake_embeddings):
+    client = HFEmbedClient(
+        HFConfig(hf=EmbedClientConfig(url="https://hf.example.com", token="")),
+        EmbedBatchConfig(max_batch_inputs=2, max_retries=0),
+    )
+
+    assert (await client.embed_passages(["a", "bb", "ccc"])).tolist() == [[1.0], [2.0], [3.0]]
+    assert [payload["inputs"] for payload in fake_embeddings.payloads] == [["a", "bb"], ["ccc"]]
+
+    fake_embeddings.failures = 1
+    assert await client.embed_passages(["a", "bb", "ccc"]) is None
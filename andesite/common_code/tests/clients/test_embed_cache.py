@@ -0,0 +1,141 @@
+import sqlite3
+
+import numpy as np
+import pytest
+from redis.exceptions import ConnectionError
+
+from common.clients.embed_cache import EmbedCache, EmbedCacheConfig, pack_vector, unpack_vector
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values: dict[str, bytes] = {}
+        self.expiries: dict[str, int] = {}
+        self.fail = False
+
+    async def mget(self, keys):
+        if self.fail:
+            raise ConnectionError("redis is down")
+        return [self.values.get(key) for key in keys]
+
+    def pipeline(self, transaction):
+        redis = self
+
+        class Pipeline:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc_info):
+                return False
+
+            def set(self, key, value, ex):
+                redis.values[key] = value
+                redis.expiries[key] = ex
+
+            async def execute(self):
+                if redis.fail:
+                    raise ConnectionError("redis is down")
+
+        return Pipeline()
+
+
+class FakeEmbedder:
+    def __init__(self):
+        self.calls: list[list[str]] = []
+
+    async def __call__(self, texts: list[str]) -> list[list[float]]:
+        self.calls.append(texts)
+        return [[len(text) / 10, -0.1] for text in texts]
+
+
+def _flat(vectors: np.ndarray) -> list[float]:
+    return vectors.ravel().tolist()
+
+
+def test_vectors_are_packed_as_float16():
+    vector = [0.1, -0.25, 1.0]
+
+    assert len(pack_vector(vector)) == 6
+    assert unpack_vector(pack_vector(vector)) == pytest.approx(vector, abs=1e-3)
+
+
+@pytest.mark.asyncio
+async def test_embed_deduplicates_and_caches_in_redis():
+    redis = FakeRedis()
+    cache = EmbedCache(EmbedCacheConfig(redis_ttl_seconds=60), redis=redis)  # type: ignore[arg-type]
+    embedder = FakeEmbedder()
+
+    vectors = await cache.embed("cohere_embed3", "document", ["a", "bb", "a"], embedder)
+
+    assert embedder.calls == [["a", "bb"]]
+    assert vectors.dtype == np.float32
+    assert _flat(vectors) == pytest.approx([0.1, -0.1, 0.2, -0.1, 0.1, -0.1])
+    assert len(redis.values) == 2
+    assert set(redis.expiries.values()) == {60}
+
+    vectors = await cache.embed("cohere_embed3", "document", ["bb", "ccc"], embedder)
+
+    assert embedder.calls[1:] == [["ccc"]]
+    assert _flat(vectors) == pytest.approx([0.2, -0.1, 0.3, -0.1], abs=1e-3)
+
+    # another input type or model never shares vectors
+    await cache.embed("cohere_embed3", "query", ["bb"], embedder)
+    await cache.embed("cohere_embed4", "document", ["bb"], embedder)
+    assert embedder.calls[2:] == [["bb"], ["bb"]]
+
+    redis.fail = True
+    assert _flat(await cache.embed("cohere_embed3", "document", ["a"], embedder)) == pytest.approx([0.1, -0.1])
+    assert embedder.calls[4:] == [["a"]]
+
+
+@pytest.mark.asyncio
+async def test_embed_uses_disk_tier_before_redis(tmp_path):
+    redis = FakeRedis()
+    config = EmbedCacheConfig(disk_path=str(tmp_path / "embeddings.sqlite3"))
+    embedder = FakeEmbedder()
+    await EmbedCache(config, redis=redis).embed("model", "document", ["a"], embedder)  # type: ignore[arg-type]
+
+    # a new process finds the vector on disk, and Redis hits are copied to disk
+    redis.fail = True
+    cache = EmbedCache(config, redis=redis)  # type: ignore[arg-type]
+    assert _flat(await cache.embed("model", "document", ["a"], embedder)) == pytest.approx([0.1, -0.1], abs=1e-3)
+    assert embedder.calls == [["a"]]
+
+    redis.fail = False
+    redis.values[cache.key("model", "document", "zz")] = pack_vector([0.5, 0.5])
+    assert (await cache.embed("model", "document", ["zz"], embedder)).tolist() == [[0.5, 0.5]]
+    redis.values.clear()
+    assert (await cache.embed("model", "document", ["zz"], embedder)).tolist() == [[0.5, 0.5]]
+    assert embedder.calls == [["a"]]
+
+
+@pytest.mark.asyncio
+async def test_disabled_cache_still_deduplicates():
+    redis = FakeRedis()
+    cache = EmbedCache(EmbedCacheConfig(enabled=False), redis=redis)  # type: ignore[arg-type]
+    embedder = FakeEmbedder()
+
+    assert _flat(await cache.embed("model", "document", ["a", "a"], embedder)) == pytest.approx([0.1, -0.1] * 2)
+    assert embedder.calls == [["a"]]
+    assert redis.values == {}
+
+
+@pytest.mark.asyncio
+async def test_failing_disk_tier_is_a_miss(tmp_path):
+    redis = FakeRedis()
+    path = tmp_path / "embeddings.sqlite3"
+    cache = EmbedCache(EmbedCacheConfig(disk_path=str(path)), redis=redis)  # type: ignore[arg-type]
+    embedder = FakeEmbedder()
+    with sqlite3.connect(path) as connection:
+        connection.execute("DROP TABLE embeddings")
+
+    assert _flat(await cache.embed("model", "document", ["a"], embedder)) == pytest.approx([0.1, -0.1])
+    assert _flat(await cache.embed("model", "document", ["a"], embedder)) == pytest.approx([0.1, -0.1], abs=1e-3)
+    assert embedder.calls == [["a"]]
+
+    # a file that is not a database leaves only the Redis tier
+    broken = tmp_path / "broken.sqlite3"
+    broken.write_bytes(b"not a database" * 100)
+    cache = EmbedCache(EmbedCacheConfig(disk_path=str(broken)), redis=redis)  # type: ignore[arg-type]
+    assert _flat(await cache.embed("model", "document", ["a", "b"], embedder)) == pytest.approx([0.1, -0.1] * 2, abs=1e-3)
+    assert embedder.calls[1:] == [["b"]]
@@ -5,7 +5,23 @@ import pytest
 import pytest_asyncio
 
 from common.clients.milvus_vdb_client import MilvusConfig, MilvusVecDBClient
-from common.clients.vdb_client import Distance, EmbedDict, VecDBClientError
+from common.clients.vdb_client import Distance, EmbedDict, Quantization, VecDBClientError
+
+
+class Float32Array:
+    """Equals a float32 NumPy array holding `values`, for asserting mock calls."""
+
+    # makes NumPy hand comparisons with arrays to __eq__ below
+    __array_ufunc__ = None
+
+    def __init__(self, values):
+        self.values = np.asarray(values, dtype=np.float32)
+
+    def __eq__(self, other):
+        return isinstance(other, np.ndarray) and other.dtype == np.float32 and np.array_equal(other, self.values)
+
+    def __repr__(self):
+        return f"Float32Array({self.values.tolist()})"
 
 
 @pytest_asyncio.fixture
@@ -173,9 +189,9 @@ class TestMilvusVecDBClient:
         ]
 
         expected_points = [
-            {"id": 0, "vector": [0.1, 0.2, 0.3], "text": "test 1"},
-            {"id": 1, "vector": [0.4, 0.5, 0.6], "text": "test 2"},
-            {"id": 2, "vector": [0.7, 0.8, 0.9], "text": "test 3"},
+            {"id": 0, "vector": Float32Array([0.1, 0.2, 0.3]), "text": "test 1"},
+            {"id": 1, "vector": Float32Array([0.4, 0.5, 0.6]), "text": "test 2"},
+            {"id": 2, "vector": Float32Array([0.7, 0.8, 0.9]), "text": "test 3"},
         ]
 
         client.async_client.upsert.return_value = {"upsert_count": 3}
@@ -320,7 +336,7 @@ class TestMilvusVecDBClient:
         client.async_client.search.assert_called_once_with(
             collection_name=col_name,
             anns_field="vector",
-            data=embedding,
+            data=Float32Array(embedding),
             limit=limit,
             search_params={"metric_type": index_details["metric_type"]},
             output_fields=["*"],
@@ -355,7 +371,7 @@ class TestMilvusVecDBClient:
         client.async_client.search.assert_called_once_with(
             collection_name=collection_name,
             anns_field="vector",
-            data=embedding,
+            data=Float32Array(embedding),
             limit=custom_limit,
             search_params={"metric_type": "IP"},
             output_fields=["*"],
@@ -428,7 +444,7 @@ class TestMilvusVecDBClient:
         client.async_client.search.assert_called_once_with(
             collection_name=collection_name,
             anns_field="vector",
-            data=query_vector,
+            data=Float32Array(query_vector),
             limit=3,  # Default limit
             search_params={"metric_type": "COSINE"},
             output_fields=["*"],
@@ -456,3 +472,82 @@ class TestMilvusVecDBClient:
         # Assert
         assert result == []
         mock_logger.info.assert_called_once()
+
+    async def test_add_vectors_in_concurrent_byte_batches(self, milvus_client):
+        """Points are split by estimated size and upserted batch by batch."""
+        client, mock_logger = milvus_client
+        client.config = client.config.model_copy(update={"insert_batch_bytes": 120})
+
+        embeddings = [EmbedDict(embedding=[0.1] * 10, payload={"text": f"t{i}"}) for i in range(5)]
+        client.async_client.upsert.side_effect = lambda collection_name, data: {"upsert_count": len(data)}
+
+        assert await client.add_vectors(collection_name="test_col", embeddings=embeddings) is True
+
+        batches = [call.kwargs["data"] for call in client.async_client.upsert.call_args_list]
+        assert [[point["id"] for point in batch] for batch in batches] == [[0, 1], [2, 3], [4]]
+        mock_logger.info.assert_called_once()
+
+    async def test_search_many_batches_queries_and_caches_index(self, milvus_client):
+        """One search request for all queries, index details fetched once."""
+        client, mock_logger = milvus_client
+        client.sync_client.list_indexes.return_value = ["idx"]
+        client.sync_client.describe_index.return_value = {"metric_type": "COSINE"}
+        client.async_client.search.return_value = [
+            [{"distance": 0.1, "entity": {"id": 1, "vector": [0.1]}}],
+            [],
+        ]
+
+        for _ in range(2):
+            results = await client.search_many(
+                collection_name="tenants",
+                embeddings=[[0.1], [0.2]],
+                limit=5,
+                query_filter="score > 0.5",
+                partition_filter={"tenant_id": 'acme "inc"'},
+                search_params={"params": {"ef": 64}},
+            )
+            assert results == [[{"distance": 0.1, "id": 1}], []]
+
+        client.sync_client.describe_index.assert_called_once()
+        client.async_client.search.assert_called_with(
+            collection_name="tenants",
+            anns_field="vector",
+            data=Float32Array([[0.1], [0.2]]),
+            limit=5,
+            search_params={"metric_type": "COSINE", "params": {"ef": 64}},
+            output_fields=["*"],
+            filter='tenant_id == "acme \\"inc\\"" and (score > 0.5)',
+        )
+
+    async def test_create_collection_with_partition_key(self, milvus_client):
+        """A partition key builds an explicit schema."""
+        client, mock_logger = milvus_client
+        client.sync_client.has_collection.return_value = False
+        schema = client.sync_client.create_schema.return_value
+
+        result = await client.create_collection(
+            collection_name="tenants", vec_size=8, partition_key="tenant_id", num_partitions=16
+        )
+
+        assert result is True
+        assert [call.kwargs["field_name"] for call in schema.add_field.call_args_list] == ["id", "vector", "tenant_id"]
+        assert schema.add_field.call_args_list[2].kwargs["is_partition_key"] is True
+        kwargs = client.async_client.create_collection.call_args.kwargs
+        assert kwargs["schema"] is schema
+        assert kwargs["num_partitions"] == 16
+
+    async def test_create_collection_with_quantization(self, milvus_client):
+        """Quantization picks the IVF_SQ8 or IVF_PQ index."""
+        client, mock_logger = milvus_client
+        client.sync_client.has_collection.return_value = False
+        index_params = client.sync_client.prepare_index_params.return_value
+
+        await client.create_collection(collection_name="docs", vec_size=1024, quantization=Quantization.INT8)
+        assert index_params.add_index.call_args.kwargs["index_type"] == "IVF_SQ8"
+
+        await client.create_collection(collection_name="docs", vec_size=1000, quantization=Quantization.PQ)
+        assert index_params.add_index.call_args.kwargs["index_type"] == "IVF_PQ"
+        assert index_params.add_index.call_args.kwargs["params"]["m"] == 125
+
+        with pytest.raises(VecDBClientError, match="float16"):
+            await client.create_collection(collection_name="docs", vec_size=8, quantization=Quantization.FLOAT16)
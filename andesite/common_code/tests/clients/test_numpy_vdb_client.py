@@ -0,0 +1,131 @@
+import numpy as np
+import pytest
+
+from common.clients.numpy_vdb_client import NumpyConfig, NumpyVecDBClient
+from common.clients.vdb_client import Distance, EmbedDict, Quantization, VecDBClient, VecDBClientError
+
+
+def _embeddings(vectors: np.ndarray, tenants: list[str]) -> list[EmbedDict]:
+    return [
+        EmbedDict(embedding=vector.tolist(), payload={"tenant": tenant, "chunk": i})
+        for i, (vector, tenant) in enumerate(zip(vectors, tenants, strict=True))
+    ]
+
+
+def _brute_force(vectors: np.ndarray, query: np.ndarray, distance: Distance, limit: int) -> list[int]:
+    match distance:
+        case Distance.COSINE:
+            scores = vectors @ query / (np.linalg.norm(vectors, axis=1) * np.linalg.norm(query))
+        case Distance.DOT:
+            scores = vectors @ query
+        case Distance.EUCLID:
+            scores = -np.linalg.norm(vectors - query, axis=1)
+        case _:
+            scores = -np.abs(vectors - query).sum(axis=1)
+    return np.argsort(-scores, kind="stable")[:limit].tolist()
+
+
+def test_implements_protocol():
+    assert isinstance(NumpyVecDBClient(), VecDBClient)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("distance", list(Distance))
+async def test_search_matches_brute_force_across_chunks(distance):
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(500, 16)).astype(np.float32)
+    queries = rng.normal(size=(3, 16)).astype(np.float32)
+    client = NumpyVecDBClient(NumpyConfig(search_chunk_rows=64))
+    await client.create_collection("docs", vec_size=16, distance_method=distance)
+    await client.add_vectors("docs", _embeddings(vectors[:200], ["a"] * 200))
+    await client.add_vectors("docs", _embeddings(vectors[200:], ["b"] * 300))
+
+    results = await client.search_many("docs", queries.tolist(), limit=5)
+
+    assert [[hit["id"] for hit in hits] for hits in results] == [
+        _brute_force(vectors, query, distance, 5) for query in queries
+    ]
+    distances = [hit["distance"] for hit in results[0]]
+    nearest_first = sorted(distances, reverse=distance in (Distance.COSINE, Distance.DOT))
+    assert distances == pytest.approx(nearest_first)
+
+
+@pytest.mark.asyncio
+async def test_filters_and_deletes_by_payload():
+    rng = np.random.default_rng(1)
+    vectors = rng.normal(size=(30, 4)).astype(np.float32)
+    client = NumpyVecDBClient()
+    await client.create_collection("docs", vec_size=4)
+    await client.add_vectors("docs", _embeddings(vectors, ["a", "b", "c"] * 10))
+
+    hits = await client.query_vectors("docs", [vectors[0].tolist()], limit=50, query_filter={"tenant": "b"})
+    assert len(hits) == 10
+    assert {hit["tenant"] for hit in hits} == {"b"}
+
+    hits = await client.query_vectors("docs", [vectors[0].tolist()], limit=50, query_filter={"tenant": ["a", "c"]})
+    assert hits[0] == {"id": 0, "distance": pytest.approx(1.0), "tenant": "a", "chunk": 0}
+    assert len(hits) == 20
+    assert await client.query_vectors("docs", [vectors[0].tolist()], query_filter={"missing": 1}) == []
+
+    assert await client.delete_by_filter("docs", '{"tenant": "a"}') is True
+    assert await client.num_entities("docs") == 20
+    hits = await client.query_vectors("docs", [vectors[0].tolist()], limit=50)
+    assert 0 not in {hit["id"] for hit in hits}
+
+    with pytest.raises(VecDBClientError):
+        await client.delete_by_filter("docs", "tenant == 'a'")
+    with pytest.raises(VecDBClientError):
+        await client.add_vectors("docs", [EmbedDict(embedding=[0.1, 0.2], payload={})])
+
+
+@pytest.mark.asyncio
+async def test_persists_to_memory_mapped_files_and_snapshots(tmp_path):
+    rng = np.random.default_rng(2)
+    vectors = rng.normal(size=(10, 8)).astype(np.float32)
+    config = NumpyConfig(data_dir=str(tmp_path / "data"), dtype="float16")
+    client = NumpyVecDBClient(config)
+    await client.create_collection("docs", vec_size=8, distance_method=Distance.DOT)
+    await client.add_vectors("docs", _embeddings(vectors, ["a"] * 10))
+    await client.flush("docs")
+    assert await client.create_snapshot("docs") is True
+
+    reopened = NumpyVecDBClient(config)
+    assert await reopened.list_collections() == ["docs"]
+    assert isinstance(reopened._collections["docs"].vectors, np.memmap)
+    hits = await reopened.query_vectors("docs", [vectors[3].tolist()], limit=1)
+    assert hits[0]["id"] == 3
+    assert hits[0]["distance"] == pytest.approx(float(vectors[3] @ vectors[3]), rel=1e-2)
+
+    # changes copy the mapped arrays, and a snapshot brings the old state back
+    await reopened.add_vectors("docs", _embeddings(vectors[:2], ["b", "b"]))
+    await reopened.delete_by_filter("docs", '{"tenant": "a"}')
+    assert await reopened.num_entities("docs") == 2
+    (snapshot,) = (tmp_path / "data" / "snapshots").iterdir()
+    await reopened.recover_from_snapshot("docs", snapshot.name)
+    assert await reopened.num_entities("docs") == 10
+
+    assert await NumpyVecDBClient(config).num_entities("docs") == 10
+
+
+@pytest.mark.asyncio
+async def test_quantization_sets_storage_dtype():
+    client = NumpyVecDBClient()
+    await client.create_collection("docs", vec_size=4, quantization=Quantization.FLOAT16)
+    await client.add_vectors("docs", [EmbedDict(embedding=np.ones(4, dtype=np.float32), payload={})])
+    assert client._collections["docs"].vectors.dtype == np.float16
+
+    with pytest.raises(VecDBClientError):
+        await client.create_collection("tickets", vec_size=4, quantization=Quantization.INT8)
+
+
+@pytest.mark.asyncio
+async def test_accepts_float32_arrays():
+    vectors = np.eye(4, dtype=np.float32)
+    client = NumpyVecDBClient()
+    await client.create_collection("docs", vec_size=4)
+    await client.add_vectors("docs", [EmbedDict(embedding=vector, payload={"i": i}) for i, vector in enumerate(vectors)])
+
+    hits = await client.query_vectors("docs", vectors[2:3], limit=1)
+
+    assert hits == [{"id": 2, "distance": pytest.approx(1.0), "i": 2}]
+    assert await client.search_many("docs", np.empty((0, 4), dtype=np.float32)) == []
@@ -0,0 +1,165 @@
+import json
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock
+
+import numpy as np
+import pytest
+from pydantic import ValidationError
+
+from common.clients import pg_vdb_client
+from common.clients.pg_vdb_client import PgVector
+from common.clients.vdb_client import Distance, Quantization
+
+
+class FakePool:
+    def __init__(self):
+        self.executemany = AsyncMock()
+        self.fetchval = AsyncMock(side_effect=lambda sql, *args: "vector" if "typname" in sql else False)
+        self.execute = AsyncMock(return_value="CREATE TABLE")
+        self.copied: list[list[tuple]] = []
+        self.acquired = 0
+        self.conn = AsyncMock()
+        self.conn.copy_records_to_table = self._copy_records_to_table
+        self.conn.transaction = self._transaction
+        self.transactions = 0
+
+    async def _copy_records_to_table(self, table, records, columns):
+        assert table == "docs"
+        assert columns == ["embedding", "payload"]
+        self.copied.append(list(records))
+
+    @asynccontextmanager
+    async def _transaction(self):
+        self.transactions += 1
+        yield
+
+    @asynccontextmanager
+    async def acquire(self):
+        self.acquired += 1
+        yield self.conn
+
+
+def _embeddings(n: int):
+    return [{"embedding": [float(i), 0.5], "payload": {"i": i}} for i in range(n)]
+
+
+@pytest.fixture
+def pg_client():
+    client = PgVector()
+    client.pool = FakePool()  # type: ignore[assignment]
+    return client
+
+
+@pytest.mark.asyncio
+async def test_add_vectors_small_load_uses_prepared_insert(pg_client):
+    assert await pg_client.add_vectors("docs", _embeddings(3)) is True
+
+    sql, records = pg_client.pool.executemany.call_args.args
+    assert sql == "INSERT INTO docs (embedding, payload) VALUES ($1, $2)"
+    assert [(vector.dtype, vector.tolist(), payload) for vector, payload in records] == [
+        (np.float32, [0.0, 0.5], '{"i": 0}'),
+        (np.float32, [1.0, 0.5], '{"i": 1}'),
+        (np.float32, [2.0, 0.5], '{"i": 2}'),
+    ]
+    assert pg_client.pool.copied == []
+
+
+@pytest.mark.asyncio
+async def test_add_vectors_large_load_is_copied_in_batches(pg_client, monkeypatch):
+    monkeypatch.setattr(pg_vdb_client, "COPY_THRESHOLD", 10)
+
+    assert await pg_client.add_vectors("docs", _embeddings(10)) is True
+    assert await pg_client.copy_vectors("docs", _embeddings(5), batch_size=2) is True
+
+    pg_client.pool.executemany.assert_not_called()
+    assert [len(batch) for batch in pg_client.pool.copied] == [10, 2, 2, 1]
+    assert pg_client.pool.acquired == 4
+    assert json.loads(pg_client.pool.copied[0][9][1]) == {"i": 9}
+
+
+@pytest.mark.asyncio
+async def test_inputs_are_validated(pg_client):
+    with pytest.raises(ValidationError):
+        await pg_client.add_vectors("docs; DROP TABLE docs", _embeddings(1))
+    with pytest.raises(ValidationError):
+        await pg_client.create_collection("docs", vec_size=0, distance_method=Distance.COSINE)
+
+    assert await pg_client.create_collection("docs", vec_size=3, distance_method=Distance.COSINE) is True
+    assert pg_client.pool.execute.call_args.args[0].startswith("CREATE TABLE docs ")
+
+
+@pytest.mark.asyncio
+async def test_requires_connection():
+    with pytest.raises(ValueError, match="not established"):
+        await PgVector().add_vectors("docs", _embeddings(1))
+
+
+@pytest.mark.asyncio
+async def test_search_vectors_groups_rows_per_query(pg_client):
+    pg_client.pool.conn.fetch.return_value = [
+        {"ord": 1, "id": 7, "payload": "{}", "distance": 0.1},
+        {"ord": 1, "id": 3, "payload": "{}", "distance": 0.2},
+        {"ord": 3, "id": 7, "payload": "{}", "distance": 0.4},
+    ]
+
+    results = await pg_client.search_vectors("docs", [[1.0, 0.0], [0.0, 1.0], [0.5, 0.5]], limit=2)
+
+    assert [[row["id"] for row in rows] for rows in results] == [[7, 3], [], [7]]
+    sql, queries, limit = pg_client.pool.conn.fetch.call_args.args
+    assert "CROSS JOIN LATERAL" in sql
+    assert "SELECT id, payload, embedding <=>" in sql
+    assert "WHERE" not in sql
+    assert queries == ["[1.0,0.0]", "[0.0,1.0]", "[0.5,0.5]"]
+    assert limit == 2
+    assert pg_client.pool.transactions == 0
+
+
+@pytest.mark.asyncio
+async def test_search_vectors_with_filter_and_tuning(pg_client):
+    pg_client.pool.conn.fetch.return_value = []
+
+    results = await pg_client.search_vectors(
+        "docs",
+        [[1.0, 0.0]],
+        limit=50,
+        distance=Distance.DOT,
+        payload_filter={"doc_id": "a"},
+        ef_search=200,
+        with_embedding=True,
+    )
+
+    assert results == [[]]
+    sql, _, _, payload_filter = pg_client.pool.conn.fetch.call_args.args
+    assert "SELECT id, payload, embedding, embedding <#>" in sql
+    assert "WHERE payload::jsonb @> $3::jsonb" in sql
+    assert json.loads(payload_filter) == {"doc_id": "a"}
+    assert pg_client.pool.transactions == 1
+    pg_client.pool.conn.execute.assert_awaited_once_with("SELECT set_config($1, $2, true)", "hnsw.ef_search", "200")
+
+    with pytest.raises(ValidationError):
+        await pg_client.search_vectors("docs", [[1.0, 0.0]], ef_search=5000)
+
+
+@pytest.mark.asyncio
+async def test_float16_collections_use_halfvec(pg_client):
+    assert await pg_client.create_collection(
+        "docs", vec_size=3, distance_method=Distance.COSINE, quantization=Quantization.FLOAT16
+    )
+    assert "embedding halfvec(3)" in pg_client.pool.execute.call_args.args[0]
+
+    pg_client.pool.conn.fetch.return_value = []
+    await pg_client.search_vectors("docs", np.array([[1.0, 0.0, 0.0]], dtype=np.float32))
+    sql, queries, _ = pg_client.pool.conn.fetch.call_args.args
+    assert "q.query::halfvec" in sql
+    assert queries == ["[1.0,0.0,0.0]"]
+
+    pg_client.pool.execute.return_value = "CREATE INDEX"
+    assert await pg_client.index_collection("docs", Distance.COSINE) is True
+    assert pg_client.pool.execute.call_args.args[0].endswith("(embedding halfvec_cosine_ops)")
+
+    # collections created elsewhere have their column type looked up once
+    await pg_client.index_collection("other", Distance.DOT)
+    assert pg_client.pool.execute.call_args.args[0].endswith("(embedding vector_ip_ops)")
+
+    with pytest.raises(ValueError, match="int8"):
+        await pg_client.create_collection("docs", 3, Distance.COSINE, quantization=Quantization.INT8)
@@ -0,0 +1,230 @@
+import hashlib
+import json
+import threading
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from botocore.exceptions import ClientError
+
+from common.clients.numpy_vdb_client import NumpyConfig, NumpyVecDBClient
+from common.clients.qdrant_vdb_client import QdrantVector
+from common.clients.vdb_client import EmbedDict
+from common.clients.vdb_s3client import MIB, S3Client, SnapshotTransferConfig, _file_digests
+
+PART_SIZE = 5 * MIB
+
+
+class FakeBody:
+    def __init__(self, data: bytes):
+        self.data = data
+
+    def iter_chunks(self, chunk_size: int):
+        for i in range(0, len(self.data), chunk_size):
+            yield self.data[i : i + chunk_size]
+
+
+class FakeS3:
+    """Keeps objects in memory, ETags are built the way S3 builds them for PART_SIZE uploads."""
+
+    def __init__(self):
+        self.objects: dict[str, tuple[bytes, dict[str, str]]] = {}
+        self.uploads: list[str] = []
+        self.ranges: list[str] = []
+        self.lock = threading.Lock()
+
+    def put(self, key: str, data: bytes, metadata: dict[str, str] | None = None):
+        self.objects[key] = (data, metadata or {})
+
+    def _etag(self, data: bytes) -> str:
+        if len(data) < PART_SIZE:
+            return f'"{hashlib.md5(data).hexdigest()}"'
+        digests = [hashlib.md5(data[i : i + PART_SIZE]).digest() for i in range(0, len(data), PART_SIZE)]
+        return f'"{hashlib.md5(b"".join(digests)).hexdigest()}-{len(digests)}"'
+
+    def list_objects_v2(self, Bucket):
+        return {"Contents": [{"Key": key} for key in self.objects]}
+
+    def get_paginator(self, name):
+        fake = self
+
+        class Paginator:
+            def paginate(self, Bucket):
+                keys = list(fake.objects)
+                yield {"Contents": [{"Key": key} for key in keys[:1]]}
+                yield {"Contents": [{"Key": key} for key in keys[1:]]}
+
+        return Paginator()
+
+    def head_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise ClientError({"Error": {"Code": "404"}}, "HeadObject")
+        data, metadata = self.objects[Key]
+        return {"ContentLength": len(data), "ETag": self._etag(data), "Metadata": metadata}
+
+    def get_object(self, Bucket, Key, Range, IfMatch):
+        data, _ = self.objects[Key]
+        assert IfMatch == self._etag(data)
+        start, end = (int(x) for x in Range.removeprefix("bytes=").split("-"))
+        with self.lock:
+            self.ranges.append(Range)
+        return {"Body": FakeBody(data[start : end + 1])}
+
+    def upload_file(self, Filename, Bucket, Key, ExtraArgs, Config):
+        assert Config.multipart_chunksize == PART_SIZE
+        with open(Filename, "rb") as f:
+            self.put(Key, f.read(), ExtraArgs["Metadata"])
+        with self.lock:
+            self.uploads.append(Key)
+
+
+@pytest.fixture
+def s3(tmp_path):
+    fake = FakeS3()
+    with patch.object(S3Client, "_init_boto", return_value=fake):
+        client = S3Client("snapshots", SnapshotTransferConfig(part_size_bytes=PART_SIZE, max_concurrent_parts=3))
+    client.save_directory = tmp_path
+    return client, fake
+
+
+def test_file_digests_match_s3_etags(tmp_path):
+    fake = FakeS3()
+    for size in (10, PART_SIZE, 2 * PART_SIZE + 7):
+        path = tmp_path / f"{size}.bin"
+        data = bytes(range(256)) * (size // 256) + b"x" * (size % 256)
+        path.write_bytes(data)
+
+        sha256, etags = _file_digests(path, [PART_SIZE, 8 * MIB])
+
+        assert sha256 == hashlib.sha256(data).hexdigest()
+        assert etags[PART_SIZE] == fake._etag(data).strip('"')
+
+
+@pytest.mark.asyncio
+async def test_upload_skips_unchanged_snapshots(s3):
+    client, fake = s3
+    (client.save_directory / "docs-2024-01-01-00-00-00.snapshot").write_bytes(b"old")
+    (client.save_directory / "docs-2024-02-01-00-00-00.snapshot").write_bytes(b"new" * MIB * 2)
+    (client.save_directory / "tickets-2024-01-01-00-00-00.snapshot").write_bytes(b"tickets")
+    # uploaded earlier without the sha256 metadata, recognized by its ETag
+    fake.put("tickets-2024-01-01-00-00-00.snapshot", b"tickets")
+
+    assert await client.upload_snapshots_async() == ["docs-2024-02-01-00-00-00.snapshot"]
+    assert await client.upload_snapshots_async() == []
+
+    (client.save_directory / "tickets-2024-01-01-00-00-00.snapshot").write_bytes(b"tickets v2")
+    client.upload_snapshots()
+    assert fake.uploads == ["docs-2024-02-01-00-00-00.snapshot", "tickets-2024-01-01-00-00-00.snapshot"]
+
+
+@pytest.mark.asyncio
+async def test_download_resumes_missing_parts(s3):
+    client, fake = s3
+    key = "docs-2024-02-01-00-00-00.snapshot"
+    data = bytes(range(256)) * (4 * PART_SIZE // 256) + b"tail"
+    fake.put(key, data, {"sha256": hashlib.sha256(data).hexdigest()})
+
+    # an earlier run wrote parts 0 and 2 before it was interrupted
+    partial = client.save_directory / f"{key}.part"
+    partial.write_bytes(
+        data[:PART_SIZE] + bytes(PART_SIZE) + data[2 * PART_SIZE : 3 * PART_SIZE] + bytes(PART_SIZE + 4)
+    )
+    etag = fake.head_object(Bucket="snapshots", Key=key)["ETag"]
+    state = {"etag": etag, "size": len(data), "part_size": PART_SIZE, "done": [0, 2]}
+    (client.save_directory / f"{key}.part.json").write_text(json.dumps(state))
+
+    path = await client.download_snapshot(key)
+
+    assert path.read_bytes() == data
+    assert sorted(fake.ranges) == sorted(
+        [
+            f"bytes={PART_SIZE}-{2 * PART_SIZE - 1}",
+            f"bytes={3 * PART_SIZE}-{4 * PART_SIZE - 1}",
+            f"bytes={4 * PART_SIZE}-{len(data) - 1}",
+        ]
+    )
+    assert not partial.exists()
+    assert not (client.save_directory / f"{key}.part.json").exists()
+
+    fake.ranges.clear()
+    assert await client.download_snapshot(key) == path
+    assert fake.ranges == []
+
+
+@pytest.mark.asyncio
+async def test_restore_recovers_latest_snapshot_per_collection(s3):
+    client, fake = s3
+    fake.put("docs-2024-01-01-00-00-00.snapshot", b"old")
+    fake.put("docs-2024-02-01-00-00-00.snapshot", b"new")
+    fake.put("tickets-2024-01-01-00-00-00.snapshot", b"tickets")
+    fake.put("broken-2024-01-01-00-00-00.snapshot", b"broken")
+    vdb = AsyncMock()
+
+    async def recover(collection_name, filename, wait):
+        if collection_name == "broken":
+            raise RuntimeError("corrupt snapshot")
+
+    vdb.recover_from_snapshot.side_effect = recover
+
+    restored = await client.restore_snapshots(vdb)
+
+    assert sorted(restored) == ["docs", "tickets"]
+    recovered = {call.args[0]: call.args[1] for call in vdb.recover_from_snapshot.call_args_list}
+    assert recovered["docs"] == (client.save_directory / "docs-2024-02-01-00-00-00.snapshot").as_uri()
+    assert (client.save_directory / "docs-2024-02-01-00-00-00.snapshot").read_bytes() == b"new"
+    assert not (client.save_directory / "docs-2024-01-01-00-00-00.snapshot").exists()
+
+
+@pytest.mark.asyncio
+async def test_restore_gives_qdrant_a_snapshot_url(s3):
+    client, fake = s3
+    fake.put("docs-2024-02-01-00-00-00.snapshot", b"new")
+    # without __init__, which would connect to a Qdrant server
+    qdrant = QdrantVector.__new__(QdrantVector)
+    qdrant.client = AsyncMock()
+
+    assert await client.restore_snapshots(qdrant) == ["docs"]
+
+    location = qdrant.client.recover_snapshot.call_args.kwargs["location"]
+    assert location == (client.save_directory / "docs-2024-02-01-00-00-00.snapshot").as_uri()
+    assert location.startswith("file:///")
+
+
+@pytest.mark.asyncio
+async def test_restore_into_numpy_client(s3, tmp_path):
+    client, fake = s3
+    source = NumpyVecDBClient(NumpyConfig(data_dir=str(tmp_path / "source")))
+    await source.create_collection("docs", vec_size=2)
+    await source.add_vectors("docs", [EmbedDict(embedding=[1.0, 0.0], payload={"n": 1})])
+    assert await source.create_snapshot("docs")
+    snapshot = next((tmp_path / "source").rglob("*.npz"))
+    fake.put("docs-2024-02-01-00-00-00.snapshot", snapshot.read_bytes())
+
+    target = NumpyVecDBClient(NumpyConfig(data_dir=str(tmp_path / "target")))
+    assert await client.restore_snapshots(target) == ["docs"]
+    assert await target.num_entities("docs") == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_part_waits_for_the_other_parts(s3):
+    client, fake = s3
+    key = "docs-2024-02-01-00-00-00.snapshot"
+    data = bytes(range(256)) * (3 * PART_SIZE // 256)
+    fake.put(key, data)
+    get_object = fake.get_object
+
+    def failing_get_object(Bucket, Key, Range, IfMatch):
+        if Range.startswith("bytes=0-"):
+            raise ClientError({"Error": {"Code": "500"}}, "GetObject")
+        return get_object(Bucket, Key, Range, IfMatch)
+
+    fake.get_object = failing_get_object
+    with pytest.raises(ClientError):
+        await client.download_snapshot(key)
+
+    # the parts that succeeded were written and recorded before the error surfaced
+    state = json.loads((client.save_directory / f"{key}.part.json").read_text())
+    assert state["done"] == [1, 2]
+    assert (client.save_directory / f"{key}.part").read_bytes()[PART_SIZE:] == data[PART_SIZE:]
+
+    fake.get_object = get_object
+    assert (await client.download_snapshot(key)).read_bytes() == data
@@ -2,10 +2,12 @@ import pytest
 from mongomock_motor import AsyncMongoMockClient  # type: ignore[import-untyped]
 
 from common.managers.dataset_descriptions.dataset_description_manager import (
+    DatasetDescriptionException,
     DatasetDescriptionManager,
 )
 from common.managers.dataset_descriptions.dataset_description_model import (
     DatasetDescription,
+    DatasetDescriptionEnrichment,
 )
 from common.models.connector_id_enum import ConnectorIdEnum
 
@@ -80,3 +82,46 @@ async def test_delete_dataset_description(
 
     dataset_descriptions = await dataset_description_manager.get_dataset_descriptions_async(connector)
     assert len(dataset_descriptions) == 0
+
+
+@pytest.mark.asyncio
+async def test_bulk_write_dataset_descriptions(
+    dataset_description_manager: DatasetDescriptionManager,
+) -> None:
+    connector = ConnectorIdEnum.CONFLUENCE
+    await dataset_description_manager.set_dataset_description_async(
+        DatasetDescription(connector=connector, path=["space", "described"], description="written by a user")
+    )
+    await dataset_description_manager.set_dataset_description_async(
+        DatasetDescription(connector=connector, path=["space", "removed"], description="")
+    )
+
+    await dataset_description_manager.bulk_write_dataset_descriptions_async(
+        [
+            DatasetDescription(
+                connector=connector,
+                path=["space"],
+                description="",
+                enrichment=DatasetDescriptionEnrichment(last_updated="2025-01-01T00:00:00+00:00"),
+            ),
+            DatasetDescription(connector=connector, path=["space", "described"], description=""),
+            DatasetDescription(connector=connector, path=["space", "new"], description="crawled"),
+        ],
+        delete_paths=[["space", "removed"]],
+        connector=connector,
+    )
+
+    dataset_descriptions = {
+        tuple(d.path): d for d in await dataset_description_manager.get_dataset_descriptions_async(connector)
+    }
+    assert {path: d.description for path, d in dataset_descriptions.items()} == {
+        ("space",): "",
+        ("space", "described"): "written by a user",
+        ("space", "new"): "crawled",
+    }
+    space_enrichment = dataset_descriptions[("space",)].enrichment
+    assert space_enrichment is not None
+    assert space_enrichment.last_updated == "2025-01-01T00:00:00+00:00"
+
+    with pytest.raises(DatasetDescriptionException):
+        await dataset_description_manager.bulk_write_dataset_descriptions_async([], delete_paths=[["space"]])
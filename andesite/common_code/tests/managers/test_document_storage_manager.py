@@ -1,7 +1,10 @@
+import datetime
+
 import pytest
 from mongomock_motor import AsyncMongoMockClient  # type: ignore[import-untyped]
 
 from common.managers.document_storage.document_storage_manager import (
+    DocumentStorageException,
     DocumentStorageManager,
 )
 from common.models.document import DocumentStorageModel
@@ -95,3 +98,48 @@ async def test_archive_all_docs(doc_storage_manager) -> None:
 
     all_docs = await doc_storage_manager.get_all_documents_async()
     assert len(all_docs) == 0
+
+
+@pytest.mark.asyncio
+async def test_list_document_summaries_pages_newest_first(doc_storage_manager) -> None:
+    uploaded_at = datetime.datetime(2025, 6, 1, tzinfo=datetime.UTC)
+    docs = []
+    # two documents share an upload time, the id breaks the tie
+    for i, day in enumerate([1, 2, 2, 3, 4]):
+        doc = DocumentStorageModel(
+            name=f"doc {i}",
+            file_name=f"doc{i}.pdf",
+            mime_type="application/pdf",
+            s3_bucket="1234",
+            s3_key="1234",
+            full_text="x" * 1000,
+            uploaded_at=uploaded_at + datetime.timedelta(days=day),
+        )
+        docs.append(await doc_storage_manager.upsert_document_async(doc))
+    await doc_storage_manager.archive_document_async(docs[3].id)
+
+    names = []
+    cursor = None
+    while True:
+        page = await doc_storage_manager.list_document_summaries_async(limit=2, cursor=cursor)
+        assert len(page.documents) <= 2
+        names += [summary.name for summary in page.documents]
+        if page.next_cursor is None:
+            break
+        cursor = page.next_cursor
+
+    assert names == ["doc 4", "doc 2", "doc 1", "doc 0"]
+    assert page.documents[-1].file_name == "doc0.pdf"
+
+
+@pytest.mark.asyncio
+async def test_list_document_summaries_invalid_cursor(doc_storage_manager) -> None:
+    with pytest.raises(DocumentStorageException):
+        await doc_storage_manager.list_document_summaries_async(cursor="not a cursor")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("limit", [0, -1])
+async def test_list_document_summaries_invalid_limit(doc_storage_manager, limit) -> None:
+    with pytest.raises(DocumentStorageException):
+        await doc_storage_manager.list_document_summaries_async(limit=limit)
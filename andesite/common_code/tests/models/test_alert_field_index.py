@@ -0,0 +1,103 @@
+from datetime import UTC, datetime
+
+import pytest
+
+from common.models.alert_attributes import AlertAttribute, AlertAttributeContext
+from common.models.alert_field_index import AlertFieldIndex
+from common.models.alerts import Alert, AlertDetailsTable
+from common.models.connector_id_enum import ConnectorIdEnum
+
+
+def _attribute(name: str, mappings: dict[ConnectorIdEnum, list[str]], weight: float = 1.0) -> AlertAttribute:
+    return AlertAttribute(
+        id=name,
+        attribute_name=name,
+        mappings=mappings,
+        context_weights={AlertAttributeContext.grouping: weight},
+        created_at=datetime.now(UTC),
+    )
+
+
+def _alert(id: str, connector: ConnectorIdEnum, details: dict) -> Alert:
+    return Alert(
+        id=id,
+        time=datetime.now(UTC),
+        connector=connector,
+        title="title",
+        description="description",
+        details_table=AlertDetailsTable.model_validate(details),
+    )
+
+
+@pytest.fixture
+def index():
+    return AlertFieldIndex(
+        [
+            _attribute(
+                "computer",
+                {ConnectorIdEnum.SPLUNK: ["Computer"], ConnectorIdEnum.ELASTIC: ["winlog.computer_name"]},
+            ),
+            _attribute("user", {ConnectorIdEnum.SPLUNK: ["User"]}),
+            _attribute("ignored", {ConnectorIdEnum.SPLUNK: ["Severity"]}, weight=0.0),
+        ]
+    )
+
+
+def test_add_returns_candidates_sharing_attribute(index):
+    assert index.add(_alert("1", ConnectorIdEnum.SPLUNK, {"Computer": "host-a", "User": "bob"})) == set()
+    assert index.add(_alert("2", ConnectorIdEnum.ELASTIC, {"winlog": {"computer_name": "host-a"}})) == {"1"}
+    assert index.add(_alert("3", ConnectorIdEnum.SPLUNK, {"Computer": "host-b", "User": "bob"})) == {"1"}
+    assert index.add(_alert("4", ConnectorIdEnum.SPLUNK, {"Computer": "host-c", "Severity": "high"})) == set()
+    assert index.add(_alert("5", ConnectorIdEnum.SPLUNK, {"Severity": "high"})) == set()
+
+    assert list(index.candidate_pairs()) == [("1", "2"), ("1", "3")]
+    assert index.shared_attributes("1", "2") == {"computer"}
+    assert index.shared_attributes("1", "3") == {"user"}
+    assert index.shared_attributes("2", "3") == set()
+
+
+def test_canonical_field_on_alert_is_preferred(index):
+    index.add(_alert("1", ConnectorIdEnum.SPLUNK, {"computer": "host-a", "Computer": "host-z"}))
+    assert index.add(_alert("2", ConnectorIdEnum.SPLUNK, {"Computer": "host-a"})) == {"1"}
+
+
+def test_list_values_are_matched_whole(index):
+    index.add(_alert("1", ConnectorIdEnum.SPLUNK, {"User": ["alice", "bob"]}))
+    assert index.add(_alert("2", ConnectorIdEnum.SPLUNK, {"User": ["alice", "bob"]})) == {"1"}
+    assert index.add(_alert("3", ConnectorIdEnum.SPLUNK, {"User": ["alice"]})) == set()
+
+
+def test_remove_and_readd(index):
+    index.add(_alert("1", ConnectorIdEnum.SPLUNK, {"Computer": "host-a"}))
+    index.add(_alert("2", ConnectorIdEnum.SPLUNK, {"Computer": "host-a"}))
+    index.remove("1")
+    assert "1" not in index
+    assert index.candidates("2") == set()
+
+    index.add(_alert("2", ConnectorIdEnum.SPLUNK, {"Computer": "host-b"}))
+    assert len(index) == 1
+    assert index.add(_alert("3", ConnectorIdEnum.SPLUNK, {"Computer": "host-a"})) == set()
+
+
+def test_max_key_frequency_skips_common_values():
+    index = AlertFieldIndex(
+        [_attribute("user", {ConnectorIdEnum.SPLUNK: ["User"]})],
+        max_key_frequency=2,
+    )
+    assert index.add(_alert("1", ConnectorIdEnum.SPLUNK, {"User": "system"})) == set()
+    assert index.add(_alert("2", ConnectorIdEnum.SPLUNK, {"User": "system"})) == {"1"}
+    assert index.add(_alert("3", ConnectorIdEnum.SPLUNK, {"User": "system"})) == set()
+    assert list(index.candidate_pairs()) == []
+
+
+def test_candidates_agree_with_matching_fields(index):
+    alerts = [
+        _alert(str(i), ConnectorIdEnum.SPLUNK, {"Computer": f"host-{i % 3}", "User": f"user-{i % 4}"})
+        for i in range(12)
+    ]
+    index.add_many(alerts)
+    pairs = set(index.candidate_pairs())
+
+    for i, alert in enumerate(alerts):
+        for other in alerts[i + 1 :]:
+            assert ((alert.id, other.id) in pairs) == bool(alert.matching_fields(other, {"Computer", "User"}))
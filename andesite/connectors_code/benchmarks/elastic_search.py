@@ -0,0 +1,97 @@
+"""
+Compares `ElasticClient.paginated_search` with the point-in-time sliced search against a local
+Elasticsearch-compatible stub that adds a fixed latency to every request.
+
+Usage: python -m benchmarks.elastic_search [--docs 50000] [--latency-ms 25] [--slices 1 2 4 8]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Any
+
+from aiohttp import web
+from pydantic import SecretStr
+
+from connectors.elastic.connector.client import ElasticClient
+
+HEADERS = {"X-Elastic-Product": "Elasticsearch", "Content-Type": "application/json"}
+
+
+def _stub_app(total_docs: int, latency_s: float) -> web.Application:
+    docs = [{"_index": "alerts", "_id": str(i), "_source": {"n": i, "@timestamp": i}} for i in range(total_docs)]
+
+    async def _respond(body: dict[str, Any]) -> web.Response:
+        await asyncio.sleep(latency_s)
+        return web.Response(text=json.dumps(body), headers=HEADERS)
+
+    async def open_pit(request: web.Request) -> web.Response:
+        return await _respond({"id": "stub-pit"})
+
+    async def close_pit(request: web.Request) -> web.Response:
+        return await _respond({"succeeded": True, "num_freed": 1})
+
+    async def search(request: web.Request) -> web.Response:
+        body = await request.json()
+        size = body.get("size", 10)
+        slice_ = body.get("slice", {"id": 0, "max": 1})
+        after = body.get("search_after", [-1])[0]
+        page = []
+        for doc in docs:
+            n = doc["_source"]["n"]
+            if n > after and n % slice_["max"] == slice_["id"]:
+                page.append({**doc, "sort": [n]})
+                if len(page) == size:
+                    break
+        return await _respond({"pit_id": "stub-pit", "hits": {"total": {"value": len(docs)}, "hits": page}})
+
+    app = web.Application()
+    app.router.add_post("/{index}/_pit", open_pit)
+    app.router.add_delete("/_pit", close_pit)
+    app.router.add_post("/_search", search)
+    app.router.add_post("/{index}/_search", search)
+    return app
+
+
+async def _run(total_docs: int, latency_ms: int, slices: list[int], size: int):
+    runner = web.AppRunner(_stub_app(total_docs, latency_ms / 1000))
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]  # type: ignore[union-attr]
+    client = ElasticClient.get_client(f"http://127.0.0.1:{port}", SecretStr("benchmark"))
+    query = {"query": {"match_all": {}}, "sort": [{"@timestamp": "asc"}]}
+
+    try:
+        start = time.perf_counter()
+        hits = await client.paginated_search(index="alerts", query=query, size=size)
+        elapsed = time.perf_counter() - start
+        print(f"paginated_search          {len(hits):>8} hits {elapsed:8.2f}s {len(hits) / elapsed:>12.0f} hits/s")
+
+        for slice_count in slices:
+            start = time.perf_counter()
+            count = 0
+            async for _ in client.sliced_search(
+                index="alerts", query=query, slices=slice_count, size=size, max_concurrency=slice_count
+            ):
+                count += 1
+            elapsed = time.perf_counter() - start
+            print(f"sliced_search slices={slice_count:<3} {count:>8} hits {elapsed:8.2f}s {count / elapsed:>12.0f} hits/s")
+    finally:
+        await ElasticClient.close_all()
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=50_000)
+    parser.add_argument("--latency-ms", type=int, default=25)
+    parser.add_argument("--size", type=int, default=1000)
+    parser.add_argument("--slices", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+    asyncio.run(_run(args.docs, args.latency_ms, args.slices, args.size))
+
+
+if __name__ == "__main__":
+    main()
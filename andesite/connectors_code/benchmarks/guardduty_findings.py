@@ -0,0 +1,166 @@
+"""
+Compares listing and hydrating GuardDuty findings the way the connector used to (a boto3 client per call, the
+paginator iterated on the event loop and get_findings batches sent one after the other) with
+`GuarddutyConnectorTools.get_guardduty_findings_async`, against a local GuardDuty stub that adds a fixed latency
+to every request.
+
+Usage: python -m benchmarks.guardduty_findings [--findings 2000] [--latency-ms 50] [--concurrency 1 4 8]
+"""
+
+import argparse
+import asyncio
+import json
+import threading
+import time
+from typing import Any
+from unittest.mock import patch
+
+import boto3
+from aiohttp import web
+from common.models.connector_id_enum import ConnectorIdEnum
+from common.models.secret import StorableSecret
+from pydantic import SecretStr
+
+from connectors.guardduty.connector.aws import get_client_context
+from connectors.guardduty.connector.config import GuarddutyConnectorConfig
+from connectors.guardduty.connector.secrets import GuarddutySecrets
+from connectors.guardduty.connector.target import GuarddutyTarget
+from connectors.guardduty.connector.tools import GetGuarddutyFindingsInput, GuarddutyConnectorTools
+
+DETECTOR_ID = "stub-detector"
+PAGE_SIZE = 50
+
+
+def _stub_app(total_findings: int, latency_s: float) -> web.Application:
+    finding_ids = [f"{i:032x}" for i in range(total_findings)]
+
+    def _finding(finding_id: str) -> dict[str, Any]:
+        return {
+            "accountId": "123456789012",
+            "arn": f"arn:aws:guardduty:us-west-2:123456789012:detector/{DETECTOR_ID}/finding/{finding_id}",
+            "createdAt": "2025-01-01T00:00:00.000Z",
+            "id": finding_id,
+            "region": "us-west-2",
+            "resource": {"resourceType": "Instance", "instanceDetails": {"instanceId": "i-0123456789abcdef0"}},
+            "schemaVersion": "2.0",
+            "severity": 8.0,
+            "type": "Recon:EC2/PortProbeUnprotectedPort",
+            "updatedAt": "2025-01-01T00:00:00.000Z",
+            "title": "Unprotected port on EC2 instance is being probed.",
+            "service": {"archived": False, "count": 3},
+        }
+
+    async def _respond(body: dict[str, Any]) -> web.Response:
+        await asyncio.sleep(latency_s)
+        return web.Response(text=json.dumps(body), content_type="application/json")
+
+    async def list_findings(request: web.Request) -> web.Response:
+        body = await request.json()
+        start = int(body.get("nextToken") or 0)
+        end = min(start + body.get("maxResults", PAGE_SIZE), len(finding_ids))
+        response: dict[str, Any] = {"findingIds": finding_ids[start:end]}
+        if end < len(finding_ids):
+            response["nextToken"] = str(end)
+        return await _respond(response)
+
+    async def get_findings(request: web.Request) -> web.Response:
+        body = await request.json()
+        return await _respond({"findings": [_finding(finding_id) for finding_id in body["findingIds"]]})
+
+    app = web.Application()
+    app.router.add_post("/detector/{detector_id}/findings", list_findings)
+    app.router.add_post("/detector/{detector_id}/findings/get", get_findings)
+    return app
+
+
+def _serve_in_thread(total_findings: int, latency_s: float) -> str:
+    """Runs the stub on its own event loop, as the baseline blocks the benchmark's loop while it waits on boto3."""
+    started = threading.Event()
+    address: list[str] = []
+
+    def serve():
+        loop = asyncio.new_event_loop()
+        runner = web.AppRunner(_stub_app(total_findings, latency_s))
+        loop.run_until_complete(runner.setup())
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        loop.run_until_complete(site.start())
+        port = site._server.sockets[0].getsockname()[1]  # type: ignore[union-attr]
+        address.append(f"http://127.0.0.1:{port}")
+        started.set()
+        loop.run_forever()
+
+    threading.Thread(target=serve, daemon=True).start()
+    started.wait()
+    return address[0]
+
+
+async def _baseline(config: GuarddutyConnectorConfig, secrets: GuarddutySecrets, endpoint_url: str) -> int:
+    client = boto3.client(
+        "guardduty",
+        region_name=config.aws_region,
+        endpoint_url=endpoint_url,
+        aws_access_key_id=secrets.aws_access_key_id.get_secret_value(),
+        aws_secret_access_key=secrets.aws_secret_access_key.get_secret_value(),
+    )
+    paginator = client.get_paginator("list_findings")
+    finding_ids: list[str] = []
+    for page in paginator.paginate(DetectorId=DETECTOR_ID, MaxResults=config.findings_max_results):
+        item = await asyncio.to_thread(lambda page=page: page)
+        finding_ids.extend(item.get("FindingIds", []))
+
+    findings = []
+    for i in range(0, len(finding_ids), 50):
+        response = await asyncio.to_thread(
+            lambda i=i: client.get_findings(DetectorId=DETECTOR_ID, FindingIds=finding_ids[i : i + 50])
+        )
+        findings.extend(response.get("Findings", []))
+    return len(findings)
+
+
+async def _concurrent(config: GuarddutyConnectorConfig, secrets: GuarddutySecrets, endpoint_url: str) -> int:
+    tools = GuarddutyConnectorTools(config=config, target=GuarddutyTarget(), secrets=secrets)
+
+    async def client_context():
+        return await get_client_context(config, secrets, endpoint_url=endpoint_url)
+
+    with patch.object(tools, "_get_client_context", new=client_context):
+        result = await tools.get_guardduty_findings_async(GetGuarddutyFindingsInput(detector_id=DETECTOR_ID))
+    return len(result.result)
+
+
+async def _run(total_findings: int, latency_ms: int, concurrency: list[int]):
+    endpoint_url = _serve_in_thread(total_findings, latency_ms / 1000)
+    secrets = GuarddutySecrets(aws_access_key_id=SecretStr("stub"), aws_secret_access_key=SecretStr("stub"))
+
+    def config(max_concurrent_requests: int) -> GuarddutyConnectorConfig:
+        return GuarddutyConnectorConfig(
+            id=ConnectorIdEnum.GUARDDUTY,
+            aws_access_key_id=StorableSecret.model_validate("stub", context={"encryption_key": "mock"}),
+            aws_secret_access_key=StorableSecret.model_validate("stub", context={"encryption_key": "mock"}),
+            findings_max_concurrent_requests=max_concurrent_requests,
+        )
+
+    print(f"{total_findings} findings, {latency_ms}ms per request")
+    start = time.perf_counter()
+    count = await _baseline(config(1), secrets, endpoint_url)
+    print(f"  boto3, sequential hydration:       {time.perf_counter() - start:7.2f}s ({count} findings)")
+    for max_concurrent_requests in concurrency:
+        start = time.perf_counter()
+        count = await _concurrent(config(max_concurrent_requests), secrets, endpoint_url)
+        print(
+            f"  aiobotocore, {max_concurrent_requests:2d} concurrent batches: "
+            f"{time.perf_counter() - start:7.2f}s ({count} findings)"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--findings", type=int, default=2000)
+    parser.add_argument("--latency-ms", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    args = parser.parse_args()
+    asyncio.run(_run(args.findings, args.latency_ms, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
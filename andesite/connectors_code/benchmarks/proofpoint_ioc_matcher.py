@@ -0,0 +1,93 @@
+"""
+Compares the previous alternation-in-lookahead regex with `IOCMatcher` when searching synthetic
+Proofpoint SIEM events for a growing number of IOCs. The serialized records are built once, as they
+are when repeated searches hit `serialized_records_cache`.
+
+Usage: python -m benchmarks.proofpoint_ioc_matcher [--events 100000] [--iocs 10 100 1000 10000]
+"""
+
+import argparse
+import json
+import random
+import re
+import string
+import time
+from typing import Any
+
+from connectors.proofpoint.connector.ioc_matcher import IOCMatcher, SerializedRecords
+
+
+def _random_token(rng: random.Random, length: int) -> str:
+    return "".join(rng.choices(string.ascii_lowercase + string.digits, k=length))
+
+
+def _event(rng: random.Random, i: int) -> dict[str, Any]:
+    domain = f"{_random_token(rng, 8)}.{rng.choice(['com', 'net', 'ru', 'io'])}"
+    return {
+        "GUID": _random_token(rng, 32),
+        "messageID": f"<{_random_token(rng, 16)}@{domain}>",
+        "sender": f"{_random_token(rng, 6)}@{domain}",
+        "recipient": [f"user{i % 500}@example.com"],
+        "subject": f"Invoice {_random_token(rng, 10)}",
+        "senderIP": f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(256)}",
+        "threatsInfoMap": [{"threat": f"https://{domain}/{_random_token(rng, 12)}", "threatID": _random_token(rng, 64)}],
+        "messageParts": [{"filename": f"{_random_token(rng, 8)}.pdf", "sha256": _random_token(rng, 64)}],
+    }
+
+
+def _iocs(rng: random.Random, events: list[dict[str, Any]], count: int) -> list[str]:
+    # roughly one IOC in ten is present in the events
+    iocs = []
+    for i in range(count):
+        if i % 10 == 0:
+            event = rng.choice(events)
+            iocs.append(rng.choice([event["senderIP"], event["messageParts"][0]["sha256"], event["sender"].split("@")[1]]))
+        else:
+            iocs.append(rng.choice([_random_token(rng, 64), f"{_random_token(rng, 10)}.com", _random_token(rng, 12)]))
+    return iocs
+
+
+def _baseline(texts: list[str], iocs: list[str]) -> int:
+    pattern = re.compile(f"(?=({'|'.join(re.escape(ioc) for ioc in iocs)}))", re.IGNORECASE)
+    return sum(1 for text in texts if any(True for _ in pattern.finditer(text)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--events", type=int, default=100_000)
+    parser.add_argument("--iocs", type=int, nargs="+", default=[10, 100, 1000, 10_000])
+    parser.add_argument(
+        "--baseline-max-iocs", type=int, default=1000, help="skip the previous regex above this many IOCs"
+    )
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    events = [_event(rng, i) for i in range(args.events)]
+
+    start = time.perf_counter()
+    texts = [json.dumps(event) for event in events]
+    print(f"json.dumps of {len(events)} events: {time.perf_counter() - start:.2f}s")
+    start = time.perf_counter()
+    serialized = SerializedRecords(events)
+    print(f"SerializedRecords of {len(events)} events: {time.perf_counter() - start:.2f}s")
+
+    for ioc_count in args.iocs:
+        iocs = _iocs(rng, events, ioc_count)
+
+        start = time.perf_counter()
+        matcher = IOCMatcher(iocs)
+        compiled = time.perf_counter() - start
+        start = time.perf_counter()
+        hits = len(matcher.search(serialized))
+        searched = time.perf_counter() - start
+        line = f"iocs={ioc_count:<6} IOCMatcher compile {compiled:6.2f}s search {searched:6.2f}s hits {hits:>6}"
+
+        if ioc_count <= args.baseline_max_iocs:
+            start = time.perf_counter()
+            baseline_hits = _baseline(texts, iocs)
+            line += f" | previous regex {time.perf_counter() - start:7.2f}s hits {baseline_hits:>6}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Athena catalog enumeration.
+
+Catalogs, their databases and their tables are listed with aiobotocore, following every `NextToken`, with each level
+of the walk bounded by its own semaphore. The resulting snapshot is kept in the connector cache (Redis) for
+`catalog_snapshot_ttl_seconds`, so query target options and data dictionary merges don't walk the catalogs again.
+"""
+
+import asyncio
+from functools import lru_cache
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+from aiobotocore.client import AioBaseClient
+from aiobotocore.session import AioSession, get_session
+from botocore.config import Config as BotoConfig
+from common.jsonlogging.jsonlogger import Logging
+from common.models.connector_id_enum import ConnectorIdEnum
+from opentelemetry import trace
+from pydantic import BaseModel, Field
+
+from connectors.athena.connector.config import AthenaConnectorConfig
+from connectors.cache import Cache
+
+logger = Logging.get_logger(__name__)
+tracer = trace.get_tracer(__name__)
+
+# Most results list_table_metadata returns per page
+TABLE_METADATA_PAGE_SIZE = 50
+
+
+class AthenaCatalogSnapshot(BaseModel):
+    # catalog -> database -> table names
+    catalogs: dict[str, dict[str, list[str]]] = Field(default_factory=dict)
+    work_groups: list[str] = Field(default_factory=list)
+
+
+@lru_cache(maxsize=1)
+def _get_session() -> AioSession:
+    # the session caches the loaded service models, so every client after the first is cheap to create
+    return get_session()
+
+
+def get_client_context(config: AthenaConnectorConfig) -> AioBaseClient:
+    """
+    Returns an Athena client context using the default credential chain, with enough pooled connections for the
+    crawl's concurrency.
+    """
+    boto_config = BotoConfig(
+        retries={"max_attempts": 5, "mode": "standard"},
+        max_pool_connections=max(10, config.catalog_max_concurrent_requests),
+    )
+    return _get_session().create_client(  # type: ignore[call-overload]
+        "athena", region_name=config.region, config=boto_config
+    )
+
+
+async def _paginate(call: Callable[..., Awaitable[dict[str, Any]]], **kwargs) -> AsyncIterator[dict[str, Any]]:
+    next_token: str | None = None
+    while True:
+        response = await call(**kwargs, **({"NextToken": next_token} if next_token else {}))
+        yield response
+        next_token = response.get("NextToken")
+        if not next_token:
+            return
+
+
+class AthenaCatalogCrawler:
+    """
+    Walks every catalog, database and table visible to the connector. At most `catalog_max_concurrent_requests`
+    requests are in flight at each level of the walk.
+    """
+
+    def __init__(self, config: AthenaConnectorConfig, client: AioBaseClient):
+        self._client = client
+        self._database_semaphore = asyncio.Semaphore(config.catalog_max_concurrent_requests)
+        self._table_semaphore = asyncio.Semaphore(config.catalog_max_concurrent_requests)
+
+    @tracer.start_as_current_span("crawl_athena_catalogs")
+    async def crawl(self) -> AthenaCatalogSnapshot:
+        catalogs = [
+            catalog["CatalogName"]
+            async for page in _paginate(self._client.list_data_catalogs)
+            for catalog in page.get("DataCatalogsSummary", [])
+        ]
+        databases, work_groups = await asyncio.gather(
+            asyncio.gather(*(self._crawl_catalog(catalog) for catalog in catalogs)),
+            self._list_work_groups(),
+        )
+        return AthenaCatalogSnapshot(catalogs=dict(zip(catalogs, databases, strict=True)), work_groups=work_groups)
+
+    async def _crawl_catalog(self, catalog: str) -> dict[str, list[str]]:
+        async with self._database_semaphore:
+            databases = [
+                database["Name"]
+                async for page in _paginate(self._client.list_databases, CatalogName=catalog)
+                for database in page.get("DatabaseList", [])
+            ]
+        tables = await asyncio.gather(*(self._list_tables(catalog, database) for database in databases))
+        return dict(zip(databases, tables, strict=True))
+
+    async def _list_tables(self, catalog: str, database: str) -> list[str]:
+        async with self._table_semaphore:
+            return [
+                table["Name"]
+                async for page in _paginate(
+                    self._client.list_table_metadata,
+                    CatalogName=catalog,
+                    DatabaseName=database,
+                    MaxResults=TABLE_METADATA_PAGE_SIZE,
+                )
+                for table in page.get("TableMetadataList", [])
+            ]
+
+    async def _list_work_groups(self) -> list[str]:
+        return [
+            work_group["Name"]
+            async for page in _paginate(self._client.list_work_groups)
+            for work_group in page.get("WorkGroups", [])
+        ]
+
+
+async def get_catalog_snapshot(
+    config: AthenaConnectorConfig, cache: Cache | None, refresh: bool = False
+) -> AthenaCatalogSnapshot:
+    """
+    Returns the cached snapshot of the Athena catalogs for the configured region, crawling them when there is none.
+    """
+    key = f"catalog_snapshot_{config.region}"
+    if cache is not None and not refresh:
+        cached = await cache.get(ConnectorIdEnum.ATHENA, key)
+        if cached is not None:
+            return AthenaCatalogSnapshot.model_validate(cached)
+
+    async with get_client_context(config) as client:
+        snapshot = await AthenaCatalogCrawler(config, client).crawl()
+    logger().info(
+        "Crawled %d Athena tables in %d catalogs",
+        sum(len(tables) for databases in snapshot.catalogs.values() for tables in databases.values()),
+        len(snapshot.catalogs),
+    )
+
+    if cache is not None:
+        await cache.set(ConnectorIdEnum.ATHENA, key, snapshot.model_dump(), config.catalog_snapshot_ttl_seconds)
+    return snapshot
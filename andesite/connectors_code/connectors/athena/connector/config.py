@@ -1,3 +1,4 @@
+from pydantic import Field
 
 from connectors.config import ConnectorConfigurationBase
 
@@ -6,3 +7,9 @@ class AthenaConnectorConfig(ConnectorConfigurationBase):
     region: str = "us-east-2"
     s3_staging_dir: str = "s3://andesite-athena/staging"
     query_timeout: int = 60
+    catalog_max_concurrent_requests: int = Field(
+        default=8, ge=1, description="Maximum concurrent requests at each level of a catalog crawl"
+    )
+    catalog_snapshot_ttl_seconds: int = Field(
+        default=900, ge=1, description="How long a crawled catalog snapshot is reused"
+    )
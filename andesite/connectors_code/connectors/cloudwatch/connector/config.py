@@ -1,5 +1,4 @@
 from pydantic import Field
-from pydantic import Field
 
 from connectors.config import ConnectorConfigurationBase
 
@@ -9,3 +8,34 @@ class CloudWatchConnectorConfig(ConnectorConfigurationBase):
     api_max_retries: int = Field(default=3, description="Number of times to retry API requests upon failure")
 
     log_retention_days: int = Field(default=7, description="Default number of days to look back when querying logs")
+
+    insights_max_concurrent_queries: int = Field(
+        default=20,
+        ge=1,
+        description="Maximum number of CloudWatch Logs Insights queries run at once. AWS allows 30 concurrent queries per account.",
+    )
+
+    insights_log_groups_per_query: int = Field(
+        default=50,
+        ge=1,
+        le=50,
+        description="Number of log groups queried together by a single Insights query. 1 runs one query per log group.",
+    )
+
+    schema_cache_ttl_seconds: int = Field(
+        default=86400,
+        ge=0,
+        description="How long discovered log group fields are used before they are refreshed in the background",
+    )
+
+    filter_time_slices: int = Field(
+        default=1,
+        ge=1,
+        description="Number of time slices fetched concurrently per log group by the filter pattern tool. 1 pages each log group sequentially.",
+    )
+
+    filter_max_concurrent_requests: int = Field(
+        default=8,
+        ge=1,
+        description="Maximum number of filter_log_events requests in flight at once when fetching time slices",
+    )
@@ -1,7 +1,10 @@
 import os
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
+from typing import Optional
 
 from botocore.config import Config as BotoConfig
+from common.managers.dataset_structures.dataset_structure_model import DatasetStructure
 from common.models.connector_id_enum import ConnectorIdEnum
 from common.models.tool import Tool
 from pydantic import SecretStr
@@ -9,8 +12,8 @@ from pydantic import SecretStr
 from connectors.cloudwatch.connector.config import CloudWatchConnectorConfig
 from connectors.cloudwatch.connector.target import CloudWatchTarget
 from connectors.cloudwatch.connector.secrets import CloudWatchSecrets
-from connectors.cloudwatch.connector.tools import CloudWatchConnectorTools
-from connectors.connector import Connector
+from connectors.cloudwatch.connector.tools import CloudWatchConnectorTools, GetCloudWatchFieldsInput
+from connectors.connector import Connector, ConnectorTargetInterface
 from connectors.cache import Cache
 from connectors.query_target_options import (
     ConnectorQueryTargetOptions,
@@ -77,6 +80,25 @@ def _get_tools(
         secrets=secrets
     ).get_tools()
 
+async def _get_dataset_structure_to_index(
+    config: CloudWatchConnectorConfig,
+    secrets: CloudWatchSecrets,
+    dataset_target: Optional[ConnectorTargetInterface] = None,
+) -> list[DatasetStructure]:
+    """
+    Discovers the fields of the targeted log groups over the configured retention window.
+    """
+    if dataset_target is None:
+        return []
+
+    target = CloudWatchTarget(**dataset_target.model_dump())
+    end_time = datetime.now(timezone.utc)
+    start_time = end_time - timedelta(days=config.log_retention_days)
+    return await CloudWatchConnectorTools(config=config, target=target, secrets=secrets).discover_schemas_async(
+        GetCloudWatchFieldsInput(start_time=start_time.isoformat(), end_time=end_time.isoformat()),
+        target.log_groups,
+    )
+
 async def _get_secrets(config: CloudWatchConnectorConfig, encryption_key: str, user_token: SecretStr | None) -> CloudWatchSecrets | None:
     if user_token is not None:
         raise ValueError("User token is not supported for salesforce at this time")
@@ -95,4 +117,5 @@ CloudWatchConnector = Connector(
     get_tools=_get_tools,
     check_connection=_check_connection,
     get_query_target_options=_get_query_target_options,
+    get_dataset_structure_to_index=_get_dataset_structure_to_index,
 )
@@ -0,0 +1,113 @@
+import asyncio
+from typing import Any
+from weakref import WeakKeyDictionary
+
+from botocore.exceptions import ClientError
+from common.jsonlogging.jsonlogger import Logging
+
+logger = Logging.get_logger(__name__)
+
+# AWS allows at most 50 log groups in the logGroupNames of a single Insights query
+MAX_LOG_GROUPS_PER_QUERY = 50
+
+INITIAL_POLL_INTERVAL_SECONDS = 0.25
+MAX_POLL_INTERVAL_SECONDS = 5.0
+POLL_BACKOFF_FACTOR = 1.5
+
+START_QUERY_MAX_ATTEMPTS = 5
+START_QUERY_BACKOFF_SECONDS = 1.0
+
+TERMINAL_QUERY_STATUSES = ["Complete", "Failed", "Cancelled", "Timeout"]
+
+
+def batch_log_groups(log_groups: list[str], batch_size: int) -> list[list[str]]:
+    """
+    Splits log groups into batches that can be queried together through `logGroupNames`.
+    """
+    batch_size = max(1, min(batch_size, MAX_LOG_GROUPS_PER_QUERY))
+    return [log_groups[i : i + batch_size] for i in range(0, len(log_groups), batch_size)]
+
+
+class InsightsQueryScheduler:
+    """
+    Runs CloudWatch Logs Insights queries while keeping the number of concurrently running queries under
+    the account's Insights quota. Every tools instance on the same event loop shares one scheduler for a
+    given limit, so concurrent conversations don't exceed the quota together.
+
+    Queries are polled with an increasing interval and are always stopped with `stop_query` if the caller
+    is cancelled (e.g. by a tool timeout) or fails before the query finishes.
+    """
+
+    _schedulers: WeakKeyDictionary[asyncio.AbstractEventLoop, dict[int, "InsightsQueryScheduler"]] = WeakKeyDictionary()
+
+    def __init__(self, max_concurrent_queries: int):
+        self.max_concurrent_queries = max_concurrent_queries
+        self._semaphore = asyncio.Semaphore(max_concurrent_queries)
+
+    @classmethod
+    def instance(cls, max_concurrent_queries: int) -> "InsightsQueryScheduler":
+        """
+        Returns the scheduler shared by every caller on the running event loop with the same limit.
+        """
+        loop = asyncio.get_running_loop()
+        schedulers = cls._schedulers.setdefault(loop, {})
+        if max_concurrent_queries not in schedulers:
+            schedulers[max_concurrent_queries] = InsightsQueryScheduler(max_concurrent_queries)
+        return schedulers[max_concurrent_queries]
+
+    async def run_query(self, client, log_groups: str | list[str], **query_params: Any) -> dict[str, Any]:
+        """
+        Starts an Insights query over one log group or a batch of log groups and waits for it to finish.
+
+        :return: The final `get_query_results` response.
+        """
+        if isinstance(log_groups, str):
+            query_params["logGroupName"] = log_groups
+        else:
+            query_params["logGroupNames"] = log_groups[:MAX_LOG_GROUPS_PER_QUERY]
+
+        async with self._semaphore:
+            query_id = await self._start_query(client, **query_params)
+            query_results: dict[str, Any] = {}
+            try:
+                poll_interval = INITIAL_POLL_INTERVAL_SECONDS
+                while True:
+                    query_results = await client.get_query_results(queryId=query_id)
+                    if query_results.get("status") in TERMINAL_QUERY_STATUSES:
+                        return query_results
+
+                    await asyncio.sleep(poll_interval)
+                    poll_interval = min(poll_interval * POLL_BACKOFF_FACTOR, MAX_POLL_INTERVAL_SECONDS)
+            except BaseException:
+                if query_results.get("status") not in TERMINAL_QUERY_STATUSES:
+                    await self._stop_query(client, query_id)
+                raise
+
+    async def _start_query(self, client, **query_params: Any) -> str:
+        """
+        Starts a query, backing off when AWS reports that too many queries are already running.
+        Other processes share the account quota, so the local semaphore alone can't prevent this.
+        """
+        backoff = START_QUERY_BACKOFF_SECONDS
+        attempt = 1
+        while True:
+            try:
+                response = await client.start_query(**query_params)
+                return response["queryId"]
+            except ClientError as e:
+                limit_exceeded = e.response.get("Error", {}).get("Code") == "LimitExceededException"
+                if not limit_exceeded or attempt >= START_QUERY_MAX_ATTEMPTS:
+                    raise
+            logger().warning("Insights query limit exceeded, retrying in %.1f seconds", backoff)
+            await asyncio.sleep(backoff)
+            backoff *= 2
+            attempt += 1
+
+    @staticmethod
+    async def _stop_query(client, query_id: str):
+        try:
+            await client.stop_query(queryId=query_id)
+            logger().info("Stopped CloudWatch Insights query %s", query_id)
+        except Exception as e:
+            # the query may have finished in the meantime
+            logger().warning("Failed to stop CloudWatch Insights query %s: %s", query_id, str(e))
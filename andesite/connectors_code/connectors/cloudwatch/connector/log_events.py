@@ -0,0 +1,145 @@
+import asyncio
+import heapq
+from typing import Any, AsyncIterator
+from weakref import WeakKeyDictionary
+
+from common.jsonlogging.jsonlogger import Logging
+
+logger = Logging.get_logger(__name__)
+
+# Pages buffered per (slice, log group) stream before its fetch waits for the merge to catch up
+PREFETCH_PAGES = 2
+
+
+def split_time_range(start_timestamp: int, end_timestamp: int, slices: int) -> list[tuple[int, int]]:
+    """
+    Splits [start_timestamp, end_timestamp) into at most `slices` contiguous, non-overlapping slices of
+    roughly equal length, in chronological order. Timestamps are in milliseconds.
+    """
+    duration = end_timestamp - start_timestamp
+    if duration <= 0:
+        return [(start_timestamp, end_timestamp)]
+
+    slices = max(1, min(slices, duration))
+    bounds = [start_timestamp + (duration * i) // slices for i in range(slices + 1)]
+    return [(bounds[i], bounds[i + 1]) for i in range(slices)]
+
+
+async def _drain(queue: asyncio.Queue[list[dict[str, Any]] | None]) -> AsyncIterator[dict[str, Any]]:
+    while True:
+        page = await queue.get()
+        if page is None:
+            return
+        for event in page:
+            yield event
+
+
+async def merge_by_timestamp(streams: list[AsyncIterator[dict[str, Any]]]) -> AsyncIterator[dict[str, Any]]:
+    """
+    k-way merges event streams that are each ordered by `timestamp` into a single ordered stream.
+    """
+    heap: list[tuple[int, int, dict[str, Any]]] = []
+    for index, stream in enumerate(streams):
+        event = await anext(stream, None)
+        if event is not None:
+            heap.append((event.get("timestamp", 0), index, event))
+    heapq.heapify(heap)
+
+    while heap:
+        # each stream has at most one event in the heap, so (timestamp, index) is unique and events are never compared
+        _, index, event = heapq.heappop(heap)
+        yield event
+        next_event = await anext(streams[index], None)
+        if next_event is not None:
+            heapq.heappush(heap, (next_event.get("timestamp", 0), index, next_event))
+
+
+class SlicedLogEventsFetcher:
+    """
+    Fetches `filter_log_events` results by splitting the time range into slices and paging every
+    (slice, log group) pair concurrently, while keeping the number of in-flight requests under a budget
+    shared by every caller on the same event loop.
+
+    Slices don't overlap, so the merged output is every slice's log groups merged by timestamp, one slice
+    after another. Fetching stops as soon as `limit` events have been emitted.
+    """
+
+    _fetchers: WeakKeyDictionary[asyncio.AbstractEventLoop, dict[int, "SlicedLogEventsFetcher"]] = WeakKeyDictionary()
+
+    def __init__(self, max_concurrent_requests: int):
+        self.max_concurrent_requests = max_concurrent_requests
+        self._semaphore = asyncio.Semaphore(max_concurrent_requests)
+
+    @classmethod
+    def instance(cls, max_concurrent_requests: int) -> "SlicedLogEventsFetcher":
+        """
+        Returns the fetcher shared by every caller on the running event loop with the same request budget.
+        """
+        loop = asyncio.get_running_loop()
+        fetchers = cls._fetchers.setdefault(loop, {})
+        if max_concurrent_requests not in fetchers:
+            fetchers[max_concurrent_requests] = SlicedLogEventsFetcher(max_concurrent_requests)
+        return fetchers[max_concurrent_requests]
+
+    async def fetch(
+        self,
+        client,
+        log_groups: list[str],
+        start_timestamp: int,
+        end_timestamp: int,
+        limit: int,
+        slices: int,
+        filter_pattern: str | None = None,
+    ) -> list[dict[str, Any]]:
+        time_slices = split_time_range(start_timestamp, end_timestamp, slices)
+        queues: list[list[asyncio.Queue[list[dict[str, Any]] | None]]] = []
+        tasks: list[asyncio.Task] = []
+
+        # tasks for earlier slices are created first, so they are first in line for the request budget
+        for slice_index, (slice_start, slice_end) in enumerate(time_slices):
+            # endTime is inclusive, so every slice but the last stops just before the next one starts
+            is_last_slice = slice_index == len(time_slices) - 1
+            slice_end_inclusive = slice_end if is_last_slice else slice_end - 1
+            slice_queues: list[asyncio.Queue[list[dict[str, Any]] | None]] = []
+            for log_group in log_groups:
+                queue: asyncio.Queue[list[dict[str, Any]] | None] = asyncio.Queue(maxsize=PREFETCH_PAGES)
+                slice_queues.append(queue)
+                query_params: dict[str, Any] = {
+                    "logGroupName": log_group,
+                    "startTime": slice_start,
+                    "endTime": slice_end_inclusive,
+                    "PaginationConfig": {"MaxItems": limit, "PageSize": min(limit, 1000)},
+                }
+                if filter_pattern:
+                    query_params["filterPattern"] = filter_pattern
+                tasks.append(asyncio.create_task(self._fetch_pages(client, query_params, queue)))
+            queues.append(slice_queues)
+
+        events: list[dict[str, Any]] = []
+        try:
+            for slice_queues in queues:
+                async for event in merge_by_timestamp([_drain(queue) for queue in slice_queues]):
+                    events.append(event)
+                    if len(events) >= limit:
+                        return events
+            return events
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _fetch_pages(self, client, query_params: dict[str, Any], queue: asyncio.Queue[list[dict[str, Any]] | None]):
+        paginator = client.get_paginator("filter_log_events")
+        try:
+            pages = aiter(paginator.paginate(**query_params))
+            while True:
+                async with self._semaphore:
+                    page = await anext(pages, None)
+                if page is None:
+                    break
+                await queue.put(page.get("events", []))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger().error(f"Error fetching events from {query_params['logGroupName']}: {str(e)}")
+        await queue.put(None)
@@ -1,10 +1,15 @@
 import asyncio
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from itertools import chain
 import json
 from typing import Any, Dict, List, Literal
 
 from botocore.config import Config as BotoConfig
+from common.managers.dataset_structures.dataset_structure_manager import (
+    DatasetStructureException,
+    DatasetStructureManager,
+)
+from common.managers.dataset_structures.dataset_structure_model import DatasetStructure
 from common.models.connector_id_enum import ConnectorIdEnum
 from common.models.metadata import QueryResultMetadata
 from common.models.tool import Tool
@@ -15,10 +20,15 @@ from connectors.cloudwatch.connector.target import CloudWatchTarget
 from connectors.cloudwatch.connector.secrets import CloudWatchSecrets
 from connectors.tools import ConnectorToolsInterface
 from connectors.cloudwatch.connector.aws import get_client_context
+from connectors.cloudwatch.connector.insights import InsightsQueryScheduler, batch_log_groups
+from connectors.cloudwatch.connector.log_events import SlicedLogEventsFetcher
 from common.jsonlogging.jsonlogger import Logging
 
 logger = Logging.get_logger(__name__)
 
+# Keep references to background schema refreshes so they aren't garbage collected before finishing
+_background_schema_refreshes: set[asyncio.Task] = set()
+_refreshing_log_groups: set[str] = set()
 
 
 class QueryCloudWatchMetricsInput(BaseModel):
@@ -355,30 +365,22 @@ class CloudWatchConnectorTools(ConnectorToolsInterface[CloudWatchSecrets]):
 
         return events
 
-    async def _fetch_insights_query(self, input: GetCloudWatchLogsInsightsQueryInput, client, log_group) -> list[dict[str, Any]]:
-        """Handle CloudWatch Logs Insights queries."""
+    async def _fetch_insights_query(self, input: GetCloudWatchLogsInsightsQueryInput, client, log_group: str | list[str]) -> list[dict[str, Any]]:
+        """
+        Handle CloudWatch Logs Insights queries over a single log group or a batch of log groups.
+        Queries are run through the shared InsightsQueryScheduler to stay under the account's concurrent query quota.
+        """
+        scheduler = InsightsQueryScheduler.instance(self.config.insights_max_concurrent_queries)
         try:
-            # Start the query
-            start_query_response = await client.start_query(
-                logGroupName=log_group,
+            query_results = await scheduler.run_query(
+                client,
+                log_group,
                 startTime=input.start_timestamp,
                 endTime=input.end_timestamp,
                 queryString=input.insights_query,
                 limit=input.limit
             )
-
-            query_id = start_query_response['queryId']
-
-            # Poll until query completes
-            while True:
-                query_results = await client.get_query_results(queryId=query_id)
-                status = query_results.get('status')
-
-                if status in ['Complete', 'Failed', 'Cancelled']:
-                    break
-
-                # Wait a bit before polling again
-                await asyncio.sleep(1)
+            status = query_results.get('status')
 
             # For consistency with standard query format, transform insights results into events
             if status == 'Complete':
@@ -440,10 +442,23 @@ class CloudWatchConnectorTools(ConnectorToolsInterface[CloudWatchSecrets]):
 
     async def get_cloudwatch_logs_filter_pattern_async(self, input: GetCloudWatchLogsFilterPatternInput) -> QueryResultMetadata:
         async with await self._get_client_context("logs") as client:
-            tasks = [self._fetch_standard_query(input, client, lg) for lg in self._get_scoped_log_streams()] # type: ignore[attr-defined]
-            all_results = await asyncio.gather(*tasks)
+            if self.config.filter_time_slices > 1:
+                # events come back ordered by timestamp across all log groups
+                fetcher = SlicedLogEventsFetcher.instance(self.config.filter_max_concurrent_requests)
+                events = await fetcher.fetch(
+                    client,
+                    self._get_scoped_log_streams(),
+                    start_timestamp=input.start_timestamp,
+                    end_timestamp=input.end_timestamp,
+                    limit=input.limit,
+                    slices=self.config.filter_time_slices,
+                    filter_pattern=input.filter_pattern,
+                )
+            else:
+                tasks = [self._fetch_standard_query(input, client, lg) for lg in self._get_scoped_log_streams()] # type: ignore[attr-defined]
+                all_results = await asyncio.gather(*tasks)
 
-            events = list(chain(*all_results))
+                events = list(chain(*all_results))
 
             if len(events) > input.limit:
                 events = events[:input.limit]
@@ -464,7 +479,14 @@ class CloudWatchConnectorTools(ConnectorToolsInterface[CloudWatchSecrets]):
 
     async def get_cloudwatch_logs_insights_query_async(self, input: GetCloudWatchLogsInsightsQueryInput) -> QueryResultMetadata:
         async with await self._get_client_context("logs") as client:
-            tasks = [self._fetch_insights_query(input, client, lg) for lg in self._get_scoped_log_streams()]
+            log_groups = self._get_scoped_log_streams()
+            if self.config.insights_log_groups_per_query > 1:
+                tasks = [
+                    self._fetch_insights_query(input, client, batch)
+                    for batch in batch_log_groups(log_groups, self.config.insights_log_groups_per_query)
+                ]
+            else:
+                tasks = [self._fetch_insights_query(input, client, lg) for lg in log_groups]
             all_results = await asyncio.gather(*tasks)
 
             events = list(chain(*all_results))
@@ -493,57 +515,135 @@ class CloudWatchConnectorTools(ConnectorToolsInterface[CloudWatchSecrets]):
         )
 
     async def get_fields_async(self, input: GetCloudWatchFieldsInput) ->  dict[str, list[str]]:
-        # TODO: user can add known fields per log stream
-        system_fields = [
-            '@timestamp',
-            '@message',
-            '@logStream',
-            '@log',
-            '@ingestionTime',
-            '@eventId',
-            '@ptr'
-        ]
-        basic_fields_query = "fields @timestamp, @log, @logStream, @message"
-        # map: log_group: list of fields at log group
+        """
+        Returns the fields discovered for every scoped log group.
+
+        Discovered schemas are persisted in the DatasetStructureManager, so discovery only runs for log groups
+        that have never been discovered. Schemas older than `schema_cache_ttl_seconds` are still returned and
+        refreshed in the background.
+        """
+        log_groups = self._get_scoped_log_streams()
         fields_map: dict[str, list[str]] = {}
+        stale_log_groups: list[str] = []
+        now = datetime.now(timezone.utc)
+        ttl = timedelta(seconds=self.config.schema_cache_ttl_seconds)
+
+        stored_schemas = await self._get_stored_schemas(log_groups)
+        for log_group in log_groups:
+            if log_group in self._log_stream_schemas:
+                fields_map[log_group] = self._log_stream_schemas[log_group]
+            elif log_group in stored_schemas:
+                fields, discovered_at = stored_schemas[log_group]
+                fields_map[log_group] = fields
+                self._log_stream_schemas[log_group] = fields
+                if now - discovered_at > ttl:
+                    stale_log_groups.append(log_group)
+
+        missing_log_groups = [log_group for log_group in log_groups if log_group not in fields_map]
+        if missing_log_groups:
+            structures = await self.discover_schemas_async(input, missing_log_groups)
+            await self._store_schemas(structures)
+            for structure in structures:
+                fields_map[structure.dataset] = structure.attributes["fields"]
+                self._log_stream_schemas[structure.dataset] = structure.attributes["fields"]
+            # log groups whose discovery failed are reported without fields and retried next time
+            for log_group in missing_log_groups:
+                fields_map.setdefault(log_group, [])
+
+        if stale_log_groups:
+            self._refresh_schemas_in_background(input, stale_log_groups)
+
+        return {log_group: fields_map[log_group] for log_group in log_groups if log_group in fields_map}
+
+    async def discover_schemas_async(self, input: GetCloudWatchLogsInputBase, log_groups: list[str]) -> list[DatasetStructure]:
+        """
+        Discovers the fields of each log group by running a basic Insights query against it.
+        Log groups whose query failed are left out so their discovery is retried later.
+        """
+        basic_fields_query = "fields @timestamp, @log, @logStream, @message"
+        query_input = GetCloudWatchLogsInsightsQueryInput(
+            start_time=input.start_time,
+            end_time=input.end_time,
+            limit=input.limit,
+            insights_query=basic_fields_query,
+        )
+        structures: list[DatasetStructure] = []
+        discovered_at = datetime.now(timezone.utc).isoformat()
 
         async with await self._get_client_context("logs") as client:
-            query_input = GetCloudWatchLogsInsightsQueryInput(**input.model_dump(), insights_query=basic_fields_query)
+            all_results = await asyncio.gather(
+                *[self._fetch_insights_query(query_input, client, log_group) for log_group in log_groups]
+            )
 
-            # run the fields query for every log group we havent discovered the schema for
-            tasks = []
-            for log_group in self._get_scoped_log_streams():
-                if log_group in self._log_stream_schemas:
-                    continue
-                tasks.append(self._fetch_insights_query(query_input, client, log_group))
-            all_results = await asyncio.gather(*tasks)
+        for log_group, query_result in zip(log_groups, all_results, strict=True):
+            log_group_fields = []
+            for result_item in query_result:
+                query_response = result_item.get("insights_result")
+                # in the case of an invalid log group, or a failure, this will return None, so we only append when
+                # there is an actual result
+                if isinstance(query_response, dict):
+                    log_group_fields.extend(self._parse_fields(query_response))
+
+            if any(result_item.get("error") for result_item in query_result):
+                continue
+            structures.append(
+                DatasetStructure(
+                    connector=ConnectorIdEnum.CLOUDWATCH,
+                    dataset=log_group,
+                    attributes={"fields": list(set(log_group_fields)), "discovered_at": discovered_at},
+                )
+            )
 
-            # update fields_map with the results of the fields query
-            for log_group, queryresult in zip(self._get_scoped_log_streams(), all_results):
-                log_group_fields = []
-                for result_item in queryresult:
-                    query_response = result_item.get("insights_result")
-                    # in the case of an invalid log group, or a failure, this will return None, so we only append when
-                    # there is an actual result
-                    if isinstance(query_response, dict):
-                        log_group_fields.extend(self._parse_fields(query_response))
-                # update the fields map
-                fields_map[log_group] = list(set(log_group_fields))
-
-        # now we update the fields map with the already known log group schemas, and update the known schemas
-        for log_group in self._get_scoped_log_streams():
-            # if a log group in scope is already found, update fields map
-            if log_group in self._log_stream_schemas:
-                fields_map[log_group] = self._log_stream_schemas[log_group]
-            else:
-                # if the log group is somehow scoped but not in the fields map or existing schemas,
-                # skip it (somehow we didnt get results)
-                if log_group not in fields_map:
-                    logger().warning("log group not in cache or in dynamic data dict. something went wrong")
-                    continue
-                # otherwise update known schemas with the log group
-                self._log_stream_schemas[log_group] = fields_map[log_group]
-        return fields_map
+        return structures
+
+    async def _get_stored_schemas(self, log_groups: list[str]) -> dict[str, tuple[list[str], datetime]]:
+        """
+        Reads the persisted schemas of the given log groups along with when they were discovered.
+        """
+        try:
+            structures = await DatasetStructureManager.instance().get_all_dataset_structures_async(ConnectorIdEnum.CLOUDWATCH)
+        except DatasetStructureException as e:
+            logger().warning("Unable to read stored CloudWatch schemas: %s", str(e))
+            return {}
+
+        scoped = set(log_groups)
+        stored: dict[str, tuple[list[str], datetime]] = {}
+        for structure in structures:
+            if structure.dataset not in scoped or not isinstance(structure.attributes, dict):
+                continue
+            try:
+                fields = list(structure.attributes["fields"])
+                discovered_at = datetime.fromisoformat(structure.attributes["discovered_at"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            stored[structure.dataset] = (fields, discovered_at)
+        return stored
+
+    @staticmethod
+    async def _store_schemas(structures: list[DatasetStructure]):
+        for structure in structures:
+            try:
+                await DatasetStructureManager.instance().set_dataset_structure_async(structure)
+            except DatasetStructureException as e:
+                logger().warning("Unable to store CloudWatch schema for %s: %s", structure.dataset, str(e))
+
+    def _refresh_schemas_in_background(self, input: GetCloudWatchLogsInputBase, log_groups: list[str]):
+        log_groups = [log_group for log_group in log_groups if log_group not in _refreshing_log_groups]
+        if not log_groups:
+            return
+        _refreshing_log_groups.update(log_groups)
+
+        async def _refresh():
+            try:
+                await self._store_schemas(await self.discover_schemas_async(input, log_groups))
+            except Exception as e:
+                logger().warning("Background CloudWatch schema refresh failed: %s", str(e))
+            finally:
+                _refreshing_log_groups.difference_update(log_groups)
+
+        task = asyncio.create_task(_refresh())
+        _background_schema_refreshes.add(task)
+        task.add_done_callback(_background_schema_refreshes.discard)
 
     def _parse_fields(self, query_result: dict[str, Any], prefix: str = "") -> list[str]:
         """
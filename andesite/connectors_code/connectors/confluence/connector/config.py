@@ -11,3 +11,9 @@ class ConfluenceConnectorConfig(ConnectorConfigurationBase):  # pragma: no cover
 
     api_request_timeout: int = Field(default=30, description="Request timeout in seconds")
     api_max_retries: int = Field(default=3, description="Maximum number of API request retries")
+    max_concurrent_spaces: int = Field(default=4, ge=1, description="Maximum number of spaces crawled concurrently")
+    full_sync_interval_hours: int = Field(
+        default=24,
+        ge=1,
+        description="Hours between full crawls of a space, which drop pages deleted since; other syncs only fetch changed pages",
+    )
@@ -1,11 +1,22 @@
+import asyncio
+import contextlib
 import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from itertools import chain
 from pathlib import Path
 from typing import Optional
 
 import httpx
 from common.jsonlogging.jsonlogger import Logging
+from common.managers.dataset_descriptions.dataset_description_manager import (
+    DatasetDescriptionException,
+    DatasetDescriptionManager,
+)
 from common.managers.dataset_descriptions.dataset_description_model import (
     DatasetDescription,
+    DatasetDescriptionEnrichment,
 )
 from common.models.connector_id_enum import ConnectorIdEnum
 from common.models.tool import Tool
@@ -20,6 +31,23 @@ from connectors.connector import Connector
 from connectors.query_target_options import ConnectorQueryTargetOptions
 
 logger = Logging.get_logger(__name__)
+ddm = DatasetDescriptionManager.instance()
+
+# CQL `lastmodified` has minute precision and is evaluated in the Confluence user's timezone, so incremental syncs
+# look back further than the watermark; pages seen twice are only upserted again
+SYNC_OVERLAP = timedelta(days=1)
+
+# When this process last crawled all the pages of a space, keyed by (url, space key)
+_last_full_syncs: dict[tuple[str, str], float] = {}
+
+
+@dataclass
+class _SpaceSync:
+    space_key: str
+    descriptions: list[DatasetDescription]
+    upserts: list[DatasetDescription] = field(default_factory=list)
+    deletes: list[list[str]] = field(default_factory=list)
+    full: bool = False
 
 
 async def _check_confluence_connection(config: ConfluenceConnectorConfig, secrets: ConfluenceSecrets) -> bool:
@@ -107,25 +135,33 @@ async def _get_page_descriptions_for_space(
     existing_desc_dict: dict[tuple[str, ...], str],
     max_pages: int = 5000,
     limit: int = 100,
+    modified_since: datetime | None = None,
+    raise_errors: bool = False,
 ) -> list[DatasetDescription]:
+    """
+    Lists the pages of a space, or with `modified_since` only the pages changed since then, found with a CQL search.
+    A failed request ends the listing early, unless `raise_errors` is set.
+    """
     page_descriptions: list[DatasetDescription] = []
     start = 0
     page_count = 0
-    page_url = f"{config.url.rstrip('/')}/rest/api/content"
-
-    while page_count < max_pages:
+    base_url = config.url.rstrip("/")
+    page_url = f"{base_url}/rest/api/content"
+    params: dict[str, str] | None = {"spaceKey": space_key, "type": "page", "expand": "ancestors"}
+    if modified_since is not None:
+        page_url = f"{base_url}/rest/api/content/search"
         params = {
-            "spaceKey": space_key,
-            "type": "page",
-            "limit": str(limit),
-            "start": str(start),
+            "cql": f'space = "{space_key}" and type = page and lastmodified >= "{modified_since:%Y/%m/%d %H:%M}"',
             "expand": "ancestors",
         }
 
+    while page_count < max_pages:
         try:
-            resp = await client.get(page_url, auth=auth, params=params)
+            request_params = {**params, "limit": str(limit), "start": str(start)} if params is not None else None
+            resp = await client.get(page_url, auth=auth, params=request_params)
             resp.raise_for_status()
-            pages = resp.json().get("results", [])
+            body = resp.json()
+            pages = body.get("results", [])
 
             for page in pages:
                 page_id = page.get("id")
@@ -143,13 +179,22 @@ async def _get_page_descriptions_for_space(
                     )
                 )
 
-            if len(pages) < limit:
-                break
-
-            start += limit
+            if modified_since is not None:
+                # CQL searches are paged with a cursor carried in the next link, relative to the base link
+                links = body.get("_links", {})
+                if not links.get("next"):
+                    break
+                page_url = f"{links.get('base', base_url).rstrip('/')}{links['next']}"
+                params = None
+            else:
+                if len(pages) < limit:
+                    break
+                start += limit
             page_count += 1
 
         except Exception as e:
+            if raise_errors:
+                raise
             logger().warning(f"Failed to retrieve pages for space {space_key} at start={start}: {e}")
             break
 
@@ -159,43 +204,139 @@ async def _get_page_descriptions_for_space(
     return page_descriptions
 
 
+async def _sync_space(
+    client: httpx.AsyncClient,
+    config: ConfluenceConnectorConfig,
+    auth: tuple[str, str],
+    space_key: str,
+    existing_dataset_descriptions: list[DatasetDescription],
+    semaphore: asyncio.Semaphore,
+) -> _SpaceSync:
+    """
+    Crawls the pages of a space changed since its watermark, or all of them when there is no watermark yet or the
+    last full crawl is older than `full_sync_interval_hours`.
+    """
+    async with semaphore:
+        stored = [desc for desc in existing_dataset_descriptions if desc.path and desc.path[0] == space_key]
+        if not any(len(desc.path) == 1 for desc in stored):
+            with contextlib.suppress(DatasetDescriptionException):
+                stored = await ddm.get_dataset_descriptions_async(
+                    connector=ConnectorIdEnum.CONFLUENCE, path_prefix=[space_key]
+                )
+        stored_by_path = {tuple(desc.path): desc for desc in stored}
+        space_description = stored_by_path.get((space_key,)) or DatasetDescription(
+            connector=ConnectorIdEnum.CONFLUENCE, path=[space_key], description=""
+        )
+
+        watermark = None
+        if space_description.enrichment is not None and space_description.enrichment.last_updated:
+            watermark = datetime.fromisoformat(space_description.enrichment.last_updated)
+        last_full_sync = _last_full_syncs.get((config.url, space_key))
+        full = (
+            watermark is None
+            or last_full_sync is None
+            or time.monotonic() - last_full_sync > config.full_sync_interval_hours * 3600
+        )
+
+        synced_at = datetime.now(timezone.utc)
+        existing_desc_dict = {path: desc.description for path, desc in stored_by_path.items()}
+        try:
+            pages = await _get_page_descriptions_for_space(
+                client,
+                config,
+                auth,
+                space_key,
+                existing_desc_dict,
+                modified_since=None if full or watermark is None else watermark - SYNC_OVERLAP,
+                raise_errors=True,
+            )
+        except Exception as e:
+            logger().warning(f"Failed to sync pages for space {space_key}: {e}")
+            return _SpaceSync(space_key=space_key, descriptions=[space_description, *stored_by_path.values()])
+
+        space_description = space_description.model_copy(
+            update={
+                "enrichment": (space_description.enrichment or DatasetDescriptionEnrichment()).model_copy(
+                    update={"last_updated": synced_at.isoformat()}
+                )
+            }
+        )
+        merged = {**stored_by_path, (space_key,): space_description}
+        upserts = [space_description]
+        for page in pages:
+            if tuple(page.path) not in merged:
+                merged[tuple(page.path)] = page
+                upserts.append(page)
+
+        # Only a full crawl shows which pages are gone; pages that were described are left for users to remove
+        deletes: list[list[str]] = []
+        if full:
+            crawled_paths = {tuple(page.path) for page in pages}
+            deletes = [
+                desc.path
+                for path, desc in stored_by_path.items()
+                if len(path) > 1 and path not in crawled_paths and not desc.description
+            ]
+            for path in deletes:
+                del merged[tuple(path)]
+
+        return _SpaceSync(
+            space_key=space_key,
+            descriptions=list(merged.values()),
+            upserts=upserts,
+            deletes=deletes,
+            full=full,
+        )
+
+
 async def _merge_data_dictionary(
     config: ConfluenceConnectorConfig,
     secrets: ConfluenceSecrets,
     existing_dataset_descriptions: list[DatasetDescription],
     path_prefix: Optional[list[str]] = None,
 ) -> list[DatasetDescription]:
+    """
+    Syncs the spaces matching `path_prefix` concurrently and stores the pages found in one bulk write. Each space
+    keeps the time it was last synced in its enrichment, so later syncs only fetch the pages changed since.
+    """
     auth = (config.email, secrets.api_key.get_secret_value())
-    existing_descriptions_dict = {tuple(desc.path): desc.description or "" for desc in existing_dataset_descriptions}
+    semaphore = asyncio.Semaphore(config.max_concurrent_spaces)
 
-    async with httpx.AsyncClient(timeout=5) as client:
+    async with httpx.AsyncClient(timeout=config.api_request_timeout) as client:
         all_space_keys = await _get_space_keys(client, config, auth)
-        data_dictionary: list[DatasetDescription] = []
 
         normalized_path_prefix = [p.strip().lower() for p in path_prefix or []]
-
-        for space_key in all_space_keys:
-            normalized_space_key = space_key.strip().lower()
-
-            if normalized_path_prefix and (normalized_space_key,) != tuple(normalized_path_prefix):
-                continue
-
-            space_path = [space_key]
-            space_description = existing_descriptions_dict.get(tuple(space_path), "")
-            data_dictionary.append(
-                DatasetDescription(
-                    connector=ConnectorIdEnum.CONFLUENCE,
-                    path=space_path,
-                    description=space_description,
-                )
+        space_keys = [
+            space_key
+            for space_key in all_space_keys
+            if not normalized_path_prefix or (space_key.strip().lower(),) == tuple(normalized_path_prefix)
+        ]
+
+        syncs = await asyncio.gather(
+            *(
+                _sync_space(client, config, auth, space_key, existing_dataset_descriptions, semaphore)
+                for space_key in space_keys
             )
+        )
 
-            page_descriptions = await _get_page_descriptions_for_space(
-                client, config, auth, space_key, existing_descriptions_dict
-            )
-            data_dictionary.extend(page_descriptions)
-
-        return data_dictionary
+    try:
+        await ddm.bulk_write_dataset_descriptions_async(
+            list(chain.from_iterable(sync.upserts for sync in syncs)),
+            delete_paths=list(chain.from_iterable(sync.deletes for sync in syncs)),
+            connector=ConnectorIdEnum.CONFLUENCE,
+        )
+    except DatasetDescriptionException as e:
+        logger().warning(f"Confluence pages were not stored, the next sync will crawl them again: {e}")
+    else:
+        now = time.monotonic()
+        for sync in syncs:
+            if sync.full:
+                _last_full_syncs[(config.url, sync.space_key)] = now
+
+    data_dictionary: list[DatasetDescription] = []
+    for sync in syncs:
+        data_dictionary.extend(sorted(sync.descriptions, key=lambda desc: (len(desc.path) > 1, desc.path)))
+    return data_dictionary
 
 
 async def _get_secrets(
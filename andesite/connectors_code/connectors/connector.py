@@ -190,6 +190,7 @@ class Connector(Generic[TConfig, TTarget, TSecrets]):
         | None = None,
         get_dataset_structure_to_index: Callable[[TConfig, TSecrets, TTarget | None], Awaitable[list[DatasetStructure]]]
         | None = None,
+        close: Callable[[], Awaitable[None]] | None = None,
     ) -> None:
         """
         :display_name: the name for this connector that will be **displayed to the end user**
@@ -206,6 +207,7 @@ class Connector(Generic[TConfig, TTarget, TSecrets]):
         :get_query_target_options: can be called to get the query target options the user can then select from when querying this connector. The agent will respect the configured query target and only ever access datasets the user has explicitly allowed
         :merge_data_dictionary: a function that handles the merging of stored data dictionary descriptions with those that exist on external systems
         :get_dataset_structure_to_index: if a connector has a complicated data structure you can provide this function for us to index the provided dataset structure. This will allow us to inspect the external data model without having to reach out to any external systems
+        :close: if this connector keeps clients open between calls, such as a pool of connections, this releases them when the application shuts down
         """
         self.id = id
         self.display_name = display_name
@@ -225,6 +227,7 @@ class Connector(Generic[TConfig, TTarget, TSecrets]):
         self._merge_data_dictionary = merge_data_dictionary
         self._get_does_allow_user_token_management = get_does_allow_user_token_management
         self._get_dataset_structure_to_index = get_dataset_structure_to_index
+        self._close = close
 
     async def initialize(self, config: ConnectorConfigurationBase, cache: Cache | None, user_id: str | None, encryption_key: str) -> Self:
         try:
@@ -517,3 +520,10 @@ class Connector(Generic[TConfig, TTarget, TSecrets]):
             return []
 
         return await self._get_dataset_structure_to_index(self.config, secrets, dataset_target)
+
+    async def close(self) -> None:
+        """
+        Releases the clients this connector keeps open between calls, shared by every instance of the connector.
+        """
+        if self._close:
+            await self._close()
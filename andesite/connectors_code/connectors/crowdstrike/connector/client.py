@@ -0,0 +1,211 @@
+"""
+CrowdStrike Falcon API query layer.
+
+ID queries are paged with the largest `limit` each endpoint allows and the remaining offset windows are fetched
+concurrently, entities are resolved in chunks through the POST bulk-ID endpoints, and device IDs looked up by
+hostname or IP are cached for a few minutes.
+"""
+
+import asyncio
+from itertools import chain
+from typing import Any
+
+from cachetools import TTLCache
+from common.jsonlogging.jsonlogger import Logging
+from common.models.connector_id_enum import ConnectorIdEnum
+from httpx import AsyncClient
+from opentelemetry import trace
+
+from connectors.crowdstrike.connector.config import CrowdstrikeConnectorConfig
+from connectors.crowdstrike.connector.secrets import CrowdstrikeSecrets
+from connectors.crowdstrike.connector.utils import fetch_token
+from connectors.rate_limit import RateLimit, RateLimits, send_with_rate_limit
+
+logger = Logging.get_logger(__name__)
+tracer = trace.get_tracer(__name__)
+
+# 6000 requests per minute per customer
+CROWDSTRIKE_RATE_LIMITS = RateLimits(
+    connector=ConnectorIdEnum.CROWDSTRIKE,
+    endpoints={"*": RateLimit(requests_per_second=100, burst=100)},
+)
+
+DEVICES_QUERY_PATH = "devices/queries/devices/v1"
+DETECTS_QUERY_PATH = "detects/queries/detects/v1"
+ALERTS_QUERY_PATH = "alerts/queries/alerts/v1"
+DEVICES_ENTITIES_PATH = "devices/entities/devices/v2"
+DETECTS_ENTITIES_PATH = "detects/entities/summaries/GET/v1"
+ALERTS_ENTITIES_PATH = "alerts/entities/alerts/v1"
+
+# Largest page each query endpoint accepts
+QUERY_LIMITS = {
+    DEVICES_QUERY_PATH: 5000,
+    DETECTS_QUERY_PATH: 9999,
+    ALERTS_QUERY_PATH: 10000,
+}
+# Offset paging stops here, offset + limit can't exceed it
+MAX_QUERY_OFFSET = 10000
+
+# Most IDs each bulk endpoint accepts per request
+ENTITIES_CHUNK_SIZES = {
+    DEVICES_ENTITIES_PATH: 5000,
+    DETECTS_ENTITIES_PATH: 1000,
+    ALERTS_ENTITIES_PATH: 1000,
+}
+
+# Device IDs per `device_id:[...]` filter, which keeps query URLs short
+DEVICE_FILTER_CHUNK_SIZE = 100
+
+# Device IDs keyed by (base url, client id, field, value), where field is hostname or local_ip
+device_ids_cache: TTLCache = TTLCache(maxsize=10_000, ttl=300)
+
+
+def format_device_lookup_filter_expression(hostnames: list[str], ips: list[str]) -> str | None:
+    """
+    Returns a filter expression that can be used to query devices by hostname or IP.
+    Note: This is a hack to get an MVP. We don't want to be in the position of mediating all FQL queries between the agent and Crowdstrike.
+    """
+
+    if hostnames:
+        formatted_hostnames = ",".join([f"'{h}'" for h in hostnames])
+        hostname_filter = f"hostname:[{formatted_hostnames}]"
+
+    if ips:
+        formatted_ips = ",".join([f"'{ip}'" for ip in ips])
+        local_ip_filter = f"local_ip:[{formatted_ips}]"
+
+    if hostnames and ips:
+        return f"({hostname_filter} OR {local_ip_filter})"
+    if hostnames and not ips:
+        return f"{hostname_filter}"
+    if ips and not hostnames:
+        return f"{local_ip_filter}"
+    return None
+
+
+def _chunks(items: list[str], size: int) -> list[list[str]]:
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+class CrowdstrikeClient:
+    """
+    Queries the Falcon API over a single HTTP client, with at most `api_max_concurrent_requests` requests in
+    flight. Use as an async context manager.
+    """
+
+    def __init__(self, config: CrowdstrikeConnectorConfig, secrets: CrowdstrikeSecrets):
+        self._config = config
+        self._secrets = secrets
+        self._base_url = config.url or f"https://{config.host}"
+        self._semaphore = asyncio.Semaphore(config.api_max_concurrent_requests)
+        self._client: AsyncClient | None = None
+        self._headers: dict[str, str] = {}
+
+    async def __aenter__(self) -> "CrowdstrikeClient":
+        token = await fetch_token(self._config, self._secrets)
+        self._headers = {"Authorization": f"Bearer {token}"}
+        self._client = AsyncClient(timeout=self._config.api_request_timeout)
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _request(self, method: str, path: str, **kwargs) -> dict[str, Any]:
+        assert self._client is not None, "CrowdstrikeClient must be used as an async context manager"
+        client = self._client
+        async with self._semaphore:
+            response = await send_with_rate_limit(
+                CROWDSTRIKE_RATE_LIMITS,
+                path,
+                lambda: client.request(method, f"{self._base_url}/{path}", headers=self._headers, **kwargs),
+                max_attempts=self._config.api_max_retries,
+            )
+        response.raise_for_status()
+        return response.json()
+
+    @tracer.start_as_current_span("query_ids")
+    async def query_ids(self, path: str, filter_expression: str | None, max_results: int) -> list[str]:
+        """
+        Returns up to `max_results` IDs matching the filter. The first page tells how many there are, the
+        remaining pages are then requested concurrently.
+        """
+        page_size = min(QUERY_LIMITS[path], max_results)
+        params: dict[str, Any] = {"filter": filter_expression} if filter_expression else {}
+        body = await self._request("GET", path, params={**params, "limit": page_size, "offset": 0})
+        ids: list[str] = body.get("resources") or []
+
+        total = body.get("meta", {}).get("pagination", {}).get("total", len(ids))
+        if total > MAX_QUERY_OFFSET and max_results > MAX_QUERY_OFFSET:
+            logger().warning("CrowdStrike query on %s matched %d results, only %d are retrieved", path, total, MAX_QUERY_OFFSET)
+        total = min(total, max_results, MAX_QUERY_OFFSET)
+
+        pages = await asyncio.gather(
+            *(
+                self._request(
+                    "GET",
+                    path,
+                    params={**params, "limit": min(page_size, total - offset), "offset": offset},
+                )
+                for offset in range(len(ids), total, page_size)
+            )
+        )
+        ids.extend(chain.from_iterable(page.get("resources") or [] for page in pages))
+        return ids[:max_results]
+
+    @tracer.start_as_current_span("query_ids_for_devices")
+    async def query_ids_for_devices(self, path: str, device_ids: list[str], max_results: int) -> list[str]:
+        """
+        Returns up to `max_results` IDs of the detections or alerts raised on the given devices.
+        """
+        filter_expressions = [
+            "device_id:[{}]".format(",".join(f"'{device_id}'" for device_id in chunk))
+            for chunk in _chunks(device_ids, DEVICE_FILTER_CHUNK_SIZE)
+        ]
+        results = await asyncio.gather(
+            *(self.query_ids(path, filter_expression, max_results) for filter_expression in filter_expressions)
+        )
+        return list(chain.from_iterable(results))[:max_results]
+
+    @tracer.start_as_current_span("get_entities")
+    async def get_entities(self, path: str, ids: list[str]) -> list[dict[str, Any]]:
+        """
+        Resolves IDs to entities through a POST bulk-ID endpoint, in concurrent chunks.
+        """
+        bodies = await asyncio.gather(
+            *(self._request("POST", path, json={"ids": chunk}) for chunk in _chunks(ids, ENTITIES_CHUNK_SIZES[path]))
+        )
+        return list(chain.from_iterable(body.get("resources") or [] for body in bodies))
+
+    @tracer.start_as_current_span("resolve_device_ids")
+    async def resolve_device_ids(self, hostnames: list[str], ips: list[str]) -> list[str]:
+        """
+        Returns the IDs of the devices with any of the hostnames or local IPs. Each hostname and IP is looked up
+        on its own, concurrently, so its devices can be cached independently of the others.
+        """
+        lookups = [("hostname", hostname) for hostname in hostnames] + [("local_ip", ip) for ip in ips]
+        keys = [(self._base_url, self._config.client_id, field, value.lower()) for field, value in lookups]
+
+        missing = {key: lookup for key, lookup in zip(keys, lookups, strict=True) if key not in device_ids_cache}
+        fetched: dict[tuple[str, ...], list[str]] = {}
+        if missing:
+            results = await asyncio.gather(
+                *(
+                    self.query_ids(
+                        DEVICES_QUERY_PATH,
+                        format_device_lookup_filter_expression(
+                            hostnames=[value] if field == "hostname" else [],
+                            ips=[value] if field == "local_ip" else [],
+                        ),
+                        MAX_QUERY_OFFSET,
+                    )
+                    for field, value in missing.values()
+                )
+            )
+            fetched = dict(zip(missing, results, strict=True))
+            for key, device_ids in fetched.items():
+                device_ids_cache[key] = tuple(device_ids)
+
+        resolved = chain.from_iterable(fetched[key] if key in fetched else device_ids_cache.get(key, ()) for key in keys)
+        return list(dict.fromkeys(resolved))
@@ -22,3 +22,9 @@ class CrowdstrikeConnectorConfig(ConnectorConfigurationBase):
 
     api_request_timeout: int = Field(default=30, description="Request timeout in seconds")
     api_max_retries: int = Field(default=3, description="Number of times to retry API requests upon failure")
+    api_max_concurrent_requests: int = Field(
+        default=4, description="Maximum number of API requests in flight for one tool call", ge=1, le=16
+    )
+    api_max_results: int = Field(
+        default=1000, description="Maximum number of detections or alerts returned for one tool call", ge=1, le=10000
+    )
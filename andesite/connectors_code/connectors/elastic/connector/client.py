@@ -1,4 +1,5 @@
-from typing import Any, Literal
+import asyncio
+from typing import Any, AsyncIterator, Literal
 from common.jsonlogging.jsonlogger import Logging
 from elasticsearch import AsyncElasticsearch  # type: ignore
 from pydantic import SecretStr
@@ -17,17 +18,66 @@ class ElasticException(Exception):
 class ElasticClient:
     _elastic_app: AsyncElasticsearch
 
+    # Pooled clients keyed by (url, api_key). The underlying aiohttp session is bound to the event loop
+    # it was created on, so the loop is kept alongside the client and a new client is made for a new loop.
+    _clients: dict[tuple[str, str], tuple[asyncio.AbstractEventLoop | None, "ElasticClient"]] = {}
+
     def __init__(self, url: str, api_key: str):
+        self._key = (url, api_key)
         self._elastic_app = AsyncElasticsearch(url, api_key=api_key, verify_certs=False)
 
     @classmethod
     def get_client(cls, url: str, api_key: SecretStr) -> "ElasticClient":
-        return ElasticClient(url=url, api_key=api_key.get_secret_value())
+        """
+        Returns the pooled client for this url and api key, creating it if needed.
+        Pooled clients keep their connections open between calls, so callers should not close them.
+        """
+        key = (url, api_key.get_secret_value())
+        try:
+            loop: asyncio.AbstractEventLoop | None = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        pooled = cls._clients.get(key)
+        if pooled is not None:
+            pooled_loop, client = pooled
+            if pooled_loop is loop or pooled_loop is None:
+                cls._clients[key] = (loop, client)
+                return client
+            cls._close_on_loop(pooled_loop, client)
+
+        client = ElasticClient(url=url, api_key=key[1])
+        cls._clients[key] = (loop, client)
+        return client
+
+    @staticmethod
+    def _close_on_loop(loop: asyncio.AbstractEventLoop, client: "ElasticClient") -> None:
+        """
+        Closes a client replaced by one for another event loop. Its session can only be closed on the loop it was
+        created on, so the close is scheduled there while that loop runs, otherwise the client is dropped with it.
+        """
+        if loop.is_running() and not loop.is_closed():
+            asyncio.run_coroutine_threadsafe(client._elastic_app.close(), loop)
+        else:
+            logger().debug("Dropping the Elastic client of a stopped event loop")
+
+    @classmethod
+    async def close_all(cls):
+        """
+        Closes every pooled client that belongs to the running event loop
+        """
+        loop = asyncio.get_running_loop()
+        for pooled_loop, client in list(cls._clients.values()):
+            if pooled_loop is loop or pooled_loop is None:
+                await client.close()
 
     async def close(self):
         """
-        Closes the elasticsearch client connection
+        Closes the elasticsearch client connection and removes it from the pool
         """
+        pooled = self._clients.get(self._key)
+        if pooled is not None and pooled[1] is self:
+            del self._clients[self._key]
         await self._elastic_app.close()
 
     async def list_indices(self) -> list[str]:
@@ -52,6 +102,8 @@ class ElasticClient:
     async def paginated_search(self, index: str, query: dict[str, Any], size: int = 1000, max_pages: int = 1000) -> list[dict[Literal["_source", "_id"], Any]]:
         hits = []
         search_after = None
+        # copy so the caller's query is not mutated between pages
+        query = dict(query)
 
         for page_num in range(max_pages):
             query["size"] = size
@@ -75,6 +127,128 @@ class ElasticClient:
 
         return hits
 
+    async def sliced_search(
+        self,
+        index: str,
+        query: dict[str, Any],
+        slices: int = 4,
+        size: int = 1000,
+        max_concurrency: int = 4,
+        keep_alive: str = "1m",
+        max_hits: int | None = None,
+    ) -> AsyncIterator[dict[Literal["_source", "_id"], Any]]:
+        """
+        Streams every hit of `query` using a point-in-time (PIT) and a sliced search.
+
+        Each of the `slices` slices is paged with `search_after` independently, and at most `max_concurrency`
+        page requests are in flight at once. Hits are yielded as pages arrive, so hits from different slices
+        are interleaved and do not follow the query's sort across slices. The PIT is closed when the stream is
+        exhausted or closed early.
+        """
+        if slices < 1:
+            raise ElasticException("slices must be at least 1")
+
+        pit_response = await self._elastic_app.open_point_in_time(index=index, keep_alive=keep_alive)
+        pit_id: str = pit_response["id"]
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+        # bounded so slices stop fetching when the consumer falls behind
+        pages: asyncio.Queue[list[dict[Literal["_source", "_id"], Any]] | BaseException | None] = asyncio.Queue(
+            maxsize=max_concurrency * 2
+        )
+
+        async def _fetch_slice(slice_id: int):
+            nonlocal pit_id
+            body: dict[str, Any] = {
+                **query,
+                "size": size,
+                "sort": query.get("sort") or ["_shard_doc"],
+            }
+            if slices > 1:
+                body["slice"] = {"id": slice_id, "max": slices}
+            try:
+                while True:
+                    body["pit"] = {"id": pit_id, "keep_alive": keep_alive}
+                    async with semaphore:
+                        response = await self._elastic_app.search(body=body)
+                    # the PIT id may change between requests; always use the most recent one
+                    pit_id = response.get("pit_id", pit_id)
+                    page_hits = response.get("hits", {}).get("hits", [])
+                    if not page_hits:
+                        break
+                    await pages.put(page_hits)
+                    search_after = page_hits[-1].get("sort")
+                    if not search_after or len(page_hits) < size:
+                        break
+                    body["search_after"] = search_after
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                await pages.put(e)
+            await pages.put(None)
+
+        workers = [asyncio.create_task(_fetch_slice(slice_id)) for slice_id in range(slices)]
+        remaining_workers = len(workers)
+        yielded = 0
+        try:
+            while remaining_workers > 0:
+                page = await pages.get()
+                if page is None:
+                    remaining_workers -= 1
+                    continue
+                if isinstance(page, BaseException):
+                    raise ElasticException("Sliced search failed") from page
+                for hit in page:
+                    yield hit
+                    yielded += 1
+                    if max_hits is not None and yielded >= max_hits:
+                        return
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            try:
+                await self._elastic_app.close_point_in_time(body={"id": pit_id})
+            except Exception as e:
+                logger().warning("Failed to close Elastic point in time: %s", str(e))
+
+    async def composite_aggregation(
+        self,
+        index: str,
+        query: dict[str, Any],
+        sources: list[dict[str, Any]],
+        aggs: dict[str, Any] | None = None,
+        page_size: int = 1000,
+        name: str = "composite",
+        after: dict[str, Any] | None = None,
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        """
+        Streams the buckets of a composite aggregation one page at a time, following `after_key` until every
+        bucket has been returned. `aggs` are run as sub-aggregations of each composite bucket, and `after`
+        resumes the aggregation after the given bucket key.
+        """
+        composite: dict[str, Any] = {"size": page_size, "sources": sources}
+        if after:
+            composite["after"] = after
+        aggregation: dict[str, Any] = {"composite": composite}
+        if aggs:
+            aggregation["aggs"] = aggs
+        body: dict[str, Any] = {"size": 0, "aggs": {name: aggregation}}
+        if query:
+            body["query"] = query
+
+        while True:
+            response = await self._elastic_app.search(index=index, body=body)
+            result = response.get("aggregations", {}).get(name, {})
+            buckets = result.get("buckets", [])
+            if buckets:
+                yield buckets
+
+            after_key = result.get("after_key")
+            if not buckets or not after_key or len(buckets) < page_size:
+                break
+            composite["after"] = after_key
+
     async def agg_search(self, index: str, query: dict[str, Any]) -> dict[str, Any]:
         response = await self._elastic_app.search(body=query, index=index)
 
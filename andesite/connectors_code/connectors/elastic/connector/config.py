@@ -10,6 +10,21 @@ class ElasticConnectorConfig(AlertProviderConfigBase, ConnectorConfigurationBase
     url: str
     api_key: StorableSecret
     alert_index: str = ""
+    composite_aggregation_page_size: int = Field(
+        default=1000,
+        ge=1,
+        description="Number of buckets requested per page when paging a composite aggregation.",
+    )
+    composite_aggregation_bucket_cap: int = Field(
+        default=5000,
+        ge=1,
+        description="Maximum number of composite aggregation buckets returned to the agent. Remaining buckets are only counted.",
+    )
+    alert_search_slices: int = Field(
+        default=1,
+        ge=1,
+        description="Number of point-in-time slices fetched concurrently when retrieving alerts. 1 disables sliced search.",
+    )
 
     mitre_attack_id_field_name: str = Field(
         default="kibana.alert.rule.threat",
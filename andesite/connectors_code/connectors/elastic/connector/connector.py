@@ -35,6 +35,9 @@ logger = Logging.get_logger(__name__)
 tracer = trace.get_tracer(__name__)
 ddm = DatasetDescriptionManager.instance()
 
+ALERT_SEARCH_PAGE_SIZE = 1000
+ALERT_SEARCH_MAX_PAGES = 1000
+
 
 async def _get_query_target_options(config: ElasticConnectorConfig, secrets: ElasticSecrets) -> ConnectorQueryTargetOptions:
     INDEX = "index"
@@ -45,18 +48,13 @@ async def _get_query_target_options(config: ElasticConnectorConfig, secrets: Ela
 
     selectors: list[ScopeTargetSelector] = []
 
-    elastic_client = None
     try:
         elastic_client = ElasticClient.get_client(config.url, secrets.api_key)
         indices = await elastic_client.list_indices()
         index_selector = ScopeTargetSelector(type=INDEX, values=indices)
-        pass
     except Exception as e:
         logger().exception("Failed to get ScopeTargetSelector options from Elastic: %s", str(e))
         raise e
-    finally:
-        if elastic_client:
-            await elastic_client.close()
 
     selectors = [index_selector]
     return ConnectorQueryTargetOptions(
@@ -155,14 +153,29 @@ async def _get_alerts_unfiltered(
 
     elastic_client = ElasticClient.get_client(config.url, secrets.api_key)
     try:
-        raw_alerts = await elastic_client.paginated_search(index=config.alert_index, query=query)
+        if config.alert_search_slices > 1:
+            raw_alerts = [
+                hit
+                async for hit in elastic_client.sliced_search(
+                    index=config.alert_index,
+                    query=query,
+                    slices=config.alert_search_slices,
+                    size=ALERT_SEARCH_PAGE_SIZE,
+                    max_concurrency=config.alert_search_slices,
+                    # the same bound as the paginated search
+                    max_hits=ALERT_SEARCH_PAGE_SIZE * ALERT_SEARCH_MAX_PAGES,
+                )
+            ]
+            # slices are interleaved, so restore the query's @timestamp desc order
+            raw_alerts.sort(key=lambda hit: hit.get("_source", {}).get("@timestamp", ""), reverse=True)
+        else:
+            raw_alerts = await elastic_client.paginated_search(
+                index=config.alert_index, query=query, size=ALERT_SEARCH_PAGE_SIZE, max_pages=ALERT_SEARCH_MAX_PAGES
+            )
         logger().info(f"ElasticClient search retrieved {len(raw_alerts)} alerts")
     except Exception as e:
         logger().exception("Failed to get alerts from Elastic: %s", str(e))
         raise e
-    finally:
-        await elastic_client.close()
-
 
     parsed_alerts: list[Alert] = []
     for alert in raw_alerts:
@@ -245,4 +258,5 @@ ElasticConnector = Connector(
     get_alerts=_get_alerts,
     merge_data_dictionary=_merge_dataset_descriptions,
     get_query_target_options=_get_query_target_options,
+    close=ElasticClient.close_all,
 )
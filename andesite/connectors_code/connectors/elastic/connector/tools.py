@@ -5,7 +5,7 @@ from common.jsonlogging.jsonlogger import Logging
 from common.managers.dataset_descriptions.dataset_description_manager import DatasetDescriptionManager
 from common.models.connector_id_enum import ConnectorIdEnum
 from common.models.metadata import QueryResultMetadata
-from common.models.tool import ExecuteQuerySpecialization, Tool
+from common.models.tool import ExecuteQuerySpecialization, Tool, ToolResult
 from opentelemetry import trace
 from pydantic import BaseModel, Field, model_validator
 
@@ -24,6 +24,13 @@ Always define a clear sort order and limit results with size for efficiency.
 Ensure field types align with query expectations by validating the index mapping beforehand.
 """
 
+# Page size used to count composite buckets past the bucket cap. Sub-aggregations are dropped while counting,
+# so much larger pages are cheap for the cluster.
+COMPOSITE_COUNT_PAGE_SIZE = 10000
+# Counting stops after this many pages, so a huge aggregation is reported as "at least" a bound instead of
+# being scanned to the end.
+COMPOSITE_COUNT_MAX_PAGES = 5
+
 logger = Logging.get_logger(__name__)
 tracer = trace.get_tracer(__name__)
 
@@ -88,6 +95,8 @@ class ElasticAggregationQuery(BaseModel):
     Runs an Elasticsearch aggregation query.
     The `query` field (optional) contains the filter conditions. The `aggs` field contains
     the aggregation definitions. Do not wrap either field in another 'query' or 'aggs' key.
+    For high-cardinality groupings use a single `composite` aggregation instead of a terms aggregation
+    with a large `size`; its buckets are paged automatically and returned one row per bucket.
     """
 
     query: dict[str, Any] = Field(
@@ -134,6 +143,8 @@ class ElasticConnectorTools(ConnectorToolsInterface[ElasticSecrets]):
         """
         self._index = target.index
         self._url = elastic_config.url
+        self._composite_page_size = elastic_config.composite_aggregation_page_size
+        self._composite_bucket_cap = elastic_config.composite_aggregation_bucket_cap
         self._target = target
         super().__init__(ConnectorIdEnum.ELASTIC, target, secrets)
 
@@ -279,10 +290,15 @@ class ElasticConnectorTools(ConnectorToolsInterface[ElasticSecrets]):
         )
 
     @tracer.start_as_current_span("execute_aggregation_query")
-    async def execute_aggregation_query(self, input: ElasticAggregationQuery) -> QueryResultMetadata:
+    async def execute_aggregation_query(self, input: ElasticAggregationQuery) -> QueryResultMetadata | ToolResult:
         index = self._index
         logger().debug(f"Executing aggregation query with arguments: {input.model_dump()}")
 
+        if len(input.aggs) == 1:
+            agg_name, agg_definition = next(iter(input.aggs.items()))
+            if isinstance(agg_definition, dict) and "composite" in agg_definition:
+                return await self._execute_composite_aggregation_query(input.query, agg_name, agg_definition)
+
         query = {"query": input.query, "aggs": input.aggs}
         agg_results = await ElasticClient.get_client(url=self._url, api_key=self._secrets.api_key).agg_search(
             query=query, index=index
@@ -299,6 +315,86 @@ class ElasticConnectorTools(ConnectorToolsInterface[ElasticSecrets]):
             column_headers=["aggregation_name", "aggregation_result"],
         )
 
+    @tracer.start_as_current_span("execute_composite_aggregation_query")
+    async def _execute_composite_aggregation_query(
+        self, query: dict[str, Any], agg_name: str, agg_definition: dict[str, Any]
+    ) -> ToolResult:
+        """
+        Pages a composite aggregation with `after_key`, turning each bucket into a row until the bucket cap is reached.
+        Buckets past the cap are only counted, up to COMPOSITE_COUNT_MAX_PAGES pages, so the agent knows how much was
+        left out.
+        """
+        sources: list[dict[str, Any]] = agg_definition["composite"].get("sources", [])
+        sub_aggs: dict[str, Any] | None = agg_definition.get("aggs") or agg_definition.get("aggregations")
+        source_names = [name for source in sources for name in source]
+        sub_agg_names = list(sub_aggs or {})
+
+        client = ElasticClient.get_client(url=self._url, api_key=self._secrets.api_key)
+        rows: list[list[str]] = []
+        total_buckets = 0
+        after_key: dict[str, Any] | None = None
+
+        async for buckets in client.composite_aggregation(
+            index=self._index,
+            query=query,
+            sources=sources,
+            aggs=sub_aggs,
+            page_size=self._composite_page_size,
+            name=agg_name,
+        ):
+            for bucket in buckets:
+                total_buckets += 1
+                if len(rows) < self._composite_bucket_cap:
+                    rows.append(self._composite_bucket_row(bucket, source_names, sub_agg_names))
+            after_key = buckets[-1].get("key")
+            if len(rows) >= self._composite_bucket_cap:
+                break
+        else:
+            after_key = None
+
+        count_truncated = False
+        if after_key is not None:
+            counted_pages = 0
+            async for buckets in client.composite_aggregation(
+                index=self._index,
+                query=query,
+                sources=sources,
+                page_size=COMPOSITE_COUNT_PAGE_SIZE,
+                name=agg_name,
+                after=after_key,
+            ):
+                total_buckets += len(buckets)
+                counted_pages += 1
+                if counted_pages >= COMPOSITE_COUNT_MAX_PAGES:
+                    count_truncated = len(buckets) == COMPOSITE_COUNT_PAGE_SIZE
+                    break
+
+        executed_query = {"query": query, "aggs": {agg_name: agg_definition}}
+        metadata = QueryResultMetadata(
+            query_format="ES",
+            query=json.dumps(executed_query),
+            results=rows,
+            column_headers=[*source_names, "doc_count", *sub_agg_names],
+        )
+
+        if count_truncated:
+            additional_context = f"The composite aggregation returned at least {total_buckets} buckets."
+        else:
+            additional_context = f"The composite aggregation returned {total_buckets} buckets in total."
+        if total_buckets > len(rows):
+            additional_context += (
+                f" Only the first {len(rows)} buckets are shown. Narrow down your query or add filters to see the rest."
+            )
+        return ToolResult(result=metadata, additional_context=additional_context)
+
+    @staticmethod
+    def _composite_bucket_row(bucket: dict[str, Any], source_names: list[str], sub_agg_names: list[str]) -> list[str]:
+        key = bucket.get("key", {})
+        row = [str(key.get(name)) for name in source_names]
+        row.append(str(bucket.get("doc_count", 0)))
+        row.extend(json.dumps(bucket.get(name)) for name in sub_agg_names)
+        return row
+
     async def _get_schema(self) -> str:
         index_description = await self.get_index_description(self.GetIndexInput())
         mappings = await self.get_index_fields(self.GetIndexFieldsInput())
@@ -1,5 +1,3 @@
-import asyncio
-
 import httpx
 from common.models.connector_id_enum import ConnectorIdEnum
 from common.models.tool import Tool, ToolResult
@@ -8,8 +6,15 @@ from pydantic import BaseModel, Field
 from connectors.github.connector.config import GithubConnectorConfig
 from connectors.github.connector.target import GithubTarget
 from connectors.github.connector.secrets import GithubSecrets
+from connectors.rate_limit import RateLimit, RateLimits, send_with_rate_limit
 from connectors.tools import ConnectorToolsInterface
 
+# Authenticated REST requests are limited to 5000 per hour, shared by every endpoint
+GITHUB_RATE_LIMITS = RateLimits(
+    connector=ConnectorIdEnum.GITHUB,
+    endpoints={"*": RateLimit(requests_per_second=5000 / 3600, burst=50)},
+)
+
 
 class GetGithubRepositoriesInput(BaseModel):
     """Input model for retrieving GitHub repositories. No parameters are required."""
@@ -46,25 +51,16 @@ class GithubConnectorTools(ConnectorToolsInterface[GithubSecrets]):
         Retrieves GitHub repositories for the authenticated user.
         Implements retry logic to handle API rate limiting responses.
         """
-        retries = 3
         async with httpx.AsyncClient(timeout=30) as client:
-            response = None
-            for attempt in range(retries):
-                response = await client.get(
+            response = await send_with_rate_limit(
+                GITHUB_RATE_LIMITS,
+                "user/repos",
+                lambda: client.get(
                     f"{self._config.url}/user/repos",
                     headers={"Authorization": f"token {self._secrets.access_token.get_secret_value()}"},
-                )
-                if response.status_code in (429, 403):
-                    await asyncio.sleep(1 * (attempt + 1))
-                    continue
-                repos = response.json()
-                if self._target and self._target.repository_ids:
-                    allowed = {str(rid) for rid in self._target.repository_ids}
-                    repos = [repo for repo in repos if str(repo.get("id")) in allowed]
-                for repo in repos:
-                    repo["id"] = str(repo.get("id"))
-                return ToolResult(result=repos)
-            repos = response.json() if response is not None else []
+                ),
+            )
+            repos = response.json()
             if self._target and self._target.repository_ids:
                 allowed = {str(rid) for rid in self._target.repository_ids}
                 repos = [repo for repo in repos if str(repo.get("id")) in allowed]
@@ -78,11 +74,12 @@ class GithubConnectorTools(ConnectorToolsInterface[GithubSecrets]):
         Implements retry logic to handle API rate limiting responses.
         """
         repository_id = input.repository_id
-        retries = 3
+        headers = {"Authorization": f"token {self._secrets.access_token.get_secret_value()}"}
         async with httpx.AsyncClient(timeout=30) as client:
-            repo_resp = await client.get(
-                f"{self._config.url}/repositories/{repository_id}",
-                headers={"Authorization": f"token {self._secrets.access_token.get_secret_value()}"},
+            repo_resp = await send_with_rate_limit(
+                GITHUB_RATE_LIMITS,
+                "repositories",
+                lambda: client.get(f"{self._config.url}/repositories/{repository_id}", headers=headers),
             )
             if repo_resp.status_code != 200:
                 return ToolResult(result=[])
@@ -90,16 +87,10 @@ class GithubConnectorTools(ConnectorToolsInterface[GithubSecrets]):
             full_name = repo_data.get("full_name")
             if not full_name:
                 return ToolResult(result=[])
-            issues_resp = None
-            for attempt in range(retries):
-                issues_resp = await client.get(
-                    f"{self._config.url}/repos/{full_name}/issues?state=all",
-                    headers={"Authorization": f"token {self._secrets.access_token.get_secret_value()}"},
-                )
-                if issues_resp.status_code in (429, 403):
-                    await asyncio.sleep(1 * (attempt + 1))
-                    continue
-                issues = issues_resp.json()
-                return ToolResult(result=issues)
-            issues = issues_resp.json() if issues_resp is not None else []
+            issues_resp = await send_with_rate_limit(
+                GITHUB_RATE_LIMITS,
+                "issues",
+                lambda: client.get(f"{self._config.url}/repos/{full_name}/issues?state=all", headers=headers),
+            )
+            issues = issues_resp.json()
             return ToolResult(result=issues)
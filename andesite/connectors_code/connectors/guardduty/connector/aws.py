@@ -0,0 +1,41 @@
+from functools import lru_cache
+
+from aiobotocore.client import AioBaseClient
+from aiobotocore.session import AioSession, get_session
+from botocore.config import Config as BotoConfig
+
+from connectors.guardduty.connector.config import GuarddutyConnectorConfig
+from connectors.guardduty.connector.secrets import GuarddutySecrets
+
+
+@lru_cache(maxsize=1)
+def _get_session() -> AioSession:
+    # the session caches the loaded service models, so every client after the first is cheap to create
+    return get_session()
+
+
+async def get_client_context(
+    config: GuarddutyConnectorConfig, secrets: GuarddutySecrets, endpoint_url: str | None = None
+) -> AioBaseClient:
+    """
+    Returns a GuardDuty client context with the configured credentials, retries and timeouts, to be shared by all
+    the requests of one operation.
+    """
+    boto_config = BotoConfig(
+        retries={
+            'max_attempts': config.api_max_retries,
+            'mode': 'standard'
+        },
+        connect_timeout=config.api_request_timeout,
+        read_timeout=config.api_request_timeout,
+        max_pool_connections=max(10, config.findings_max_concurrent_requests),
+    )
+    return _get_session().create_client(  # type: ignore[call-overload]
+        "guardduty",
+        region_name=config.aws_region,
+        endpoint_url=endpoint_url,
+        aws_access_key_id=secrets.aws_access_key_id.get_secret_value(),
+        aws_secret_access_key=secrets.aws_secret_access_key.get_secret_value(),
+        aws_session_token=(secrets.aws_session_token.get_secret_value() if secrets.aws_session_token else None),
+        config=boto_config,
+    )
@@ -39,6 +39,12 @@ class GuarddutyConnectorConfig(ConnectorConfigurationBase):
         default=50,
         description="Maximum number of findings to return per page"
     )
+    findings_max_concurrent_requests: int = Field(
+        default=4,
+        description="Maximum number of get_findings requests in flight when hydrating findings",
+        ge=1,
+        le=16
+    )
     findings_days_back: int = Field(
         default=30,
         description="Default number of days to look back when querying findings"
@@ -1,7 +1,4 @@
 import os
-import asyncio
-import boto3
-from botocore.config import Config as BotoConfig
 from pathlib import Path
 
 from opentelemetry import trace
@@ -11,6 +8,7 @@ from common.jsonlogging.jsonlogger import Logging
 from connectors.connector import Connector
 from connectors.cache import Cache
 from common.models.connector_id_enum import ConnectorIdEnum
+from connectors.guardduty.connector.aws import get_client_context
 from connectors.guardduty.connector.config import GuarddutyConnectorConfig
 from connectors.guardduty.connector.target import GuarddutyTarget
 from connectors.guardduty.connector.secrets import GuarddutySecrets
@@ -35,24 +33,9 @@ async def _check_connection(config: GuarddutyConnectorConfig, secrets: Guardduty
     Verifies connectivity to AWS GuardDuty by listing detectors.
     """
     try:
-        boto_config = BotoConfig(
-            retries={
-                'max_attempts': config.api_max_retries,
-                'mode': 'standard'
-            },
-            connect_timeout=config.api_request_timeout,
-            read_timeout=config.api_request_timeout
-        )
-        client = boto3.client(
-            "guardduty",
-            region_name=config.aws_region,
-            aws_access_key_id=secrets.aws_access_key_id.get_secret_value(),
-            aws_secret_access_key=secrets.aws_secret_access_key.get_secret_value(),
-            aws_session_token=(secrets.aws_session_token.get_secret_value() if secrets.aws_session_token else None),
-            config=boto_config
-        )
-        # Confirm connectivity by listing detectors
-        await asyncio.to_thread(lambda: client.list_detectors())
+        async with await get_client_context(config, secrets) as client:
+            # Confirm connectivity by listing detectors
+            await client.list_detectors()
         return True
     except Exception:
         logger().exception("GuardDuty connection failed")
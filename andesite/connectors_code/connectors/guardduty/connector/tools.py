@@ -1,11 +1,12 @@
 from common.jsonlogging.jsonlogger import Logging
 import asyncio
-from typing import Any
-import boto3
-from botocore.config import Config as BotoConfig
+import time
+from typing import Any, Optional
+from aiobotocore.client import AioBaseClient
 from opentelemetry import trace
 from common.models.tool import Tool, ToolResult
 from common.models.connector_id_enum import ConnectorIdEnum
+from connectors.guardduty.connector.aws import get_client_context
 from connectors.guardduty.connector.config import GuarddutyConnectorConfig
 from connectors.guardduty.connector.target import GuarddutyTarget
 from connectors.guardduty.connector.secrets import GuarddutySecrets
@@ -15,6 +16,9 @@ from pydantic import BaseModel, Field
 tracer = trace.get_tracer(__name__)
 logger = Logging.get_logger(__name__)
 
+# max request size for aws is 50, beyond that you get a bounds error
+GET_FINDINGS_BATCH_SIZE = 50
+
 class GetGuarddutyFindingsInput(BaseModel):
     """
     Input model for listing GuardDuty findings.
@@ -24,6 +28,25 @@ class GetGuarddutyFindingsInput(BaseModel):
     detector_id: str = Field(
         description="The detector ID to list findings for"
     )
+    min_severity: Optional[int] = Field(
+        default=None,
+        ge=1,
+        le=10,
+        description="Only list findings with at least this severity: 1 for low, 4 for medium, 7 for high and 9 for critical"
+    )
+    finding_types: Optional[list[str]] = Field(
+        default=None,
+        description="Only list findings of these types, e.g. 'Recon:EC2/PortProbeUnprotectedPort'"
+    )
+    days_back: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="Only list findings updated in this many last days. Defaults to the connector setting"
+    )
+    archived: Optional[bool] = Field(
+        default=None,
+        description="Only list archived findings when true or unarchived findings when false. Lists both when not set"
+    )
 
 class GetFindingDetailsInput(BaseModel):
     """
@@ -77,68 +100,83 @@ class GuarddutyConnectorTools(ConnectorToolsInterface[GuarddutySecrets]):
             ),
         ]
 
-    def _get_client(self):
+    async def _get_client_context(self) -> AioBaseClient:
         """
-        Internal helper to construct a boto3 GuardDuty client with configured retries and timeouts.
+        Internal helper to construct a GuardDuty client with configured retries and timeouts.
 
-        :return: Configured boto3 GuardDuty client.
+        :return: Configured GuardDuty client context.
         """
-        boto_config = BotoConfig(
-            retries={
-                'max_attempts': self.config.api_max_retries,
-                'mode': 'standard'
-            },
-            connect_timeout=self.config.api_request_timeout,
-            read_timeout=self.config.api_request_timeout
-        )
-        return boto3.client(
-            "guardduty",
-            region_name=self.config.aws_region,
-            aws_access_key_id=self._secrets.aws_access_key_id.get_secret_value(),
-            aws_secret_access_key=self._secrets.aws_secret_access_key.get_secret_value(),
-            aws_session_token=(
-                self._secrets.aws_session_token.get_secret_value()
-                if self._secrets.aws_session_token
-                else None
-            ),
-            config=boto_config
-        )
+        return await get_client_context(self.config, self._secrets)
+
+    def _get_finding_criteria(self, input: GetGuarddutyFindingsInput) -> dict[str, Any]:
+        """
+        Translates the input filters into GuardDuty finding criteria, so findings are filtered by list_findings
+        instead of being fetched and discarded.
+        """
+        days_back = input.days_back or self.config.findings_days_back
+        criterion: dict[str, Any] = {
+            "updatedAt": {"GreaterThanOrEqual": int((time.time() - days_back * 86400) * 1000)},
+        }
+        if input.min_severity is not None:
+            criterion["severity"] = {"GreaterThanOrEqual": input.min_severity}
+        if input.finding_types:
+            criterion["type"] = {"Equals": input.finding_types}
+        if input.archived is not None:
+            criterion["service.archived"] = {"Equals": [str(input.archived).lower()]}
+        return {"Criterion": criterion}
+
+    async def _get_findings(
+        self, client: AioBaseClient, detector_id: str, finding_ids: list[str], semaphore: asyncio.Semaphore
+    ) -> list[dict[str, Any]]:
+        async with semaphore:
+            response = await client.get_findings(DetectorId=detector_id, FindingIds=finding_ids)
+        return response.get("Findings", []) or []
 
     @tracer.start_as_current_span("get_guardduty_findings_async")
     async def get_guardduty_findings_async(self, input: GetGuarddutyFindingsInput) -> ToolResult:
         """
         lists GuardDuty findings for the specified detector ID with pagination.
 
-        :param input: GetGuarddutyFindingsInput containing the detector_id
-        :return: ToolResult where result is a list of normalized finding dictionaries
+        Findings are hydrated in batches of 50 while the listing continues, with at most
+        `findings_max_concurrent_requests` get_findings requests in flight.
+
+        :param input: GetGuarddutyFindingsInput containing the detector_id and filters
+        :return: ToolResult where result is a list of normalized finding dictionaries, most recently updated first
         """
         detector_id = input.detector_id
-        client = self._get_client()
-
-        # Paginate through findings
-        paginator = client.get_paginator("list_findings")
-        finding_ids: list[str] = []
-        for page in paginator.paginate( DetectorId=detector_id, MaxResults=self.config.findings_max_results):
-            item = await asyncio.to_thread(lambda: page)
-            finding_ids.extend(item.get("FindingIds", []))
-
-        if not finding_ids:
-            return ToolResult(result=[])
-
-        raw_findings = []
-        # max request size for aws is 50, beyond that you get a bounds error (probably share with zerg)
-        for i in range(0, len(finding_ids), 50):
-            response_i = await asyncio.to_thread(
-                lambda: client.get_findings(
+        semaphore = asyncio.Semaphore(self.config.findings_max_concurrent_requests)
+        hydrations: list[asyncio.Task[list[dict[str, Any]]]] = []
+
+        async with await self._get_client_context() as client:
+            try:
+                paginator = client.get_paginator("list_findings")
+                pending_ids: list[str] = []
+                async for page in paginator.paginate(
                     DetectorId=detector_id,
-                    FindingIds=finding_ids[i:i+50]
-                )
-            )
-            raw_findings.extend(response_i.get("Findings", []))
+                    FindingCriteria=self._get_finding_criteria(input),
+                    SortCriteria={"AttributeName": "updatedAt", "OrderBy": "DESC"},
+                    MaxResults=self.config.findings_max_results,
+                ):
+                    pending_ids.extend(page.get("FindingIds", []))
+                    while len(pending_ids) >= GET_FINDINGS_BATCH_SIZE:
+                        batch, pending_ids = pending_ids[:GET_FINDINGS_BATCH_SIZE], pending_ids[GET_FINDINGS_BATCH_SIZE:]
+                        hydrations.append(
+                            asyncio.create_task(self._get_findings(client, detector_id, batch, semaphore))
+                        )
+                if pending_ids:
+                    hydrations.append(
+                        asyncio.create_task(self._get_findings(client, detector_id, pending_ids, semaphore))
+                    )
+
+                batches = await asyncio.gather(*hydrations)
+            finally:
+                for task in hydrations:
+                    task.cancel()
 
         normalized_findings: list[dict[str, Any]] = []
-        for f in raw_findings:
-            normalized_findings.append(self._normalize_finding(f, detector_id))
+        for batch_findings in batches:
+            for f in batch_findings:
+                normalized_findings.append(self._normalize_finding(f, detector_id))
 
         return ToolResult(result=normalized_findings)
 
@@ -152,14 +190,11 @@ class GuarddutyConnectorTools(ConnectorToolsInterface[GuarddutySecrets]):
         """
         detector_id = input.detector_id
         finding_id = input.finding_id
-        client = self._get_client()
-
-        response = await asyncio.to_thread(
-            lambda: client.get_findings(
+        async with await self._get_client_context() as client:
+            response = await client.get_findings(
                 DetectorId=detector_id,
                 FindingIds=[finding_id]
             )
-        )
         raw_findings = response.get("Findings", []) or []
         if not raw_findings:
             return ToolResult(result={})
@@ -3,14 +3,20 @@ import base64
 from connectors.jira.connector.config import JIRAConnectorConfig
 from connectors.jira.connector.target import JIRATarget
 import httpx
-import asyncio
 from pydantic import BaseModel
 
 from common.models.connector_id_enum import ConnectorIdEnum
 from connectors.jira.connector.secrets import JIRASecrets
+from connectors.rate_limit import RateLimit, RateLimits, send_with_rate_limit
 from connectors.tools import ConnectorToolsInterface
 from common.models.tool import Tool, ToolResult
 
+# Jira Cloud doesn't publish fixed limits; it answers 429 with Retry-After, which the governor honors
+JIRA_RATE_LIMITS = RateLimits(
+    connector=ConnectorIdEnum.JIRA,
+    endpoints={"*": RateLimit(requests_per_second=10, burst=20)},
+)
+
 
 class GetJIRAProjectsInput(BaseModel):
     """Input model for retrieving JIRA projects. No fields are required."""
@@ -46,7 +52,9 @@ class JIRAConnectorTools(ConnectorToolsInterface[JIRASecrets]):
             headers = {
                 "Authorization": "Basic " + base64.b64encode(f"{self.config.email}:{self._secrets.api_key.get_secret_value()}".encode()).decode()
             }
-            response = await client.get(url, headers=headers, timeout=30)
+            response = await send_with_rate_limit(
+                JIRA_RATE_LIMITS, "project", lambda: client.get(url, headers=headers, timeout=30)
+            )
             response.raise_for_status()
             projects: list[dict[str, Any]] = response.json()
             projects = [p for p in projects if p.get("key") in self.target.project_keys]
@@ -68,23 +76,12 @@ class JIRAConnectorTools(ConnectorToolsInterface[JIRASecrets]):
                 "Authorization": "Basic " + base64.b64encode(f"{self.config.email}:{self._secrets.api_key.get_secret_value()}".encode()).decode()
             }
             params = {"jql": jql}
-            retries = 3
-            attempt = 0
-            response = None
-            issues: list[Any] = []
-            while attempt < retries:
-                response = await client.get(url, params=params, headers=headers, timeout=30)
-                if response.status_code == 429:
-                    await asyncio.sleep(1)
-                    attempt += 1
-                    continue
-                response.raise_for_status()
-                issues = response.json().get("issues", [])
-                return ToolResult(result=issues)
-            # If retries exhausted, raise an exception
-            if response is not None:
-                response.raise_for_status()
-                issues = response.json().get("issues", [])
+            response = await send_with_rate_limit(
+                JIRA_RATE_LIMITS, "search", lambda: client.get(url, params=params, headers=headers, timeout=30)
+            )
+            # raises if the request is still rate limited after retries
+            response.raise_for_status()
+            issues: list[Any] = response.json().get("issues", [])
             return ToolResult(result=issues)
 
     def get_tools(self) -> list[Tool]:
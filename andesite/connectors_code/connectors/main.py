@@ -12,3 +12,8 @@ async def initialize_connector_dependencies(mongodb_database: str):
     logger().info("Initializing connector registry")
     await ConnectorConfigurationManager.instance().initialize(storage_collection=MongoDbClient().get_collection(mongodb_database, "connector_configurations"))
     await ConnectorRegistry.initialize(cache=RedisClient().get_client())
+
+
+async def close_connector_dependencies():
+    logger().info("Closing connector clients")
+    await ConnectorRegistry.close()
@@ -1,12 +1,14 @@
 import asyncio
+from collections import deque
 from enum import StrEnum
-from typing import Any, Callable
+from typing import Any, AsyncIterator, Callable
 from opentelemetry import trace
 
 from httpx import AsyncClient, HTTPStatusError
 from pydantic import BaseModel, SecretStr, field_validator, ConfigDict, Field
 
 from connectors.cache import Cache
+from connectors.rate_limit import RateLimit, RateLimitGovernor, RateLimits
 from common.jsonlogging.jsonlogger import Logging
 from common.models.connector_id_enum import ConnectorIdEnum
 from connectors.proofpoint.utils import (
@@ -21,6 +23,17 @@ from datetime import timedelta, datetime, timezone, UTC
 logger = Logging.get_logger(__name__)
 tracer = trace.get_tracer(__name__)
 
+# Documented quotas are per 24 hours; they are enforced per UTC day. Campaign details have no documented limit.
+# https://help.proofpoint.com/Threat_Insight_Dashboard/API_Documentation
+PROOFPOINT_RATE_LIMITS = RateLimits(
+    connector=ConnectorIdEnum.PROOFPOINT,
+    endpoints={
+        "campaign/ids": RateLimit(daily_quota=50),
+        "siem": RateLimit(daily_quota=1800),
+        "forensics": RateLimit(daily_quota=1800),
+    },
+)
+
 
 class Interval(BaseModel):
     interval: str
@@ -107,6 +120,7 @@ async def _add_cache_to_request_function(
     cache: Cache,
     connector_id: ConnectorIdEnum,
     expiry_sec: int,
+    endpoint: str,
 ) -> Any:
     """
     Makes an HTTP request, checking the cache first. If the response is not cached, it will make the request and store the result in the cache.
@@ -120,6 +134,7 @@ async def _add_cache_to_request_function(
     :param cache: An instance of Cache to store results
     :param connector_id: The ID of the connector for which the cache is being used
     :param expiry_sec: Expiry time for the cache in seconds
+    :param endpoint: The rate-limited endpoint the request counts against
     :return: The response from the HTTP request, either from cache or the actual request
     """
     key = make_key(method, url, params)
@@ -141,6 +156,7 @@ async def _add_cache_to_request_function(
         auth=auth,
         timeout=timeout,
         max_retries=max_retries,
+        endpoint=endpoint,
     )
 
     if response:
@@ -185,6 +201,44 @@ def _segment_interval_by_unit(interval: str, unit: SegmentTimeUnit) -> list[str]
     return segments
 
 
+def _round_siem_interval(interval: str) -> str:
+    """
+    Rounds a SIEM interval outwards to whole hours, so its segments line up with the cached 1-hour segments.
+
+    We ensure that the interval start uses the beginning of the hour containing the SIEM endpoint request
+    since we fetch and cache the SIEM events in 1-hour segments.
+    The exception is the last segment which bounded by the current time. This last segment is rounded down to
+    the previous hour to avoid making excessive API requests that could exhaust the quota.
+    """
+    interval = validate_ISO8601_interval(interval)
+    start, end = interval.split("/")
+
+    # Ensure that the interval start is rounded down to the beginning of the hour containing the request
+    start_dt = datetime.strptime(start, "%Y-%m-%dT%H:%M:%SZ")
+    start_dt_rounded = round_time_down_to_nearest_increment(
+        start_dt, increment=60 * 60
+    )
+    start_str = start_dt_rounded.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    if interval_end_more_than_timedelta_ago(interval, timedelta(hours=1)):
+        # If the interval end is more than 1 hour old, we can round up to the next hour to guarantee we include the
+        # target interval while snapping the interval to 1-hr segments to avoid making excessive API requests.
+        end_dt = datetime.strptime(end, "%Y-%m-%dT%H:%M:%SZ")
+        end_dt_rounded = round_time_up_to_nearest_increment(
+            end_dt, increment=60 * 60
+        )
+        end_str = end_dt_rounded.strftime("%Y-%m-%dT%H:%M:%SZ")
+    else:
+        # Otherwise, the interval end is within a 1-hr segment that is still receiving new events. We ensure that
+        # the interval end is rounded down to the beginning of the minute containing the request.
+        # We round down to prevent 404 errors resulting from an interval end that is in the future.
+        end_dt = datetime.strptime(end, "%Y-%m-%dT%H:%M:%SZ")
+        end_dt_rounded = round_time_down_to_nearest_increment(end_dt, increment=60)
+        end_str = end_dt_rounded.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    return f"{start_str}/{end_str}"
+
+
 async def _request_with_retry(
     method: str,
     url: str,
@@ -192,12 +246,15 @@ async def _request_with_retry(
     params: dict[str, Any],
     timeout: int,
     max_retries: int,
+    endpoint: str,
 ) -> Any:
     """
-    Throws if max retries is exceeded
+    Throws if max retries is exceeded, or if the endpoint's daily quota is used up
     """
+    governor = RateLimitGovernor.instance()
     retries = 0
     while retries < max_retries:
+        await governor.acquire(PROOFPOINT_RATE_LIMITS, endpoint)
         try:
             async with AsyncClient(timeout=timeout) as client:
                 response = await client.request(
@@ -208,7 +265,10 @@ async def _request_with_retry(
         except HTTPStatusError as exc:
             logger().exception(f"Encountered an HTTP error: {exc.response.status_code}, message: {exc.response.text}")
             if exc.response.status_code == 429 and retries < max_retries:
-                await asyncio.sleep(2**retries)
+                # the next acquire waits for Retry-After, or backs off exponentially
+                await governor.observe_response(
+                    PROOFPOINT_RATE_LIMITS, endpoint, exc.response.status_code, exc.response.headers, retries
+                )
                 retries += 1
                 continue
             raise exc
@@ -227,12 +287,14 @@ class ProofpointInstance:
         request_timeout: int,
         max_retries: int,
         cache: Cache | None = None,
+        siem_max_concurrent_requests: int = 4,
     ):
         self.base_url = api_host.rstrip("/")
         self.auth = (principal, token.get_secret_value() if token else "UNSET_TOKEN")
         self.request_timeout = request_timeout
         self.max_retries = max_retries
         self.cache = cache
+        self.siem_max_concurrent_requests = siem_max_concurrent_requests
 
 
 
@@ -242,6 +304,7 @@ class ProofpointInstance:
         url: str,
         params: dict[str, Any],
         expiry_sec: int | None = None,
+        endpoint: str = "*",
     ) -> Any:
         if expiry_sec and not self.cache:
             raise ValueError(
@@ -259,6 +322,7 @@ class ProofpointInstance:
                 cache=self.cache,
                 connector_id=ConnectorIdEnum.PROOFPOINT,
                 expiry_sec=expiry_sec,
+                endpoint=endpoint,
             )
         return await _request_with_retry(
             method=method,
@@ -267,10 +331,11 @@ class ProofpointInstance:
             auth=self.auth,
             max_retries=self.max_retries,
             timeout=self.request_timeout,
+            endpoint=endpoint,
         )
 
     async def _request_all_results(
-        self, url: str, params: dict[str, Any], expiry_sec: int | None = None
+        self, url: str, params: dict[str, Any], expiry_sec: int | None = None, endpoint: str = "*"
     ) -> list[dict[str, Any]]:
         """
         Helper function to make a paginated HTTP GET requests that terminate on 404.
@@ -280,7 +345,7 @@ class ProofpointInstance:
         while True:
             try:
                 page_data = await self.request(
-                    method="GET", url=url, params=params, expiry_sec=expiry_sec
+                    method="GET", url=url, params=params, expiry_sec=expiry_sec, endpoint=endpoint
                 )
                 results.append(page_data)
                 params["page"] += 1
@@ -348,7 +413,7 @@ class ProofpointInstance:
 
             try:
                 segment_pages = await self._request_all_results(
-                    url, params, expiry_sec=24 * 60 * 60 if self.cache else None
+                    url, params, expiry_sec=24 * 60 * 60 if self.cache else None, endpoint="campaign/ids"
                 )
             except HTTPStatusError as exc:
                 logger().exception(
@@ -375,68 +440,64 @@ class ProofpointInstance:
         threat_status: list[str],
         segment_unit: SegmentTimeUnit = SegmentTimeUnit.HOUR,
     ) -> dict[str, list[dict[str, Any]]]:
-        interval = validate_ISO8601_interval(interval)
-        # Note on rounding the time interval.
-        # We ensure that the interval start uses the beginning of the hour containing the SIEM endpoint request
-        # since we fetch and cache the SIEM events in 1-hour segments.
-        # The exception is the last segment which bounded by the current time. This last segment is rounded down to
-        # the previous hour to avoid making excessive API requests that could exhaust the quota.
-        start, end = interval.split("/")
-
-        # Ensure that the interval start is rounded down to the beginning of the hour containing the request
-        start_dt = datetime.strptime(start, "%Y-%m-%dT%H:%M:%SZ")
-        start_dt_rounded = round_time_down_to_nearest_increment(
-            start_dt, increment=60 * 60
-        )
-        start_str = start_dt_rounded.strftime("%Y-%m-%dT%H:%M:%SZ")
-
-        if interval_end_more_than_timedelta_ago(interval, timedelta(hours=1)):
-            # If the interval end is more than 1 hour old, we can round up to the next hour to guarantee we include the
-            # target interval while snapping the interval to 1-hr segments to avoid making excessive API requests.
-            end_dt = datetime.strptime(end, "%Y-%m-%dT%H:%M:%SZ")
-            end_dt_rounded = round_time_up_to_nearest_increment(
-                end_dt, increment=60 * 60
-            )
-            end_str = end_dt_rounded.strftime("%Y-%m-%dT%H:%M:%SZ")
-        else:
-            # Otherwise, the interval end is within a 1-hr segment that is still receiving new events. We ensure that
-            # the interval end is rounded down to the beginning of the minute containing the request.
-            # We round down to prevent 404 errors resulting from an interval end that is in the future.
-            end_dt = datetime.strptime(end, "%Y-%m-%dT%H:%M:%SZ")
-            end_dt_rounded = round_time_down_to_nearest_increment(end_dt, increment=60)
-            end_str = end_dt_rounded.strftime("%Y-%m-%dT%H:%M:%SZ")
-
-        rounded_interval = f"{start_str}/{end_str}"
-
         siem_events: dict[str, list[dict[str, Any]]] = {}
+        async for _, segment_events in self.iter_siem_events(
+            interval=interval, threat_status=threat_status, segment_unit=segment_unit
+        ):
+            for key, events in segment_events.items():
+                if isinstance(events, list):
+                    siem_events.setdefault(key, []).extend(events)
+        return siem_events
 
-        for segment in _segment_interval_by_unit(rounded_interval, unit=segment_unit):
-            url = f"{self.base_url}/v2/siem/all"
-            params: dict[str, Any] = {
-                "format": "json",
-                "interval": segment,
-                "threatStatus": threat_status,
-            }
-
-            # Cache for 1 day if interval ended more than 24 hours ago, otherwise 5 min.
-            # This assumes that older events are less likely to change and can be cached longer.
-            ttl = (
-                24 * 60 * 60
-                if interval_end_more_than_timedelta_ago(
-                    segment, timedelta(days=1)
-                )
-                else 5 * 60
-            )
-            segment_events = await self.request(
-                "GET", url, params, expiry_sec=ttl if self.cache else None
-            )
-            for key in segment_events.keys():
-                new_siem_events = [event for event in segment_events.get(key, [])]
-                if key not in siem_events:
-                    siem_events[key] = []
-                siem_events[key].extend(new_siem_events)
+    async def iter_siem_events(
+        self,
+        interval: str,
+        threat_status: list[str],
+        segment_unit: SegmentTimeUnit = SegmentTimeUnit.HOUR,
+    ) -> AsyncIterator[tuple[str, dict[str, Any]]]:
+        """
+        Fetches the SIEM events of an interval segment by segment and yields each (segment, events) pair in
+        chronological order. Up to `siem_max_concurrent_requests` segments are fetched ahead of the one being
+        consumed, so callers can process earlier segments while later ones are still in flight.
+        """
+        segments = _segment_interval_by_unit(_round_siem_interval(interval), unit=segment_unit)
+        # segments that are in flight or fetched but not yet yielded, oldest first
+        pending: deque[asyncio.Task[dict[str, Any]]] = deque()
+        next_segment = 0
+        try:
+            while pending or next_segment < len(segments):
+                while next_segment < len(segments) and len(pending) < self.siem_max_concurrent_requests:
+                    pending.append(
+                        asyncio.create_task(self._get_siem_segment(segments[next_segment], threat_status))
+                    )
+                    next_segment += 1
+                segment = segments[next_segment - len(pending)]
+                yield segment, await pending.popleft()
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _get_siem_segment(self, segment: str, threat_status: list[str]) -> dict[str, Any]:
+        url = f"{self.base_url}/v2/siem/all"
+        params: dict[str, Any] = {
+            "format": "json",
+            "interval": segment,
+            "threatStatus": threat_status,
+        }
 
-        return siem_events
+        # Cache for 1 day if interval ended more than 24 hours ago, otherwise 5 min.
+        # This assumes that older events are less likely to change and can be cached longer.
+        ttl = (
+            24 * 60 * 60
+            if interval_end_more_than_timedelta_ago(
+                segment, timedelta(days=1)
+            )
+            else 5 * 60
+        )
+        return await self.request(
+            "GET", url, params, expiry_sec=ttl if self.cache else None, endpoint="siem"
+        )
 
     async def get_campaign_forensics(self, campaign_id: str) -> Any:
         url = f"{self.base_url}/v2/forensics"
@@ -446,7 +507,7 @@ class ProofpointInstance:
         }
         # Cache for 10 min since the rate limit is 1800 per day, but we may be sharing the quota
         return await self.request(
-            "GET", url, params, expiry_sec=10 * 60 if self.cache else None
+            "GET", url, params, expiry_sec=10 * 60 if self.cache else None, endpoint="forensics"
         )
 
     async def get_threat_forensics(
@@ -462,5 +523,5 @@ class ProofpointInstance:
         # otherwise the limit is 1800 per day, so use 10 minutes
         expiry_sec = 60 * 60 if not include_campaign_forensics else 10 * 60
         return await self.request(
-            "GET", url, params, expiry_sec=expiry_sec if self.cache else None
+            "GET", url, params, expiry_sec=expiry_sec if self.cache else None, endpoint="forensics"
         )
@@ -10,4 +10,7 @@ class ProofpointConnectorConfig(ConnectorConfigurationBase):  # pragma: no cover
     token: StorableSecret = Field(..., description="Proofpoint service token")
     request_timeout: int = Field(30, description="Request timeout in seconds")
     max_retries: int = Field(3, description="Maximum number of retries for API requests")
+    siem_max_concurrent_requests: int = Field(
+        4, description="Maximum number of hourly SIEM segments fetched concurrently for one request", ge=1, le=16
+    )
     campaign_id_lookback: int = Field(30, description="Number of days of campaign id data to index", lt=50)
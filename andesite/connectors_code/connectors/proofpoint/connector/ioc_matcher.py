@@ -0,0 +1,147 @@
+import bisect
+import json
+import re
+import sys
+from typing import Any
+
+# Never produced by json.dumps (control characters are escaped), so a match can't span two records
+RECORD_SEPARATOR = "\x00"
+
+
+def _deep_sizeof(value: Any) -> int:
+    """Bytes held by a JSON-like value and everything it contains. Shared objects are counted each time."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_deep_sizeof(k) + _deep_sizeof(v) for k, v in value.items())
+    elif isinstance(value, list | tuple):
+        size += sum(_deep_sizeof(item) for item in value)
+    return size
+
+
+class _TrieNode:
+    __slots__ = ("children", "ioc")
+
+    def __init__(self):
+        self.children: dict[str, "_TrieNode"] = {}
+        # the case-folded IOC ending at this node, if any
+        self.ioc: str | None = None
+
+
+class SerializedRecords:
+    """
+    Records together with their case-folded JSON serialization, joined into a single text so an
+    `IOCMatcher` can scan them all in one pass. Build it once and reuse it across searches to avoid
+    re-serializing the same records for every IOC list.
+    """
+
+    def __init__(self, records: list[Any]):
+        self.records: list[dict[str, Any]] = []
+        texts: list[str] = []
+        self.offsets: list[int] = []
+        offset = 0
+        records_size = 0
+        for record in records:
+            if not isinstance(record, dict):
+                continue
+            try:
+                text = json.dumps(record).casefold()
+            except (TypeError, ValueError, UnicodeEncodeError):
+                continue
+            self.records.append(record)
+            self.offsets.append(offset)
+            texts.append(text)
+            offset += len(text) + len(RECORD_SEPARATOR)
+            records_size += _deep_sizeof(record)
+        self.text = RECORD_SEPARATOR.join(texts)
+        # memory held by the records, their text and offsets, used to size caches of serialized records
+        self.nbytes = (
+            records_size
+            + sys.getsizeof(self.records)
+            + sys.getsizeof(self.text)
+            + sys.getsizeof(self.offsets)
+            + sum(sys.getsizeof(o) for o in self.offsets)
+        )
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def record_index(self, position: int) -> int:
+        """Returns the index of the record containing the given position of `text`."""
+        return bisect.bisect_right(self.offsets, position) - 1
+
+
+class IOCMatcher:
+    """
+    Finds which of a set of IOCs occur in text, case-insensitively and including overlapping matches.
+
+    The IOCs are folded into a trie that is compiled to a single regular expression, so every position
+    of the text is checked against all IOCs at once by the regex engine instead of trying each IOC in turn.
+    At each position the regex finds the longest IOC; shorter IOCs starting at the same position are
+    prefixes of it and are recovered by walking the trie.
+    """
+
+    def __init__(self, iocs: list[str]):
+        self._root = _TrieNode()
+        for ioc in iocs:
+            folded = ioc.casefold()
+            if not folded or RECORD_SEPARATOR in folded:
+                continue
+            node = self._root
+            for char in folded:
+                node = node.children.setdefault(char, _TrieNode())
+            node.ioc = folded
+
+        self._pattern = re.compile(self._render(self._root)) if self._root.children else None
+
+    @classmethod
+    def _render(cls, node: _TrieNode) -> str:
+        """Renders the regex matching the longest IOC continuing from `node`."""
+        alternatives = []
+        for char, child in sorted(node.children.items()):
+            literal = [char]
+            # collapse chains of single-child nodes into one literal
+            while child.ioc is None and len(child.children) == 1:
+                ((char, child),) = child.children.items()
+                literal.append(char)
+            alternative = re.escape("".join(literal))
+            if child.children:
+                suffix = cls._render(child)
+                alternative += f"(?:{suffix})?" if child.ioc is not None else suffix
+            alternatives.append(alternative)
+        if len(alternatives) == 1:
+            return alternatives[0]
+        return f"(?:{'|'.join(alternatives)})"
+
+    def _iocs_prefixing(self, match: str) -> list[str]:
+        iocs = []
+        node = self._root
+        for char in match:
+            node = node.children[char]
+            if node.ioc is not None:
+                iocs.append(node.ioc)
+        return iocs
+
+    def search(self, serialized: SerializedRecords) -> list[dict[str, Any]]:
+        """
+        Returns copies of the records that contain at least one IOC, each with an `iocs_found` list.
+        """
+        if self._pattern is None or not serialized.text:
+            return []
+
+        found_by_record: dict[int, set[str]] = {}
+        iocs_by_match: dict[str, list[str]] = {}
+        # search again from the character after each match, so IOCs overlapping it are found too
+        search = self._pattern.search
+        m = search(serialized.text)
+        while m is not None:
+            match = m.group()
+            if match not in iocs_by_match:
+                iocs_by_match[match] = self._iocs_prefixing(match)
+            record_index = serialized.record_index(m.start())
+            found_by_record.setdefault(record_index, set()).update(iocs_by_match[match])
+            m = search(serialized.text, m.start() + 1)
+
+        return [
+            {**serialized.records[record_index], "iocs_found": sorted(found)}
+            for record_index, found in sorted(found_by_record.items())
+        ]
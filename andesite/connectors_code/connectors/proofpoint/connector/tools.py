@@ -1,15 +1,15 @@
 import asyncio
+import contextlib
 import json
 from common.managers.dataset_structures.dataset_structure_manager import (
     DatasetStructureManager,
 )
-import re
-from re import Pattern
-from typing import Any, Literal
+from typing import Any, Awaitable, Callable, Literal
 from common.models.connector_id_enum import ConnectorIdEnum
 from common.jsonlogging.jsonlogger import Logging
 from connectors.proofpoint.client.proofpoint_instance import Interval, ProofPointCampaignIdsResponse, ProofpointInstance
 from connectors.proofpoint.connector.config import ProofpointConnectorConfig
+from connectors.proofpoint.connector.ioc_matcher import IOCMatcher, SerializedRecords
 from connectors.proofpoint.connector.secrets import ProofpointSecrets
 from connectors.proofpoint.connector.parsing import (
     parse_proofpooint_forensics,
@@ -21,6 +21,7 @@ from connectors.tools import ConnectorToolsInterface
 from connectors.proofpoint.connector.target import ProofpointTarget
 from connectors.cache import Cache
 from common.models.tool import Tool
+from cachetools import TTLCache
 from datetime import timedelta
 from pydantic import BaseModel, Field, field_validator, model_validator
 from opentelemetry import trace
@@ -28,6 +29,15 @@ from opentelemetry import trace
 logger = Logging.get_logger(__name__)
 tracer = trace.get_tracer(__name__)
 
+# Serialized SIEM events and campaigns kept for follow-up IOC searches, sized by the memory of the records and
+# their text. Keys start with the API host and principal, since the cache is shared by every connector in the process.
+# The TTL matches the shortest TTL of the client's response cache, so results are never staler than a refetch.
+serialized_records_cache: TTLCache[tuple, dict[str, SerializedRecords]] = TTLCache(
+    maxsize=256 * 1024 * 1024,
+    ttl=5 * 60,
+    getsizeof=lambda serialized: sum(records.nbytes for records in serialized.values()),
+)
+
 
 def snake_to_camel(snake_str: str) -> str:
     """Turns a snake string to camel string, e.g. my_snake_string -> mySnakeString"""
@@ -37,31 +47,28 @@ def snake_to_camel(snake_str: str) -> str:
     )
 
 
-def find_matches(pattern: Pattern[str], text: str) -> list[str]:
-    """
-    Return the list of terms that appear in `text`, case-insensitive.
-    """
-    seen = set()
-    for m in pattern.finditer(text):
-        seen.add(m.group(1).lower())
-    return list(seen)
-
-
 def search_for_iocs_in_records(records: list[dict], iocs: list[str]) -> list[dict]:
     """Search for strings in a list of json records"""
-    joined = "|".join([re.escape(term) for term in iocs])
-    pattern = re.compile(f"(?=({joined}))", re.IGNORECASE)
-    results = []
-    for record in records:
-        try:
-            serialized = json.dumps(record)
-        except (TypeError, ValueError, UnicodeEncodeError) as e:
-            continue
-        iocs_found = find_matches(pattern, serialized)
-        if iocs_found:
-            record["iocs_found"] = iocs_found
-            results.append(record)
-    return results
+    return IOCMatcher(iocs).search(SerializedRecords(records))
+
+
+async def _get_serialized_records(key: tuple, fetch: Callable[[], Awaitable[dict[str, list[Any]]]]) -> dict[str, SerializedRecords]:
+    """
+    Returns the serialized records for `key`, fetching and serializing them on a miss so repeated IOC
+    searches over the same records don't serialize them again.
+    """
+    serialized = serialized_records_cache.get(key)
+    if serialized is None:
+        records = await fetch()
+        serialized = {
+            record_type: SerializedRecords(values)
+            for record_type, values in records.items()
+            if values and isinstance(values, list)
+        }
+        # a value larger than the whole cache is not kept
+        with contextlib.suppress(ValueError):
+            serialized_records_cache[key] = serialized
+    return serialized
 
 
 class GetCampaignIdsInput(BaseModel):
@@ -246,9 +253,13 @@ class ProofpointConnectorTools(ConnectorToolsInterface[ProofpointSecrets]):
             request_timeout=config.request_timeout,
             max_retries=config.max_retries,
             cache=cache,
+            siem_max_concurrent_requests=config.siem_max_concurrent_requests,
         )
         super().__init__(ConnectorIdEnum.PROOFPOINT, target, secrets)
 
+    def _serialized_records_key(self, *parts: Any) -> tuple:
+        return (self.client.base_url, self.config.principal, *parts)
+
     async def get_campaign_ids_async(
             self, input: GetCampaignIdsInput
     ) -> list[dict[str, Any]]:
@@ -323,14 +334,23 @@ class ProofpointConnectorTools(ConnectorToolsInterface[ProofpointSecrets]):
         if not campaign_ids:
             return []
 
-        campaign_details = await asyncio.gather(
-            *(
-                self.client.get_campaign(campaign_id=campaign_id)
-                for campaign_id in campaign_ids
+        async def fetch_campaign_details() -> dict[str, list[Any]]:
+            campaign_details = await asyncio.gather(
+                *(
+                    self.client.get_campaign(campaign_id=campaign_id)
+                    for campaign_id in campaign_ids
+                )
             )
+            return {"campaigns": list(campaign_details)}
+
+        # a campaign's details only change when it is updated
+        key = self._serialized_records_key(
+            "campaigns", tuple(sorted((c["id"], c.get("lastUpdatedAt")) for c in campaign_ids_result))
         )
+        serialized = await _get_serialized_records(key, fetch_campaign_details)
 
-        hits = search_for_iocs_in_records(campaign_details, input.iocs)
+        matcher = IOCMatcher(input.iocs)
+        hits = matcher.search(serialized["campaigns"]) if "campaigns" in serialized else []
         # Filter out campaign members to keep response manageable
         if not input.include_campaign_members:
             for hit in hits:
@@ -345,29 +365,22 @@ class ProofpointConnectorTools(ConnectorToolsInterface[ProofpointSecrets]):
         """
         Fetch all ProofPoint SIEM events over a time period.
         """
-        siem_events = await self.client.get_siem_events(
-            interval=input.interval, threat_status=input.threat_status
-        )
-
-        messages_delivered = siem_events.get("messagesDelivered", [])
-        messages_blocked = siem_events.get("messagesBlocked", [])
-        clicks_permitted = siem_events.get("clicksPermitted", [])
-        clicks_blocked = siem_events.get("clicksBlocked", [])
-
-        result = {
-            "messagesDelivered": parse_proofpoint_messages(messages_delivered)
-            if messages_delivered
-            else [],
-            "messagesBlocked": parse_proofpoint_messages(messages_blocked)
-            if messages_blocked
-            else [],
-            "clicksPermitted": parse_proofpoint_clicks(clicks_permitted)
-            if clicks_permitted
-            else [],
-            "clicksBlocked": parse_proofpoint_clicks(clicks_blocked)
-            if clicks_blocked
-            else [],
+        result: dict[str, list[dict[str, Any]]] = {
+            "messagesDelivered": [],
+            "messagesBlocked": [],
+            "clicksPermitted": [],
+            "clicksBlocked": [],
         }
+        # parse each segment as it arrives while later segments are still being fetched
+        async for _, segment_events in self.client.iter_siem_events(
+            interval=input.interval, threat_status=input.threat_status
+        ):
+            for event_type in ("messagesDelivered", "messagesBlocked"):
+                if segment_events.get(event_type):
+                    result[event_type].extend(parse_proofpoint_messages(segment_events[event_type]))
+            for event_type in ("clicksPermitted", "clicksBlocked"):
+                if segment_events.get(event_type):
+                    result[event_type].extend(parse_proofpoint_clicks(segment_events[event_type]))
 
         value_counts = {k: len(v) for k, v in result.items()}
         if sum(value_counts.values()) <= input.limit:
@@ -394,31 +407,22 @@ class ProofpointConnectorTools(ConnectorToolsInterface[ProofpointSecrets]):
         """
         Find SIEM events that contain specific IOCs over a specified time interval.
         """
-
-        all_siem_events = await self.client.get_siem_events(
-            interval=input.interval, threat_status=input.threat_status
+        all_siem_events = await _get_serialized_records(
+            self._serialized_records_key("siem", input.interval, tuple(input.threat_status)),
+            lambda: self.client.get_siem_events(interval=input.interval, threat_status=input.threat_status),
         )
         if input.event_type != "all":
             # filter to searchable events
-            searchable_events = {
-                snake_to_camel(input.event_type): all_siem_events.get(
-                    snake_to_camel(input.event_type), []
-                )
-            }
+            event_type = snake_to_camel(input.event_type)
+            searchable_events = {event_type: all_siem_events[event_type]} if event_type in all_siem_events else {}
         else:
             searchable_events = all_siem_events
 
+        # one matcher is compiled for the IOCs and shared by every event type
+        matcher = IOCMatcher(input.iocs)
         hits = {}
         for event_type, events in searchable_events.items():
-            if events and isinstance(events, list):
-                try:
-                    hits[event_type] = search_for_iocs_in_records(events, input.iocs)
-                except ValueError as e:
-                    logger().exception(
-                        "Error searching for IOCs in event type %s: %s.", event_type, e
-                    )
-                finally:
-                    continue
+            hits[event_type] = matcher.search(events)
         value_counts = {k: len(v) for k, v in hits.items()}
         if sum(value_counts.values()) <= input.limit:
             return {
@@ -0,0 +1,432 @@
+import asyncio
+import math
+import time
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from typing import Awaitable, Callable, Iterable, Mapping
+
+import httpx
+from common.jsonlogging.jsonlogger import Logging
+from common.models.connector_id_enum import ConnectorIdEnum
+from opentelemetry.metrics import CallbackOptions, Observation
+from pydantic import BaseModel, Field
+from redis.asyncio.client import Redis
+from redis.commands.core import AsyncScript
+from redis.exceptions import RedisError
+
+from connectors.metrics import meter
+
+logger = Logging.get_logger(__name__)
+
+KEY_PREFIX = "connector_rate_limit"
+
+DEFAULT_ENDPOINT = "*"
+
+# Used when a rate-limited response doesn't say how long to wait
+DEFAULT_BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 60.0
+
+# Reset headers above this are epoch timestamps rather than seconds from now
+EPOCH_THRESHOLD_SECONDS = 1_000_000_000
+
+
+class RateLimit(BaseModel):
+    """
+    The limits of one endpoint (or of every undeclared endpoint) of a connector's API.
+    """
+
+    requests_per_second: float | None = Field(default=None, gt=0, description="Sustained request rate")
+    burst: int | None = Field(
+        default=None, ge=1, description="Requests allowed back to back, defaults to one second's worth"
+    )
+    daily_quota: int | None = Field(default=None, ge=0, description="Requests allowed per UTC day")
+
+    @property
+    def bucket_size(self) -> int:
+        if self.burst is not None:
+            return self.burst
+        return max(1, math.ceil(self.requests_per_second or 1))
+
+
+class RateLimits(BaseModel):
+    """
+    A connector's declared API limits, keyed by endpoint name. Endpoints without their own entry share the
+    `DEFAULT_ENDPOINT` entry, if any; otherwise they are only limited by the responses they receive.
+    """
+
+    connector: ConnectorIdEnum
+    endpoints: dict[str, RateLimit] = Field(default_factory=dict)
+
+    def resolve(self, endpoint: str) -> tuple[str, RateLimit]:
+        """
+        Returns the name the endpoint's budget is tracked under and its limit.
+        """
+        if endpoint in self.endpoints:
+            return endpoint, self.endpoints[endpoint]
+        return DEFAULT_ENDPOINT, self.endpoints.get(DEFAULT_ENDPOINT, RateLimit())
+
+
+class RateLimitExceededError(Exception):
+    """
+    Raised when a request can't be made within its budget, e.g. when the daily quota is used up.
+    """
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass
+class _Reservation:
+    # seconds to wait before the request may be sent
+    wait: float
+    # True when the wait is a backoff; the caller must reserve again after waiting
+    blocked: bool = False
+    quota_exhausted: bool = False
+    tokens_remaining: float | None = None
+    quota_remaining: int | None = None
+
+
+# Reserves a request atomically. KEYS: bucket, daily count, blocked-until.
+# ARGV: now (s), requests per second (0 = none), bucket size, daily quota (-1 = none), seconds until the day ends.
+_RESERVE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local size = tonumber(ARGV[3])
+local quota = tonumber(ARGV[4])
+local day_ttl = tonumber(ARGV[5])
+
+local blocked_until = tonumber(redis.call('GET', KEYS[3]) or '0')
+if blocked_until > now then
+    return {'blocked', tostring(blocked_until - now), '', ''}
+end
+
+local used = tonumber(redis.call('GET', KEYS[2]) or '0')
+if quota >= 0 and used >= quota then
+    return {'quota', tostring(day_ttl), '', '0'}
+end
+
+local wait = 0
+local tokens = ''
+if rate > 0 then
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local available = tonumber(state[1]) or size
+    local ts = tonumber(state[2]) or now
+    available = math.min(size, available + math.max(0, now - ts) * rate) - 1
+    if available < 0 then
+        wait = -available / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tostring(available), 'ts', tostring(now))
+    redis.call('EXPIRE', KEYS[1], math.ceil(size / rate) + 60)
+    tokens = tostring(math.max(0, available))
+end
+
+local quota_remaining = ''
+if quota >= 0 then
+    used = redis.call('INCR', KEYS[2])
+    redis.call('EXPIRE', KEYS[2], day_ttl + 60)
+    quota_remaining = tostring(quota - used)
+end
+
+return {'ok', tostring(wait), tokens, quota_remaining}
+"""
+
+# Sets the blocked-until time unless a later one is already set. KEYS: blocked-until. ARGV: until (s), ttl (ms).
+_BLOCK_SCRIPT = """
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+if tonumber(ARGV[1]) > current then
+    redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2])
+end
+return 1
+"""
+
+
+def _seconds_until_day_ends(now: float) -> int:
+    return 86400 - int(now) % 86400
+
+
+def parse_retry_after(value: str | None, now: float) -> float | None:
+    """
+    Parses a Retry-After header, which is either a number of seconds or an HTTP date.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - now)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_reset(value: str | None, now: float) -> float | None:
+    """
+    Parses a rate limit reset header into seconds from now. Depending on the API it is an epoch timestamp
+    (GitHub, ServiceNow), a number of seconds from now (Zendesk) or an ISO timestamp (Jira).
+    """
+    if not value:
+        return None
+    try:
+        reset = float(value)
+        return max(0.0, reset - now if reset > EPOCH_THRESHOLD_SECONDS else reset)
+    except ValueError:
+        pass
+    try:
+        reset_at = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        if reset_at.tzinfo is None:
+            reset_at = reset_at.replace(tzinfo=UTC)
+        return max(0.0, reset_at.timestamp() - now)
+    except ValueError:
+        return None
+
+
+def _header(headers: Mapping[str, str], *names: str) -> str | None:
+    for name in names:
+        value = headers.get(name)
+        if value is not None:
+            return value
+    return None
+
+
+class RateLimitGovernor:
+    """
+    Keeps every connector's API calls within its declared limits, across every process sharing the Redis
+    instance given to `ConnectorRegistry.initialize`, or within this process when there is none.
+
+    Before each request, `acquire` reserves a token from the endpoint's token bucket and a request from its
+    daily quota, waiting with `asyncio.sleep` (never blocking the event loop) until the request may be sent.
+    Afterwards `observe_response` reads `Retry-After` and `X-RateLimit-*` headers, so that when the API asks
+    for a pause every process backs off until the advertised reset.
+
+    The remaining budget of every endpoint is exported as the `connector_rate_limit_remaining` gauge.
+    """
+
+    def __init__(self):
+        self._redis: Redis | None = None
+        self._reserve_script: AsyncScript | None = None
+        self._block_script: AsyncScript | None = None
+        self._buckets: dict[str, tuple[float, float]] = {}
+        self._daily_counts: dict[str, tuple[int, int]] = {}
+        self._blocked_until: dict[str, float] = {}
+        self._remaining: dict[tuple[str, str, str], float] = {}
+        meter.create_observable_gauge(
+            "connector_rate_limit_remaining",
+            callbacks=[self._observe_remaining],
+            unit="1",
+            description="Remaining request budget of a connector endpoint, by budget type (tokens, daily_quota, reported)",
+        )
+        self._waits_histogram = meter.create_histogram(
+            "connector_rate_limit_wait",
+            unit="s",
+            description="Time requests waited for their connector's rate limit",
+        )
+
+    @classmethod
+    @lru_cache(maxsize=1)
+    def instance(cls) -> "RateLimitGovernor":
+        return RateLimitGovernor()
+
+    def initialize(self, redis: Redis | None) -> None:
+        self._redis = redis
+        if redis is not None:
+            self._reserve_script = redis.register_script(_RESERVE_SCRIPT)
+            self._block_script = redis.register_script(_BLOCK_SCRIPT)
+
+    def remaining(self, connector: ConnectorIdEnum, endpoint: str) -> dict[str, float]:
+        """
+        Returns the last known remaining budget of an endpoint, by budget type.
+        """
+        return {
+            budget: value
+            for (remaining_connector, remaining_endpoint, budget), value in self._remaining.items()
+            if remaining_connector == connector and remaining_endpoint == endpoint
+        }
+
+    def _observe_remaining(self, options: CallbackOptions) -> Iterable[Observation]:
+        for (connector, endpoint, budget), value in list(self._remaining.items()):
+            yield Observation(value, {"connector": connector, "endpoint": endpoint, "budget": budget})
+
+    @staticmethod
+    def _keys(connector: ConnectorIdEnum, endpoint: str, now: float) -> tuple[str, str, str]:
+        base = f"{KEY_PREFIX}_{connector}_{endpoint}"
+        day = datetime.fromtimestamp(now, UTC).strftime("%Y%m%d")
+        return f"{base}_bucket", f"{base}_day_{day}", f"{base}_blocked_until"
+
+    async def acquire(self, limits: RateLimits, endpoint: str, max_wait_seconds: float = MAX_BACKOFF_SECONDS) -> None:
+        """
+        Waits until a request to `endpoint` fits in the connector's budget and reserves it.
+
+        :raises RateLimitExceededError: if the daily quota is used up, or the API asked for a longer pause
+            than `max_wait_seconds`.
+        """
+        name, limit = limits.resolve(endpoint)
+        waited = 0.0
+        while True:
+            now = time.time()
+            keys = self._keys(limits.connector, name, now)
+            reservation = await self._reserve(keys, limit, now)
+            self._record_remaining(limits.connector, name, reservation)
+
+            if reservation.quota_exhausted:
+                raise RateLimitExceededError(
+                    f"Daily quota of {limit.daily_quota} requests to {limits.connector} {name} is used up",
+                    retry_after=reservation.wait,
+                )
+            if reservation.blocked and reservation.wait > max_wait_seconds:
+                raise RateLimitExceededError(
+                    f"{limits.connector} {name} is rate limited for another {reservation.wait:.0f} seconds",
+                    retry_after=reservation.wait,
+                )
+            if reservation.wait > 0:
+                await asyncio.sleep(reservation.wait)
+                waited += reservation.wait
+            if not reservation.blocked:
+                break
+
+        if waited:
+            self._waits_histogram.record(waited, {"connector": limits.connector, "endpoint": name})
+
+    async def observe_response(
+        self, limits: RateLimits, endpoint: str, status_code: int, headers: Mapping[str, str], attempt: int = 0
+    ) -> bool:
+        """
+        Updates the endpoint's budget from a response. When the response is rate limited, every process
+        backs off for the time the API asked for, or exponentially in `attempt` when it didn't say.
+
+        :return: True if the response was rate limited and the request should be retried.
+        """
+        now = time.time()
+        response_headers = httpx.Headers(headers)
+
+        remaining_header = _header(response_headers, "x-ratelimit-remaining", "ratelimit-remaining", "x-rate-limit-remaining")
+        remaining = None
+        if remaining_header is not None:
+            try:
+                remaining = float(remaining_header)
+                self.report_remaining(limits, endpoint, remaining)
+            except ValueError:
+                pass
+
+        retry_after = parse_retry_after(response_headers.get("retry-after"), now)
+        if retry_after is None and (remaining == 0 or status_code == 429):
+            reset = _header(
+                response_headers, "x-ratelimit-reset", "ratelimit-reset", "x-rate-limit-reset", "x-ratelimit-retryafter"
+            )
+            retry_after = parse_reset(reset, now)
+
+        rate_limited = status_code == 429 or (status_code in (403, 503) and (retry_after is not None or remaining == 0))
+        if rate_limited and retry_after is None:
+            retry_after = min(DEFAULT_BACKOFF_SECONDS * 2**attempt, MAX_BACKOFF_SECONDS)
+
+        if retry_after:
+            await self.back_off(limits, endpoint, retry_after)
+        return rate_limited
+
+    async def back_off(self, limits: RateLimits, endpoint: str, seconds: float) -> None:
+        """
+        Pauses every request to the endpoint, in every process, for `seconds`.
+        """
+        name, _ = limits.resolve(endpoint)
+        now = time.time()
+        logger().warning("%s %s is rate limited, backing off for %.1f seconds", limits.connector, name, seconds)
+        await self._block(self._keys(limits.connector, name, now)[2], now + seconds, now)
+
+    def report_remaining(self, limits: RateLimits, endpoint: str, remaining: float) -> None:
+        """
+        Records the remaining budget the API itself reported for the endpoint.
+        """
+        name, _ = limits.resolve(endpoint)
+        self._remaining[(limits.connector, name, "reported")] = remaining
+
+    async def _reserve(self, keys: tuple[str, str, str], limit: RateLimit, now: float) -> _Reservation:
+        if self._redis is not None and self._reserve_script is not None:
+            try:
+                status, wait, tokens, quota_remaining = await self._reserve_script(
+                    keys=list(keys),
+                    args=[
+                        repr(now),
+                        repr(limit.requests_per_second or 0),
+                        limit.bucket_size,
+                        limit.daily_quota if limit.daily_quota is not None else -1,
+                        _seconds_until_day_ends(now),
+                    ],
+                )
+                status = status.decode() if isinstance(status, bytes) else status
+                return _Reservation(
+                    wait=float(wait),
+                    blocked=status == "blocked",
+                    quota_exhausted=status == "quota",
+                    tokens_remaining=float(tokens) if tokens else None,
+                    quota_remaining=int(quota_remaining) if quota_remaining else None,
+                )
+            except RedisError as e:
+                logger().warning("Rate limit state unavailable in redis, limiting within this process: %s", str(e))
+        return self._reserve_locally(keys, limit, now)
+
+    def _reserve_locally(self, keys: tuple[str, str, str], limit: RateLimit, now: float) -> _Reservation:
+        bucket_key, day_key, blocked_key = keys
+
+        blocked_until = self._blocked_until.get(blocked_key, 0.0)
+        if blocked_until > now:
+            return _Reservation(wait=blocked_until - now, blocked=True)
+
+        day = int(now) // 86400
+        count_day, used = self._daily_counts.get(day_key, (day, 0))
+        if count_day != day:
+            used = 0
+        if limit.daily_quota is not None and used >= limit.daily_quota:
+            return _Reservation(wait=_seconds_until_day_ends(now), quota_exhausted=True, quota_remaining=0)
+
+        reservation = _Reservation(wait=0.0)
+        if limit.requests_per_second:
+            tokens, updated_at = self._buckets.get(bucket_key, (float(limit.bucket_size), now))
+            tokens = min(limit.bucket_size, tokens + max(0.0, now - updated_at) * limit.requests_per_second) - 1
+            if tokens < 0:
+                reservation.wait = -tokens / limit.requests_per_second
+            self._buckets[bucket_key] = (tokens, now)
+            reservation.tokens_remaining = max(0.0, tokens)
+
+        if limit.daily_quota is not None:
+            self._daily_counts[day_key] = (day, used + 1)
+            reservation.quota_remaining = limit.daily_quota - used - 1
+        return reservation
+
+    async def _block(self, blocked_key: str, until: float, now: float) -> None:
+        if self._redis is not None and self._block_script is not None:
+            try:
+                await self._block_script(keys=[blocked_key], args=[repr(until), max(1, int((until - now) * 1000))])
+                return
+            except RedisError as e:
+                logger().warning("Rate limit state unavailable in redis, limiting within this process: %s", str(e))
+        self._blocked_until[blocked_key] = max(until, self._blocked_until.get(blocked_key, 0.0))
+
+    def _record_remaining(self, connector: ConnectorIdEnum, endpoint: str, reservation: _Reservation) -> None:
+        if reservation.tokens_remaining is not None:
+            self._remaining[(connector, endpoint, "tokens")] = reservation.tokens_remaining
+        if reservation.quota_remaining is not None:
+            self._remaining[(connector, endpoint, "daily_quota")] = reservation.quota_remaining
+
+
+async def send_with_rate_limit(
+    limits: RateLimits,
+    endpoint: str,
+    send: Callable[[], Awaitable[httpx.Response]],
+    max_attempts: int = 3,
+) -> httpx.Response:
+    """
+    Sends an HTTP request within the connector's budget, retrying rate-limited responses after the pause the
+    API asked for. The last response is returned as is once `max_attempts` is reached.
+    """
+    governor = RateLimitGovernor.instance()
+    attempt = 0
+    while True:
+        await governor.acquire(limits, endpoint)
+        response = await send()
+        rate_limited = await governor.observe_response(limits, endpoint, response.status_code, response.headers, attempt)
+        attempt += 1
+        if not rate_limited or attempt >= max_attempts:
+            return response
@@ -10,6 +10,7 @@ from common.models.connector_id_enum import ConnectorIdEnum
 from connectors.config import ConnectorConfigurationManager
 from connectors.connector import Connector
 from connectors.cache import Cache
+from connectors.rate_limit import RateLimitGovernor
 
 logger = Logging.get_logger(__name__)
 
@@ -56,6 +57,25 @@ class ConnectorRegistry:
             except Exception:
                 logger().exception(f"Failed to register connector {connector_id}. It will be unavailable for this site.")
         cls._cache = Cache(cache=cache)
+        RateLimitGovernor.instance().initialize(redis=cache)
+
+    @classmethod
+    async def close(cls) -> None:
+        """
+        Closes the clients registered connectors keep open between calls, when the application shuts down.
+        """
+        for connector_id, connector in cls._registry.items():
+            try:
+                await connector.close()
+            except Exception:
+                logger().exception(f"Failed to close connector {connector_id}")
+
+    @classmethod
+    def get_cache(cls) -> Cache:
+        """
+        Returns the cache shared by connectors, which does nothing until the registry is initialized with Redis.
+        """
+        return getattr(cls, "_cache", None) or Cache(cache=None)
 
     @classmethod
     async def register(
@@ -1,5 +1,5 @@
 from typing import Any, List
-import time
+import asyncio
 from pydantic import BaseModel, Field
 from common.models.tool import Tool
 from connectors.salesforce.connector.target import SalesforceTarget
@@ -9,10 +9,18 @@ from common.models.connector_id_enum import ConnectorIdEnum
 from opentelemetry import trace
 from simple_salesforce.exceptions import SalesforceGeneralError
 from common.models.tool import ToolResult
-from simple_salesforce.api import Salesforce
+from simple_salesforce.api import Salesforce, Usage
+from connectors.rate_limit import RateLimit, RateLimitGovernor, RateLimits
 
 tracer = trace.get_tracer(__name__)
 
+# Orgs have a rolling 24 hour request allowance that depends on their licenses; simple-salesforce reports
+# what is left of it after each call, so only a sustained rate is declared here
+SALESFORCE_RATE_LIMITS = RateLimits(
+    connector=ConnectorIdEnum.SALESFORCE,
+    endpoints={"*": RateLimit(requests_per_second=5, burst=10)},
+)
+
 class SalesforceConnectorTools(ConnectorToolsInterface[SalesforceSecrets]):
     """
     A collection of tools used by agents that query Salesforce.
@@ -34,6 +42,18 @@ class SalesforceConnectorTools(ConnectorToolsInterface[SalesforceSecrets]):
         self.target = target
         super().__init__(ConnectorIdEnum.SALESFORCE, target=target, secrets=secrets)
 
+    async def _describe_async(self) -> Any:
+        """
+        Runs the blocking describe call in a worker thread, within the org's rate limit.
+        """
+        governor = RateLimitGovernor.instance()
+        await governor.acquire(SALESFORCE_RATE_LIMITS, "describe")
+        desc = await asyncio.to_thread(self.client.describe)
+        usage = self.client.api_usage.get("api-usage")
+        if isinstance(usage, Usage):
+            governor.report_remaining(SALESFORCE_RATE_LIMITS, "describe", usage.total - usage.used)
+        return desc
+
     def get_tools(self) -> List[Tool]:
         """
         Returns a list of Tool objects for querying Salesforce.
@@ -79,7 +99,7 @@ class SalesforceConnectorTools(ConnectorToolsInterface[SalesforceSecrets]):
         backoff = 1
         for attempt in range(max_retries):
             try:
-                desc: Any = self.client.describe() or []
+                desc: Any = await self._describe_async() or []
                 all_objects = desc.get("sobjects", [])
 
                 target_objects = set(self.target.objects)
@@ -88,7 +108,7 @@ class SalesforceConnectorTools(ConnectorToolsInterface[SalesforceSecrets]):
                 return ToolResult(result=filtered)
             except SalesforceGeneralError as e:
                 if "REQUEST_LIMIT_EXCEEDED" in str(e):
-                    time.sleep(backoff)
+                    await RateLimitGovernor.instance().back_off(SALESFORCE_RATE_LIMITS, "describe", backoff)
                     backoff *= 2
                     continue
                 raise
@@ -126,12 +146,12 @@ class SalesforceConnectorTools(ConnectorToolsInterface[SalesforceSecrets]):
         backoff = 1
         for attempt in range(max_retries):
             try:
-                desc: Any = self.client.describe() or []
+                desc: Any = await self._describe_async() or []
                 return ToolResult(result=desc.get("sobjects", []))
             except SalesforceGeneralError as e:
                 error_str = str(e)
                 if "REQUEST_LIMIT_EXCEEDED" in error_str:
-                    time.sleep(backoff)
+                    await RateLimitGovernor.instance().back_off(SALESFORCE_RATE_LIMITS, "describe", backoff)
                     backoff *= 2
                     continue
                 raise
@@ -1,3 +1,4 @@
+from pydantic import Field
 
 from common.models.secret import StorableSecret
 from connectors.config import ConnectorConfigurationBase
@@ -6,3 +7,8 @@ from connectors.config import ConnectorConfigurationBase
 class SentinelOneConnectorConfig(ConnectorConfigurationBase):  # pragma: no cover
     api_endpoint: str
     token: StorableSecret
+    page_size: int = Field(100, description="Number of items requested per page", ge=1, le=1000)
+    max_rows: int = Field(500, description="Maximum number of items a tool returns across pages", ge=1)
+    max_response_bytes: int = Field(
+        200_000, description="Maximum size in bytes of the serialized items a tool returns across pages", ge=1
+    )
@@ -1,6 +1,7 @@
+import asyncio
 import json
 from enum import Enum
-from typing import Any, Literal, Optional
+from typing import Any, Callable, Literal, Optional
 
 import httpx
 from common.jsonlogging.jsonlogger import Logging
@@ -40,7 +41,25 @@ class NoNoneEncoder(json.JSONEncoder):
 class SentinelOneConnectorException(Exception):
     pass
 
-RESULT_LIMIT = 10
+
+def project_fields(item: dict[str, Any], fields: list[str]) -> dict[str, Any]:
+    """
+    Keeps only the given fields of an item. Nested fields are given as dotted paths, e.g. `agent.osName`.
+    """
+    projected: dict[str, Any] = {}
+    for field in fields:
+        source: Any = item
+        *parents, leaf = field.split(".")
+        target = projected
+        for parent in parents:
+            source = source.get(parent) if isinstance(source, dict) else None
+            if not isinstance(source, dict):
+                break
+            target = target.setdefault(parent, {})
+        else:
+            if leaf in source:
+                target[leaf] = source[leaf]
+    return projected
 
 class SentinelOneConnectorTools(ConnectorToolsInterface[SentinelOneSecrets]):
     QUERY_RESULT_METADATA_FORMAT = "SentinelOne API"
@@ -49,9 +68,16 @@ class SentinelOneConnectorTools(ConnectorToolsInterface[SentinelOneSecrets]):
         super().__init__(connector=ConnectorIdEnum.SENTINEL_ONE, target=SentinelOneTarget(), secrets=secrets)
         self.api_endpoint = config.api_endpoint
         self.headers = {"Authorization": f"ApiToken {self._secrets.token.get_secret_value()}"}
+        self.page_size = config.page_size
+        self.max_rows = config.max_rows
+        self.max_response_bytes = config.max_response_bytes
 
     class GetResourceInput(BaseModel):
-        pass
+        fields: Optional[list[str]] = Field(
+            default=None,
+            description="Only return these fields of each item, using dotted paths for nested fields such as 'agentRealtimeInfo.agentComputerName'. Request only the fields needed to answer the question so more items fit in the response.",
+            exclude=True,
+        )
 
 
     class GetEndpointsAgentInfoInput(GetResourceInput):
@@ -332,82 +358,201 @@ class SentinelOneConnectorTools(ConnectorToolsInterface[SentinelOneSecrets]):
             description="Filter alerts that contain a source process name.",
         )
 
+    class GetAgentsThreatsAndAlertsInput(BaseModel):
+        """
+        Fetches agent information, threats and alerts at the same time. Use this instead of calling
+        get_endpoints_agent_info, get_threats and get_alerts one after the other when a question needs more than one of them.
+        Only the resources given are fetched.
+        """
+
+        agents: Optional["SentinelOneConnectorTools.GetEndpointsAgentInfoInput"] = Field(
+            default=None, description="Filters for the agents, as for get_endpoints_agent_info."
+        )
+        threats: Optional["SentinelOneConnectorTools.GetThreatsInput"] = Field(
+            default=None, description="Filters for the threats, as for get_threats."
+        )
+        alerts: Optional["SentinelOneConnectorTools.GetAlertsInput"] = Field(
+            default=None, description="Filters for the alerts, as for get_alerts."
+        )
+
     def get_tools(self) -> list[Tool]:
         return [
             Tool(connector=ConnectorIdEnum.SENTINEL_ONE, name="get_endpoints", execute_fn=self.get_endpoints_async),
             Tool(connector=ConnectorIdEnum.SENTINEL_ONE, name="get_endpoints_agent_info", execute_fn=self.get_endpoints_agent_info_async),
             Tool(connector=ConnectorIdEnum.SENTINEL_ONE, name="get_threats", execute_fn=self.get_threats_async),
             Tool(connector=ConnectorIdEnum.SENTINEL_ONE, name="get_alerts", execute_fn=self.get_alerts_async),
+            Tool(connector=ConnectorIdEnum.SENTINEL_ONE, name="get_agents_threats_and_alerts", execute_fn=self.get_agents_threats_and_alerts_async),
         ]
 
+    @staticmethod
+    def _without_applications(endpoint: dict[str, Any]) -> dict[str, Any]:
+        endpoint.pop("applications", None)
+        return endpoint
+
     async def get_endpoints_agent_info_async(self, input: GetEndpointsAgentInfoInput) -> ToolResult:
-        api_request: dict[str, Any] = self.generate_params(input)
-        response_json = await self._get_s1_resource_async(SentinelOneResource.ENDPOINT, api_request)
-        for endpoint in response_json["data"]:
-            if "applications" in endpoint:
-                del endpoint["applications"]
-        return ToolResult(
-            result=json.dumps(response_json),
-            additional_context="This tool can only return the first page of results",
+        response_json, truncated_context = await self._collect_s1_resource_async(
+            SentinelOneResource.ENDPOINT, input, transform=self._without_applications
         )
+        return ToolResult(result=json.dumps(response_json), additional_context=truncated_context)
 
     async def get_endpoints_async(self, input: GetEndpointsInput) -> ToolResult:
-        api_request: dict[str, Any] = self.generate_params(input)
-        response_json = await self._get_s1_resource_async(SentinelOneResource.ENDPOINT, api_request)
-        for endpoint in response_json["data"]:
+        def trim_endpoint(endpoint: dict[str, Any]) -> dict[str, Any]:
             if "applications" in endpoint:
                 if input.tool_application_limit == 0:
                     del endpoint["applications"]
                 else:
                     endpoint["applications"] = endpoint["applications"][:input.tool_application_limit]
-            if "agent" in endpoint:
-                del endpoint["agent"]
+            endpoint.pop("agent", None)
+            return endpoint
 
-        if input.tool_application_limit == 0:
-            return ToolResult(
-                result=json.dumps(response_json),
-                additional_context="This tool can only return the first page of results and by default does not include application information.",
-            )
-        return ToolResult(
-            result=json.dumps(response_json),
-            additional_context=f"This tool can only return the first page of results and up to {input.tool_application_limit} applications per result.",
+        response_json, truncated_context = await self._collect_s1_resource_async(
+            SentinelOneResource.ENDPOINT, input, transform=trim_endpoint
         )
 
+        if input.tool_application_limit == 0:
+            additional_context = "By default this tool does not include application information."
+        else:
+            additional_context = f"This tool returns up to {input.tool_application_limit} applications per result."
+        if truncated_context:
+            additional_context = f"{truncated_context} {additional_context}"
+        return ToolResult(result=json.dumps(response_json), additional_context=additional_context)
+
     async def get_threats_async(self, input: GetThreatsInput) -> ToolResult:
-        api_request: dict[str, Any] = self.generate_params(input)
-        response_json = await self._get_s1_resource_async(SentinelOneResource.THREAT, api_request)
-        return ToolResult(result=json.dumps(response_json, cls=NoNoneEncoder), additional_context=None)
+        response_json, truncated_context = await self._collect_s1_resource_async(SentinelOneResource.THREAT, input)
+        return ToolResult(result=json.dumps(response_json, cls=NoNoneEncoder), additional_context=truncated_context)
 
     async def get_alerts_async(self, input: GetAlertsInput) -> ToolResult:
-        api_request: dict[str, Any] = self.generate_params(input)
-        response_json = await self._get_s1_resource_async(SentinelOneResource.ALERTS, api_request)
-        return ToolResult(result=json.dumps(response_json, cls=NoNoneEncoder), additional_context=None)
-
-    @tracer.start_as_current_span("get_s1_resource_async")
-    async def _get_s1_resource_async(self, resource: SentinelOneResource, api_request: dict[str, Any]) -> Any:
+        response_json, truncated_context = await self._collect_s1_resource_async(SentinelOneResource.ALERTS, input)
+        return ToolResult(result=json.dumps(response_json, cls=NoNoneEncoder), additional_context=truncated_context)
+
+    async def get_agents_threats_and_alerts_async(self, input: GetAgentsThreatsAndAlertsInput) -> ToolResult:
+        requests: dict[str, tuple[SentinelOneResource, SentinelOneConnectorTools.GetResourceInput, Any]] = {}
+        if input.agents is not None:
+            requests["agents"] = (SentinelOneResource.ENDPOINT, input.agents, self._without_applications)
+        if input.threats is not None:
+            requests["threats"] = (SentinelOneResource.THREAT, input.threats, None)
+        if input.alerts is not None:
+            requests["alerts"] = (SentinelOneResource.ALERTS, input.alerts, None)
+        if not requests:
+            raise SentinelOneConnectorException("At least one of agents, threats or alerts must be requested")
+
+        # the response budget is shared between the resources
         async with httpx.AsyncClient(timeout=15.0) as client:
-            try:
-                response = await client.get(
-                    f"{self.api_endpoint}{resource.api_path}", headers=self.headers, **api_request
+            results = await asyncio.gather(
+                *(
+                    self._collect_s1_resource_async(
+                        resource,
+                        resource_input,
+                        transform=transform,
+                        max_rows=max(1, self.max_rows // len(requests)),
+                        max_bytes=max(1, self.max_response_bytes // len(requests)),
+                        client=client,
+                    )
+                    for resource, resource_input, transform in requests.values()
                 )
-                response.raise_for_status()
-                return response.json()
-            except httpx.RequestError:
-                logger().exception(f"An error occurred while requesting {resource.name}.")
-                raise SentinelOneConnectorException("Unable to connect to SentinelOne")  # noqa: B904
-            except httpx.HTTPStatusError as e:
-                logger().exception(f"Error response {e.response.status_code} while requesting {resource.name}.")
-                if e.response.status_code == 401:
-                    raise SentinelOneConnectorException("SentinelOne API token is not set or unauthorized")  # noqa: B904
-                raise SentinelOneConnectorException(
-                    f"SentinelOne returned an HTTP error {e.response.status_code}, {e.response.text}"
-                ) from None
-            except Exception:
-                logger().exception("Unknown error from S1")
-                raise SentinelOneConnectorException("Unknown error from SentinelOne")  # noqa: B904
-
-
-    def generate_params(self, input: GetResourceInput) -> dict[str, dict[str, str]]:
+            )
+
+        truncated_contexts = [f"{name}: {context}" for name, (_, context) in zip(requests, results, strict=True) if context]
+        return ToolResult(
+            result=json.dumps({name: response_json for name, (response_json, _) in zip(requests, results, strict=True)}, cls=NoNoneEncoder),
+            additional_context=" ".join(truncated_contexts) or None,
+        )
+
+    @tracer.start_as_current_span("collect_s1_resource_async")
+    async def _collect_s1_resource_async(
+        self,
+        resource: SentinelOneResource,
+        input: GetResourceInput,
+        transform: Optional[Callable[[dict[str, Any]], dict[str, Any]]] = None,
+        max_rows: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        client: Optional[httpx.AsyncClient] = None,
+    ) -> tuple[dict[str, Any], Optional[str]]:
+        """
+        Follows `nextCursor` until every item has been fetched or the row or byte budget is spent. Each page is
+        transformed and projected to the requested fields as it arrives, so only what is returned is kept.
+
+        :return: The response, shaped like a single SentinelOne page, and a note for the agent when it was truncated.
+        """
+        if client is None:
+            async with httpx.AsyncClient(timeout=15.0) as client:
+                return await self._collect_s1_resource_async(resource, input, transform, max_rows, max_bytes, client)
+
+        max_rows = max_rows or self.max_rows
+        max_bytes = max_bytes or self.max_response_bytes
+        params = self.generate_params(input)["params"]
+        data: list[Any] = []
+        size = 0
+        cursor = None
+        total_items = None
+        truncated = False
+        while True:
+            page_params = {**params, "limit": min(self.page_size, max_rows - len(data))}
+            if cursor:
+                page_params["cursor"] = cursor
+            response_json = await self._get_s1_resource_async(resource, {"params": page_params}, client=client)
+            pagination = response_json.get("pagination") or {}
+            total_items = pagination.get("totalItems", total_items)
+            cursor = pagination.get("nextCursor")
+            if params.get("countOnly"):
+                data = response_json.get("data") or []
+                break
+
+            for item in response_json.get("data") or []:
+                if transform is not None:
+                    item = transform(item)
+                if input.fields:
+                    item = project_fields(item, input.fields)
+                size += len(json.dumps(item))
+                if len(data) >= max_rows or size > max_bytes:
+                    truncated = True
+                    break
+                data.append(item)
+
+            if truncated or not cursor:
+                break
+            if len(data) >= max_rows:
+                truncated = True
+                break
+
+        truncated_context = None
+        if truncated:
+            truncated_context = (
+                f"Only {len(data)} of {total_items if total_items is not None else 'more'} items are shown. "
+                "Narrow down the filters, request fewer fields, or use countOnly for counts."
+            )
+        return {"data": data, "pagination": {"totalItems": total_items}}, truncated_context
+
+    @tracer.start_as_current_span("get_s1_resource_async")
+    async def _get_s1_resource_async(
+        self, resource: SentinelOneResource, api_request: dict[str, Any], client: Optional[httpx.AsyncClient] = None
+    ) -> Any:
+        if client is None:
+            async with httpx.AsyncClient(timeout=15.0) as client:
+                return await self._get_s1_resource_async(resource, api_request, client=client)
+
+        try:
+            response = await client.get(
+                f"{self.api_endpoint}{resource.api_path}", headers=self.headers, **api_request
+            )
+            response.raise_for_status()
+            return response.json()
+        except httpx.RequestError:
+            logger().exception(f"An error occurred while requesting {resource.name}.")
+            raise SentinelOneConnectorException("Unable to connect to SentinelOne")  # noqa: B904
+        except httpx.HTTPStatusError as e:
+            logger().exception(f"Error response {e.response.status_code} while requesting {resource.name}.")
+            if e.response.status_code == 401:
+                raise SentinelOneConnectorException("SentinelOne API token is not set or unauthorized")  # noqa: B904
+            raise SentinelOneConnectorException(
+                f"SentinelOne returned an HTTP error {e.response.status_code}, {e.response.text}"
+            ) from None
+        except Exception:
+            logger().exception("Unknown error from S1")
+            raise SentinelOneConnectorException("Unknown error from SentinelOne")  # noqa: B904
+
+
+    def generate_params(self, input: GetResourceInput) -> dict[str, dict[str, Any]]:
         params = input.model_dump(exclude_unset=True, exclude_defaults=True)
-        params["limit"] = RESULT_LIMIT
+        params["limit"] = self.page_size
         return {"params": params}
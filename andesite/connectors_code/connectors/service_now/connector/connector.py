@@ -2,7 +2,6 @@ import os
 from pathlib import Path
 from typing import Any
 import httpx
-import asyncio
 
 from connectors.connector import Connector
 from common.models.connector_id_enum import ConnectorIdEnum
@@ -10,7 +9,7 @@ from connectors.query_target_options import ConnectorQueryTargetOptions
 from connectors.service_now.connector.config import ServiceNowConnectorConfig
 from connectors.service_now.connector.target import ServiceNowTarget
 from connectors.service_now.connector.secrets import ServiceNowSecrets
-from connectors.service_now.connector.tools import ServiceNowConnectorTools
+from connectors.service_now.connector.tools import ServiceNowConnectorTools, _get_with_retries
 from pydantic import SecretStr
 
 
@@ -22,21 +21,13 @@ async def _get_query_target_options(config: ServiceNowConnectorConfig, secrets:
     tables: list[Any] = []
     retries = 3
     url = f"{config.instance_url}/api/now/table/sys_db_object?sysparm_fields=name,label&sysparm_limit=100"
-    async with httpx.AsyncClient(timeout=10) as client:
-        for attempt in range(retries):
-            try:
-                response = await client.get(url, auth=(config.username, secrets.password.get_secret_value()))
-                response.raise_for_status()
-                result = response.json().get("result", [])
-                for obj in result:
-                    if "name" in obj and obj["name"]:
-                        tables.append(obj["name"])
-                break
-            except httpx.HTTPStatusError as e:
-                if e.response.status_code == 429 and attempt < retries - 1:
-                    await asyncio.sleep(2)
-                else:
-                    raise e
+    response = await _get_with_retries(
+        url, auth=(config.username, secrets.password.get_secret_value()), timeout=10, retries=retries
+    )
+    result = response.json().get("result", [])
+    for obj in result:
+        if "name" in obj and obj["name"]:
+            tables.append(obj["name"])
     definitions = [ScopeTargetDefinition(name="table_names", multiselect=True)]
     selectors = [ScopeTargetSelector(type="table_names", values=tables)]
     return ConnectorQueryTargetOptions(definitions=definitions, selectors=selectors)
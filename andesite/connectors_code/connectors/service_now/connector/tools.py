@@ -2,8 +2,8 @@ from typing import Any
 from common.models.connector_id_enum import ConnectorIdEnum
 from connectors.service_now.connector.config import ServiceNowConnectorConfig
 import httpx
-import asyncio
 from common.jsonlogging.jsonlogger import Logging
+from connectors.rate_limit import RateLimits, send_with_rate_limit
 from connectors.service_now.connector.secrets import ServiceNowSecrets
 from connectors.tools import ConnectorToolsInterface
 from connectors.service_now.connector.target import ServiceNowTarget
@@ -12,19 +12,18 @@ from common.models.tool import Tool, ToolResult
 
 logger = Logging.get_logger(__name__)
 
+# ServiceNow has no fixed limits; instances enforce their own rate limit rules and report them in
+# X-RateLimit-* headers, which the governor honors
+SERVICE_NOW_RATE_LIMITS = RateLimits(connector=ConnectorIdEnum.SERVICE_NOW)
+
+
 async def _get_with_retries(url: str, auth: tuple[Any, ...], timeout: int = 10, retries: int = 3):
     async with httpx.AsyncClient(timeout=timeout) as client:
-        for attempt in range(retries):
-            try:
-                response = await client.get(url, auth=auth)
-                response.raise_for_status()
-                return response
-            except httpx.HTTPStatusError as e:
-                if e.response.status_code == 429 and attempt < retries - 1:
-                    await asyncio.sleep(2)
-                else:
-                    raise e
-    raise Exception("Failed to get a successful response after retries")
+        response = await send_with_rate_limit(
+            SERVICE_NOW_RATE_LIMITS, "table", lambda: client.get(url, auth=auth), max_attempts=retries
+        )
+        response.raise_for_status()
+        return response
 
 class ServiceNowConnectorTools(ConnectorToolsInterface[ServiceNowSecrets]):
     """A collection of tools used to interact with ServiceNow.
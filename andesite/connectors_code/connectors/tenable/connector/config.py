@@ -1,3 +1,8 @@
+import os
+import tempfile
+
+from pydantic import Field
+
 from common.models.secret import StorableSecret
 from connectors.connector import ConnectorConfigurationBase
 
@@ -5,3 +10,13 @@ from connectors.connector import ConnectorConfigurationBase
 class TenableConnectorConfig(ConnectorConfigurationBase):  # pragma: no cover
     access_key: StorableSecret
     secret_key: StorableSecret
+    export_cache_dir: str = Field(
+        default_factory=lambda: os.path.join(tempfile.gettempdir(), "tenable_exports"),
+        description="Local directory where completed asset and vulnerability exports are cached",
+    )
+    export_max_age_hours: int = Field(
+        24, description="Age after which a cached export is re-run instead of being reused", ge=1
+    )
+    export_max_concurrent_chunks: int = Field(
+        4, description="Maximum number of export chunks downloaded concurrently", ge=1, le=16
+    )
@@ -0,0 +1,346 @@
+import asyncio
+import codecs
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+from typing import Any, AsyncIterator, Literal
+
+from common.jsonlogging.jsonlogger import Logging
+from common.models.connector_id_enum import ConnectorIdEnum
+from httpx import AsyncClient
+from pydantic import BaseModel
+
+from connectors.rate_limit import RateLimitGovernor, RateLimits, send_with_rate_limit
+
+logger = Logging.get_logger(__name__)
+
+type ExportKind = Literal["vulns", "assets"]
+
+# Tenable answers 429 with Retry-After when too many requests or exports are running, which the governor honors
+TENABLE_RATE_LIMITS = RateLimits(connector=ConnectorIdEnum.TENABLE)
+
+TERMINAL_EXPORT_STATUSES = ["FINISHED", "CANCELLED", "ERROR"]
+
+INITIAL_POLL_INTERVAL_SECONDS = 2.0
+MAX_POLL_INTERVAL_SECONDS = 15.0
+
+# Records per chunk requested from Tenable: vulns exports chunk by asset, asset exports by asset too
+EXPORT_CHUNK_SIZES: dict[str, dict[str, int]] = {
+    "vulns": {"num_assets": 500},
+    "assets": {"chunk_size": 1000},
+}
+
+# The columns each export is flattened into, as (column, path into the exported record). Lists are stored
+# comma separated; the complete record is kept as JSON in the `record` column for json_extract.
+EXPORT_COLUMNS: dict[str, list[tuple[str, tuple[str, ...]]]] = {
+    "vulns": [
+        ("asset_uuid", ("asset", "uuid")),
+        ("asset_hostname", ("asset", "hostname")),
+        ("asset_fqdn", ("asset", "fqdn")),
+        ("asset_ipv4", ("asset", "ipv4")),
+        ("asset_operating_system", ("asset", "operating_system")),
+        ("plugin_id", ("plugin", "id")),
+        ("plugin_name", ("plugin", "name")),
+        ("plugin_family", ("plugin", "family")),
+        ("plugin_cve", ("plugin", "cve")),
+        ("plugin_cvss3_base_score", ("plugin", "cvss3_base_score")),
+        ("plugin_exploit_available", ("plugin", "exploit_available")),
+        ("severity", ("severity",)),
+        ("state", ("state",)),
+        ("port", ("port", "port")),
+        ("protocol", ("port", "protocol")),
+        ("first_found", ("first_found",)),
+        ("last_found", ("last_found",)),
+    ],
+    "assets": [
+        ("id", ("id",)),
+        ("hostnames", ("hostnames",)),
+        ("fqdns", ("fqdns",)),
+        ("ipv4s", ("ipv4s",)),
+        ("netbios_names", ("netbios_names",)),
+        ("operating_systems", ("operating_systems",)),
+        ("has_agent", ("has_agent",)),
+        ("agent_uuid", ("agent_uuid",)),
+        ("sources", ("sources",)),
+        ("created_at", ("created_at",)),
+        ("updated_at", ("updated_at",)),
+        ("last_seen", ("last_seen",)),
+    ],
+}
+
+
+class TenableExport(BaseModel):
+    kind: ExportKind
+    export_uuid: str
+    filters: dict[str, Any]
+    completed_at: float
+    record_count: int
+
+
+def _column_value(record: dict[str, Any], path: tuple[str, ...]) -> Any:
+    value: Any = record
+    for key in path:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    if isinstance(value, list):
+        return ",".join(str(item.get("name", item) if isinstance(item, dict) else item) for item in value)
+    if isinstance(value, dict):
+        return json.dumps(value)
+    return value
+
+
+async def iter_json_array(chunks: AsyncIterator[bytes]) -> AsyncIterator[dict[str, Any]]:
+    """
+    Parses a streamed JSON array, yielding each element as soon as it has been received in full.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    position = 0
+    started = False
+    async for chunk in chunks:
+        buffer = buffer[position:] + text_decoder.decode(chunk)
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if not started and position < len(buffer):
+                if buffer[position] != "[":
+                    raise ValueError("Expected a JSON array")
+                started = True
+                position += 1
+                continue
+            if position >= len(buffer) or buffer[position] == "]":
+                break
+            try:
+                element, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # the element continues in the next chunk
+                break
+            position = end
+            yield element
+
+
+class TenableExportStore:
+    """
+    A local SQLite cache of completed exports, with one table per export kind and one column per exported
+    field. Only the latest completed export of each kind is visible through the `vulns` and `assets` views;
+    older exports are removed once a newer one completes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with closing(sqlite3.connect(path)) as connection, connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS exports ("
+                "export_uuid TEXT PRIMARY KEY, kind TEXT, filters TEXT, completed_at REAL, record_count INTEGER)"
+            )
+            for kind, columns in EXPORT_COLUMNS.items():
+                column_names = ", ".join(column for column, _ in columns)
+                connection.execute(
+                    f"CREATE TABLE IF NOT EXISTS {kind}_records (export_uuid TEXT, {column_names}, record TEXT)"
+                )
+                connection.execute(
+                    f"CREATE INDEX IF NOT EXISTS {kind}_records_export ON {kind}_records (export_uuid)"
+                )
+                # records of an export still running are written to the table but stay hidden until it completes
+                connection.execute(
+                    f"CREATE VIEW IF NOT EXISTS {kind} AS SELECT {column_names}, record FROM {kind}_records "
+                    f"WHERE export_uuid = (SELECT export_uuid FROM exports WHERE kind = '{kind}' "
+                    "ORDER BY completed_at DESC LIMIT 1)"
+                )
+
+    def insert_records(self, kind: ExportKind, export_uuid: str, records: list[dict[str, Any]]) -> None:
+        columns = EXPORT_COLUMNS[kind]
+        rows = [
+            (export_uuid, *(_column_value(record, path) for _, path in columns), json.dumps(record))
+            for record in records
+        ]
+        placeholders = ", ".join("?" for _ in range(len(columns) + 2))
+        with closing(sqlite3.connect(self.path)) as connection, connection:
+            connection.executemany(f"INSERT INTO {kind}_records VALUES ({placeholders})", rows)
+
+    def complete_export(self, export: TenableExport) -> None:
+        with closing(sqlite3.connect(self.path)) as connection, connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO exports VALUES (?, ?, ?, ?, ?)",
+                (
+                    export.export_uuid,
+                    export.kind,
+                    json.dumps(export.filters, sort_keys=True),
+                    export.completed_at,
+                    export.record_count,
+                ),
+            )
+            # only the latest export of a kind is kept
+            stale = [
+                row[0]
+                for row in connection.execute(
+                    "SELECT export_uuid FROM exports WHERE kind = ? AND export_uuid != ?",
+                    (export.kind, export.export_uuid),
+                )
+            ]
+            # exports of the same kind still downloading aren't in exports yet and keep their records
+            stale_params = [(uuid,) for uuid in stale]
+            connection.executemany(f"DELETE FROM {export.kind}_records WHERE export_uuid = ?", stale_params)
+            connection.executemany("DELETE FROM exports WHERE export_uuid = ?", stale_params)
+
+    def discard_export(self, kind: ExportKind, export_uuid: str) -> None:
+        with closing(sqlite3.connect(self.path)) as connection, connection:
+            connection.execute(f"DELETE FROM {kind}_records WHERE export_uuid = ?", (export_uuid,))
+
+    def latest_export(self, kind: ExportKind) -> TenableExport | None:
+        with closing(sqlite3.connect(self.path)) as connection:
+            row = connection.execute(
+                "SELECT export_uuid, filters, completed_at, record_count FROM exports "
+                "WHERE kind = ? ORDER BY completed_at DESC LIMIT 1",
+                (kind,),
+            ).fetchone()
+        if row is None:
+            return None
+        return TenableExport(
+            kind=kind, export_uuid=row[0], filters=json.loads(row[1]), completed_at=row[2], record_count=row[3]
+        )
+
+    def query(self, sql: str, limit: int) -> tuple[list[str], list[list[Any]], bool]:
+        """
+        Runs a read-only query against the cache.
+
+        :return: The column names, up to `limit` rows and whether more rows were available.
+        """
+        with closing(sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)) as connection:
+            cursor = connection.execute(sql)
+            rows = cursor.fetchmany(limit + 1)
+            headers = [description[0] for description in cursor.description or []]
+        return headers, [list(row) for row in rows[:limit]], len(rows) > limit
+
+
+class TenableExporter:
+    """
+    Runs Tenable bulk exports: starts the export job, polls its status and downloads chunks concurrently as
+    soon as they become available, parsing each one while it streams in and writing it to the store.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        headers: dict[str, str],
+        store: TenableExportStore,
+        max_concurrent_chunks: int,
+    ):
+        self.base_url = base_url
+        self.headers = headers
+        self.store = store
+        self.max_concurrent_chunks = max_concurrent_chunks
+
+    async def run_export(self, kind: ExportKind, filters: dict[str, Any]) -> TenableExport:
+        async with AsyncClient(timeout=60) as client:
+            response = await send_with_rate_limit(
+                TENABLE_RATE_LIMITS,
+                f"{kind}/export",
+                lambda: client.post(
+                    f"{self.base_url}/{kind}/export",
+                    headers=self.headers,
+                    json={**EXPORT_CHUNK_SIZES[kind], "filters": filters},
+                ),
+            )
+            response.raise_for_status()
+            export_uuid = response.json()["export_uuid"]
+            logger().info("Started Tenable %s export %s", kind, export_uuid)
+
+            try:
+                record_count = await self._download_chunks(client, kind, export_uuid)
+            except BaseException:
+                await asyncio.to_thread(self.store.discard_export, kind, export_uuid)
+                raise
+
+        export = TenableExport(
+            kind=kind, export_uuid=export_uuid, filters=filters, completed_at=time.time(), record_count=record_count
+        )
+        await asyncio.to_thread(self.store.complete_export, export)
+        return export
+
+    async def _download_chunks(self, client: AsyncClient, kind: ExportKind, export_uuid: str) -> int:
+        semaphore = asyncio.Semaphore(self.max_concurrent_chunks)
+        # sqlite allows one writer at a time
+        write_lock = asyncio.Lock()
+        downloads: dict[int, asyncio.Task[int]] = {}
+        poll_interval = INITIAL_POLL_INTERVAL_SECONDS
+        try:
+            while True:
+                response = await send_with_rate_limit(
+                    TENABLE_RATE_LIMITS,
+                    f"{kind}/export/status",
+                    lambda: client.get(f"{self.base_url}/{kind}/export/{export_uuid}/status", headers=self.headers),
+                )
+                response.raise_for_status()
+                status = response.json()
+
+                for chunk_id in status.get("chunks_available", []):
+                    if chunk_id not in downloads:
+                        downloads[chunk_id] = asyncio.create_task(
+                            self._download_chunk(client, kind, export_uuid, chunk_id, semaphore, write_lock)
+                        )
+
+                if status.get("status") in TERMINAL_EXPORT_STATUSES:
+                    break
+                await asyncio.sleep(poll_interval)
+                poll_interval = min(poll_interval * 1.5, MAX_POLL_INTERVAL_SECONDS)
+
+            if status.get("status") != "FINISHED":
+                raise Exception(f"Tenable {kind} export {export_uuid} ended with status {status.get('status')}")
+            return sum(await asyncio.gather(*downloads.values()))
+        finally:
+            for task in downloads.values():
+                task.cancel()
+            await asyncio.gather(*downloads.values(), return_exceptions=True)
+
+    async def _download_chunk(
+        self,
+        client: AsyncClient,
+        kind: ExportKind,
+        export_uuid: str,
+        chunk_id: int,
+        semaphore: asyncio.Semaphore,
+        write_lock: asyncio.Lock,
+        batch_size: int = 1000,
+        max_attempts: int = 3,
+    ) -> int:
+        governor = RateLimitGovernor.instance()
+        endpoint = f"{kind}/export/chunks"
+        url = f"{self.base_url}/{kind}/export/{export_uuid}/chunks/{chunk_id}"
+        async with semaphore:
+            attempt = 0
+            while True:
+                await governor.acquire(TENABLE_RATE_LIMITS, endpoint)
+                async with client.stream("GET", url, headers=self.headers) as response:
+                    rate_limited = await governor.observe_response(
+                        TENABLE_RATE_LIMITS, endpoint, response.status_code, response.headers, attempt
+                    )
+                    attempt += 1
+                    if rate_limited and attempt < max_attempts:
+                        continue
+                    # a response still rate limited after the last attempt is an error status and raises here
+                    response.raise_for_status()
+
+                    count = 0
+                    batch: list[dict[str, Any]] = []
+                    async for record in iter_json_array(response.aiter_bytes()):
+                        batch.append(record)
+                        if len(batch) >= batch_size:
+                            count += await self._write(kind, export_uuid, batch, write_lock)
+                            batch = []
+                    count += await self._write(kind, export_uuid, batch, write_lock)
+                    return count
+
+    async def _write(
+        self, kind: ExportKind, export_uuid: str, records: list[dict[str, Any]], write_lock: asyncio.Lock
+    ) -> int:
+        if records:
+            async with write_lock:
+                await asyncio.to_thread(self.store.insert_records, kind, export_uuid, records)
+        return len(records)
@@ -1,4 +1,9 @@
+import asyncio
+import hashlib
 import json
+import os
+import sqlite3
+import time
 from typing import Any, Optional
 
 from common.jsonlogging.jsonlogger import Logging
@@ -10,6 +15,13 @@ from opentelemetry import trace
 from pydantic import BaseModel, Field
 
 from connectors.tenable.connector.config import TenableConnectorConfig
+from connectors.tenable.connector.exports import (
+    EXPORT_COLUMNS,
+    ExportKind,
+    TenableExport,
+    TenableExporter,
+    TenableExportStore,
+)
 from connectors.tenable.connector.target import TenableTarget
 from connectors.tenable.connector.secrets import TenableSecrets
 from connectors.tools import ConnectorToolsInterface
@@ -37,6 +49,7 @@ class TenableConnectorTools(ConnectorToolsInterface[TenableSecrets]):
         :param target: The Tenable target the tools will target.
         """
         super().__init__(ConnectorIdEnum.TENABLE, target=target, secrets=secrets)
+        self._config = tenable_config
 
     def get_tools(self) -> list[Tool]:
         tools: list[Tool] = []
@@ -103,8 +116,33 @@ class TenableConnectorTools(ConnectorToolsInterface[TenableSecrets]):
                 execute_fn=self.get_vulnerability_info_for_specific_asset_async,
             )
         )
+        tools.append(
+            Tool(
+                connector=ConnectorIdEnum.TENABLE,
+                name="export_tenable_data",
+                execute_fn=self.export_tenable_data_async,
+            )
+        )
+        tools.append(
+            Tool(
+                connector=ConnectorIdEnum.TENABLE,
+                name="query_tenable_export",
+                execute_fn=self.query_tenable_export_async,
+            )
+        )
         return tools
 
+    def _get_headers(self) -> dict[str, str]:
+        return {
+            "accept": "application/json",
+            "X-ApiKeys": f"accessKey={self._secrets.access_key.get_secret_value()};secretKey={self._secrets.secret_key.get_secret_value()}",
+        }
+
+    def _get_export_store(self) -> TenableExportStore:
+        # one cache per Tenable account
+        account = hashlib.sha256(self._secrets.access_key.get_secret_value().encode()).hexdigest()[:16]
+        return TenableExportStore(os.path.join(self._config.export_cache_dir, f"tenable_{account}.sqlite3"))
+
     @classmethod
     @tracer.start_as_current_span("_get_filters_query_params")
     def _get_filters_query_params(
@@ -146,10 +184,7 @@ class TenableConnectorTools(ConnectorToolsInterface[TenableSecrets]):
             try:
                 response = await client.get(
                     url=url,
-                    headers={
-                        "accept": "application/json",
-                        "X-ApiKeys": f"accessKey={self._secrets.access_key.get_secret_value()};secretKey={self._secrets.secret_key.get_secret_value()}",
-                    },
+                    headers=self._get_headers(),
                 )
                 response.raise_for_status()
             except HTTPStatusError as exc:
@@ -575,3 +610,94 @@ class TenableConnectorTools(ConnectorToolsInterface[TenableSecrets]):
             has_filters=True,
         )
         return metadata
+
+    class ExportTenableDataInput(BaseModel):
+        """
+        Exports all assets or all vulnerabilities from Tenable into a local cache that can be queried with the
+        query_tenable_export tool. Use this for questions over the whole estate (counts, top vulnerable assets,
+        everything affected by a CVE...) that the workbench tools can't answer because they are capped.
+        Exports take a few minutes, so a recent export with the same filters is reused unless refresh is set.
+        """
+
+        kind: ExportKind = Field(description="What to export, `vulns` for vulnerabilities or `assets`.")
+        filters: dict[str, Any] = Field(
+            description="Export filters as documented by Tenable, e.g. {\"severity\": [\"high\", \"critical\"], \"state\": [\"open\", \"reopened\"]} for vulns or {\"last_assessed\": <unix timestamp>} for assets.",
+            default={},
+        )
+        refresh: bool = Field(description="Run a new export even if a recent one is cached.", default=False)
+
+    @tracer.start_as_current_span("export_tenable_data_async")
+    async def export_tenable_data_async(self, input: ExportTenableDataInput) -> ToolResult:
+        # Based on API docs found here: https://developer.tenable.com/reference/exports-vulns-request-export
+        # and https://developer.tenable.com/reference/exports-assets-request-export
+        store = await asyncio.to_thread(self._get_export_store)
+        export: TenableExport | None = await asyncio.to_thread(store.latest_export, input.kind)
+        if (
+            input.refresh
+            or export is None
+            or export.filters != input.filters
+            or time.time() - export.completed_at > self._config.export_max_age_hours * 3600
+        ):
+            exporter = TenableExporter(
+                TENABLE_URL, self._get_headers(), store, self._config.export_max_concurrent_chunks
+            )
+            try:
+                export = await exporter.run_export(input.kind, input.filters)
+            except HTTPStatusError as exc:
+                raise Exception(
+                    f"API Error. Code={exc.response.status_code},Response={exc.response.text} Check the filters passed in and try again."
+                ) from exc
+
+        columns = ", ".join(column for column, _ in EXPORT_COLUMNS[input.kind])
+        return ToolResult(
+            result=QueryResultMetadata(
+                query_format="Tenable API",
+                query=f"{TENABLE_URL}/{input.kind}/export",
+                column_headers=["kind", "export_uuid", "filters", "completed_at", "record_count"],
+                results=[
+                    [
+                        export.kind,
+                        export.export_uuid,
+                        json.dumps(export.filters),
+                        time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(export.completed_at)),
+                        str(export.record_count),
+                    ]
+                ],
+            ),
+            additional_context=f"Query the export with query_tenable_export using the `{input.kind}` table. Its columns are {columns} and `record`, which holds the full exported record as JSON for use with json_extract. List values are comma separated.",
+        )
+
+    class QueryTenableExportInput(BaseModel):
+        """
+        Runs a read-only SQLite query over the data cached by the export_tenable_data tool, which must be called
+        first. The `vulns` table has one row per vulnerability finding and the `assets` table one row per asset.
+        """
+
+        query: str = Field(
+            description="A SQLite SELECT statement, e.g. SELECT asset_hostname, COUNT(*) FROM vulns WHERE severity = 'critical' GROUP BY asset_hostname ORDER BY 2 DESC"
+        )
+        limit: int = Field(description="Maximum number of rows to return.", default=100, ge=1, le=1000)
+
+    @tracer.start_as_current_span("query_tenable_export_async")
+    async def query_tenable_export_async(self, input: QueryTenableExportInput) -> ToolResult:
+        if not input.query.lstrip().lower().startswith(("select", "with")):
+            raise Exception("Only SELECT queries can be run against Tenable exports.")
+
+        store = await asyncio.to_thread(self._get_export_store)
+        try:
+            headers, rows, truncated = await asyncio.to_thread(store.query, input.query, input.limit)
+        except sqlite3.Error as exc:
+            raise Exception(f"Query Error: {exc}. Call export_tenable_data first if the tables are empty.") from exc
+
+        additional_context = None
+        if truncated:
+            additional_context = f"Only the first {input.limit} results are shown. Narrow down your query or aggregate the results."
+        return ToolResult(
+            result=QueryResultMetadata(
+                query_format="SQLite",
+                query=input.query,
+                column_headers=headers,
+                results=[["" if value is None else str(value) for value in row] for row in rows],
+            ),
+            additional_context=additional_context,
+        )
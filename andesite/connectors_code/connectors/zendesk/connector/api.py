@@ -4,8 +4,17 @@ from typing import Any
 import httpx
 from pydantic import SecretStr
 
+from common.models.connector_id_enum import ConnectorIdEnum
+
+from connectors.rate_limit import RateLimit, RateLimits, send_with_rate_limit
 from connectors.zendesk.connector.config import ZendeskConnectorConfig
 
+# The Support API allows 200 requests per minute on the smallest plan, more on larger ones
+ZENDESK_RATE_LIMITS = RateLimits(
+    connector=ConnectorIdEnum.ZENDESK,
+    endpoints={"*": RateLimit(requests_per_second=200 / 60, burst=20)},
+)
+
 
 async def get_tickets(config: ZendeskConnectorConfig, token: SecretStr, view_id: str) -> list[Any]:
     """Retrieve tickets for a given Zendesk view from the Zendesk API."""
@@ -14,7 +23,10 @@ async def get_tickets(config: ZendeskConnectorConfig, token: SecretStr, view_id:
     for attempt in range(config.api_max_retries):
         try:
             async with httpx.AsyncClient(timeout=config.api_request_timeout) as client:
-                response = await client.get(url, auth=auth)
+                # a rate-limited response makes every process back off before this loop's next attempt
+                response = await send_with_rate_limit(
+                    ZENDESK_RATE_LIMITS, "views/tickets", lambda: client.get(url, auth=auth), max_attempts=1
+                )
                 response.raise_for_status()
                 data = response.json()
                 tickets = data.get("tickets", [])
@@ -33,7 +45,9 @@ async def get_ticket_details(config: ZendeskConnectorConfig, token: SecretStr, t
     for attempt in range(config.api_max_retries):
         try:
             async with httpx.AsyncClient(timeout=config.api_request_timeout) as client:
-                response = await client.get(url, auth=auth)
+                response = await send_with_rate_limit(
+                    ZENDESK_RATE_LIMITS, "tickets", lambda: client.get(url, auth=auth), max_attempts=1
+                )
                 response.raise_for_status()
                 data = response.json()
                 return data.get("ticket", {})
@@ -0,0 +1,125 @@
+import asyncio
+from contextlib import asynccontextmanager
+from unittest.mock import patch
+
+import pytest
+from common.managers.dataset_descriptions.dataset_description_model import DatasetDescription
+from common.models.connector_id_enum import ConnectorIdEnum
+
+from connectors.athena.connector.catalog import get_catalog_snapshot
+from connectors.athena.connector.config import AthenaConnectorConfig
+from connectors.athena.connector.connector import _get_query_target_options, _merge_data_dictionary
+from connectors.athena.connector.secrets import AthenaSecrets
+from connectors.cache import Cache
+
+
+class FakeAthena:
+    """Serves two catalogs of 3 databases with 120 tables each, one result per page except for tables."""
+
+    def __init__(self):
+        self.calls: list[str] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def _page(self, call: str, items: list, key: str, page_size: int, next_token: str | None):
+        self.calls.append(call)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.001)
+        self.in_flight -= 1
+        start = int(next_token or 0)
+        response = {key: items[start : start + page_size]}
+        if start + page_size < len(items):
+            response["NextToken"] = str(start + page_size)
+        return response
+
+    async def list_data_catalogs(self, NextToken=None):
+        catalogs = [{"CatalogName": name} for name in ("AwsDataCatalog", "lakehouse")]
+        return await self._page("list_data_catalogs", catalogs, "DataCatalogsSummary", 1, NextToken)
+
+    async def list_databases(self, CatalogName, NextToken=None):
+        databases = [{"Name": f"db{n}"} for n in range(3)]
+        return await self._page("list_databases", databases, "DatabaseList", 1, NextToken)
+
+    async def list_table_metadata(self, CatalogName, DatabaseName, MaxResults, NextToken=None):
+        tables = [{"Name": f"{DatabaseName}_table{n}", "Columns": []} for n in range(120)]
+        return await self._page("list_table_metadata", tables, "TableMetadataList", MaxResults, NextToken)
+
+    async def list_work_groups(self, NextToken=None):
+        return await self._page("list_work_groups", [{"Name": "primary"}], "WorkGroups", 1, NextToken)
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values: dict[str, str] = {}
+        self.expiries: dict[str, int] = {}
+
+    async def get(self, name):
+        return self.values.get(name)
+
+    async def set(self, name, value, ex):
+        self.values[name] = value
+        self.expiries[name] = ex
+
+
+@pytest.fixture
+def fake_athena():
+    fake = FakeAthena()
+
+    @asynccontextmanager
+    async def client_context(config):
+        yield fake
+
+    with patch("connectors.athena.connector.catalog.get_client_context", new=client_context):
+        yield fake
+
+
+@pytest.mark.asyncio
+async def test_catalog_snapshot_follows_next_tokens_and_is_cached(fake_athena):
+    config = AthenaConnectorConfig(id=ConnectorIdEnum.ATHENA, catalog_max_concurrent_requests=2)
+    redis = FakeRedis()
+    cache = Cache(redis)  # type: ignore[arg-type]
+
+    snapshot = await get_catalog_snapshot(config, cache)
+
+    assert list(snapshot.catalogs) == ["AwsDataCatalog", "lakehouse"]
+    assert list(snapshot.catalogs["lakehouse"]) == ["db0", "db1", "db2"]
+    assert snapshot.catalogs["lakehouse"]["db2"] == [f"db2_table{n}" for n in range(120)]
+    assert snapshot.work_groups == ["primary"]
+    # 3 pages of tables for each of the 6 databases, with at most 2 requests per level in flight
+    assert fake_athena.calls.count("list_table_metadata") == 18
+    assert fake_athena.max_in_flight <= 4
+    assert list(redis.expiries.values()) == [config.catalog_snapshot_ttl_seconds]
+
+    fake_athena.calls.clear()
+    assert await get_catalog_snapshot(config, cache) == snapshot
+    assert fake_athena.calls == []
+
+
+@pytest.mark.asyncio
+async def test_merge_data_dictionary_and_query_target_options_use_snapshot(fake_athena):
+    config = AthenaConnectorConfig(id=ConnectorIdEnum.ATHENA)
+    existing = [
+        DatasetDescription(connector=ConnectorIdEnum.ATHENA, path=["lakehouse", "db1"], description="Sales"),
+        DatasetDescription(
+            connector=ConnectorIdEnum.ATHENA, path=["lakehouse", "db1", "db1_table7"], description="Orders"
+        ),
+    ]
+
+    data_dictionary = await _merge_data_dictionary(config, AthenaSecrets(), existing)
+
+    assert len(data_dictionary) == 2 + 6 + 6 * 120
+    descriptions = {tuple(dd.path): dd.description for dd in data_dictionary}
+    assert descriptions[("lakehouse", "db1")] == "Sales"
+    assert descriptions[("lakehouse", "db1", "db1_table7")] == "Orders"
+    assert descriptions[("lakehouse", "db1", "db1_table8")] == ""
+
+    data_dictionary = await _merge_data_dictionary(config, AthenaSecrets(), existing, ["lakehouse", "db1"])
+    assert [dd.path for dd in data_dictionary] == [["lakehouse"], ["lakehouse", "db1"]]
+
+    options = await _get_query_target_options(config, AthenaSecrets())
+    catalog_selector, workgroup_selector = options.selectors
+    assert list(catalog_selector.values) == ["AwsDataCatalog", "lakehouse"]
+    database_selector = catalog_selector.values["lakehouse"][0]  # type: ignore[call-overload]
+    assert database_selector.values["db0"][0].values[:2] == ["db0_table0", "db0_table1"]
+    assert workgroup_selector.values == ["primary"]
@@ -0,0 +1,106 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from common.managers.dataset_structures.dataset_structure_manager import DatasetStructureManager
+from common.managers.dataset_structures.dataset_structure_model import DatasetStructure
+from common.models.connector_id_enum import ConnectorIdEnum
+from mongomock_motor import AsyncMongoMockClient  # type: ignore[import-untyped]
+
+from connectors.cloudwatch.connector.config import CloudWatchConnectorConfig
+from connectors.cloudwatch.connector.secrets import CloudWatchSecrets
+from connectors.cloudwatch.connector.target import CloudWatchTarget
+from connectors.cloudwatch.connector.tools import CloudWatchConnectorTools, GetCloudWatchFieldsInput
+
+FIELDS_INPUT = GetCloudWatchFieldsInput(start_time="2025-04-15T10:30:00Z", end_time="2025-04-15T11:30:00Z")
+
+
+@pytest.fixture
+async def dataset_structure_manager():
+    manager = DatasetStructureManager()
+    await manager.initialize(AsyncMongoMockClient()["metamorph_test"]["dataset_structures"])
+    with patch.object(DatasetStructureManager, "instance", return_value=manager):
+        yield manager
+
+
+def _tools(log_groups: list[str]) -> CloudWatchConnectorTools:
+    return CloudWatchConnectorTools(
+        config=CloudWatchConnectorConfig(id=ConnectorIdEnum.CLOUDWATCH, schema_cache_ttl_seconds=3600),
+        target=CloudWatchTarget(log_groups=log_groups),
+        secrets=CloudWatchSecrets(),
+    )
+
+
+def _client_context(results_by_group: dict[str, list | Exception]):
+    client = AsyncMock()
+
+    async def start_query(logGroupName, **kwargs):
+        return {"queryId": logGroupName}
+
+    async def get_query_results(queryId):
+        results = results_by_group[queryId]
+        if isinstance(results, Exception):
+            raise results
+        return {"status": "Complete", "results": results}
+
+    client.start_query.side_effect = start_query
+    client.get_query_results.side_effect = get_query_results
+    client_context = AsyncMock()
+    client_context.__aenter__.return_value = client
+    return client, client_context
+
+
+def _result(**fields) -> list:
+    return [[{"field": key, "value": value} for key, value in fields.items()]]
+
+
+@pytest.mark.asyncio
+async def test_get_fields_persists_discovered_schemas(dataset_structure_manager):
+    tools = _tools(["a", "b", "c"])
+    client, client_context = _client_context(
+        {"a": _result(user="alice"), "b": RuntimeError("boom"), "c": _result(host="web-1")}
+    )
+
+    with patch.object(tools, "_get_client_context", new=AsyncMock(return_value=client_context)):
+        fields = await tools.get_fields_async(FIELDS_INPUT)
+
+    # results stay aligned with their log group even when one of them fails
+    assert fields == {"a": ["user"], "b": [], "c": ["host"]}
+    stored = await dataset_structure_manager.get_all_dataset_structures_async(ConnectorIdEnum.CLOUDWATCH)
+    assert {structure.dataset: structure.attributes["fields"] for structure in stored} == {"a": ["user"], "c": ["host"]}
+
+    # a new tools instance reads the persisted schemas and only rediscovers the failed log group
+    tools = _tools(["a", "b", "c"])
+    client, client_context = _client_context({"b": _result(status="200")})
+    with patch.object(tools, "_get_client_context", new=AsyncMock(return_value=client_context)):
+        fields = await tools.get_fields_async(FIELDS_INPUT)
+
+    assert fields == {"a": ["user"], "b": ["status"], "c": ["host"]}
+    assert [call.kwargs["logGroupName"] for call in client.start_query.call_args_list] == ["b"]
+
+
+@pytest.mark.asyncio
+async def test_get_fields_refreshes_stale_schemas_in_background(dataset_structure_manager):
+    stale_at = (datetime.now(timezone.utc) - timedelta(hours=2)).isoformat()
+    await dataset_structure_manager.set_dataset_structure_async(
+        DatasetStructure(
+            connector=ConnectorIdEnum.CLOUDWATCH,
+            dataset="a",
+            attributes={"fields": ["old"], "discovered_at": stale_at},
+        )
+    )
+    tools = _tools(["a"])
+    client, client_context = _client_context({"a": _result(new="value")})
+
+    with patch.object(tools, "_get_client_context", new=AsyncMock(return_value=client_context)):
+        fields = await tools.get_fields_async(FIELDS_INPUT)
+        assert fields == {"a": ["old"]}
+        # let the background refresh finish
+        for _ in range(20):
+            await asyncio.sleep(0.05)
+            stored = await dataset_structure_manager.get_dataset_structure_async(ConnectorIdEnum.CLOUDWATCH, "a")
+            if stored.attributes["fields"] == ["new"]:
+                break
+
+    assert stored.attributes["fields"] == ["new"]
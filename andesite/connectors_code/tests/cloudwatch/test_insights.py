@@ -0,0 +1,119 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from botocore.exceptions import ClientError
+from common.models.connector_id_enum import ConnectorIdEnum
+
+from connectors.cloudwatch.connector.config import CloudWatchConnectorConfig
+from connectors.cloudwatch.connector.insights import InsightsQueryScheduler, batch_log_groups
+from connectors.cloudwatch.connector.secrets import CloudWatchSecrets
+from connectors.cloudwatch.connector.target import CloudWatchTarget
+from connectors.cloudwatch.connector.tools import CloudWatchConnectorTools, GetCloudWatchLogsInsightsQueryInput
+
+
+def test_batch_log_groups():
+    log_groups = [f"group-{i}" for i in range(120)]
+    batches = batch_log_groups(log_groups, 50)
+    assert [len(batch) for batch in batches] == [50, 50, 20]
+    assert batch_log_groups(log_groups, 500)[0] == log_groups[:50]
+    assert batch_log_groups([], 50) == []
+
+
+@pytest.mark.asyncio
+async def test_scheduler_bounds_concurrent_queries():
+    scheduler = InsightsQueryScheduler(max_concurrent_queries=2)
+    running = 0
+    max_running = 0
+
+    async def start_query(**kwargs):
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        return {"queryId": kwargs["logGroupName"]}
+
+    async def get_query_results(queryId):
+        nonlocal running
+        await asyncio.sleep(0.01)
+        running -= 1
+        return {"status": "Complete", "results": []}
+
+    client = AsyncMock()
+    client.start_query.side_effect = start_query
+    client.get_query_results.side_effect = get_query_results
+
+    await asyncio.gather(*[scheduler.run_query(client, f"group-{i}", queryString="fields @message") for i in range(6)])
+
+    assert client.start_query.await_count == 6
+    assert max_running == 2
+
+
+@pytest.mark.asyncio
+async def test_scheduler_stops_query_on_cancel():
+    scheduler = InsightsQueryScheduler(max_concurrent_queries=1)
+    client = AsyncMock()
+    client.start_query.return_value = {"queryId": "query-1"}
+    client.get_query_results.return_value = {"status": "Running"}
+
+    with pytest.raises(TimeoutError):
+        await asyncio.wait_for(scheduler.run_query(client, ["a", "b"], queryString="fields @message"), timeout=0.1)
+
+    client.stop_query.assert_awaited_once_with(queryId="query-1")
+    assert client.start_query.call_args.kwargs["logGroupNames"] == ["a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_scheduler_does_not_stop_finished_query():
+    scheduler = InsightsQueryScheduler(max_concurrent_queries=1)
+    client = AsyncMock()
+    client.start_query.return_value = {"queryId": "query-1"}
+    client.get_query_results.return_value = {"status": "Failed"}
+
+    result = await scheduler.run_query(client, "a", queryString="fields @message")
+
+    assert result["status"] == "Failed"
+    client.stop_query.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_scheduler_retries_limit_exceeded():
+    scheduler = InsightsQueryScheduler(max_concurrent_queries=1)
+    limit_exceeded = ClientError({"Error": {"Code": "LimitExceededException"}}, "StartQuery")
+    client = AsyncMock()
+    client.start_query.side_effect = [limit_exceeded, limit_exceeded, {"queryId": "query-1"}]
+    client.get_query_results.return_value = {"status": "Complete", "results": []}
+
+    with patch("connectors.cloudwatch.connector.insights.asyncio.sleep", new=AsyncMock()) as sleep:
+        await scheduler.run_query(client, "a", queryString="fields @message")
+
+    assert client.start_query.await_count == 3
+    assert [call.args[0] for call in sleep.await_args_list] == [1.0, 2.0]
+
+
+@pytest.mark.asyncio
+async def test_insights_query_batches_log_groups():
+    instance = CloudWatchConnectorTools(
+        config=CloudWatchConnectorConfig(id=ConnectorIdEnum.CLOUDWATCH, insights_log_groups_per_query=2),
+        target=CloudWatchTarget(log_groups=["a", "b", "c"]),
+        secrets=CloudWatchSecrets(),
+    )
+    client = AsyncMock()
+    client.start_query.return_value = {"queryId": "query-1"}
+    client.get_query_results.return_value = {
+        "status": "Complete",
+        "results": [[{"field": "@message", "value": "hello"}]],
+    }
+    client_context = AsyncMock()
+    client_context.__aenter__.return_value = client
+
+    with patch.object(instance, "_get_client_context", new=AsyncMock(return_value=client_context)):
+        result = await instance.get_cloudwatch_logs_insights_query_async(
+            GetCloudWatchLogsInsightsQueryInput(
+                start_time="2025-04-15T10:30:00Z",
+                end_time="2025-04-15T11:30:00Z",
+                insights_query="fields @message",
+            )
+        )
+
+    assert [call.kwargs["logGroupNames"] for call in client.start_query.call_args_list] == [["a", "b"], ["c"]]
+    assert result.results == [["hello"], ["hello"]]
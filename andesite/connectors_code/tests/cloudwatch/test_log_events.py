@@ -0,0 +1,104 @@
+import asyncio
+from typing import Any
+from unittest.mock import MagicMock
+
+import pytest
+
+from connectors.cloudwatch.connector.log_events import (
+    SlicedLogEventsFetcher,
+    merge_by_timestamp,
+    split_time_range,
+)
+
+
+def test_split_time_range():
+    assert split_time_range(0, 100, 4) == [(0, 25), (25, 50), (50, 75), (75, 100)]
+    assert split_time_range(0, 10, 3) == [(0, 3), (3, 6), (6, 10)]
+    assert split_time_range(0, 2, 5) == [(0, 1), (1, 2)]
+    assert split_time_range(10, 10, 4) == [(10, 10)]
+
+
+@pytest.mark.asyncio
+async def test_merge_by_timestamp():
+    async def stream(timestamps: list[int], name: str):
+        for timestamp in timestamps:
+            yield {"timestamp": timestamp, "name": name}
+
+    merged = [
+        (event["timestamp"], event["name"])
+        async for event in merge_by_timestamp([stream([1, 4, 9], "a"), stream([], "b"), stream([2, 4, 5], "c")])
+    ]
+    assert merged == [(1, "a"), (2, "c"), (4, "a"), (4, "c"), (5, "c"), (9, "a")]
+
+
+class FakePaginator:
+    """Serves one event per `step` ms for each log group, honouring startTime/endTime (inclusive) and MaxItems."""
+
+    def __init__(self, step: int, page_size: int, calls: list[dict[str, Any]]):
+        self.step = step
+        self.page_size = page_size
+        self.calls = calls
+
+    def paginate(self, **params):
+        self.calls.append(params)
+
+        async def _pages():
+            start = -(-params["startTime"] // self.step) * self.step
+            timestamps = list(range(start, params["endTime"] + 1, self.step))[: params["PaginationConfig"]["MaxItems"]]
+            for i in range(0, len(timestamps), self.page_size):
+                await asyncio.sleep(0)
+                yield {
+                    "events": [
+                        {"timestamp": timestamp, "message": params["logGroupName"]}
+                        for timestamp in timestamps[i : i + self.page_size]
+                    ]
+                }
+
+        return _pages()
+
+
+def _client(step: int, page_size: int, calls: list[dict[str, Any]]):
+    client = MagicMock()
+    client.get_paginator.return_value = FakePaginator(step, page_size, calls)
+    return client
+
+
+@pytest.mark.asyncio
+async def test_sliced_fetch_orders_events_across_groups_and_slices():
+    calls: list[dict[str, Any]] = []
+    fetcher = SlicedLogEventsFetcher(max_concurrent_requests=3)
+
+    events = await fetcher.fetch(
+        _client(step=10, page_size=3, calls=calls),
+        ["a", "b"],
+        start_timestamp=0,
+        end_timestamp=100,
+        limit=1000,
+        slices=4,
+        filter_pattern="ERROR",
+    )
+
+    timestamps = [event["timestamp"] for event in events]
+    assert timestamps == sorted(timestamps)
+    # every event in [0, 100] exactly once per group, slice boundaries are not duplicated
+    assert len(events) == 2 * 11
+    assert {(call["startTime"], call["endTime"]) for call in calls} == {(0, 24), (25, 49), (50, 74), (75, 100)}
+    assert all(call["filterPattern"] == "ERROR" for call in calls)
+
+
+@pytest.mark.asyncio
+async def test_sliced_fetch_stops_at_limit():
+    calls: list[dict[str, Any]] = []
+    fetcher = SlicedLogEventsFetcher(max_concurrent_requests=2)
+
+    events = await fetcher.fetch(
+        _client(step=1, page_size=5, calls=calls),
+        ["a", "b", "c"],
+        start_timestamp=0,
+        end_timestamp=10_000,
+        limit=7,
+        slices=8,
+    )
+
+    assert len(events) == 7
+    assert [event["timestamp"] for event in events] == [0, 0, 0, 1, 1, 1, 2]
@@ -1,9 +1,13 @@
 from unittest.mock import AsyncMock, patch
 
+import httpx
 import pytest
+from common.managers.dataset_descriptions.dataset_description_manager import DatasetDescriptionManager
 from common.managers.dataset_descriptions.dataset_description_model import DatasetDescription
 from common.models.connector_id_enum import ConnectorIdEnum
 
+from mongomock_motor import AsyncMongoMockClient  # type: ignore[import-untyped]
+
 from connectors.confluence.connector.config import ConfluenceConnectorConfig
 from connectors.confluence.connector.connector import _merge_data_dictionary
 from connectors.confluence.connector.secrets import ConfluenceSecrets
@@ -216,3 +220,89 @@ async def test_merge_data_dictionary_path_prefix_startswith_behavior():
         assert ["Engineering", "Page"] not in paths
         assert ["EngTools"] not in paths
         assert ["EngTools", "Tooling"] not in paths
+
+
+class FakeConfluence:
+    """Serves spaces with pages, and the pages of space Eng changed since the watermark through CQL searches."""
+
+    def __init__(self):
+        self.pages = {"Eng": ["Overview", "Runbook"], "HR": ["PTO"]}
+        self.changed = ["Runbook", "Oncall"]
+        self.requests: list[httpx.Request] = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if request.url.path == "/rest/api/space":
+            return httpx.Response(200, json={"results": [{"key": key} for key in self.pages]})
+        if request.url.path == "/rest/api/content":
+            titles = self.pages[request.url.params["spaceKey"]]
+            return httpx.Response(200, json={"results": [{"id": title, "title": title} for title in titles]})
+        if request.url.path == "/rest/api/content/search":
+            if "cursor" not in request.url.params:
+                assert 'space = "Eng" and type = page and lastmodified >= ' in request.url.params["cql"]
+                return httpx.Response(
+                    200,
+                    json={
+                        "results": [{"id": self.changed[0], "title": self.changed[0]}],
+                        "_links": {"base": "https://fake-confluence.com", "next": "/rest/api/content/search?cursor=1"},
+                    },
+                )
+            return httpx.Response(200, json={"results": [{"id": title, "title": title} for title in self.changed[1:]]})
+        return httpx.Response(404)
+
+
+@pytest.mark.asyncio
+async def test_merge_data_dictionary_syncs_changed_pages_incrementally():
+    config = ConfluenceConnectorConfig.model_validate(
+        {
+            "id": ConnectorIdEnum.CONFLUENCE,
+            "url": "https://fake-confluence.com",
+            "email": "fake-confluence@confluence.com",
+            "api_key": "fake-api-key",
+        },
+        context={"encryption_key": "dummy-key"},
+    )
+    secrets = ConfluenceSecrets.model_validate({"api_key": "fake-api-key"}, context={"encryption_key": "dummy-key"})
+
+    manager = DatasetDescriptionManager()
+    await manager.initialize(AsyncMongoMockClient()["metamorph_test"]["dataset_descriptions"])
+    fake = FakeConfluence()
+    transport = httpx.MockTransport(fake.handler)
+    async_client = httpx.AsyncClient
+
+    async def merge(path_prefix):
+        existing = await manager.get_dataset_descriptions_async(ConnectorIdEnum.CONFLUENCE, path_prefix=path_prefix)
+        return await _merge_data_dictionary(config, secrets, existing, path_prefix)
+
+    with (
+        patch("connectors.confluence.connector.connector.ddm", manager),
+        patch(
+            "connectors.confluence.connector.connector.httpx.AsyncClient",
+            new=lambda **kwargs: async_client(transport=transport, **kwargs),
+        ),
+        patch.object(manager, "bulk_write_dataset_descriptions_async", wraps=manager.bulk_write_dataset_descriptions_async) as bulk_write,
+        patch.dict("connectors.confluence.connector.connector._last_full_syncs", clear=True),
+    ):
+        result = await merge(None)
+        assert [r.path for r in result] == [["Eng"], ["Eng", "Overview"], ["Eng", "Runbook"], ["HR"], ["HR", "PTO"]]
+        assert bulk_write.call_count == 1
+
+        await manager.set_dataset_description_async(
+            DatasetDescription(connector=ConnectorIdEnum.CONFLUENCE, path=["Eng", "Overview"], description="Intro")
+        )
+        fake.requests.clear()
+        result = await merge(["Eng"])
+
+    assert {tuple(r.path): r.description for r in result} == {
+        ("Eng",): "",
+        ("Eng", "Overview"): "Intro",
+        ("Eng", "Runbook"): "",
+        ("Eng", "Oncall"): "",
+    }
+    assert [request.url.path for request in fake.requests] == [
+        "/rest/api/space",
+        "/rest/api/content/search",
+        "/rest/api/content/search",
+    ]
+    stored = await manager.get_dataset_descriptions_async(ConnectorIdEnum.CONFLUENCE)
+    assert len(stored) == 6
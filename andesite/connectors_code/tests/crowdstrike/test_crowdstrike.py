@@ -1,15 +1,28 @@
-from unittest.mock import patch
+import json
+import re
+from unittest.mock import AsyncMock, patch
 
+import httpx
 import pytest
 from common.models.connector_id_enum import ConnectorIdEnum
 from common.models.secret import StorableSecret
-from httpx import Request, Response
 from pydantic import SecretStr
 
+from connectors.crowdstrike.connector.client import (
+    ALERTS_ENTITIES_PATH,
+    ALERTS_QUERY_PATH,
+    DETECTS_ENTITIES_PATH,
+    DETECTS_QUERY_PATH,
+    DEVICES_QUERY_PATH,
+    CrowdstrikeClient,
+    device_ids_cache,
+    format_device_lookup_filter_expression,
+)
 from connectors.crowdstrike.connector.config import CrowdstrikeConnectorConfig
 from connectors.crowdstrike.connector.secrets import CrowdstrikeSecrets
 from connectors.crowdstrike.connector.target import CrowdstrikeTarget
 from connectors.crowdstrike.connector.tools import CrowdstrikeConnectorTools, GetSecurityAlertsInput
+from connectors.rate_limit import RateLimitGovernor
 
 
 def test_crowdstrike_target():
@@ -35,88 +48,114 @@ def test_crowdstrike_connector_tools():
     assert tools[0].name == "get_security_alerts"
 
 
-@pytest.mark.anyio
-@patch(
-    "connectors.crowdstrike.connector.tools.AsyncClient.get",
-    side_effect=[
-        Response(
-            200,
-            request=Request("GET", "https://test_url.com"),
-            json={
-                "resources": [
-                    {"device_id": "device1"},
-                    {"device_id": "device2"},
-                ]
-            },
-        ),
-        Response(
-            200,
-            request=Request("GET", "https://test_url.com"),
-            json={
-                "resources": [
-                    "detection1",
-                    "detection2",
-                    "detection3",
-                ]
-            },
-        ),
-        Response(
-            200,
-            request=Request("GET", "https://test_url.com"),
-            json={
-                "resources": [
-                    {"alert_name": "alert1", "tactic_name": "hacking", "technique_name": "phishing"},
-                    {"alert_name": "alert2", "tactic_name": "more hacking", "technique_name": "breaking and entering"},
-                    {
-                        "alert_name": "alert3",
-                        "tactic_name": "its a false positive",
-                        "technique_name": "looking at hackernews",
-                    },
-                ]
-            },
+class FakeFalcon:
+    """
+    Serves a tenant with `device_count` devices named host-<n>, each with one detection, and records the requests.
+    """
+
+    def __init__(self, device_count: int = 2, detections: bool = True):
+        self.device_count = device_count
+        self.detections = detections
+        self.requests: list[httpx.Request] = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        path = request.url.path.lstrip("/")
+        params = request.url.params
+        if path == DEVICES_QUERY_PATH:
+            device_ids = [f"device{n}" for n in range(self.device_count)]
+            if "filter" in params:
+                value = params["filter"].split("'")[1]
+                device_ids = [device_id for device_id in device_ids if value == f"host-{device_id[6:]}"]
+            offset, limit = int(params["offset"]), int(params["limit"])
+            return httpx.Response(
+                200,
+                json={
+                    "meta": {"pagination": {"total": len(device_ids), "offset": offset}},
+                    "resources": device_ids[offset : offset + limit],
+                },
+            )
+        if path in (DETECTS_QUERY_PATH, ALERTS_QUERY_PATH):
+            device_ids = re.findall(r"'([^']+)'", params["filter"])
+            ids = [f"{path.split('/')[0]}-{device_id}" for device_id in device_ids]
+            if path == DETECTS_QUERY_PATH and not self.detections:
+                ids = []
+            return httpx.Response(200, json={"meta": {"pagination": {"total": len(ids)}}, "resources": ids})
+        if path in (DETECTS_ENTITIES_PATH, ALERTS_ENTITIES_PATH):
+            ids = json.loads(request.content)["ids"]
+            return httpx.Response(
+                200,
+                json={"resources": [{"id": id, "alert_name": f"{id} alert", "tactic_name": "hacking"} for id in ids]},
+            )
+        return httpx.Response(404)
+
+
+@pytest.fixture
+def fake_falcon():
+    fake = FakeFalcon()
+    transport = httpx.MockTransport(fake.handler)
+    device_ids_cache.clear()
+    with (
+        patch(
+            "connectors.crowdstrike.connector.client.AsyncClient",
+            new=lambda **kwargs: httpx.AsyncClient(transport=transport, **kwargs),
         ),
-    ],
-)
-@patch(
-    "connectors.crowdstrike.connector.utils.AsyncClient.post",
-    side_effect=[
-        Response(
-            200,
-            request=Request("GET", "https://test_url.com"),
-            json={"access_token": "access_token"},
+        patch(
+            "connectors.crowdstrike.connector.client.fetch_token",
+            new=AsyncMock(return_value="access_token"),
         ),
-    ],
-)
-async def test_crowdstrike_connector_tools_get_security_alerts_async(
-    mocker,
-    mocked_fetch_token,
-):
-    config = CrowdstrikeConnectorConfig(
+        patch.object(RateLimitGovernor, "instance", return_value=RateLimitGovernor()),
+    ):
+        yield fake
+    device_ids_cache.clear()
+
+
+def _config() -> CrowdstrikeConnectorConfig:
+    return CrowdstrikeConnectorConfig(
         id=ConnectorIdEnum.CROWDSTRIKE,
         host="test_host",
         url="https://test_url.com",
         client_id="test_client_id",
         client_secret=StorableSecret.model_validate("test_client_secret", context={"encryption_key": "mock"}),
     )
-    target = CrowdstrikeTarget()
 
-    tools = CrowdstrikeConnectorTools(config, target, secrets=CrowdstrikeSecrets(client_secret=SecretStr("a")))
+
+@pytest.mark.anyio
+async def test_crowdstrike_connector_tools_get_security_alerts_async(fake_falcon):
+    tools = CrowdstrikeConnectorTools(_config(), CrowdstrikeTarget(), secrets=CrowdstrikeSecrets(client_secret=SecretStr("a")))
 
     input_data = GetSecurityAlertsInput.model_validate(
         {
-            "hostnames": ["device1.hostname.com", "device2.hostname.com"],
+            "hostnames": ["host-0", "host-1"],
         }
     )
     tool_result = await tools.get_security_alerts_async(input_data)
     assert tool_result.result == [
-        {"detection_name": "alert1", "tactic": "hacking", "technique": "phishing"},
-        {"detection_name": "alert2", "tactic": "more hacking", "technique": "breaking and entering"},
-        {
-            "detection_name": "alert3",
-            "tactic": "its a false positive",
-            "technique": "looking at hackernews",
-        },
+        {"id": "detects-device0", "detection_name": "detects-device0 alert", "tactic": "hacking"},
+        {"id": "detects-device1", "detection_name": "detects-device1 alert", "tactic": "hacking"},
     ]
+    entity_requests = [request for request in fake_falcon.requests if request.method == "POST"]
+    assert [request.url.path for request in entity_requests] == [f"/{DETECTS_ENTITIES_PATH}"]
+    # alerts are only the fallback, they are not queried when there are detections
+    assert not any(request.url.path == f"/{ALERTS_QUERY_PATH}" for request in fake_falcon.requests)
+
+    # the device lookups are cached, a second call only queries detections and alerts
+    fake_falcon.requests.clear()
+    fake_falcon.detections = False
+    tool_result = await tools.get_security_alerts_async(input_data)
+    assert [alert["id"] for alert in tool_result.result] == ["alerts-device0", "alerts-device1"]
+    assert not any(request.url.path == f"/{DEVICES_QUERY_PATH}" for request in fake_falcon.requests)
+
+
+@pytest.mark.anyio
+async def test_crowdstrike_connector_tools_get_security_alerts_async_without_devices(fake_falcon):
+    fake_falcon.device_count = 0
+    tools = CrowdstrikeConnectorTools(_config(), CrowdstrikeTarget(), secrets=CrowdstrikeSecrets(client_secret=SecretStr("a")))
+
+    tool_result = await tools.get_security_alerts_async(GetSecurityAlertsInput(ips=["10.0.0.1"]))
+
+    assert tool_result.result[0]["id"] == ""
+    assert len(fake_falcon.requests) == 1
 
 
 def test_format_device_lookup_filter_expression():
@@ -124,69 +163,41 @@ def test_format_device_lookup_filter_expression():
     hostnames = ["device1.hostname.com"]
     ips = []
     expected = "hostname:['device1.hostname.com']"
-    result = CrowdstrikeConnectorTools._format_device_lookup_filter_expression(hostnames, ips)
+    result = format_device_lookup_filter_expression(hostnames, ips)
     assert result == expected
 
     # Test with multiple hostnames
     hostnames = ["device1.hostname.com", "device2.hostname.com"]
     ips = []
     expected = "hostname:['device1.hostname.com','device2.hostname.com']"
-    result = CrowdstrikeConnectorTools._format_device_lookup_filter_expression(hostnames, ips)
+    result = format_device_lookup_filter_expression(hostnames, ips)
     assert result == expected
 
     # Test with multiple hostnames and IPs
     hostnames = ["device1.hostname.com", "device2.hostname.com"]
     ips = ["10.5.15.95"]
     expected = "(hostname:['device1.hostname.com','device2.hostname.com'] OR local_ip:['10.5.15.95'])"
-    result = CrowdstrikeConnectorTools._format_device_lookup_filter_expression(hostnames, ips)
+    result = format_device_lookup_filter_expression(hostnames, ips)
     assert result == expected
 
     # Test None
     hostnames = []
     ips = []
     expected = None
-    result = CrowdstrikeConnectorTools._format_device_lookup_filter_expression(hostnames, ips)
+    result = format_device_lookup_filter_expression(hostnames, ips)
     assert result == expected
 
 
 @pytest.mark.anyio
-@patch(
-    "connectors.crowdstrike.connector.tools.AsyncClient.get",
-    side_effect=[
-        Response(
-            200,
-            request=Request("GET", "https://test_url.com"),
-            json={
-                "meta": {
-                    "pagination": {
-                        "offset": 0,
-                    }
-                },
-                "resources": [
-                    {"device_id": "device1"},
-                    {"device_id": "device2"},
-                ],
-            },
-        ),
-        Response(
-            200,
-            request=Request("GET", "https://test_url.com"),
-            json={
-                "resources": [
-                    {"device_id": "device3"},
-                    {"device_id": "device4"},
-                ]
-            },
-        ),
-    ],
-)
-async def test_get_all_device_ids(mocker):
-    result = await CrowdstrikeConnectorTools._get_all_device_ids(
-        "http://test_url.com", "crowdstrike_access_token", "test_expression"
-    )
-    assert result == [
-        "device1",
-        "device2",
-        "device3",
-        "device4",
+async def test_query_ids_fetches_offset_windows_concurrently(fake_falcon):
+    fake_falcon.device_count = 12000
+
+    async with CrowdstrikeClient(_config(), CrowdstrikeSecrets(client_secret=SecretStr("a"))) as client:
+        device_ids = await client.query_ids(DEVICES_QUERY_PATH, None, max_results=20000)
+
+    # offset paging stops at 10000 results, in pages of the largest limit allowed
+    assert device_ids == [f"device{n}" for n in range(10000)]
+    assert [(request.url.params["offset"], request.url.params["limit"]) for request in fake_falcon.requests] == [
+        ("0", "5000"),
+        ("5000", "5000"),
     ]
@@ -0,0 +1,183 @@
+import asyncio
+import threading
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+from common.models.connector_id_enum import ConnectorIdEnum
+from common.models.secret import StorableSecret
+from pydantic import SecretStr
+
+from connectors.elastic.connector import Connector as ElasticConnector
+from connectors.elastic.connector.client import ElasticClient, ElasticException
+from connectors.elastic.connector.config import ElasticConnectorConfig
+from connectors.elastic.connector.connector import _get_alerts_unfiltered
+from connectors.elastic.connector.secrets import ElasticSecrets
+
+
+class FakeElasticsearch:
+    """Serves `total` documents split evenly across slices, honouring PIT, slice and search_after."""
+
+    def __init__(self, total: int, fail_slice: int | None = None):
+        self.docs = [{"_id": str(i), "_source": {"n": i}} for i in range(total)]
+        self.fail_slice = fail_slice
+        self.closed_pits: list[str] = []
+        self.search_bodies: list[dict[str, Any]] = []
+
+    async def open_point_in_time(self, index: str, keep_alive: str) -> dict[str, Any]:
+        return {"id": "pit-0"}
+
+    async def close_point_in_time(self, body: dict[str, Any]) -> dict[str, Any]:
+        self.closed_pits.append(body["id"])
+        return {"succeeded": True}
+
+    async def search(self, body: dict[str, Any], index: str | None = None) -> dict[str, Any]:
+        self.search_bodies.append(dict(body))
+        slice_ = body.get("slice", {"id": 0, "max": 1})
+        if slice_["id"] == self.fail_slice:
+            raise RuntimeError("boom")
+        docs = [doc for doc in self.docs if int(doc["_id"]) % slice_["max"] == slice_["id"]]
+        after = body.get("search_after", [-1])[0]
+        page = [{**doc, "sort": [int(doc["_id"])]} for doc in docs if int(doc["_id"]) > after][: body["size"]]
+        return {"pit_id": "pit-1", "hits": {"hits": page}}
+
+
+def _client(app: FakeElasticsearch) -> ElasticClient:
+    client = ElasticClient(url="http://localhost:9200", api_key="key")
+    client._elastic_app = app  # type: ignore[assignment]
+    return client
+
+
+@pytest.mark.asyncio
+async def test_sliced_search_streams_all_hits():
+    app = FakeElasticsearch(total=95)
+    client = _client(app)
+
+    hits = [hit async for hit in client.sliced_search(index="alerts", query={"query": {"match_all": {}}}, slices=3, size=10)]
+
+    assert sorted(int(hit["_id"]) for hit in hits) == list(range(95))
+    assert app.closed_pits == ["pit-1"]
+    assert all("index" not in body and body["pit"]["keep_alive"] == "1m" for body in app.search_bodies)
+    assert {body["slice"]["id"] for body in app.search_bodies} == {0, 1, 2}
+
+
+@pytest.mark.asyncio
+async def test_sliced_search_stops_at_max_hits():
+    app = FakeElasticsearch(total=1000)
+    client = _client(app)
+
+    hits = [hit async for hit in client.sliced_search(index="alerts", query={}, slices=2, size=10, max_hits=25)]
+
+    assert len(hits) == 25
+    assert app.closed_pits == ["pit-1"]
+
+
+@pytest.mark.asyncio
+async def test_sliced_search_raises_slice_errors():
+    app = FakeElasticsearch(total=50, fail_slice=1)
+    client = _client(app)
+
+    with pytest.raises(ElasticException):
+        async for _ in client.sliced_search(index="alerts", query={}, slices=2, size=10):
+            pass
+    assert app.closed_pits
+
+
+@pytest.mark.asyncio
+async def test_paginated_search_does_not_mutate_query():
+    app = FakeElasticsearch(total=25)
+    client = _client(app)
+    query: dict[str, Any] = {"query": {"match_all": {}}}
+
+    hits = await client.paginated_search(index="alerts", query=query, size=10)
+
+    assert len(hits) == 25
+    assert query == {"query": {"match_all": {}}}
+
+
+@pytest.mark.asyncio
+async def test_get_client_is_pooled():
+    client = ElasticClient.get_client("http://localhost:9200", SecretStr("key-a"))
+    assert ElasticClient.get_client("http://localhost:9200", SecretStr("key-a")) is client
+    assert ElasticClient.get_client("http://localhost:9200", SecretStr("key-b")) is not client
+
+    await ElasticClient.close_all()
+    assert ElasticClient.get_client("http://localhost:9200", SecretStr("key-a")) is not client
+    await ElasticClient.close_all()
+
+
+class ClosableElasticsearch:
+    def __init__(self):
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+def test_get_client_closes_the_client_of_a_previous_loop():
+    async def get_client() -> ElasticClient:
+        return ElasticClient.get_client("http://localhost:9200", SecretStr("key-loop"))
+
+    old_loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=old_loop.run_forever, daemon=True)
+    thread.start()
+    try:
+        old = asyncio.run_coroutine_threadsafe(get_client(), old_loop).result()
+        old._elastic_app = ClosableElasticsearch()  # type: ignore[assignment]
+
+        new = asyncio.run(get_client())
+
+        assert new is not old
+        # the close runs on the loop the old client belongs to
+        asyncio.run_coroutine_threadsafe(asyncio.sleep(0), old_loop).result()
+        assert old._elastic_app.closed  # type: ignore[attr-defined]
+        assert ElasticClient._clients[("http://localhost:9200", "key-loop")][1] is new
+    finally:
+        old_loop.call_soon_threadsafe(old_loop.stop)
+        thread.join()
+        old_loop.close()
+        ElasticClient._clients.clear()
+
+
+@pytest.mark.asyncio
+async def test_connector_close_closes_pooled_clients():
+    client = ElasticClient.get_client("http://localhost:9200", SecretStr("key-close"))
+    client._elastic_app = ClosableElasticsearch()  # type: ignore[assignment]
+
+    await ElasticConnector.close()
+
+    assert client._elastic_app.closed  # type: ignore[attr-defined]
+    assert ("http://localhost:9200", "key-close") not in ElasticClient._clients
+
+
+@pytest.mark.asyncio
+async def test_sliced_alert_search_is_capped_like_paginated_search():
+    calls: dict[str, dict[str, Any]] = {}
+
+    class RecordingClient:
+        async def sliced_search(self, **kwargs):
+            calls["sliced"] = kwargs
+            for _ in ():
+                yield {}
+
+        async def paginated_search(self, **kwargs):
+            calls["paginated"] = kwargs
+            return []
+
+    def config(slices: int) -> ElasticConnectorConfig:
+        return ElasticConnectorConfig(
+            id=ConnectorIdEnum.ELASTIC,
+            url="http://localhost:9200",
+            api_key=StorableSecret.model_validate("key", context={"encryption_key": "mock"}),
+            alert_index="alerts",
+            alert_search_slices=slices,
+        )
+
+    secrets = ElasticSecrets(api_key=SecretStr("key"))
+    with patch.object(ElasticClient, "get_client", return_value=RecordingClient()):
+        await _get_alerts_unfiltered(config(1), secrets)
+        await _get_alerts_unfiltered(config(4), secrets)
+
+    paginated, sliced = calls["paginated"], calls["sliced"]
+    assert sliced["size"] == paginated["size"]
+    assert sliced["max_hits"] == paginated["size"] * paginated["max_pages"]
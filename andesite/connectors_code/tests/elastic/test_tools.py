@@ -0,0 +1,117 @@
+import json
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+from common.models.connector_id_enum import ConnectorIdEnum
+from common.models.secret import StorableSecret
+from common.models.tool import ToolResult
+from pydantic import SecretStr
+
+from connectors.elastic.connector.client import ElasticClient
+from connectors.elastic.connector.config import ElasticConnectorConfig
+from connectors.elastic.connector.secrets import ElasticSecrets
+from connectors.elastic.connector.target import ElasticTarget
+from connectors.elastic.connector.tools import ElasticAggregationQuery, ElasticConnectorTools
+
+
+class FakeCompositeElasticsearch:
+    """Serves `total` composite buckets keyed by host, honouring `size` and `after`."""
+
+    def __init__(self, total: int):
+        self.total = total
+        self.bodies: list[dict[str, Any]] = []
+
+    async def search(self, index: str, body: dict[str, Any]) -> dict[str, Any]:
+        self.bodies.append(json.loads(json.dumps(body)))
+        name, aggregation = next(iter(body["aggs"].items()))
+        composite = aggregation["composite"]
+        start = composite.get("after", {}).get("host", -1) + 1
+        buckets = []
+        for host in range(start, min(start + composite["size"], self.total)):
+            bucket: dict[str, Any] = {"key": {"host": host}, "doc_count": host * 2}
+            for sub_agg in aggregation.get("aggs", {}):
+                bucket[sub_agg] = {"value": host}
+            buckets.append(bucket)
+        result: dict[str, Any] = {"buckets": buckets}
+        if buckets:
+            result["after_key"] = buckets[-1]["key"]
+        return {"aggregations": {name: result}}
+
+
+def _tools(page_size: int, bucket_cap: int) -> ElasticConnectorTools:
+    config = ElasticConnectorConfig(
+        id=ConnectorIdEnum.ELASTIC,
+        url="http://localhost:9200",
+        api_key=StorableSecret.model_validate("key", context={"encryption_key": "mock"}),
+        composite_aggregation_page_size=page_size,
+        composite_aggregation_bucket_cap=bucket_cap,
+    )
+    return ElasticConnectorTools(config, ElasticTarget(index="logs"), ElasticSecrets(api_key=SecretStr("key")))
+
+
+def _composite_input() -> ElasticAggregationQuery:
+    return ElasticAggregationQuery(
+        query={"match_all": {}},
+        aggs={
+            "by_host": {
+                "composite": {"sources": [{"host": {"terms": {"field": "host.name"}}}], "size": 100000},
+                "aggs": {"bytes": {"sum": {"field": "bytes"}}},
+            }
+        },
+    )
+
+
+@pytest.mark.asyncio
+async def test_composite_aggregation_pages_all_buckets():
+    app = FakeCompositeElasticsearch(total=25)
+    client = ElasticClient(url="http://localhost:9200", api_key="key")
+    client._elastic_app = app  # type: ignore[assignment]
+
+    with patch.object(ElasticClient, "get_client", return_value=client):
+        result = await _tools(page_size=10, bucket_cap=100).execute_aggregation_query(_composite_input())
+
+    assert isinstance(result, ToolResult)
+    assert result.result.column_headers == ["host", "doc_count", "bytes"]
+    assert len(result.result.results) == 25
+    assert result.result.results[3] == ["3", "6", json.dumps({"value": 3})]
+    assert result.additional_context == "The composite aggregation returned 25 buckets in total."
+    assert [body["aggs"]["by_host"]["composite"]["size"] for body in app.bodies] == [10, 10, 10]
+
+
+@pytest.mark.asyncio
+async def test_composite_aggregation_caps_buckets_and_counts_rest():
+    app = FakeCompositeElasticsearch(total=95)
+    client = ElasticClient(url="http://localhost:9200", api_key="key")
+    client._elastic_app = app  # type: ignore[assignment]
+
+    with patch.object(ElasticClient, "get_client", return_value=client):
+        result = await _tools(page_size=10, bucket_cap=20).execute_aggregation_query(_composite_input())
+
+    assert isinstance(result, ToolResult)
+    assert len(result.result.results) == 20
+    assert "95 buckets in total" in result.additional_context
+    assert "Only the first 20 buckets are shown" in result.additional_context
+    # counting pages resume after the last returned bucket and skip sub-aggregations
+    counting_body = app.bodies[2]["aggs"]["by_host"]
+    assert counting_body["composite"]["after"] == {"host": 19}
+    assert "aggs" not in counting_body
+
+
+@pytest.mark.asyncio
+async def test_composite_aggregation_counts_a_bounded_number_of_pages():
+    app = FakeCompositeElasticsearch(total=1000)
+    client = ElasticClient(url="http://localhost:9200", api_key="key")
+    client._elastic_app = app  # type: ignore[assignment]
+
+    with (
+        patch.object(ElasticClient, "get_client", return_value=client),
+        patch("connectors.elastic.connector.tools.COMPOSITE_COUNT_PAGE_SIZE", 30),
+        patch("connectors.elastic.connector.tools.COMPOSITE_COUNT_MAX_PAGES", 2),
+    ):
+        result = await _tools(page_size=10, bucket_cap=20).execute_aggregation_query(_composite_input())
+
+    assert isinstance(result, ToolResult)
+    assert len(result.result.results) == 20
+    assert result.additional_context.startswith("The composite aggregation returned at least 80 buckets.")
+    assert len(app.bodies) == 4
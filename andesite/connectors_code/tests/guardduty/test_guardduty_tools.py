@@ -0,0 +1,104 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from common.models.connector_id_enum import ConnectorIdEnum
+from common.models.secret import StorableSecret
+from pydantic import SecretStr
+
+from connectors.guardduty.connector.config import GuarddutyConnectorConfig
+from connectors.guardduty.connector.secrets import GuarddutySecrets
+from connectors.guardduty.connector.target import GuarddutyTarget
+from connectors.guardduty.connector.tools import GetGuarddutyFindingsInput, GuarddutyConnectorTools
+
+
+class FakeGuardduty:
+    """Lists `count` findings in pages of `page_size` and tracks how many get_findings calls overlap."""
+
+    def __init__(self, count: int, page_size: int):
+        self.finding_ids = [f"finding-{i}" for i in range(count)]
+        self.page_size = page_size
+        self.paginate_params: dict = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.batches: list[list[str]] = []
+
+    def get_paginator(self, operation: str):
+        assert operation == "list_findings"
+        paginator = MagicMock()
+
+        def paginate(**params):
+            self.paginate_params = params
+
+            async def pages():
+                for i in range(0, len(self.finding_ids), self.page_size):
+                    yield {"FindingIds": self.finding_ids[i : i + self.page_size]}
+
+            return pages()
+
+        paginator.paginate = paginate
+        return paginator
+
+    async def get_findings(self, DetectorId: str, FindingIds: list[str]):
+        self.batches.append(FindingIds)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return {"Findings": [{"Id": finding_id, "Type": "Recon", "Severity": 8.0} for finding_id in FindingIds]}
+
+
+def _tools(**config) -> GuarddutyConnectorTools:
+    return GuarddutyConnectorTools(
+        config=GuarddutyConnectorConfig(
+            id=ConnectorIdEnum.GUARDDUTY,
+            aws_access_key_id=StorableSecret.model_validate("key", context={"encryption_key": "mock"}),
+            aws_secret_access_key=StorableSecret.model_validate("secret", context={"encryption_key": "mock"}),
+            **config,
+        ),
+        target=GuarddutyTarget(),
+        secrets=GuarddutySecrets(aws_access_key_id=SecretStr("key"), aws_secret_access_key=SecretStr("secret")),
+    )
+
+
+def _client_context(client: FakeGuardduty) -> MagicMock:
+    client_context = MagicMock()
+    client_context.__aenter__ = AsyncMock(return_value=client)
+    client_context.__aexit__ = AsyncMock(return_value=False)
+    return client_context
+
+
+@pytest.mark.asyncio
+async def test_get_findings_hydrates_batches_concurrently():
+    client = FakeGuardduty(count=230, page_size=40)
+    tools = _tools(findings_max_concurrent_requests=3, findings_max_results=40)
+
+    with patch.object(tools, "_get_client_context", new=AsyncMock(return_value=_client_context(client))):
+        result = await tools.get_guardduty_findings_async(
+            GetGuarddutyFindingsInput(detector_id="detector", min_severity=7, finding_types=["Recon"], archived=False)
+        )
+
+    # findings keep the listing order, in batches of 50 with at most 3 requests in flight
+    assert [finding["id"] for finding in result.result] == client.finding_ids
+    assert [len(batch) for batch in client.batches] == [50, 50, 50, 50, 30]
+    assert client.max_in_flight == 3
+
+    criterion = client.paginate_params["FindingCriteria"]["Criterion"]
+    assert criterion["severity"] == {"GreaterThanOrEqual": 7}
+    assert criterion["type"] == {"Equals": ["Recon"]}
+    assert criterion["service.archived"] == {"Equals": ["false"]}
+    assert "GreaterThanOrEqual" in criterion["updatedAt"]
+    assert client.paginate_params["SortCriteria"] == {"AttributeName": "updatedAt", "OrderBy": "DESC"}
+
+
+@pytest.mark.asyncio
+async def test_get_findings_without_results():
+    client = FakeGuardduty(count=0, page_size=50)
+    tools = _tools()
+
+    with patch.object(tools, "_get_client_context", new=AsyncMock(return_value=_client_context(client))):
+        result = await tools.get_guardduty_findings_async(GetGuarddutyFindingsInput(detector_id="detector"))
+
+    assert result.result == []
+    assert client.batches == []
+    assert set(client.paginate_params["FindingCriteria"]["Criterion"]) == {"updatedAt"}
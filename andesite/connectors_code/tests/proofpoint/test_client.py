@@ -1,4 +1,9 @@
-from connectors.proofpoint.client.proofpoint_instance import Interval
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from connectors.proofpoint.client.proofpoint_instance import Interval, ProofpointInstance
 
 
 class TestIntervalOverlaps:
@@ -64,3 +69,63 @@ class TestIntervalOverlaps:
         interval2 = Interval(interval="2025-06-20T22:00:00Z/2025-06-21T02:00:00Z")
         assert interval1.overlaps_with(interval2)
         assert interval2.overlaps_with(interval1)
+
+
+def _instance(siem_max_concurrent_requests: int) -> ProofpointInstance:
+    return ProofpointInstance(
+        api_host="foo",
+        principal="bar",
+        token=None,
+        request_timeout=0,
+        max_retries=1,
+        siem_max_concurrent_requests=siem_max_concurrent_requests,
+    )
+
+
+@pytest.mark.asyncio
+async def test_siem_events_are_fetched_concurrently_and_merged_in_order():
+    instance = _instance(siem_max_concurrent_requests=3)
+    in_flight = 0
+    max_in_flight = 0
+
+    async def request(method, url, params, expiry_sec=None, endpoint="*"):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        hour = int(params["interval"][11:13])
+        # later segments respond first
+        await asyncio.sleep(0.01 * (10 - hour))
+        in_flight -= 1
+        return {"messagesDelivered": [{"hour": hour}], "clicksBlocked": [], "queryEndTime": params["interval"]}
+
+    with patch.object(instance, "request", side_effect=request):
+        events = await instance.get_siem_events(
+            interval="2020-05-01T00:00:00Z/2020-05-01T08:00:00Z", threat_status=["active"]
+        )
+
+    assert [event["hour"] for event in events["messagesDelivered"]] == list(range(8))
+    assert events["clicksBlocked"] == []
+    assert "queryEndTime" not in events
+    assert max_in_flight == 3
+
+
+@pytest.mark.asyncio
+async def test_siem_events_stop_fetching_when_consumer_stops():
+    instance = _instance(siem_max_concurrent_requests=2)
+    requested: list[str] = []
+
+    async def request(method, url, params, expiry_sec=None, endpoint="*"):
+        requested.append(params["interval"])
+        await asyncio.sleep(0.01)
+        return {"messagesDelivered": []}
+
+    with patch.object(instance, "request", side_effect=request):
+        segments = instance.iter_siem_events(
+            interval="2020-05-01T00:00:00Z/2020-05-02T00:00:00Z", threat_status=["active"]
+        )
+        segment, _ = await anext(segments)
+        await segments.aclose()
+
+    assert segment == "2020-05-01T00:00:00Z/2020-05-01T01:00:00Z"
+    # the first segment and the prefetched ones only, not the whole day
+    assert len(requested) <= 3
@@ -0,0 +1,56 @@
+from connectors.proofpoint.connector.ioc_matcher import IOCMatcher, SerializedRecords
+
+
+def test_matcher_finds_overlapping_and_nested_iocs():
+    records = SerializedRecords(
+        [
+            {"content": "Cryptography and CRYPTOCURRENCY"},
+            {"content": "nothing to see"},
+            {"url": "https://evil.example.COM/path"},
+        ]
+    )
+    matcher = IOCMatcher(["crypt", "cryptography", "graph", "currency", "EVIL.example.com", "example", "absent"])
+
+    hits = matcher.search(records)
+
+    assert hits == [
+        {"content": "Cryptography and CRYPTOCURRENCY", "iocs_found": ["crypt", "cryptography", "currency", "graph"]},
+        {"url": "https://evil.example.COM/path", "iocs_found": ["evil.example.com", "example"]},
+    ]
+
+
+def test_matcher_does_not_modify_records():
+    record = {"ip": "10.0.0.1"}
+    hits = IOCMatcher(["10.0.0.1"]).search(SerializedRecords([record]))
+
+    assert hits == [{"ip": "10.0.0.1", "iocs_found": ["10.0.0.1"]}]
+    assert record == {"ip": "10.0.0.1"}
+
+
+def test_matcher_escapes_regex_characters():
+    records = SerializedRecords([{"path": "c:/temp/a+b(1).exe"}, {"path": "c:/temp/aab1.exe"}])
+
+    hits = IOCMatcher(["a+b(1).exe", "a.b"]).search(records)
+
+    assert [hit["iocs_found"] for hit in hits] == [["a+b(1).exe"]]
+
+
+def test_matches_do_not_span_records():
+    records = SerializedRecords([{"a": "foo"}, {"b": "bar"}])
+
+    assert IOCMatcher(['foo"}\x00{"b']).search(records) == []
+    assert IOCMatcher(["foo"]).search(records) == [{"a": "foo", "iocs_found": ["foo"]}]
+
+
+def test_matcher_without_iocs_matches_nothing():
+    records = SerializedRecords([{"a": "foo"}, "not a record"])
+
+    assert len(records) == 1
+    assert IOCMatcher([]).search(records) == []
+    assert IOCMatcher([""]).search(records) == []
+
+
+def test_serialized_records_size_counts_records_and_text():
+    records = SerializedRecords([{"content": "x" * 1000, "tags": ["a", "b"]}, {"content": "y" * 1000}])
+
+    assert records.nbytes > len(records.text) + 2000
@@ -20,6 +20,7 @@ from connectors.proofpoint.connector.tools import (
     GetSiemEventsInput,
     ProofpointConnectorTools,
     search_for_iocs_in_records,
+    serialized_records_cache,
 )
 from tests.proofpoint.test_data import (
     get_test_find_iocs_in_campaigns_data,
@@ -29,6 +30,13 @@ from tests.proofpoint.test_data import (
 )
 
 
+@pytest.fixture(autouse=True)
+def clear_serialized_records_cache():
+    serialized_records_cache.clear()
+    yield
+    serialized_records_cache.clear()
+
+
 def test_segment_interval_same_day():
     """Test the _segment_interval function."""
     interval = "2020-05-01T01:00:00Z/2020-05-01T02:00:00Z"
@@ -305,3 +313,25 @@ def test_search_for_iocs_in_records():
         ["this is not a dict and should return nothing", {"content": "racecar"}], ["ace"]
     )
     assert partial_results == [{"content": "racecar", "iocs_found": ["ace"]}]
+
+
+@pytest.mark.asyncio
+async def test_serialized_records_are_cached_per_principal():
+    def tools_for(principal: str) -> ProofpointConnectorTools:
+        config = ProofpointConnectorConfig(
+            id=ConnectorIdEnum.PROOFPOINT,
+            api_host="foo",
+            principal=principal,
+            token=StorableSecret.model_validate("foobar", context={"encryption_key": "mock"}),
+            request_timeout=0,
+            max_retries=1,
+        )
+        return ProofpointConnectorTools(config=config, target=ProofpointTarget(), secrets=MagicMock())
+
+    inputs = FindSiemEventsByIOCsInput(interval="2020-05-01T01:00:00Z/2020-05-01T01:30:00Z", iocs=["evil.com"])
+    for principal, url in (("first", "https://evil.com/a"), ("second", "https://good.com/b")):
+        tools = tools_for(principal)
+        tools.client.get_siem_events = AsyncMock(return_value={"clicksPermitted": [{"url": url}]})
+        results = await tools.find_siem_events_by_iocs_async(inputs)
+        assert len(results["results"].get("clicksPermitted", [])) == (1 if principal == "first" else 0)
+    assert len(serialized_records_cache) == 2
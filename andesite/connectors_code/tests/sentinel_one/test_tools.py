@@ -14,6 +14,7 @@ from connectors.sentinel_one.connector.tools import (
     SentinelOneConnectorException,
     SentinelOneConnectorTools,
     SentinelOneResource,
+    project_fields,
 )
 from tests.sentinel_one.util import read_json_file_for_resource, read_json_to_dict
 
@@ -25,6 +26,9 @@ TEST_API_SECRET = "secret"
 def sentinel_one_api():
     def mock_get(url, *args, **kwargs):
         json_response = read_json_file_for_resource(url)
+        if kwargs.get("params", {}).get("cursor") == "test":
+            # the page following the alerts fixture is empty
+            json_response = {"data": [], "pagination": {"nextCursor": None, "totalItems": 1}}
         mock = Mock(spec=httpx.Response)
         mock.json.return_value = json_response
         return mock
@@ -33,14 +37,40 @@ def sentinel_one_api():
         yield mock
 
 
-@pytest.fixture
-def tools():
-    config = SentinelOneConnectorConfig(
+def _tools(**config) -> SentinelOneConnectorTools:
+    connector_config = SentinelOneConnectorConfig(
         id=ConnectorIdEnum.SENTINEL_ONE,
         api_endpoint=TEST_API_ENDPOINT,
         token=StorableSecret.model_validate(TEST_API_SECRET, context={"encryption_key": "mock"}),
+        **config,
+    )
+    return SentinelOneConnectorTools(
+        config=connector_config, secrets=SentinelOneSecrets(token=SecretStr(TEST_API_SECRET))
     )
-    return SentinelOneConnectorTools(config=config, secrets=SentinelOneSecrets(token=SecretStr(TEST_API_SECRET)))
+
+
+@pytest.fixture
+def tools():
+    return _tools()
+
+
+@pytest.fixture
+def paged_threats_api():
+    """Serves 25 threats in pages of at most `limit` items linked by cursors."""
+    threats = [{"id": str(i), "threatInfo": {"threatName": f"threat {i}", "sha1": "a" * 40}} for i in range(25)]
+
+    def mock_get(url, *args, params, **kwargs):
+        start = int(params.get("cursor", 0))
+        end = min(start + params["limit"], len(threats))
+        mock = Mock(spec=httpx.Response)
+        mock.json.return_value = {
+            "data": threats[start:end],
+            "pagination": {"nextCursor": str(end) if end < len(threats) else None, "totalItems": len(threats)},
+        }
+        return mock
+
+    with patch.object(httpx.AsyncClient, "get", new=AsyncMock(side_effect=mock_get)) as mock:
+        yield mock
 
 
 @pytest.mark.parametrize("resource", [SentinelOneResource.THREAT, SentinelOneResource.ALERTS])
@@ -78,10 +108,10 @@ async def test_get_alerts_uses_params(tools, sentinel_one_api):
     )
     assert tool_result.result
     assert tool_result.additional_context is None
-    sentinel_one_api.assert_awaited_with(
+    sentinel_one_api.assert_any_await(
         TEST_API_ENDPOINT + SentinelOneResource.ALERTS.api_path,
         headers={"Authorization": f"ApiToken {TEST_API_SECRET}"},
-        params={"sourceProcessName__contains": "chown", "ruleName__contains": "some rule", "limit": 10},
+        params={"sourceProcessName__contains": "chown", "ruleName__contains": "some rule", "limit": 100},
     )
 
 
@@ -96,7 +126,7 @@ async def test_get_threats_uses_params(tools, sentinel_one_api):
     sentinel_one_api.assert_awaited_with(
         TEST_API_ENDPOINT + SentinelOneResource.THREAT.api_path,
         headers={"Authorization": f"ApiToken {TEST_API_SECRET}"},
-        params={"limit": 10, "mitigationStatuses": "marked_as_benign", "commandLineArguments__contains": "chown"},
+        params={"limit": 100, "mitigationStatuses": "marked_as_benign", "commandLineArguments__contains": "chown"},
     )
 
 
@@ -135,12 +165,12 @@ async def test_get_endpoints_no_args(tools, sentinel_one_api):
     assert json.loads(tool_result.result) == read_json_to_dict("endpoints_expected_output.json")
     assert (
         tool_result.additional_context
-        == "This tool can only return the first page of results and by default does not include application information."
+        == "By default this tool does not include application information."
     )
     sentinel_one_api.assert_awaited_with(
         TEST_API_ENDPOINT + SentinelOneResource.ENDPOINT.api_path,
         headers={"Authorization": f"ApiToken {TEST_API_SECRET}"},
-        params={"limit": 10},
+        params={"limit": 100},
     )
 
 
@@ -149,12 +179,12 @@ async def test_get_endpoints_no_args(tools, sentinel_one_api):
     [
         (
             0,
-            "This tool can only return the first page of results and by default does not include application information.",
+            "By default this tool does not include application information.",
             "endpoints_expected_output.json",
         ),
         (
             3,
-            "This tool can only return the first page of results and up to 3 applications per result.",
+            "This tool returns up to 3 applications per result.",
             "endpoints_expected_output_2.json",
         ),
     ],
@@ -169,7 +199,7 @@ async def test_get_endpoints_limits(tools, sentinel_one_api, limit, expected_con
     sentinel_one_api.assert_awaited_with(
         TEST_API_ENDPOINT + SentinelOneResource.ENDPOINT.api_path,
         headers={"Authorization": f"ApiToken {TEST_API_SECRET}"},
-        params={"limit": 10},
+        params={"limit": 100},
     )
 
 
@@ -180,7 +210,7 @@ async def test_get_threats(tools, sentinel_one_api):
     sentinel_one_api.assert_awaited_with(
         TEST_API_ENDPOINT + SentinelOneResource.THREAT.api_path,
         headers={"Authorization": f"ApiToken {TEST_API_SECRET}"},
-        params={"limit": 10},
+        params={"limit": 100},
     )
 
 
@@ -188,13 +218,70 @@ async def test_get_alerts(tools, sentinel_one_api):
     tool_result = await tools.get_alerts_async(SentinelOneConnectorTools.GetAlertsInput())
     assert tool_result
     assert json.loads(tool_result.result) == read_json_to_dict("alerts_expected_output.json")
+    assert tool_result.additional_context is None
     sentinel_one_api.assert_awaited_with(
         TEST_API_ENDPOINT + SentinelOneResource.ALERTS.api_path,
         headers={"Authorization": f"ApiToken {TEST_API_SECRET}"},
-        params={"limit": 10},
+        # the cursor of the first page is followed to the end
+        params={"limit": 100, "cursor": "test"},
     )
 
 
 def test_s1_target():
     target = SentinelOneTarget()
     assert target.get_dataset_paths() == []
+
+
+def test_project_fields():
+    item = {"id": "1", "agent": {"osName": "linux", "version": "2"}, "tags": ["a"]}
+    assert project_fields(item, ["id", "agent.osName", "missing", "tags.name"]) == {
+        "id": "1",
+        "agent": {"osName": "linux"},
+    }
+
+
+async def test_get_threats_follows_cursors(paged_threats_api):
+    tool_result = await _tools(page_size=10).get_threats_async(
+        SentinelOneConnectorTools.GetThreatsInput(fields=["threatInfo.threatName"])
+    )
+
+    result = json.loads(tool_result.result)
+    assert result["data"] == [{"threatInfo": {"threatName": f"threat {i}"}} for i in range(25)]
+    assert result["pagination"] == {"totalItems": 25}
+    assert tool_result.additional_context is None
+    assert [call.kwargs["params"].get("cursor") for call in paged_threats_api.await_args_list] == [None, "10", "20"]
+
+
+@pytest.mark.parametrize(
+    "config, expected_items, expected_calls",
+    [
+        ({"page_size": 10, "max_rows": 15}, 15, 2),
+        # each threat serializes to 105 bytes
+        ({"page_size": 10, "max_response_bytes": 550}, 5, 1),
+    ],
+)
+async def test_get_threats_stops_at_budget(paged_threats_api, config, expected_items, expected_calls):
+    tool_result = await _tools(**config).get_threats_async(SentinelOneConnectorTools.GetThreatsInput())
+
+    assert len(json.loads(tool_result.result)["data"]) == expected_items
+    assert tool_result.additional_context.startswith(f"Only {expected_items} of 25 items are shown.")
+    assert paged_threats_api.await_count == expected_calls
+
+
+async def test_get_agents_threats_and_alerts(tools, sentinel_one_api):
+    tool_result = await tools.get_agents_threats_and_alerts_async(
+        SentinelOneConnectorTools.GetAgentsThreatsAndAlertsInput(
+            threats=SentinelOneConnectorTools.GetThreatsInput(fields=["id"]),
+            alerts=SentinelOneConnectorTools.GetAlertsInput(),
+        )
+    )
+
+    result = json.loads(tool_result.result)
+    assert list(result) == ["threats", "alerts"]
+    assert result["alerts"] == read_json_to_dict("alerts_expected_output.json")
+    assert all(list(threat) == ["id"] for threat in result["threats"]["data"])
+    requested = [call.args[0] for call in sentinel_one_api.await_args_list]
+    assert TEST_API_ENDPOINT + SentinelOneResource.ENDPOINT.api_path not in requested
+
+    with pytest.raises(SentinelOneConnectorException):
+        await tools.get_agents_threats_and_alerts_async(SentinelOneConnectorTools.GetAgentsThreatsAndAlertsInput())
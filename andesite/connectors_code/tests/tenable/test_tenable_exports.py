@@ -0,0 +1,166 @@
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+from pydantic import SecretStr
+
+from connectors.rate_limit import RateLimitGovernor
+from connectors.tenable.connector.config import TenableConnectorConfig
+from connectors.tenable.connector.exports import TenableExport, TenableExporter, TenableExportStore, iter_json_array
+from connectors.tenable.connector.secrets import TenableSecrets
+from connectors.tenable.connector.target import TenableTarget
+from connectors.tenable.connector.tools import TenableConnectorTools
+
+VULNS = [
+    {
+        "asset": {"uuid": f"asset-{i}", "hostname": f"host-{i % 2}", "ipv4": "10.0.0.1"},
+        "plugin": {"id": 1000 + i, "name": "Plugin é", "cve": ["CVE-2024-0001", "CVE-2024-0002"]},
+        "severity": "critical" if i % 2 else "low",
+        "state": "OPEN",
+        "port": {"port": 443, "protocol": "TCP"},
+    }
+    for i in range(5)
+]
+
+
+class FakeTenable:
+    """Serves a vulns export whose chunks become available over two status polls."""
+
+    def __init__(self):
+        self.polls = 0
+        self.chunk_requests: list[str] = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if request.method == "POST" and path == "/vulns/export":
+            assert json.loads(request.content)["filters"] == {"severity": ["critical", "low"]}
+            return httpx.Response(200, json={"export_uuid": "export-1"})
+        if path == "/vulns/export/export-1/status":
+            self.polls += 1
+            if self.polls == 1:
+                return httpx.Response(200, json={"status": "PROCESSING", "chunks_available": [1]})
+            return httpx.Response(200, json={"status": "FINISHED", "chunks_available": [1, 2]})
+        if path.startswith("/vulns/export/export-1/chunks/"):
+            chunk_id = path.rsplit("/", 1)[1]
+            self.chunk_requests.append(chunk_id)
+            records = VULNS[:3] if chunk_id == "1" else VULNS[3:]
+            body = json.dumps(records, ensure_ascii=False).encode()
+            return httpx.Response(200, stream=httpx.ByteStream(body), headers={"content-type": "application/json"})
+        return httpx.Response(404)
+
+
+@pytest.fixture
+def fake_tenable():
+    fake = FakeTenable()
+    transport = httpx.MockTransport(fake.handler)
+    with (
+        patch(
+            "connectors.tenable.connector.exports.AsyncClient",
+            new=lambda **kwargs: httpx.AsyncClient(transport=transport, **kwargs),
+        ),
+        patch("connectors.tenable.connector.exports.asyncio.sleep", new=AsyncMock()),
+        patch.object(RateLimitGovernor, "instance", return_value=RateLimitGovernor()),
+    ):
+        yield fake
+
+
+@pytest.mark.asyncio
+async def test_iter_json_array_across_chunk_boundaries():
+    body = json.dumps(VULNS, ensure_ascii=False).encode()
+
+    async def pieces():
+        for i in range(0, len(body), 7):
+            yield body[i : i + 7]
+
+    assert [record async for record in iter_json_array(pieces())] == VULNS
+
+    async def empty():
+        yield b" [ ] "
+
+    assert [record async for record in iter_json_array(empty())] == []
+
+
+@pytest.mark.asyncio
+async def test_export_downloads_all_chunks_into_store(tmp_path, fake_tenable):
+    store = TenableExportStore(str(tmp_path / "tenable.sqlite3"))
+    exporter = TenableExporter("https://cloud.tenable.com", {}, store, max_concurrent_chunks=2)
+
+    export = await exporter.run_export("vulns", {"severity": ["critical", "low"]})
+
+    assert export.record_count == 5
+    assert sorted(fake_tenable.chunk_requests) == ["1", "2"]
+    headers, rows, truncated = store.query(
+        "SELECT asset_hostname, COUNT(*) FROM vulns WHERE severity = 'critical' GROUP BY asset_hostname", 10
+    )
+    assert headers == ["asset_hostname", "COUNT(*)"]
+    assert rows == [["host-1", 2]]
+    assert not truncated
+    _, rows, _ = store.query("SELECT plugin_cve, plugin_name, port FROM vulns LIMIT 1", 10)
+    assert rows == [["CVE-2024-0001,CVE-2024-0002", "Plugin é", 443]]
+    assert store.latest_export("vulns") == export
+
+
+@pytest.mark.asyncio
+async def test_tools_reuse_cached_export(tmp_path, fake_tenable):
+    config = MagicMock(spec=TenableConnectorConfig)
+    config.export_cache_dir = str(tmp_path)
+    config.export_max_age_hours = 24
+    config.export_max_concurrent_chunks = 2
+    tools = TenableConnectorTools(
+        tenable_config=config,
+        target=MagicMock(spec=TenableTarget),
+        secrets=TenableSecrets(access_key=SecretStr("mock_access_key"), secret_key=SecretStr("mock_secret_key")),
+    )
+    export_input = TenableConnectorTools.ExportTenableDataInput(
+        kind="vulns", filters={"severity": ["critical", "low"]}
+    )
+
+    first = await tools.export_tenable_data_async(export_input)
+    second = await tools.export_tenable_data_async(export_input)
+
+    assert first == second
+    assert first.result.results[0][4] == "5"
+    assert fake_tenable.polls == 2
+
+    result = await tools.query_tenable_export_async(
+        TenableConnectorTools.QueryTenableExportInput(query="SELECT asset_uuid FROM vulns ORDER BY 1", limit=2)
+    )
+    assert result.result.results == [["asset-0"], ["asset-1"]]
+    assert result.additional_context is not None
+
+    with pytest.raises(Exception, match="Only SELECT queries"):
+        await tools.query_tenable_export_async(
+            TenableConnectorTools.QueryTenableExportInput(query="DELETE FROM vulns_records")
+        )
+    with pytest.raises(Exception, match="Query Error"):
+        await tools.query_tenable_export_async(
+            TenableConnectorTools.QueryTenableExportInput(query="SELECT 1; DELETE FROM vulns_records")
+        )
+
+
+def test_complete_export_keeps_records_of_exports_in_progress(tmp_path):
+    store = TenableExportStore(str(tmp_path / "tenable.sqlite3"))
+    store.insert_records("vulns", "old", VULNS[:1])
+    store.complete_export(TenableExport(kind="vulns", export_uuid="old", filters={}, completed_at=1, record_count=1))
+    store.insert_records("vulns", "running", VULNS[1:3])
+    store.insert_records("vulns", "new", VULNS[3:])
+
+    store.complete_export(TenableExport(kind="vulns", export_uuid="new", filters={}, completed_at=2, record_count=2))
+
+    _, rows, _ = store.query("SELECT export_uuid, COUNT(*) FROM vulns_records GROUP BY 1 ORDER BY 1", 10)
+    assert rows == [["new", 2], ["running", 2]]
+
+
+@pytest.mark.asyncio
+async def test_chunk_download_gives_up_when_rate_limited(fake_tenable):
+    transport = httpx.MockTransport(lambda request: httpx.Response(429))
+    exporter = TenableExporter("https://cloud.tenable.com", {}, MagicMock(spec=TenableExportStore), 1)
+
+    with patch.object(RateLimitGovernor, "back_off", new=AsyncMock()):
+        async with httpx.AsyncClient(transport=transport) as client:
+            with pytest.raises(httpx.HTTPStatusError):
+                await exporter._download_chunk(
+                    client, "vulns", "export-1", 1, asyncio.Semaphore(1), asyncio.Lock(), max_attempts=2
+                )
@@ -0,0 +1,128 @@
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+from common.models.connector_id_enum import ConnectorIdEnum
+from redis.exceptions import ConnectionError
+
+from connectors.rate_limit import (
+    RateLimit,
+    RateLimitExceededError,
+    RateLimitGovernor,
+    RateLimits,
+    parse_reset,
+    parse_retry_after,
+    send_with_rate_limit,
+)
+
+LIMITS = RateLimits(
+    connector=ConnectorIdEnum.GITHUB,
+    endpoints={
+        "*": RateLimit(requests_per_second=10, burst=2),
+        "ids": RateLimit(daily_quota=2),
+    },
+)
+
+
+@pytest.fixture
+def sleep():
+    with patch("connectors.rate_limit.asyncio.sleep", new=AsyncMock()) as sleep:
+        yield sleep
+
+
+def test_parse_rate_limit_headers():
+    now = 1_750_000_000.0
+    assert parse_retry_after("3", now) == 3.0
+    assert parse_retry_after("Wed, 15 Jun 2025 15:06:50 GMT", now) == pytest.approx(1_750_000_010.0 - now)
+    assert parse_retry_after("soon", now) is None
+    assert parse_reset(str(now + 30), now) == 30.0
+    assert parse_reset("45", now) == 45.0
+    assert parse_reset("2025-06-15T15:07:20Z", now) == pytest.approx(40.0)
+    assert parse_reset(None, now) is None
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_waits_once_burst_is_spent(sleep):
+    governor = RateLimitGovernor()
+
+    for _ in range(3):
+        await governor.acquire(LIMITS, "search")
+
+    # two requests fit in the burst, the third waits for a token at 10 per second
+    assert len(sleep.await_args_list) == 1
+    assert sleep.await_args.args[0] == pytest.approx(0.1, abs=0.01)
+    # undeclared endpoints share the default budget
+    assert governor.remaining(ConnectorIdEnum.GITHUB, "*") == {"tokens": 0.0}
+
+
+@pytest.mark.asyncio
+async def test_daily_quota_is_enforced(sleep):
+    governor = RateLimitGovernor()
+
+    await governor.acquire(LIMITS, "ids")
+    await governor.acquire(LIMITS, "ids")
+    with pytest.raises(RateLimitExceededError) as exc_info:
+        await governor.acquire(LIMITS, "ids")
+
+    assert 0 < exc_info.value.retry_after <= 86400
+    assert governor.remaining(ConnectorIdEnum.GITHUB, "ids") == {"daily_quota": 0}
+    sleep.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_response_pauses_endpoint():
+    governor = RateLimitGovernor()
+
+    rate_limited = await governor.observe_response(LIMITS, "ids", 429, {"Retry-After": "0.05"})
+    assert rate_limited
+
+    start = time.monotonic()
+    await governor.acquire(LIMITS, "ids")
+    assert time.monotonic() - start >= 0.04
+
+    # an exhausted budget with a distant reset fails fast instead of waiting
+    assert not await governor.observe_response(
+        LIMITS, "search", 200, {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(time.time() + 600)}
+    )
+    with pytest.raises(RateLimitExceededError):
+        await governor.acquire(LIMITS, "search")
+    assert governor.remaining(ConnectorIdEnum.GITHUB, "*")["reported"] == 0
+
+
+@pytest.mark.asyncio
+async def test_falls_back_to_local_state_when_redis_fails(sleep):
+    redis = MagicMock()
+    redis.register_script.return_value = AsyncMock(side_effect=ConnectionError("down"))
+    governor = RateLimitGovernor()
+    governor.initialize(redis)
+
+    await governor.acquire(LIMITS, "ids")
+    await governor.acquire(LIMITS, "ids")
+    with pytest.raises(RateLimitExceededError):
+        await governor.acquire(LIMITS, "ids")
+
+
+@pytest.mark.asyncio
+async def test_send_with_rate_limit_retries_rate_limited_responses():
+    governor = RateLimitGovernor()
+    responses = [
+        httpx.Response(429, headers={"Retry-After": "2"}),
+        httpx.Response(200, json={"ok": True}),
+    ]
+    send = AsyncMock(side_effect=responses)
+    clock = [100.0]
+
+    async def advance(seconds: float):
+        clock[0] += seconds
+
+    with (
+        patch.object(RateLimitGovernor, "instance", return_value=governor),
+        patch("connectors.rate_limit.time.time", new=lambda: clock[0]),
+        patch("connectors.rate_limit.asyncio.sleep", side_effect=advance) as sleep,
+    ):
+        response = await send_with_rate_limit(LIMITS, "ids", send)
+
+    assert response.status_code == 200
+    assert send.await_count == 2
+    assert [call.args[0] for call in sleep.await_args_list] == [2.0]